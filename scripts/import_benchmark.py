@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Import time benchmark for the immigration-agent project.
+
+Every module is imported in a fresh Python process, so that modules loaded by an
+earlier import do not hide the cost of a later one. The script prints the median
+import time of each module and the heavy packages that the import loaded.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+# Modules timed by default: the package entry points
+DEFAULT_MODULES = ["src.llm", "src.llm.llm_factory", "src.main", "src.api.api_server"]
+
+# Packages that take seconds to import and should only load on first use
+HEAVY_PACKAGES = ["crewai", "langchain_anthropic", "langchain_openai", "langchain_community"]
+
+# Python code run in the child process; it prints the import time and the loaded heavy packages
+CHILD_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def time_import(module: str, project_root: Path) -> tuple[float, list[str]]:
+    """Import a module in a fresh process.
+
+    Args:
+        module: The dotted module name
+        project_root: Directory the child process runs in
+
+    Returns:
+        The import time in seconds and the heavy packages that were loaded
+
+    Raises:
+        subprocess.CalledProcessError: If the import fails
+    """
+    code = CHILD_CODE.format(module=module, heavy=HEAVY_PACKAGES)
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, check=True, capture_output=True, text=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report["seconds"], report["loaded"]
+
+
+def main() -> int:
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Measure the import time of the project modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module; the median is reported")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if a median import time is higher")
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    success = True
+
+    print(f"{'Module':<24} {'Median (s)':>10}  Heavy packages loaded")
+    for module in args.modules:
+        try:
+            runs = [time_import(module, project_root) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"Error importing {module}:")
+            print(e.stderr)
+            success = False
+            continue
+
+        median = statistics.median(seconds for seconds, _ in runs)
+        loaded = ", ".join(runs[-1][1]) or "-"
+        print(f"{module:<24} {median:>10.2f}  {loaded}")
+        if args.max_seconds is not None and median > args.max_seconds:
+            success = False
+
+    if success:
+        print("\n✅ All imports are within limits")
+        return 0
+    else:
+        print("\n❌ Some imports failed or are too slow")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Ollama client benchmark for the immigration-agent project.
+
+Sends the same requests through `OllamaLLM` with the LangChain backend
+(`ChatOllama`) and with the native pooled client, and prints the median and 95th
+percentile time per request of each backend. By default the requests go to a
+local stand-in server that answers at once, so the times show the overhead of the
+client and not the speed of a model; `--base-url` benchmarks a real Ollama server.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.llm.config import config_manager  # noqa: E402
+from src.llm.event_loop import run_coroutine  # noqa: E402
+from src.llm.ollama_llm import BACKENDS, OllamaLLM  # noqa: E402
+
+
+# Lines of a streamed answer of the stand-in server
+STREAM_LINES = 50
+
+# Maximum time in seconds for one async request
+ASYNC_TIMEOUT = 60
+
+
+class OllamaStandIn(BaseHTTPRequestHandler):
+    """Answers POST /api/chat like Ollama, at once and over keep-alive connections."""
+
+    protocol_version = "HTTP/1.1"
+    # Ollama's Go server sends small writes at once too
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not body.get("stream", True):
+            data = json.dumps(self._line("word " * STREAM_LINES, done=True)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index in range(STREAM_LINES + 1):
+            line = self._line("" if index == STREAM_LINES else "word ", done=index == STREAM_LINES)
+            data = (json.dumps(line) + "\n").encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def _line(content: str, done: bool = False) -> dict:
+        line = {"model": "llama3", "created_at": "2026-01-01T00:00:00Z", "message": {"role": "assistant", "content": content}}
+        line["done"] = done
+        if done:
+            line.update(done_reason="stop", prompt_eval_count=20, eval_count=STREAM_LINES)
+        return line
+
+    def log_message(self, format, *args):
+        pass
+
+
+def time_requests(send: Callable[[int], object], requests: int) -> list[float]:
+    """Send requests one after the other and time each of them.
+
+    Args:
+        send: Function that sends the request with the given number
+        requests: Number of requests
+
+    Returns:
+        The time of every request in seconds
+    """
+    times = []
+    for index in range(requests):
+        start = time.perf_counter()
+        send(index)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def benchmark(backend: str, base_url: str, model: str, requests: int) -> dict[str, list[float]]:
+    """Time plain, streamed, and async requests through one backend.
+
+    Every request has its own prompt, so the response cache and request
+    coalescing do not answer it.
+
+    Args:
+        backend: "langchain" or "native"
+        base_url: The base URL of the Ollama API
+        model: The model name
+        requests: Requests per mode
+
+    Returns:
+        The request times in seconds per mode
+    """
+    llm = OllamaLLM(model_name=model, base_url=base_url, backend=backend)
+    # Opens the connections and loads the model before the timing starts
+    llm.invoke(f"{backend} warm-up")
+    return {
+        "invoke": time_requests(lambda index: llm.invoke(f"{backend} invoke {index}"), requests),
+        "stream": time_requests(lambda index: list(llm.stream(f"{backend} stream {index}")), requests),
+        "acall": time_requests(lambda index: run_coroutine(llm.acall(f"{backend} acall {index}"), ASYNC_TIMEOUT), requests),
+    }
+
+
+def percentile(times: list[float], fraction: float) -> float:
+    """Get a percentile of the request times.
+
+    Args:
+        times: Request times in seconds
+        fraction: The percentile as a fraction, for example 0.95
+
+    Returns:
+        The time below which the given fraction of the requests finished
+    """
+    ordered = sorted(times)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main() -> int:
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Compare the LangChain and native Ollama clients.")
+    parser.add_argument("--base-url", default=None, help="Ollama server to benchmark; a local stand-in server by default")
+    parser.add_argument("--model", default="llama3", help="Model of the requests")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per backend and mode")
+    args = parser.parse_args()
+
+    config = config_manager.get_config()
+    config.cache_responses = False
+    config.ollama.warmup = False
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStandIn)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        results = {backend: benchmark(backend, base_url, args.model, args.requests) for backend in BACKENDS}
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    print(f"{'Backend':<10} {'Mode':<7} {'Median (ms)':>11} {'p95 (ms)':>9}")
+    for backend, modes in results.items():
+        for mode, times in modes.items():
+            print(f"{backend:<10} {mode:<7} {statistics.median(times) * 1000:>11.2f} {percentile(times, 0.95) * 1000:>9.2f}")
+
+    print()
+    for mode in results[BACKENDS[0]]:
+        langchain, native = (statistics.median(results[backend][mode]) for backend in BACKENDS)
+        print(f"{mode:<7} native is {langchain / native:.1f}x faster than LangChain")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
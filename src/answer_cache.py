@@ -0,0 +1,373 @@
+"""Final-answer cache keyed on the structured intake summary.
+
+Many users ask the same question in different words, for example "Nigerian in
+Rwanda wants a Canadian study permit". The exact prompts differ, so the LLM response
+cache misses, but the facts that the IntakeTask extracts are the same. This module
+parses those facts from the intake summary, normalizes them, and uses them as the
+key of a final-answer cache.
+
+On a hit, the Research and Response stages are skipped. The cached answer is
+personalized without an LLM call: the name of the user who caused the answer to be
+stored is replaced by a placeholder, and the placeholder is replaced by the name of
+the current user. Only the full name, and the given name where it addresses the
+user ("Hi Will,", "Good luck, Will!"), are replaced, because names are often common
+words. Answers that quote the user's additional details are not stored at all.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field, fields
+
+from src.fast_intake import canonical_country
+from src.llm.response_cache import CacheStats, ResponseCache
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Defaults used when the environment variables are not set
+DEFAULT_ANSWER_CACHE_DIR = ".cache/answers"
+DEFAULT_ANSWER_CACHE_TTL_SECONDS = 86400
+DEFAULT_ANSWER_CACHE_MAX_ENTRIES = 1000
+
+# Placeholder stored in cached answers in place of the user's name
+NAME_PLACEHOLDER = "[[name]]"
+
+# Word used in place of the name when the current user's name is unknown
+ANONYMOUS_NAME = "there"
+
+# Values that the IntakeAgent writes for missing information
+EMPTY_VALUES = {"", "not provided", "not specified", "not mentioned", "none", "n/a", "na", "unknown"}
+
+# Intake summary labels, normalized, mapped to IntakeProfile fields
+FIELD_ALIASES = {
+    "name": "name",
+    "nationality": "nationality",
+    "country of origin": "nationality",
+    "nationality / country of origin": "nationality",
+    "current location": "current_location",
+    "location": "current_location",
+    "destination": "destination_country",
+    "destination country": "destination_country",
+    "visa type": "current_visa_type",
+    "current visa type": "current_visa_type",
+    "current visa": "current_visa_type",
+    "status": "immigration_status",
+    "immigration status": "immigration_status",
+    "current immigration status": "immigration_status",
+    "desired outcome": "desired_outcome",
+    "goal": "desired_outcome",
+    "additional details": "additional_details",
+    "details": "additional_details",
+}
+
+# Fields that identify a case; the name and the additional details are left out
+KEY_FIELDS = (
+    "nationality",
+    "current_location",
+    "destination_country",
+    "current_visa_type",
+    "immigration_status",
+    "desired_outcome",
+)
+
+# Fields that hold a country, compared by country name ("Nigerian" and "Nigeria" are equal)
+COUNTRY_FIELDS = ("nationality", "current_location", "destination_country")
+
+# Fields without which an answer is too generic to be shared between users
+REQUIRED_FIELDS = ("destination_country", "desired_outcome")
+
+# Words in a row of the additional details that make an answer a quote of them
+QUOTE_MIN_WORDS = 6
+
+# Words before a name that address the user, for example "Hi Will" or "Good luck, Will"
+SALUTATIONS = ("hi", "hello", "hey", "dear", "welcome", "thanks", "thank you", "good luck", "congratulations")
+
+_LINE_PATTERN = re.compile(r"^[\s\-*•\d.)]*([A-Za-z][A-Za-z _/]*?)\s*[:\-–]\s*(.+)$")
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_value(value: str) -> str:
+    """Normalize an intake value for comparison.
+
+    Args:
+        value: The raw value written by the IntakeAgent
+
+    Returns:
+        The value in lower case without punctuation, or an empty string when the
+        value means "missing"
+    """
+    if value.strip(" .").lower() in EMPTY_VALUES:
+        return ""
+    value = _WHITESPACE.sub(" ", _NON_WORD.sub(" ", value.lower())).strip()
+    return "" if value in EMPTY_VALUES else value
+
+
+@dataclass(frozen=True)
+class IntakeProfile:
+    """The normalized facts of an immigration case.
+
+    Attributes:
+        name: The user's name (not part of the cache key)
+        nationality: Nationality or country of origin
+        current_location: Country where the user lives now
+        destination_country: Country the user wants to go to
+        current_visa_type: The user's current visa, if any
+        immigration_status: Current status, for example valid or expired
+        desired_outcome: What the user wants, for example a study permit
+        additional_details: Other details of the user (not part of the cache key)
+    """
+
+    name: str = ""
+    nationality: str = ""
+    current_location: str = ""
+    destination_country: str = ""
+    current_visa_type: str = ""
+    immigration_status: str = ""
+    desired_outcome: str = ""
+    additional_details: str = field(default="", compare=False)
+
+    @property
+    def cacheable(self) -> bool:
+        """Check whether the profile is specific enough to share an answer.
+
+        Returns:
+            True if all required fields are known
+        """
+        return all(getattr(self, name) for name in REQUIRED_FIELDS)
+
+    def cache_key(self) -> str:
+        """Build the answer cache key from the fields that identify the case.
+
+        Returns:
+            A hex digest that identifies the case
+        """
+        return hashlib.sha256(json.dumps([getattr(self, name) for name in KEY_FIELDS]).encode("utf-8")).hexdigest()
+
+
+def parse_intake_summary(summary: str) -> IntakeProfile:
+    """Parse the structured summary written by the IntakeAgent.
+
+    Lines such as `destination_country: Canada` or `3. Destination country - Canada`
+    are recognized. Unknown labels are ignored.
+
+    Args:
+        summary: The raw output of the IntakeTask
+
+    Returns:
+        The normalized IntakeProfile. Fields that are missing are empty.
+    """
+    values: dict[str, str] = {}
+    for line in summary.splitlines():
+        match = _LINE_PATTERN.match(line.strip())
+        if not match:
+            continue
+        label = _WHITESPACE.sub(" ", match.group(1).replace("_", " ")).strip().lower()
+        field_name = FIELD_ALIASES.get(label)
+        if field_name and field_name not in values:
+            values[field_name] = match.group(2).strip()
+
+    profile = {item.name: normalize_value(values.get(item.name, "")) for item in fields(IntakeProfile)}
+    # Advice depends on the country, not the city: "Kigali, Rwanda" and "Rwanda" are the same case
+    location = values.get("current_location", "").rsplit(",", 1)[-1]
+    profile["current_location"] = normalize_value(location)
+    for name in COUNTRY_FIELDS:
+        profile[name] = canonical_country(profile[name]) or profile[name]
+    profile["name"] = values.get("name", "") if profile["name"] else ""
+    return IntakeProfile(**profile)
+
+
+def _address_patterns(given_name: str) -> list[re.Pattern[str]]:
+    """Build the patterns of a given name in a position that addresses the user.
+
+    The name group is preceded by a salutation ("Hi Will"), starts a sentence and is
+    followed by a comma ("Will, you can apply"), or ends a sentence after a comma
+    ("Good luck, Will!").
+    """
+    name = re.escape(given_name)
+    salutations = "|".join(re.escape(word).replace(r"\ ", r"\s+") for word in SALUTATIONS)
+    return [
+        re.compile(rf"(?i:\b(?:{salutations}))\b,?\s+({name})\b"),
+        re.compile(rf"(?:^|[.!?]\s+)({name}),", re.MULTILINE),
+        re.compile(rf",\s*({name})(?=\s*(?:[.!?]|$))", re.MULTILINE),
+    ]
+
+
+def _replace_name_group(match: re.Match[str]) -> str:
+    """Replace the name group of an address pattern match with the placeholder."""
+    start, end = match.start(1) - match.start(), match.end(1) - match.start()
+    return match.group(0)[:start] + NAME_PLACEHOLDER + match.group(0)[end:]
+
+
+def depersonalize(answer: str, name: str | None) -> str:
+    """Replace the user's name in an answer with the placeholder.
+
+    The full name is replaced wherever it appears. The given name alone is replaced
+    only where it addresses the user, so that a name such as "Will Grant" does not
+    replace the words "will" or "grant" in the advice.
+
+    Args:
+        answer: The final answer
+        name: The name of the user the answer was written for
+
+    Returns:
+        The answer with the name replaced by NAME_PLACEHOLDER
+    """
+    if not name or not normalize_value(name):
+        return answer
+    parts = name.split()
+    full_name = r"\s+".join(re.escape(part) for part in parts)
+    answer = re.sub(rf"\b{full_name}\b", NAME_PLACEHOLDER, answer)
+    for pattern in _address_patterns(parts[0]):
+        answer = pattern.sub(_replace_name_group, answer)
+    return answer
+
+
+def quotes_details(answer: str, details: str) -> bool:
+    """Check whether an answer quotes the user's additional details.
+
+    Args:
+        answer: The final answer
+        details: The normalized additional details of the intake summary
+
+    Returns:
+        True if QUOTE_MIN_WORDS or more words of the details appear in a row in the answer
+    """
+    words = details.split()
+    text = f" {normalize_value(answer)} "
+    return any(f" {' '.join(words[start : start + QUOTE_MIN_WORDS])} " in text for start in range(len(words) - QUOTE_MIN_WORDS + 1))
+
+
+def personalize(answer: str, name: str | None) -> str:
+    """Fill the placeholder of a cached answer with the current user's name.
+
+    Args:
+        answer: The cached answer
+        name: The name of the current user
+
+    Returns:
+        The answer addressed to the current user
+    """
+    if not name or not normalize_value(name):
+        name = ANONYMOUS_NAME
+    return answer.replace(NAME_PLACEHOLDER, name.strip())
+
+
+class AnswerCache:
+    """Final-answer cache for immigration cases.
+
+    Attributes:
+        store: The on-disk cache that holds the answers
+
+    Example:
+        ```python
+        cache = AnswerCache(ResponseCache(".cache/answers", ttl_seconds=86400, max_entries=1000))
+        profile = parse_intake_summary(intake_output.raw)
+        answer = cache.lookup(profile, "Emmanuel")
+        ```
+    """
+
+    def __init__(self, store: ResponseCache) -> None:
+        """Initialize the answer cache.
+
+        Args:
+            store: The on-disk cache that holds the answers
+        """
+        self.store = store
+
+    def lookup(self, profile: IntakeProfile, name: str | None = None) -> str | None:
+        """Look up the answer for a case.
+
+        Args:
+            profile: The normalized facts of the case
+            name: The current user's name, used to personalize the answer
+
+        Returns:
+            The personalized answer, or None on a miss or when the profile is not
+            specific enough
+        """
+        if not profile.cacheable:
+            return None
+        answer = self.store.get(profile.cache_key())
+        if answer is None:
+            return None
+        logger.info("Answer cache hit, skipping research and response")
+        return personalize(answer, name)
+
+    def save(self, profile: IntakeProfile, answer: str, name: str | None = None) -> None:
+        """Store the answer for a case.
+
+        An answer that quotes the user's additional details is personal and is not
+        stored.
+
+        Args:
+            profile: The normalized facts of the case
+            answer: The final answer
+            name: The name of the user the answer was written for
+        """
+        if not profile.cacheable or not answer:
+            return
+        if quotes_details(answer, profile.additional_details):
+            logger.info("Answer quotes the user's details, not storing it in the answer cache")
+            return
+        self.store.set(profile.cache_key(), depersonalize(answer, name))
+
+    def stats(self) -> CacheStats:
+        """Return the hit, miss, and eviction counters.
+
+        Returns:
+            A CacheStats object
+        """
+        return self.store.stats()
+
+
+class AnswerCacheFactory:
+    """Factory for the process-wide answer cache."""
+
+    _cache: AnswerCache | None = None
+    _settings: tuple[str, float, int] | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls) -> AnswerCache | None:
+        """Get the answer cache configured by the environment.
+
+        The cache is turned off with ANSWER_CACHE_ENABLED=false, and rebuilt when
+        the ANSWER_CACHE_DIR, ANSWER_CACHE_TTL_SECONDS, or ANSWER_CACHE_MAX_ENTRIES
+        settings change.
+
+        Returns:
+            The shared AnswerCache, or None if the answer cache is disabled
+        """
+        if os.getenv("ANSWER_CACHE_ENABLED", "true").lower() != "true":
+            return None
+
+        settings = (
+            os.getenv("ANSWER_CACHE_DIR", DEFAULT_ANSWER_CACHE_DIR),
+            float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(DEFAULT_ANSWER_CACHE_TTL_SECONDS))),
+            int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", str(DEFAULT_ANSWER_CACHE_MAX_ENTRIES))),
+        )
+        with cls._lock:
+            if cls._cache is None or cls._settings != settings:
+                try:
+                    cls._cache = AnswerCache(ResponseCache(*settings))
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"Answer cache disabled, cannot open {settings[0]}: {e}")
+                    return None
+                cls._settings = settings
+            return cls._cache
+
+
+def get_answer_cache() -> AnswerCache | None:
+    """Get the answer cache, or None if it is disabled.
+
+    Returns:
+        The shared AnswerCache instance, or None
+    """
+    return AnswerCacheFactory.get_cache()
@@ -2,18 +2,91 @@
 
 This module creates a FastAPI application that exposes an endpoint for
 processing immigration queries. It serves as the API gateway for the system.
+Crew runs are blocking, so they are executed in a bounded worker pool
+(`CrewExecutor`) and never on the event loop itself.
 """
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Any
 
-from src.main import process_immigration_query
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.api.crew_executor import CrewExecutor, CrewExecutorFullError
+from src.api.job_store import get_job_runner
+from src.llm.circuit_breaker import get_health_prober
+from src.llm.concurrency_limiter import ConcurrencyLimiterFactory
+from src.llm.config import config_manager
+from src.llm.ollama_warmup import ResidencySnapshot, get_ollama_warmer, start_ollama_warmup
+from src.llm.router import RouterStats, get_llm_router
+from src.main import get_crew_template_pool, process_immigration_query
+from src.streaming import StreamEvent
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# HTTP status codes
+HTTP_ACCEPTED = 202
+HTTP_NOT_FOUND = 404
+HTTP_SERVICE_UNAVAILABLE = 503  # Returned when the crew executor queue is full
+
+# Default number of batch items that run at the same time
+DEFAULT_BATCH_PARALLELISM = int(os.getenv("BATCH_MAX_PARALLELISM", "4"))
+
+# Upper bounds of a batch request
+MAX_BATCH_ITEMS = 100
+MAX_BATCH_PARALLELISM = 32
+
+# Longest time a batch item waits for room in a full crew executor before it fails
+MAX_BATCH_ITEM_WAIT_SECONDS = 60.0
+BATCH_FULL_RETRY_INTERVAL = 0.1  # seconds
+
+# Longest time a job status request may wait for the job to finish
+MAX_JOB_WAIT_SECONDS = 60.0
+JOB_WAIT_POLL_INTERVAL = 0.25  # seconds
+
+# Shared worker pool for all crew runs of this process
+crew_executor = CrewExecutor()
+
+
+def _run_job_query(query: str) -> object:
+    """Run the crew for a stored job (looked up at call time so it can be patched)."""
+    return process_immigration_query(query)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start the health prober and the Ollama warm-up, warm the crew templates, and open the job store and start its workers; stop them at shutdown."""
+    prober = await asyncio.to_thread(get_health_prober)
+    warmer = start_ollama_warmup()
+    try:
+        await asyncio.to_thread(get_crew_template_pool().warm)
+    except Exception as e:
+        logger.warning(f"Could not warm crew templates at startup, they will be built on first use: {e}")
+    job_runner = await asyncio.to_thread(get_job_runner, _run_job_query)
+    job_runner.start()
+    yield
+    job_runner.stop(timeout=1.0)
+    crew_executor.shutdown(wait=False)
+    prober.stop()
+    if warmer is not None:
+        warmer.stop()
 
 
 app = FastAPI(
     title="Immigration AI Agent API",
     description="An API for processing immigration queries with a multi-agent system.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 
@@ -23,6 +96,22 @@ class ImmigrationQueryRequest(BaseModel):
     text: str
 
 
+class BatchImmigrationQueryRequest(BaseModel):
+    """Request model for a batch of immigration queries."""
+
+    items: list[ImmigrationQueryRequest] = Field(max_length=MAX_BATCH_ITEMS)
+    max_parallelism: int | None = Field(default=None, ge=1, le=MAX_BATCH_PARALLELISM)
+
+
+class BatchItemResult(BaseModel):
+    """Result of one item of a batch request."""
+
+    index: int
+    status: str
+    result: Any = None
+    error: str | None = None
+
+
 @app.post("/immigration-advice/", summary="Process an immigration query")
 async def immigration_advice_endpoint(request: ImmigrationQueryRequest) -> dict:
     """Processes an immigration query and returns structured guidance.
@@ -78,5 +167,370 @@ async def immigration_advice_endpoint(request: ImmigrationQueryRequest) -> dict:
             ]
         }
         ```
+
+    Raises:
+        HTTPException: 503 if too many crew runs are already queued
+    """
+    try:
+        return await crew_executor.run(process_immigration_query, request.text)
+    except CrewExecutorFullError as e:
+        raise HTTPException(status_code=HTTP_SERVICE_UNAVAILABLE, detail=str(e)) from e
+
+
+async def _run_batch_item(index: int, item: ImmigrationQueryRequest, slots: asyncio.Semaphore) -> BatchItemResult:
+    """Run one batch item and turn any failure into an error result.
+
+    When the crew executor is full, the item waits for room for up to
+    MAX_BATCH_ITEM_WAIT_SECONDS instead of failing at once.
+
+    Args:
+        index: Position of the item in the batch
+        item: The immigration query of the item
+        slots: Semaphore that limits how many items run at the same time
+
+    Returns:
+        The result of the item
+    """
+    async with slots:
+        deadline = time.monotonic() + MAX_BATCH_ITEM_WAIT_SECONDS
+        try:
+            while True:
+                try:
+                    result = await crew_executor.run(process_immigration_query, item.text)
+                    break
+                except CrewExecutorFullError:
+                    if time.monotonic() >= deadline:
+                        raise
+                    await asyncio.sleep(BATCH_FULL_RETRY_INTERVAL)
+        except Exception as e:
+            logger.warning(f"Batch item {index} failed: {e}")
+            return BatchItemResult(index=index, status="error", error=str(e))
+    return BatchItemResult(index=index, status="ok", result=result)
+
+
+@app.post("/immigration-advice/batch", summary="Process a batch of immigration queries")
+async def immigration_advice_batch_endpoint(request: BatchImmigrationQueryRequest) -> dict:
+    """Processes many immigration queries concurrently.
+
+    The items run through the crew executor, at most `max_parallelism` at a time
+    (default: the BATCH_MAX_PARALLELISM environment variable, or 4; never more than
+    the executor's workers plus its queue). A batch holds at most MAX_BATCH_ITEMS
+    items and `max_parallelism` is at most MAX_BATCH_PARALLELISM. The results
+    are returned in the same order as the items. A failing item is reported in its
+    own result and does not fail the whole batch.
+
+    Args:
+        request: A request object with the list of queries and an optional parallelism limit.
+
+    Returns:
+        A dictionary with one result per item and the number of succeeded and failed items.
+
+    Example:
+        Request Body:
+        ```json
+        {
+            "items": [
+                {"text": "I am on an expired F-1 visa and want a work permit."},
+                {"text": "Nigerian in Rwanda wants a Canadian study permit."}
+            ],
+            "max_parallelism": 2
+        }
+        ```
+
+        Response Body:
+        ```json
+        {
+            "results": [
+                {"index": 0, "status": "ok", "result": "...", "error": null},
+                {"index": 1, "status": "error", "result": null, "error": "Crew executor queue is full"}
+            ],
+            "succeeded": 1,
+            "failed": 1
+        }
+        ```
+    """
+    parallelism = min(request.max_parallelism or DEFAULT_BATCH_PARALLELISM, crew_executor.max_workers + crew_executor.max_queue)
+    slots = asyncio.Semaphore(parallelism)
+    results = await asyncio.gather(*(_run_batch_item(index, item, slots) for index, item in enumerate(request.items)))
+    failed = sum(1 for result in results if result.status == "error")
+    return {
+        "results": [result.model_dump() for result in results],
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }
+
+
+@app.get("/executor-stats/", summary="Show crew executor load")
+async def executor_stats_endpoint() -> dict:
+    """Returns how many crew runs are queued and running.
+
+    Returns:
+        A dictionary with the worker pool size, queue limit, and current load.
+
+    Example:
+        Response Body:
+        ```json
+        {
+            "max_workers": 4,
+            "max_queue": 32,
+            "queued": 3,
+            "running": 4,
+            "completed": 120,
+            "rejected": 0
+        }
+        ```
+    """
+    return asdict(crew_executor.stats())
+
+
+@app.get("/routing-stats/", summary="Show LLM routing decisions")
+async def routing_stats_endpoint() -> dict:
+    """Returns the latency and error-rate averages of the LLM routes and the routing decisions.
+
+    Returns:
+        A dictionary with the averages per route and the count of each decision.
+
+    Example:
+        Response Body:
+        ```json
+        {
+            "enabled": true,
+            "routes": {
+                "anthropic/claude-sonnet-4-20250514": {"latency": 2.41, "baseline": 2.2, "error_rate": 0.02, "samples": 57}
+            },
+            "decisions": {
+                "cloud_fast -> anthropic/claude-sonnet-4-20250514 (preferred)": 40,
+                "cloud_fast -> ollama/llama3 (faster)": 3
+            }
+        }
+        ```
+    """
+    router = get_llm_router()
+    stats = router.stats() if router is not None else RouterStats()
+    return {"enabled": router is not None, **stats.to_dict()}
+
+
+@app.get("/concurrency-stats/", summary="Show adaptive LLM concurrency limits")
+async def concurrency_stats_endpoint() -> dict:
+    """Returns the adaptive concurrency limit of every model that has been called.
+
+    Returns:
+        A dictionary with the limit, the requests in flight and waiting, and the latency averages per model.
+
+    Example:
+        Response Body:
+        ```json
+        {
+            "enabled": true,
+            "models": {
+                "ollama/llama3": {
+                    "limit": 3.4,
+                    "max_limit": 4,
+                    "in_flight": 3,
+                    "waiting": 5,
+                    "latency": 2.1,
+                    "baseline": 1.9,
+                    "increases": 12,
+                    "decreases": 2
+                }
+            }
+        }
+        ```
+    """
+    models = ConcurrencyLimiterFactory.stats()
+    return {
+        "enabled": config_manager.get_config().adaptive_concurrency,
+        "models": {name: stats.to_dict() for name, stats in models.items()},
+    }
+
+
+@app.get("/ollama-models/", summary="Show the loaded Ollama models")
+async def ollama_models_endpoint() -> dict:
+    """Returns the Ollama models that the warm-up keeps loaded and the models that are in memory.
+
+    Returns:
+        A dictionary with the warmed and pinned models and the last residency check.
+
+    Example:
+        Response Body:
+        ```json
+        {
+            "enabled": true,
+            "warmed": ["llama3:latest"],
+            "pinned": ["llama3:latest"],
+            "reachable": true,
+            "checked_at": 1760790000.0,
+            "models": {"llama3:latest": {"expires_at": "2318-08-27T12:00:00+00:00", "size_vram": 5137025024}}
+        }
+        ```
+    """
+    warmer = get_ollama_warmer()
+    snapshot = warmer.snapshot if warmer is not None else ResidencySnapshot()
+    return {
+        "enabled": warmer is not None,
+        "warmed": warmer.models if warmer is not None else [],
+        "pinned": warmer.pinned if warmer is not None else [],
+        **snapshot.to_dict(),
+    }
+
+
+async def _sse_events(crew_run: Future, events: asyncio.Queue[StreamEvent | None]) -> AsyncIterator[str]:
+    """Yield Server-Sent Events until the crew run has finished.
+
+    Args:
+        crew_run: Future of the crew run in the crew executor
+        events: Queue with the progress events; `None` marks the end of the run
+
+    Yields:
+        SSE-formatted messages, ending with a "final" or an "error" event
+    """
+    while (event := await events.get()) is not None:
+        yield event.to_sse()
+
+    try:
+        yield StreamEvent("final", {"response": crew_run.result()}).to_sse()
+    except Exception as e:
+        logger.error(f"Streamed crew run failed: {e}")
+        yield StreamEvent("error", {"error": str(e)}).to_sse()
+
+
+@app.post("/immigration-advice/stream", summary="Stream an immigration query")
+async def immigration_advice_stream_endpoint(request: ImmigrationQueryRequest) -> StreamingResponse:
+    """Processes an immigration query and streams progress as Server-Sent Events.
+
+    The response is a `text/event-stream`. An event is sent when each task of the
+    crew (Intake → Research → Response) starts and finishes. The tokens of the
+    final answer are sent as `token` events while they are generated, so a client
+    can render the answer before the whole pipeline has finished.
+
+    Args:
+        request: A request object containing the immigration query text.
+
+    Returns:
+        A streaming response with the SSE messages.
+
+    Raises:
+        HTTPException: 503 if too many crew runs are already queued
+
+    Example:
+        Request Body:
+        ```json
+        {
+            "text": "I am on an expired F-1 visa and want to apply for a work permit."
+        }
+        ```
+
+        Response Stream:
+        ```text
+        event: task_started
+        data: {"task": "IntakeTask", "agent": "Immigration Intake Specialist"}
+
+        event: task_completed
+        data: {"task": "IntakeTask", "agent": "Immigration Intake Specialist", "output": "..."}
+
+        event: token
+        data: {"text": "You may be able to"}
+
+        event: final
+        data: {"response": "You may be able to ..."}
+        ```
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue[StreamEvent | None] = asyncio.Queue()
+
+    def on_event(event: StreamEvent) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    try:
+        crew_run = crew_executor.submit(process_immigration_query, request.text, None, on_event)
+    except CrewExecutorFullError as e:
+        raise HTTPException(status_code=HTTP_SERVICE_UNAVAILABLE, detail=str(e)) from e
+
+    # The end marker is queued after all events, because both use call_soon_threadsafe
+    crew_run.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+
+    return StreamingResponse(
+        _sse_events(crew_run, events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/jobs/", status_code=HTTP_ACCEPTED, summary="Submit an immigration query as a job")
+async def submit_job_endpoint(request: ImmigrationQueryRequest) -> dict:
+    """Stores an immigration query as a job and returns its ID right away.
+
+    The crew runs in a background worker pool. The job and its result are kept in
+    a local SQLite database, so they survive a server restart. Use `GET /jobs/{job_id}`
+    to poll for the result.
+
+    Args:
+        request: A request object containing the immigration query text.
+
+    Returns:
+        A dictionary with the job ID and its status.
+
+    Example:
+        Request Body:
+        ```json
+        {
+            "text": "I am on an expired F-1 visa and want to apply for a work permit."
+        }
+        ```
+
+        Response Body:
+        ```json
+        {
+            "job_id": "3f2b6c0e9d8a4e1f8c7b6a5d4e3f2a1b",
+            "status": "queued"
+        }
+        ```
+    """
+    job_runner = await asyncio.to_thread(get_job_runner, _run_job_query)
+    job = await asyncio.to_thread(job_runner.store.create, request.text)
+    job_runner.start()
+    job_runner.notify()
+    return {"job_id": job.id, "status": job.status.value}
+
+
+@app.get("/jobs/{job_id}", summary="Get the status and result of a job")
+async def get_job_endpoint(job_id: str, wait: float = 0.0) -> dict:
+    """Returns the status of a job, waiting up to `wait` seconds for it to finish.
+
+    With `wait=0` the current status is returned right away (polling). With a
+    positive `wait` the request is held open until the job has finished or the
+    time is up (long-polling). The wait is capped at 60 seconds.
+
+    Args:
+        job_id: The job ID returned by `POST /jobs/`.
+        wait: Maximum number of seconds to wait for the job to finish.
+
+    Returns:
+        A dictionary with the job status, and the result or error once finished.
+
+    Raises:
+        HTTPException: 404 if the job does not exist
+
+    Example:
+        Response Body:
+        ```json
+        {
+            "id": "3f2b6c0e9d8a4e1f8c7b6a5d4e3f2a1b",
+            "status": "succeeded",
+            "query": "I am on an expired F-1 visa and want to apply for a work permit.",
+            "result": "You may be able to ...",
+            "error": null,
+            "created_at": 1760000000.0,
+            "updated_at": 1760000042.5
+        }
+        ```
     """
-    return process_immigration_query(request.text)
+    job_store = (await asyncio.to_thread(get_job_runner, _run_job_query)).store
+    deadline = asyncio.get_running_loop().time() + min(max(wait, 0.0), MAX_JOB_WAIT_SECONDS)
+    while True:
+        job = await asyncio.to_thread(job_store.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=HTTP_NOT_FOUND, detail=f"Job {job_id} not found")
+        if job.finished or asyncio.get_running_loop().time() >= deadline:
+            return job.to_dict()
+        await asyncio.sleep(JOB_WAIT_POLL_INTERVAL)
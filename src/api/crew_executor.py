@@ -0,0 +1,187 @@
+"""Bounded worker pool for running crews outside the API event loop.
+
+Crew runs are fully blocking and can take tens of seconds. If they run directly
+inside an `async def` endpoint, they freeze the uvicorn event loop and every other
+request has to wait. This module provides a dedicated thread pool with a fixed number
+of workers and a bounded waiting queue. The event loop only awaits the result, so the
+server keeps accepting and serving requests while crews are in flight.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Defaults used when neither arguments nor environment variables are set
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_QUEUE = 32
+
+
+class CrewExecutorFullError(RuntimeError):
+    """Raised when the executor already holds the maximum number of waiting crew runs."""
+
+
+@dataclass(frozen=True)
+class CrewExecutorStats:
+    """Snapshot of the executor load.
+
+    Attributes:
+        max_workers: Number of crews that can run at the same time
+        max_queue: Number of crew runs that can wait for a free worker
+        queued: Crew runs that are waiting for a free worker
+        running: Crew runs that are currently executing
+        completed: Crew runs that have finished (successfully or with an error)
+        rejected: Crew runs that were refused because the queue was full
+    """
+
+    max_workers: int
+    max_queue: int
+    queued: int
+    running: int
+    completed: int
+    rejected: int
+
+
+class CrewExecutor:
+    """Size-configurable thread pool with a bounded queue for blocking crew runs.
+
+    The executor counts how many submitted runs are waiting and how many are
+    running. When the waiting queue is full, new submissions are rejected right
+    away with `CrewExecutorFullError` instead of piling up without limit.
+
+    Attributes:
+        max_workers: Number of worker threads
+        max_queue: Maximum number of runs waiting for a worker
+
+    Example:
+        ```python
+        executor = CrewExecutor(max_workers=2, max_queue=10)
+        result = await executor.run(process_immigration_query, "I need a work permit")
+        print(executor.stats().running)
+        ```
+    """
+
+    def __init__(self, max_workers: int | None = None, max_queue: int | None = None) -> None:
+        """Initialize the crew executor.
+
+        Args:
+            max_workers: Number of worker threads. Defaults to the CREW_MAX_WORKERS
+                environment variable, or 4.
+            max_queue: Maximum number of runs waiting for a worker. Defaults to the
+                CREW_MAX_QUEUE environment variable, or 32.
+
+        Raises:
+            ValueError: If max_workers is smaller than 1 or max_queue is negative
+        """
+        self.max_workers = max_workers if max_workers is not None else int(os.getenv("CREW_MAX_WORKERS", str(DEFAULT_MAX_WORKERS)))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("CREW_MAX_QUEUE", str(DEFAULT_MAX_QUEUE)))
+
+        if self.max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {self.max_workers}")
+        if self.max_queue < 0:
+            raise ValueError(f"max_queue must not be negative, got {self.max_queue}")
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crew-worker")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Submit a blocking function to the worker pool.
+
+        Args:
+            fn: The blocking function to run (e.g. `process_immigration_query`)
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            A `concurrent.futures.Future` with the result of the function
+
+        Raises:
+            CrewExecutorFullError: If the waiting queue is already full
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise CrewExecutorFullError(f"Crew executor queue is full ({self._queued} waiting, {self._running} running)")
+            self._queued += 1
+
+        try:
+            future = self._executor.submit(self._run, fn, args, kwargs)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking function in the worker pool and await its result.
+
+        Args:
+            fn: The blocking function to run
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function
+
+        Returns:
+            The return value of the function
+
+        Raises:
+            CrewExecutorFullError: If the waiting queue is already full
+            Exception: Any exception raised by the function itself
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> CrewExecutorStats:
+        """Return a consistent snapshot of the executor load.
+
+        Returns:
+            A CrewExecutorStats object
+        """
+        with self._lock:
+            return CrewExecutorStats(
+                max_workers=self.max_workers,
+                max_queue=self.max_queue,
+                queued=self._queued,
+                running=self._running,
+                completed=self._completed,
+                rejected=self._rejected,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting new runs and release the worker threads.
+
+        Args:
+            wait: Whether to block until all submitted crews have finished. When False,
+                runs that have not started yet are cancelled.
+        """
+        logger.info("Shutting down crew executor")
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _on_done(self, future: Future) -> None:
+        """Take a run that was cancelled before it started out of the queue count."""
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _run(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Execute one submitted run and keep the counters up to date."""
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
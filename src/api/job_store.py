@@ -0,0 +1,523 @@
+"""Durable job store and worker pool for asynchronous crew runs.
+
+Crew runs take tens of seconds, which is too long to hold an HTTP connection open
+behind a load balancer. Instead, a client submits a query as a job and gets a job ID
+right away. The job is stored in a local SQLite database, a background worker pool
+runs the crew, and the client polls (or long-polls) the job until it has finished.
+
+Because the queue itself lives in SQLite, queued jobs and results survive a restart.
+Several server processes can share one database: a worker that claims a job takes a
+lease on it and renews the lease while the crew runs. Only jobs whose lease has run
+out (because their process stopped) are put back in the queue, so a process never
+runs a job again that another live process still owns. A worker stores the outcome
+of a job only while it still owns the job; the outcome of a worker whose lease ran
+out and whose job another worker took over is dropped, so a job is finished once.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from enum import StrEnum
+from typing import Any
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Defaults used when neither arguments nor environment variables are set
+DEFAULT_JOB_STORE_PATH = ".cache/jobs.sqlite3"
+DEFAULT_JOB_WORKERS = 2
+POLL_INTERVAL = 1.0  # seconds between queue checks when no job was submitted
+
+# Seconds a claimed job stays owned by its worker without a renewal
+DEFAULT_JOB_LEASE_SECONDS = 60.0
+
+# Columns added after the first release of the jobs table, with their types
+LEASE_COLUMNS = {"owner": "TEXT", "lease_expires_at": "REAL"}
+
+
+class JobStatus(StrEnum):
+    """Lifecycle states of a job."""
+
+    QUEUED = "queued"  # Stored, waiting for a worker
+    RUNNING = "running"  # A worker is running the crew
+    SUCCEEDED = "succeeded"  # The crew finished, the result is stored
+    FAILED = "failed"  # The crew raised an error, the message is stored
+
+
+@dataclass(frozen=True)
+class Job:
+    """A stored crew run.
+
+    Attributes:
+        id: Unique job ID returned to the client
+        status: Current lifecycle state
+        query: The immigration query text
+        result: The crew result once the job has succeeded
+        error: The error message once the job has failed
+        created_at: Submission time (Unix timestamp)
+        updated_at: Time of the last status change (Unix timestamp)
+    """
+
+    id: str
+    status: JobStatus
+    query: str
+    result: Any = None
+    error: str | None = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        """Check whether the job has reached a final state.
+
+        Returns:
+            True if the job has succeeded or failed
+        """
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the job to a JSON-serializable dictionary.
+
+        Returns:
+            The job fields, with the status as a plain string
+        """
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+
+class JobStore:
+    """SQLite-backed store for jobs.
+
+    Every operation opens a short-lived connection, so the store can be used from
+    the event loop and from worker threads at the same time.
+
+    Attributes:
+        path: Path of the SQLite database file
+
+    Example:
+        ```python
+        store = JobStore(".cache/jobs.sqlite3")
+        job = store.create("I need a work permit")
+        print(store.get(job.id).status)
+        ```
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        """Initialize the store and create the database if needed.
+
+        Args:
+            path: Path of the SQLite database file. Defaults to the JOB_STORE_PATH
+                environment variable, or `.cache/jobs.sqlite3`.
+
+        Raises:
+            sqlite3.Error: If the database cannot be created
+        """
+        self.path = path or os.getenv("JOB_STORE_PATH", DEFAULT_JOB_STORE_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, column_type in LEASE_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    def create(self, query: str) -> Job:
+        """Store a new queued job.
+
+        Args:
+            query: The immigration query text
+
+        Returns:
+            The new job
+        """
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, status=JobStatus.QUEUED, query=query, created_at=now, updated_at=now)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, query, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.status.value, job.query, job.created_at, job.updated_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Load a job by ID.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            The job, or None if it does not exist
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def claim_next(self, owner: str = "", lease_seconds: float = DEFAULT_JOB_LEASE_SECONDS) -> Job | None:
+        """Atomically move the oldest queued job to the running state.
+
+        Args:
+            owner: ID of the worker process that takes the job
+            lease_seconds: How long the job stays owned without a `renew_leases` call
+
+        Returns:
+            The claimed job, or None if no job is waiting
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (JobStatus.QUEUED.value,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                (JobStatus.RUNNING.value, owner, now + lease_seconds, now, row["id"]),
+            )
+        return self._to_job(row, status=JobStatus.RUNNING, updated_at=now)
+
+    def mark_succeeded(self, job_id: str, result: Any, owner: str = "") -> bool:
+        """Store the result of a finished job.
+
+        Args:
+            job_id: The job ID
+            result: JSON-serializable crew result
+            owner: ID of the worker process that claimed the job
+
+        Returns:
+            True if the result was stored, False if the job is no longer running
+            under this owner
+        """
+        return self._finish(job_id, owner, JobStatus.SUCCEEDED, result=json.dumps(result))
+
+    def mark_failed(self, job_id: str, error: str, owner: str = "") -> bool:
+        """Store the error of a failed job.
+
+        Args:
+            job_id: The job ID
+            error: The error message
+            owner: ID of the worker process that claimed the job
+
+        Returns:
+            True if the error was stored, False if the job is no longer running
+            under this owner
+        """
+        return self._finish(job_id, owner, JobStatus.FAILED, error=error)
+
+    def renew_leases(self, owner: str, job_ids: list[str], lease_seconds: float = DEFAULT_JOB_LEASE_SECONDS) -> int:
+        """Extend the leases of running jobs that a worker process still owns.
+
+        Args:
+            owner: ID of the worker process
+            job_ids: The jobs the process is running
+            lease_seconds: New lease length, counted from now
+
+        Returns:
+            The number of leases that were renewed
+        """
+        if not job_ids:
+            return 0
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires_at = ? WHERE status = ? AND owner = ? AND id IN ({placeholders})",
+                (time.time() + lease_seconds, JobStatus.RUNNING.value, owner, *job_ids),
+            )
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        """Put running jobs whose lease has run out back in the queue.
+
+        A lease runs out when the process that owns the job stopped without
+        finishing it. Running jobs without a lease (stored before leases existed)
+        count as expired.
+
+        Returns:
+            The number of jobs that were requeued
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (JobStatus.QUEUED.value, now, JobStatus.RUNNING.value, now),
+            )
+        return cursor.rowcount
+
+    def count_by_status(self) -> dict[str, int]:
+        """Count the jobs in each state.
+
+        Returns:
+            A dictionary from status name to number of jobs
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS total FROM jobs GROUP BY status").fetchall()
+        counts = {status.value: 0 for status in JobStatus}
+        counts.update({row["status"]: row["total"] for row in rows})
+        return counts
+
+    def _finish(self, job_id: str, owner: str, status: JobStatus, result: str | None = None, error: str | None = None) -> bool:
+        """Move a job that is running under `owner` to a final state, and tell whether it moved."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND status = ? AND owner = ?",
+                (status.value, result, error, time.time(), job_id, JobStatus.RUNNING.value, owner),
+            )
+        if cursor.rowcount == 0:
+            logger.warning(f"Dropped the outcome of job {job_id}: it is no longer running under {owner!r}")
+            return False
+        return True
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and always closes."""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row, **overrides: Any) -> Job:
+        """Convert a database row to a Job."""
+        fields = {
+            "id": row["id"],
+            "status": JobStatus(row["status"]),
+            "query": row["query"],
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+        fields.update(overrides)
+        return Job(**fields)
+
+
+class JobRunner:
+    """Background worker pool that runs the queued jobs of a JobStore.
+
+    Each worker thread claims the oldest queued job, runs the handler, and stores the
+    result or the error. Workers wake up immediately when a job is submitted through
+    `notify()`, and otherwise check the queue every second. A lease thread renews the
+    leases of the running jobs and requeues the jobs of stopped processes.
+
+    Attributes:
+        store: The job store to take jobs from
+        workers: Number of worker threads
+        owner: ID of this runner in the leases of its jobs
+        lease_seconds: Length of the job leases
+
+    Example:
+        ```python
+        runner = JobRunner(store, process_immigration_query)
+        runner.start()
+        job = store.create("I need a work permit")
+        runner.notify()
+        ```
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[str], Any],
+        workers: int | None = None,
+        lease_seconds: float | None = None,
+    ) -> None:
+        """Initialize the runner without starting any thread.
+
+        Args:
+            store: The job store to take jobs from
+            handler: Function that runs the crew for a query and returns its result
+            workers: Number of worker threads. Defaults to the JOB_MAX_WORKERS
+                environment variable, or 2.
+            lease_seconds: Length of the job leases. Defaults to the JOB_LEASE_SECONDS
+                environment variable, or 60.
+        """
+        self.store = store
+        self.workers = workers if workers is not None else int(os.getenv("JOB_MAX_WORKERS", str(DEFAULT_JOB_WORKERS)))
+        self.lease_seconds = (
+            lease_seconds if lease_seconds is not None else float(os.getenv("JOB_LEASE_SECONDS", str(DEFAULT_JOB_LEASE_SECONDS)))
+        )
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handler = handler
+        self._active: set[str] = set()
+        self._active_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Requeue jobs with an expired lease and start the worker and lease threads (only once)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._requeue_expired()
+            self._stop.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._keep_leases, name="job-leases", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self) -> None:
+        """Wake up one idle worker because a new job was queued."""
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Ask the workers to stop after their current job.
+
+        Args:
+            timeout: Maximum time to wait for each worker thread
+        """
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        with self._lock:
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def _work(self) -> None:
+        """Worker loop: claim and run jobs until the runner is stopped."""
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim_next(self.owner, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to claim the next job: {e}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(POLL_INTERVAL)
+                continue
+
+            with self._active_lock:
+                self._active.add(job.id)
+            try:
+                self._run(job)
+            except Exception as e:
+                # The outcome could not be stored; the lease runs out and the job is queued again
+                logger.error(f"Failed to store the outcome of job {job.id}: {e}")
+            finally:
+                with self._active_lock:
+                    self._active.discard(job.id)
+
+    def _run(self, job: Job) -> None:
+        """Run one job and store its outcome.
+
+        A result that cannot be stored (for example because it is not
+        JSON-serializable) fails the job with the storage error. The outcome
+        is dropped when the lease of the job ran out and it was requeued.
+        """
+        logger.info(f"Running job {job.id}")
+        try:
+            result = self._handler(job.query)
+            self.store.mark_succeeded(job.id, result, owner=self.owner)
+        except Exception as e:
+            logger.warning(f"Job {job.id} failed: {e}")
+            self.store.mark_failed(job.id, str(e), owner=self.owner)
+
+    def _keep_leases(self) -> None:
+        """Lease loop: renew the leases of the running jobs and requeue expired ones."""
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._active_lock:
+                job_ids = list(self._active)
+            try:
+                self.store.renew_leases(self.owner, job_ids, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to renew the job leases: {e}")
+            self._requeue_expired()
+
+    def _requeue_expired(self) -> None:
+        """Put the jobs of stopped processes back in the queue."""
+        try:
+            requeued = self.store.requeue_expired()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to requeue expired jobs: {e}")
+            return
+        if requeued:
+            logger.info(f"Requeued {requeued} jobs whose lease ran out")
+            self.notify()
+
+
+class JobRunnerFactory:
+    """Factory for the process-wide job runner and its store."""
+
+    _runner: JobRunner | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_runner(cls, handler: Callable[[str], Any]) -> JobRunner:
+        """Get the shared job runner, opening the job database on first use.
+
+        The runner is not started here; `JobRunner.start` starts it.
+
+        Args:
+            handler: Function that runs the crew for a query, used when the runner is created
+
+        Returns:
+            The shared JobRunner, whose `store` is the shared JobStore
+        """
+        with cls._lock:
+            if cls._runner is None:
+                cls._runner = JobRunner(JobStore(), handler)
+            return cls._runner
+
+    @classmethod
+    def reset(cls) -> None:
+        """Stop and forget the shared runner."""
+        with cls._lock:
+            runner, cls._runner = cls._runner, None
+        if runner is not None:
+            runner.stop(timeout=1.0)
+
+
+def get_job_runner(handler: Callable[[str], Any]) -> JobRunner:
+    """Get the process-wide job runner.
+
+    Args:
+        handler: Function that runs the crew for a query, used when the runner is created
+
+    Returns:
+        The shared JobRunner instance
+    """
+    return JobRunnerFactory.get_runner(handler)
@@ -0,0 +1,409 @@
+"""Warm, reusable crew templates for the Immigration AI Agent system.
+
+Building a crew is not free: every query used to load the environment, create the
+LLM, build three pydantic-heavy `Agent` objects (each with new tool instances), build
+three `Task` objects, and build a new `Crew`. This module builds those objects once
+and keeps them in a pool. A request checks out one template, resets its per-run state,
+runs the crew, and returns the template to the pool.
+
+A template is used by only one request at a time, so templates are safe to share
+between the worker threads of the API server. Every checkout asks the LLM factory
+for the current LLM, which moves off an unavailable provider, and a template built
+for another provider, model, or temperature is rebuilt, so templates follow the
+provider's availability. The LLM is compared by those settings, not by identity,
+so a template is kept when the factory builds a new but equal LLM instance (for
+example with the LLM instance pool turned off).
+
+Besides the full three-step crew, a template holds the same tasks split into an
+intake crew and an advice crew (Research and Response). The split lets the caller
+look at the intake summary before it decides to run the expensive stages (see
+`src.answer_cache`).
+
+CrewAI agents call the provider through their own client, so after every run the
+template records the token usage of each task, taken from the token counters of
+its agent, in the LLM metrics registry (see `src.llm.metrics`). For the same
+reason, each agent gets the CrewAI client of the provider (`BaseLLM.get_crewai_llm`),
+which for Claude marks the stable prompt prefixes of the agent and its task for
+prompt caching (see `src.llm.prompt_cache`) and counts the prompt tokens written to
+the cache, which CrewAI does not count.
+"""
+
+import logging
+import os
+import queue
+import threading
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from crewai import Crew, Process
+from crewai.agents.agent_builder.utilities.base_token_process import TokenProcess
+from crewai.tasks.task_output import TaskOutput
+from dotenv import load_dotenv
+
+from src.agents import create_immigration_crew
+from src.llm.base import BaseLLM
+from src.llm.llm_factory import get_llm
+from src.llm.metrics import CallRecord, estimate_cost, get_metrics_registry
+from src.llm.prompt_cache import static_prefix
+from src.tasks import (
+    IntakeTask,
+    ResearchImmigrationTask,
+    ResponseTask,
+)
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default number of warm templates (one per crew worker of the API server)
+DEFAULT_POOL_SIZE = 4
+
+# Temperature used for the immigration crew
+CREW_TEMPERATURE = 0.3
+
+
+def _default_llm() -> Any:
+    """Create the crew LLM through the centralized LLM factory."""
+    return get_llm(temperature=CREW_TEMPERATURE)
+
+
+def _llm_key(llm: Any) -> Hashable:
+    """Describe an LLM by its provider, model, and temperature.
+
+    Two LLM instances with the same key give the same crew, so a template built
+    with one of them can run with the other.
+    """
+    if isinstance(llm, BaseLLM):
+        return (llm.provider, llm.model_name, llm.temperature)
+    return (type(llm).__name__, str(llm))
+
+
+class CrewTemplate:
+    """A pre-built immigration crew that can be run many times.
+
+    The template owns the LLM handle, the three agents with their tools, the three
+    tasks, and the `Crew` object. `reset()` clears the state that a previous run
+    left behind, so the next run starts clean.
+
+    Attributes:
+        llm: The language model shared by all agents of this template
+        llm_key: The provider, model, and temperature of `llm`
+        agents: The Intake, Research, and Response agents
+        tasks: The Intake, Research, and Response tasks
+        crew: The sequential crew that runs the tasks
+        intake_crew: Crew that runs only the IntakeTask
+        advice_crew: Crew that runs the Research and Response tasks on the output
+            of the last intake run
+    """
+
+    def __init__(self, llm: Any) -> None:
+        """Build the agents, tasks, and crew of the template.
+
+        Args:
+            llm: The language model instance to be used by all agents
+        """
+        self.llm = llm
+        self.llm_key = _llm_key(llm)
+        self.agents = create_immigration_crew(llm)
+        intake_agent, research_agent, response_agent = self.agents
+        intake_task = IntakeTask(intake_agent)
+        research_task = ResearchImmigrationTask(research_agent)
+        response_task = ResponseTask(response_agent)
+        # Explicit contexts give the same inputs as the sequential default, and also
+        # work when the advice crew runs without the intake task
+        research_task.context = [intake_task]
+        response_task.context = [intake_task, research_task]
+        self.tasks = [intake_task, research_task, response_task]
+        if isinstance(llm, BaseLLM):
+            self._use_provider_clients(llm)
+
+        self.crew = Crew(agents=self.agents, tasks=self.tasks, process=Process.sequential, verbose=True)
+        self.intake_crew = Crew(agents=[intake_agent], tasks=[intake_task], process=Process.sequential, verbose=True)
+        self.advice_crew = Crew(
+            agents=[research_agent, response_agent],
+            tasks=[research_task, response_task],
+            process=Process.sequential,
+            verbose=True,
+        )
+
+    def _use_provider_clients(self, llm: BaseLLM) -> None:
+        """Give every agent its own CrewAI client of the provider.
+
+        Each agent gets its own client, so that turning on streaming for the
+        ResponseAgent does not stream the other agents. A client with
+        `static_prefixes` gets the static part of the description of its task.
+        """
+        for agent, task in zip(self.agents, self.tasks, strict=True):
+            agent_llm = llm.get_crewai_llm()
+            if agent_llm is llm:
+                continue
+            if hasattr(agent_llm, "static_prefixes"):
+                agent_llm.static_prefixes = [static_prefix(task.description)]
+            agent.llm = agent_llm
+
+    def reset(self) -> None:
+        """Clear the outputs and counters left behind by the previous run.
+
+        Task descriptions do not need a reset: CrewAI keeps the original templates
+        and interpolates the new inputs into them on every kickoff.
+        """
+        for task in self.tasks:
+            task.output = None
+            task.used_tools = 0
+            task.tools_errors = 0
+            task.delegations = 0
+            task.retry_count = 0
+        for agent in self.agents:
+            agent._token_process = TokenProcess()
+            if hasattr(agent.llm, "cache_write_tokens"):
+                agent.llm.cache_write_tokens = 0
+
+    def kickoff(self, inputs: dict[str, Any], stream: bool = False) -> Any:
+        """Run the crew with the given inputs.
+
+        Args:
+            inputs: Values for the placeholders in the task descriptions
+            stream: Whether the ResponseAgent should stream its tokens through the
+                CrewAI event bus (see `src.streaming`)
+
+        Returns:
+            The CrewOutput of the run
+        """
+        self._set_streaming(stream)
+        output = self.crew.kickoff(inputs=inputs)
+        self._record_usage(self.tasks)
+        return output
+
+    def kickoff_intake(self, inputs: dict[str, Any]) -> Any:
+        """Run only the IntakeTask.
+
+        Args:
+            inputs: Values for the placeholders in the task descriptions
+
+        Returns:
+            The CrewOutput of the intake run. Its `raw` text is the intake summary.
+        """
+        output = self.intake_crew.kickoff(inputs=inputs)
+        self._record_usage(self.tasks[:1])
+        return output
+
+    def set_intake_summary(self, summary: str) -> None:
+        """Use an intake summary written without the IntakeAgent.
+
+        `kickoff_advice` then runs on this summary as if `kickoff_intake` had
+        produced it (see `src.fast_intake`).
+
+        Args:
+            summary: The intake summary in the format of the IntakeTask
+        """
+        intake_task = self.tasks[0]
+        intake_task.output = TaskOutput(
+            description=intake_task.description,
+            name=intake_task.name,
+            expected_output=intake_task.expected_output,
+            raw=summary,
+            agent=intake_task.agent.role,
+        )
+
+    def kickoff_advice(self, inputs: dict[str, Any], stream: bool = False) -> Any:
+        """Run the Research and Response tasks after `kickoff_intake` or `set_intake_summary`.
+
+        Args:
+            inputs: Values for the placeholders in the task descriptions
+            stream: Whether the ResponseAgent should stream its tokens
+
+        Returns:
+            The CrewOutput of the run. Its `raw` text is the final answer.
+        """
+        self._set_streaming(stream)
+        output = self.advice_crew.kickoff(inputs=inputs)
+        self._record_usage(self.tasks[1:])
+        return output
+
+    def _record_usage(self, tasks: list[Any]) -> None:
+        """Record the token usage and duration of the tasks of a finished run.
+
+        Every agent runs one task, and `reset()` clears the agents' token counters
+        before each query, so the counters of an agent hold the usage of its task.
+        CrewAI counts the prompt tokens read from the prompt cache; the tokens written
+        to it are counted by the agent's client (`PromptCachingLLM`).
+        """
+        provider = getattr(self.llm, "provider", "unknown")
+        model = getattr(self.llm, "model_name", None) or str(self.llm)
+        registry = get_metrics_registry()
+        for task in tasks:
+            usage = task.agent._token_process.get_summary()
+            cache_read_tokens = min(usage.cached_prompt_tokens, usage.prompt_tokens)
+            # LiteLLM counts cache reads in the prompt tokens of Claude responses, but not cache writes
+            cache_write_tokens = getattr(task.agent.llm, "cache_write_tokens", 0)
+            prompt_tokens = usage.prompt_tokens + cache_write_tokens
+            registry.record(
+                CallRecord(
+                    provider=provider,
+                    model=model,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                    latency=task.execution_duration or 0.0,
+                    cost=estimate_cost(
+                        provider,
+                        model,
+                        prompt_tokens,
+                        usage.completion_tokens,
+                        cache_read_tokens=cache_read_tokens,
+                        cache_write_tokens=cache_write_tokens,
+                    ),
+                    agent=task.agent.role,
+                    task=type(task).__name__,
+                    requests=usage.successful_requests,
+                    cache_read_tokens=cache_read_tokens,
+                    cache_write_tokens=cache_write_tokens,
+                )
+            )
+
+    def _set_streaming(self, stream: bool) -> None:
+        """Turn token streaming of the ResponseAgent on or off."""
+        response_llm = self.agents[-1].llm
+        if hasattr(response_llm, "stream"):
+            response_llm.stream = stream
+
+
+class CrewTemplatePool:
+    """Thread-safe pool of warm crew templates.
+
+    Templates are created once (at startup with `warm()`, or on first use) and then
+    reused. When every template is checked out, an extra template is built so the
+    caller never blocks. Extra templates are dropped when the pool is already full.
+    A checkout gets the current LLM from the LLM factory; a template built for
+    another provider, model, or temperature, for example before its provider
+    failed, is replaced by a new one.
+
+    Attributes:
+        size: Number of templates kept warm in the pool
+
+    Example:
+        ```python
+        pool = CrewTemplatePool(size=2)
+        pool.warm()
+        with pool.checkout() as template:
+            result = template.kickoff(inputs)
+        ```
+    """
+
+    def __init__(self, size: int | None = None, llm_factory: Callable[[], Any] | None = None) -> None:
+        """Initialize the pool without building any template yet.
+
+        Args:
+            size: Number of templates to keep warm. Defaults to the CREW_MAX_WORKERS
+                environment variable, or 4.
+            llm_factory: Callable that returns the LLM for a new template. Defaults to
+                `get_llm(temperature=0.3)`.
+
+        Raises:
+            ValueError: If size is smaller than 1
+        """
+        self.size = size if size is not None else int(os.getenv("CREW_MAX_WORKERS", str(DEFAULT_POOL_SIZE)))
+        if self.size < 1:
+            raise ValueError(f"size must be at least 1, got {self.size}")
+
+        self._llm_factory = llm_factory or _default_llm
+        self._idle: queue.LifoQueue[CrewTemplate] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def warm(self) -> None:
+        """Build templates until the pool holds `size` of them.
+
+        Raises:
+            Exception: Any error raised while creating the LLM or the crew
+        """
+        while self.created < self.size:
+            self._idle.put(self._build())
+        logger.info(f"Crew template pool warmed with {self.size} templates")
+
+    @contextmanager
+    def checkout(self) -> Iterator[CrewTemplate]:
+        """Borrow a clean template for the duration of one run.
+
+        Yields:
+            A CrewTemplate of the current LLM that no other caller is using
+
+        Raises:
+            Exception: Any error raised while creating the LLM or building a new template
+        """
+        llm = self._llm_factory()
+        try:
+            template = self._idle.get_nowait()
+        except queue.Empty:
+            template = self._build(llm)
+        if template.llm_key != _llm_key(llm):
+            logger.info(f"Rebuilding a crew template for the LLM {getattr(llm, 'provider', llm)}")
+            self._drop(template)
+            template = self._build(llm)
+
+        template.reset()
+        try:
+            yield template
+        finally:
+            self._release(template)
+
+    @property
+    def created(self) -> int:
+        """Get the number of templates built by this pool so far.
+
+        Returns:
+            The number of templates
+        """
+        with self._lock:
+            return self._created
+
+    def _build(self, llm: Any = None) -> CrewTemplate:
+        """Build a new template, with a new LLM from the factory unless one is given, and count it."""
+        template = CrewTemplate(llm if llm is not None else self._llm_factory())
+        with self._lock:
+            self._created += 1
+        logger.debug("Built a new crew template")
+        return template
+
+    def _release(self, template: CrewTemplate) -> None:
+        """Return a template to the pool, or drop it if the pool is full."""
+        if self._idle.qsize() < self.size:
+            self._idle.put(template)
+        else:
+            self._drop(template)
+
+    def _drop(self, template: CrewTemplate) -> None:
+        """Forget a template that does not go back to the pool."""
+        with self._lock:
+            self._created -= 1
+
+
+class CrewTemplatePoolFactory:
+    """Factory for the process-wide crew template pool."""
+
+    _pool: CrewTemplatePool | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls) -> CrewTemplatePool:
+        """Get the shared crew template pool, creating it on first use.
+
+        The environment is loaded from `.env` once, when the pool is created.
+
+        Returns:
+            The shared CrewTemplatePool instance
+        """
+        with cls._lock:
+            if cls._pool is None:
+                load_dotenv()
+                cls._pool = CrewTemplatePool()
+            return cls._pool
+
+
+def get_crew_template_pool() -> CrewTemplatePool:
+    """Get the shared crew template pool.
+
+    Returns:
+        The shared CrewTemplatePool instance
+    """
+    return CrewTemplatePoolFactory.get_pool()
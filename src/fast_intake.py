@@ -0,0 +1,360 @@
+"""Rule-based intake fast path for the Immigration AI Agent system.
+
+The IntakeTask spends a full LLM round trip to extract a few facts: name,
+nationality, current location, destination, and desired outcome. These facts often
+come straight from the `user_context` dict or from simple phrases such as "from
+Nigeria living in Rwanda ... Trent University Canada". This module extracts them
+locally with a country and demonym gazetteer and a few compiled patterns.
+
+The extractor only answers when it is confident: nationality, destination, and
+desired outcome must be known, and the query must not mention more than one
+possible destination. Otherwise it returns None and the IntakeAgent runs as before.
+"""
+
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Value written for facts that are not known, as the IntakeAgent does
+NOT_PROVIDED = "Not provided"
+
+# Country names (lower case) mapped to their demonyms (lower case)
+COUNTRIES = {
+    "afghanistan": "afghan",
+    "argentina": "argentinian",
+    "australia": "australian",
+    "austria": "austrian",
+    "bangladesh": "bangladeshi",
+    "belgium": "belgian",
+    "brazil": "brazilian",
+    "burundi": "burundian",
+    "cameroon": "cameroonian",
+    "canada": "canadian",
+    "chile": "chilean",
+    "china": "chinese",
+    "colombia": "colombian",
+    "cuba": "cuban",
+    "denmark": "danish",
+    "egypt": "egyptian",
+    "el salvador": "salvadoran",
+    "ethiopia": "ethiopian",
+    "finland": "finnish",
+    "france": "french",
+    "germany": "german",
+    "ghana": "ghanaian",
+    "greece": "greek",
+    "guatemala": "guatemalan",
+    "haiti": "haitian",
+    "honduras": "honduran",
+    "india": "indian",
+    "indonesia": "indonesian",
+    "iran": "iranian",
+    "iraq": "iraqi",
+    "ireland": "irish",
+    "israel": "israeli",
+    "italy": "italian",
+    "jamaica": "jamaican",
+    "japan": "japanese",
+    "kenya": "kenyan",
+    "lebanon": "lebanese",
+    "malaysia": "malaysian",
+    "mexico": "mexican",
+    "morocco": "moroccan",
+    "nepal": "nepali",
+    "netherlands": "dutch",
+    "new zealand": "new zealander",
+    "nigeria": "nigerian",
+    "norway": "norwegian",
+    "pakistan": "pakistani",
+    "peru": "peruvian",
+    "philippines": "filipino",
+    "poland": "polish",
+    "portugal": "portuguese",
+    "russia": "russian",
+    "rwanda": "rwandan",
+    "saudi arabia": "saudi",
+    "senegal": "senegalese",
+    "somalia": "somali",
+    "south africa": "south african",
+    "south korea": "korean",
+    "spain": "spanish",
+    "sri lanka": "sri lankan",
+    "sudan": "sudanese",
+    "sweden": "swedish",
+    "switzerland": "swiss",
+    "syria": "syrian",
+    "tanzania": "tanzanian",
+    "thailand": "thai",
+    "turkey": "turkish",
+    "uganda": "ugandan",
+    "ukraine": "ukrainian",
+    "united arab emirates": "emirati",
+    "united kingdom": "british",
+    "united states": "american",
+    "venezuela": "venezuelan",
+    "vietnam": "vietnamese",
+    "zambia": "zambian",
+    "zimbabwe": "zimbabwean",
+}
+
+# Other names of countries (lower case) mapped to the names in COUNTRIES.
+# "US" is left out because the pattern is case-insensitive and "us" is a common word.
+COUNTRY_ALIASES = {
+    "uk": "united kingdom",
+    "england": "united kingdom",
+    "great britain": "united kingdom",
+    "britain": "united kingdom",
+    "usa": "united states",
+    "america": "united states",
+    "united states of america": "united states",
+    "uae": "united arab emirates",
+    "korea": "south korea",
+    "holland": "netherlands",
+}
+
+# Desired outcomes and the patterns that identify them, most specific first
+OUTCOME_PATTERNS = [
+    (
+        "Study permit",
+        r"study permit|student visa|study visa|transfer my stud|stud(?:y|ying) (?:in|at|abroad)|university|college|admission",
+    ),
+    ("Work permit", r"work permit|work visa|job offer|employment visa|h-?1b|work (?:in|for)"),
+    ("Permanent residence", r"permanent residen\w*|green card|express entry|settle permanently"),
+    ("Citizenship", r"citizenship|naturali[sz]\w*"),
+    ("Asylum", r"asylum|refugee"),
+    ("Family sponsorship", r"sponsor\w*|spouse visa|family reunification|join my (?:wife|husband|spouse|family)"),
+    ("Visitor visa", r"visitor visa|tourist visa|visit(?:ing)? (?:my|family|friends)|tourism"),
+]
+
+# Current visa types that are written in a fixed form
+VISA_TYPE_PATTERN = re.compile(r"\b(F-?1|J-?1|H-?1B|H-?4|L-?1|O-?1|B-?1|B-?2|OPT|DACA|TPS)\b", re.IGNORECASE)
+
+# Current immigration status words
+STATUS_PATTERNS = [
+    ("Expired", r"expired|overstay\w*|out of status"),
+    ("Pending", r"pending|waiting for (?:a |my )?decision|applied"),
+    ("Valid", r"\bvalid\b|still active"),
+]
+
+_COUNTRY_NAMES = {name: name for name in COUNTRIES} | COUNTRY_ALIASES
+_DEMONYMS = {demonym: country for country, demonym in COUNTRIES.items()}
+
+
+def _alternation(words: list[str]) -> str:
+    """Build a regex alternation that prefers longer words."""
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+_COUNTRY_PATTERN = re.compile(rf"\b({_alternation(list(_COUNTRY_NAMES))})\b", re.IGNORECASE)
+_DEMONYM_PATTERN = re.compile(rf"\b({_alternation(list(_DEMONYMS))})\b", re.IGNORECASE)
+_ORIGIN_PREFIX = re.compile(r"\b(?:from|citizen of|national of|born in)\s+(?:the\s+)?$", re.IGNORECASE)
+_LOCATION_PREFIX = re.compile(
+    r"\b(?:living in|live in|lives in|based in|residing in|reside in|currently in|staying in|i am in|i'm in)\s+(?:the\s+)?$",
+    re.IGNORECASE,
+)
+_IN_PREFIX = re.compile(r"\bin\s+(?:the\s+)?$", re.IGNORECASE)
+_DEMONYM_DESTINATION_SUFFIX = re.compile(
+    r"^\s+(?:study|work|student|visitor|tourist|permanent|visa|permit|citizenship)", re.IGNORECASE
+)
+_NAME_PATTERN = re.compile(r"\bmy name is ((?:[A-Z][a-z'\-]+)(?:\s+[A-Z][a-z'\-]+){0,2})")
+_OUTCOMES = [(outcome, re.compile(pattern, re.IGNORECASE)) for outcome, pattern in OUTCOME_PATTERNS]
+_STATUSES = [(status, re.compile(pattern, re.IGNORECASE)) for status, pattern in STATUS_PATTERNS]
+
+
+def _title(country: str) -> str:
+    """Return the display name of a country."""
+    return " ".join(word.capitalize() for word in country.split())
+
+
+def canonical_country(text: str) -> str | None:
+    """Map a country name, alias, or demonym to the country name.
+
+    Args:
+        text: Text such as "Canada", "USA", or "Nigerian"
+
+    Returns:
+        The lower-case country name, or None if the text is not a known country
+    """
+    key = " ".join(text.lower().replace(".", " ").split())
+    return _COUNTRY_NAMES.get(key) or _DEMONYMS.get(key)
+
+
+def _known(value: str | None) -> bool:
+    """Check whether a user context value holds real information."""
+    return bool(value) and value.strip().lower() != NOT_PROVIDED.lower()
+
+
+@dataclass(frozen=True)
+class FastIntakeStats:
+    """Counters of the intake fast path.
+
+    Attributes:
+        fast: Queries answered by the rule-based extractor
+        fallback: Queries passed on to the IntakeAgent
+    """
+
+    fast: int
+    fallback: int
+
+    @property
+    def fast_path_rate(self) -> float:
+        """Get the share of queries that took the fast path.
+
+        Returns:
+            The rate between 0.0 and 1.0
+        """
+        total = self.fast + self.fallback
+        return self.fast / total if total else 0.0
+
+
+class FastIntakeExtractor:
+    """Rule-based extractor that writes the intake summary without an LLM call.
+
+    Example:
+        ```python
+        extractor = FastIntakeExtractor()
+        summary = extractor.extract("I am from Nigeria and want a Canadian study permit")
+        if summary is None:
+            ...  # run the IntakeAgent
+        ```
+    """
+
+    def __init__(self) -> None:
+        """Initialize the extractor with empty counters."""
+        self._lock = threading.Lock()
+        self._fast = 0
+        self._fallback = 0
+
+    def extract(self, query: str, user_context: dict | None = None) -> str | None:
+        """Write the intake summary of a query if the facts are clear.
+
+        Args:
+            query: The user's immigration question
+            user_context: Optional dict with user details (name, country, location)
+
+        Returns:
+            The intake summary in the format of the IntakeTask, or None if the query
+            is ambiguous and the IntakeAgent must run
+        """
+        summary = self._extract(query, user_context or {})
+        with self._lock:
+            if summary is None:
+                self._fallback += 1
+            else:
+                self._fast += 1
+        return summary
+
+    def stats(self) -> FastIntakeStats:
+        """Return how often the fast path was taken.
+
+        Returns:
+            A FastIntakeStats object
+        """
+        with self._lock:
+            return FastIntakeStats(fast=self._fast, fallback=self._fallback)
+
+    def _extract(self, query: str, ctx: dict) -> str | None:
+        """Extract the facts, or return None when they are not clear."""
+        origins: set[str] = set()
+        locations: set[str] = set()
+        destinations: set[str] = set()
+        mentioned_in: set[str] = set()
+
+        for match in _COUNTRY_PATTERN.finditer(query):
+            country = _COUNTRY_NAMES[match.group(1).lower()]
+            before = query[: match.start()]
+            if _ORIGIN_PREFIX.search(before):
+                origins.add(country)
+            elif _LOCATION_PREFIX.search(before):
+                locations.add(country)
+            elif _IN_PREFIX.search(before):
+                mentioned_in.add(country)
+            else:
+                destinations.add(country)
+
+        for match in _DEMONYM_PATTERN.finditer(query):
+            country = _DEMONYMS[match.group(1).lower()]
+            # "a Canadian study permit" names the destination, "I am Nigerian" the origin
+            if _DEMONYM_DESTINATION_SUFFIX.match(query[match.end() :]):
+                destinations.add(country)
+            else:
+                origins.add(country)
+
+        # "in Rwanda" is where the user lives when another country is the destination,
+        # and the destination otherwise ("study in Canada")
+        if destinations - mentioned_in:
+            locations |= mentioned_in
+        else:
+            destinations |= mentioned_in
+
+        nationality = ctx.get("country") if _known(ctx.get("country")) else None
+        if nationality is None and len(origins) == 1:
+            nationality = _title(next(iter(origins)))
+        location = ctx.get("location") if _known(ctx.get("location")) else None
+        if location is None and len(locations) == 1:
+            location = _title(next(iter(locations)))
+
+        # The countries the user comes from or lives in are not destinations
+        destinations -= origins | locations
+        for known in (nationality, location):
+            if known:
+                destinations.discard(known.rsplit(",", 1)[-1].strip().lower())
+
+        outcome = next((name for name, pattern in _OUTCOMES if pattern.search(query)), None)
+        if nationality is None or outcome is None or len(destinations) != 1:
+            return None
+
+        name_match = _NAME_PATTERN.search(query)
+        name = ctx.get("name") if _known(ctx.get("name")) else (name_match.group(1) if name_match else None)
+        visa_match = VISA_TYPE_PATTERN.search(query)
+        status = next((name for name, pattern in _STATUSES if pattern.search(query)), None)
+
+        fields = {
+            "name": name,
+            "nationality": nationality,
+            "current_location": location,
+            "destination_country": _title(next(iter(destinations))),
+            "current_visa_type": visa_match.group(1).upper() if visa_match else None,
+            "immigration_status": status,
+            "desired_outcome": outcome,
+            "additional_details": " ".join(query.split()),
+        }
+        return "\n".join(f"{key}: {value or NOT_PROVIDED}" for key, value in fields.items())
+
+
+class FastIntakeFactory:
+    """Factory for the process-wide intake fast path."""
+
+    _extractor: FastIntakeExtractor | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_extractor(cls) -> FastIntakeExtractor | None:
+        """Get the shared extractor, or None if the fast path is disabled.
+
+        The fast path is turned off with INTAKE_FAST_PATH=false.
+
+        Returns:
+            The shared FastIntakeExtractor instance, or None
+        """
+        if os.getenv("INTAKE_FAST_PATH", "true").lower() != "true":
+            return None
+        with cls._lock:
+            if cls._extractor is None:
+                cls._extractor = FastIntakeExtractor()
+            return cls._extractor
+
+
+def get_fast_intake() -> FastIntakeExtractor | None:
+    """Get the intake fast path, or None if it is disabled.
+
+    Returns:
+        The shared FastIntakeExtractor instance, or None
+    """
+    return FastIntakeFactory.get_extractor()
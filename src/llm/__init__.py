@@ -1,12 +1,29 @@
-"""LLM package for Immigration AI Agent system."""
+"""LLM package for Immigration AI Agent system.
 
-from src.llm.base import BaseLLM
-from src.llm.claude_llm import ClaudeLLM
+The provider classes are imported on first access, so that importing the package
+does not load the LangChain provider packages.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+from src.llm.base import BaseLLM, StreamChunk
 from src.llm.config import AnthropicConfig, LLMConfig, OllamaConfig, OpenAIConfig, config_manager
 from src.llm.fallback import FallbackLLM, FallbackStrategy, RetryStrategy
 from src.llm.llm_factory import LLMFactory, LLMProvider, LLMType, get_llm
-from src.llm.ollama_llm import OllamaLLM
-from src.llm.openai_llm import OpenAILLM
+
+
+if TYPE_CHECKING:
+    from src.llm.claude_llm import ClaudeLLM
+    from src.llm.ollama_llm import OllamaLLM
+    from src.llm.openai_llm import OpenAILLM
+
+# Provider classes and the modules they are imported from on first access
+_LAZY_PROVIDERS = {
+    "ClaudeLLM": "src.llm.claude_llm",
+    "OllamaLLM": "src.llm.ollama_llm",
+    "OpenAILLM": "src.llm.openai_llm",
+}
 
 
 __all__ = [
@@ -24,6 +41,26 @@
     "OpenAIConfig",
     "OpenAILLM",
     "RetryStrategy",
+    "StreamChunk",
     "config_manager",
     "get_llm",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a provider class on first access.
+
+    Args:
+        name: The attribute name
+
+    Returns:
+        The provider class
+
+    Raises:
+        AttributeError: If the name is not a provider class
+    """
+    if name not in _LAZY_PROVIDERS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_PROVIDERS[name]), name)
+    globals()[name] = value
+    return value
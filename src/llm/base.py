@@ -1,10 +1,67 @@
 """Base classes for LLM implementations."""
 
+import asyncio
+import logging
+import time
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from dataclasses import dataclass
 from typing import Any
 
-from langchain.callbacks.manager import CallbackManagerForLLMRun
-from langchain.schema import BaseMessage, LLMResult
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain.schema import BaseMessage, Generation, LLMResult
+
+from src.llm.circuit_breaker import get_circuit_breaker
+from src.llm.concurrency_limiter import ConcurrencySlot, get_concurrency_limiter
+from src.llm.config import config_manager
+from src.llm.event_loop import run_coroutine
+from src.llm.metrics import CallRecord, CallTracker, estimate_tokens, track_call
+from src.llm.rate_limiter import RateLimiter, account_key, get_rate_limiter, rate_limit_flow
+from src.llm.response_cache import ResponseCache, get_response_cache
+from src.llm.router import get_llm_router
+from src.llm.single_flight import get_single_flight
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class StreamChunk:
+    """A piece of generated text from a streamed LLM call.
+
+    Attributes:
+        text: The generated text of this piece
+        index: Position of the piece in the stream, starting at 0
+        provider: The provider that generated the text
+        model: The model that generated the text
+        elapsed: Seconds from the start of the stream to this piece
+        time_to_first_token: Seconds from the start of the stream to the first piece
+    """
+
+    text: str
+    index: int
+    provider: str
+    model: str
+    elapsed: float
+    time_to_first_token: float
+
+
+def content_text(content: Any) -> str:
+    """Return the text of a LangChain message content.
+
+    Args:
+        content: A string, or a list of strings and content blocks such as
+            `{"type": "text", "text": "..."}`
+
+    Returns:
+        The text, without non-text blocks
+    """
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(block if isinstance(block, str) else str(block.get("text", "")) for block in content)
+    return str(content)
 
 
 class BaseLLM(ABC):
@@ -52,6 +109,29 @@ def _call(
         """
         pass
 
+    async def _acall(
+        self,
+        prompt: str,
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the LLM asynchronously with the given prompt.
+
+        Providers override this with their native async client. The default runs
+        the synchronous `_call` in a worker thread.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            run_manager: Optional async callback manager for the run
+            **kwargs: Additional arguments to pass to the LLM
+
+        Returns:
+            The generated text from the LLM
+        """
+        return await asyncio.to_thread(self._call, prompt, stop, None, **kwargs)
+
     @abstractmethod
     def _llm_type(self) -> str:
         """Return type of LLM.
@@ -98,6 +178,426 @@ def provider(self) -> str:
         """
         pass
 
+    def _execute(self, prompt: str, stop: list[str] | None, operation: Callable[[], str]) -> str:
+        """Run a provider request through the shared call pipeline.
+
+        Provider implementations call this from `_call` with a function that sends
+        the request. Concurrent identical calls (same provider, model, temperature,
+        stop sequences, and prompt) are coalesced into one request. The pipeline
+        answers from the response cache when caching is enabled in `LLMConfig`, and
+        stores new responses in it. Requests that reach the provider wait in the fair
+        queue of the provider's rate limit and then for a slot in the adaptive
+        concurrency limit of the model (see `src.llm.concurrency_limiter`). Their
+        outcome and duration are recorded in the provider's circuit breaker, in the LLM
+        router (see `src.llm.router`), and in the concurrency limiter.
+        Successful requests are recorded in the metrics registry with their token
+        usage and cost (see `src.llm.metrics`).
+
+        Args:
+            prompt: The prompt sent to the LLM
+            stop: Optional list of stop sequences
+            operation: Function that sends the request and returns the generated text
+
+        Returns:
+            The generated (or cached) text
+
+        Raises:
+            CircuitOpenError: If the circuit of the provider is open
+        """
+        key = ResponseCache.make_key(self.provider, self.model_name, self.temperature, stop, prompt)
+        return get_single_flight("llm").do(key, lambda: self._cached(key, prompt, operation))
+
+    def _cached(self, key: str, prompt: str, operation: Callable[[], str]) -> str:
+        """Answer from the response cache, or run the operation and store its result."""
+        cache = get_response_cache()
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            return cached
+
+        result = self._send_limited(operation, prompt)
+        if cache is not None:
+            cache.set(key, result)
+        return result
+
+    def _send_limited(self, operation: Callable[[], str], prompt: str = "") -> str:
+        """Send a request to the provider once its circuit, its rate limit, and the model's concurrency limit allow it.
+
+        The request reserves its estimated prompt tokens in the rate limiter, which is
+        settled with the real usage afterwards. A rate limit or overload error with a
+        Retry-After header pauses the limiter queue, so that the waiting requests do not
+        run into the same error.
+        """
+        breaker = get_circuit_breaker(self.provider)
+        if breaker is not None:
+            breaker.before_call()
+        limiter = self._rate_limiter()
+        reserved = estimate_tokens(prompt)
+        queue_wait = limiter.acquire(reserved) if limiter is not None else 0.0
+        record = None
+        try:
+            slot = self._acquire_slot()
+            queue_wait += slot.waited if slot is not None else 0.0
+
+            start = time.monotonic()
+            try:
+                with track_call(self.provider, self.model_name, prompt, queue_wait) as tracker:
+                    try:
+                        result = operation()
+                    except Exception as e:
+                        self._record_outcome(breaker, False, time.monotonic() - start, slot=slot, error=e)
+                        self._pause_if_throttled(limiter, e)
+                        raise
+                duration = time.monotonic() - start
+                record = tracker.finish(result)
+                self._record_outcome(breaker, True, duration, slot=slot, output_tokens=record.completion_tokens)
+            finally:
+                self._release_slot(slot)
+        finally:
+            self._settle_tokens(limiter, reserved, record)
+        return result
+
+    async def _aexecute(self, prompt: str, stop: list[str] | None, operation: Callable[[], Awaitable[str]]) -> str:
+        """Run an async provider request through the shared call pipeline.
+
+        This is the async counterpart of `_execute`: identical calls are coalesced
+        without blocking the event loop, and the response cache is used in the same
+        way.
+
+        Args:
+            prompt: The prompt sent to the LLM
+            stop: Optional list of stop sequences
+            operation: Coroutine function that sends the request and returns the generated text
+
+        Returns:
+            The generated (or cached) text
+        """
+        key = ResponseCache.make_key(self.provider, self.model_name, self.temperature, stop, prompt)
+        return await get_single_flight("llm").ado(key, lambda: self._acached(key, prompt, operation))
+
+    async def _acached(self, key: str, prompt: str, operation: Callable[[], Awaitable[str]]) -> str:
+        """Async counterpart of `_cached`. SQLite lookups are local and short, so they run inline."""
+        cache = get_response_cache()
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            return cached
+
+        result = await self._asend_limited(operation, prompt)
+        if cache is not None:
+            cache.set(key, result)
+        return result
+
+    async def _asend_limited(self, operation: Callable[[], Awaitable[str]], prompt: str = "") -> str:
+        """Async counterpart of `_send_limited`. A cancelled call is not counted as a failure."""
+        breaker = get_circuit_breaker(self.provider)
+        if breaker is not None:
+            breaker.before_call()
+        limiter = self._rate_limiter()
+        reserved = estimate_tokens(prompt)
+        queue_wait = await limiter.aacquire(reserved) if limiter is not None else 0.0
+        record = None
+        try:
+            slot = await self._aacquire_slot()
+            queue_wait += slot.waited if slot is not None else 0.0
+
+            start = time.monotonic()
+            try:
+                with track_call(self.provider, self.model_name, prompt, queue_wait) as tracker:
+                    try:
+                        result = await operation()
+                    except Exception as e:
+                        self._record_outcome(breaker, False, time.monotonic() - start, slot=slot, error=e)
+                        self._pause_if_throttled(limiter, e)
+                        raise
+                duration = time.monotonic() - start
+                record = tracker.finish(result)
+                self._record_outcome(breaker, True, duration, slot=slot, output_tokens=record.completion_tokens)
+            finally:
+                self._release_slot(slot)
+        finally:
+            self._settle_tokens(limiter, reserved, record)
+        return result
+
+    def _stream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> Iterator[str]:
+        """Yield the generated text of a prompt piece by piece.
+
+        Providers override this with their streaming client. The default yields the
+        whole result of `_call` as one piece.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        yield self._call(prompt, stop, None, **kwargs)
+
+    async def _astream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> AsyncIterator[str]:
+        """Async counterpart of `_stream`. The default yields the whole result of `_acall`.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        yield await self._acall(prompt, stop, None, **kwargs)
+
+    def _stream_limited(self, open_stream: Callable[[], Iterator[Any]], prompt: str = "") -> Iterator[Any]:
+        """Stream from the provider once its circuit, its rate limit, and the model's concurrency limit allow it.
+
+        Streams are not cached or coalesced. The outcome and the duration of the
+        whole stream are recorded in the provider's circuit breaker, and a finished
+        stream is recorded in the metrics registry with the usage of its chunks and
+        its time to first token; a stream that the caller closes early is not
+        recorded. The stream holds its concurrency slot until it ends.
+        """
+        breaker = get_circuit_breaker(self.provider)
+        if breaker is not None:
+            breaker.before_call()
+        limiter = self._rate_limiter()
+        reserved = estimate_tokens(prompt)
+        queue_wait = limiter.acquire(reserved) if limiter is not None else 0.0
+        record = None
+        try:
+            slot = self._acquire_slot()
+            queue_wait += slot.waited if slot is not None else 0.0
+
+            start = time.monotonic()
+            tracker = CallTracker(self.provider, self.model_name, prompt, queue_wait)
+            pieces: list[str] = []
+            try:
+                for piece in open_stream():
+                    self._track_piece(tracker, piece, pieces)
+                    yield piece
+            except Exception as e:
+                self._record_outcome(breaker, False, time.monotonic() - start, slot=slot, error=e)
+                self._pause_if_throttled(limiter, e)
+                raise
+            else:
+                self._record_outcome(breaker, True, time.monotonic() - start, tracker.time_to_first_token, slot=slot)
+            finally:
+                # Frees the slot of a stream that the caller closed early
+                self._release_slot(slot)
+            record = tracker.finish("".join(pieces))
+        finally:
+            self._settle_tokens(limiter, reserved, record)
+
+    async def _astream_limited(self, open_stream: Callable[[], AsyncIterator[Any]], prompt: str = "") -> AsyncIterator[Any]:
+        """Async counterpart of `_stream_limited`."""
+        breaker = get_circuit_breaker(self.provider)
+        if breaker is not None:
+            breaker.before_call()
+        limiter = self._rate_limiter()
+        reserved = estimate_tokens(prompt)
+        queue_wait = await limiter.aacquire(reserved) if limiter is not None else 0.0
+        record = None
+        try:
+            slot = await self._aacquire_slot()
+            queue_wait += slot.waited if slot is not None else 0.0
+
+            start = time.monotonic()
+            tracker = CallTracker(self.provider, self.model_name, prompt, queue_wait)
+            pieces: list[str] = []
+            try:
+                async for piece in open_stream():
+                    self._track_piece(tracker, piece, pieces)
+                    yield piece
+            except Exception as e:
+                self._record_outcome(breaker, False, time.monotonic() - start, slot=slot, error=e)
+                self._pause_if_throttled(limiter, e)
+                raise
+            else:
+                self._record_outcome(breaker, True, time.monotonic() - start, tracker.time_to_first_token, slot=slot)
+            finally:
+                # Frees the slot of a stream that the caller closed early
+                self._release_slot(slot)
+            record = tracker.finish("".join(pieces))
+        finally:
+            self._settle_tokens(limiter, reserved, record)
+
+    @property
+    def rate_limit_account(self) -> str | None:
+        """Get the account whose rate limits apply to this LLM.
+
+        Returns:
+            A fingerprint of the API key (see `src.llm.rate_limiter.account_key`),
+            or None for providers without a key
+        """
+        return account_key(getattr(self, "_api_key", None))
+
+    def _rate_limiter(self) -> RateLimiter | None:
+        """Get the rate limiter of this LLM's provider and account, or None without a limit."""
+        return get_rate_limiter(self.provider, self.rate_limit_account)
+
+    @staticmethod
+    def _settle_tokens(limiter: RateLimiter | None, reserved: int, record: CallRecord | None) -> None:
+        """Settle the tokens reserved in the rate limiter with the usage of the request.
+
+        A request without a usage record (it failed, was cancelled while it waited
+        for a slot, or was closed early) gives all its reserved tokens back, so
+        failed calls do not use up the token limit.
+        """
+        if limiter is not None:
+            limiter.settle(record.total_tokens - reserved if record is not None else -reserved)
+
+    @staticmethod
+    def _pause_if_throttled(limiter: RateLimiter | None, error: Exception) -> None:
+        """Pause the rate limiter queue for the Retry-After time of a rate limit or overload error."""
+        if limiter is None:
+            return
+        # Imported here because src.llm.fallback imports this module
+        from src.llm.fallback import MAX_RETRY_AFTER, retry_after_seconds
+
+        delay = retry_after_seconds(error)
+        if delay:
+            limiter.pause(min(delay, MAX_RETRY_AFTER))
+
+    def _record_outcome(
+        self,
+        breaker: Any,
+        success: bool,
+        duration: float,
+        latency: float | None = None,
+        slot: ConcurrencySlot | None = None,
+        error: Exception | None = None,
+        output_tokens: int | None = None,
+    ) -> None:
+        """Record the outcome of a provider request in its circuit breaker, the router, and its concurrency limiter.
+
+        Args:
+            breaker: The provider's circuit breaker, or None
+            success: Whether the request succeeded
+            duration: Duration of the whole request in seconds
+            latency: Latency for the router and the concurrency limiter, if not the
+                duration (streams use their time to first token, so long answers do
+                not look slow)
+            slot: The request's concurrency slot, or None; it is released here
+            error: The error of a failed request
+            output_tokens: Generated tokens of a request that was not streamed; the
+                concurrency limiter then gets the latency per generated token, so a
+                longer answer does not look like a slower model
+        """
+        if breaker is not None:
+            breaker.record_call(success=success, duration=duration)
+        latency = duration if latency is None else latency
+        router = get_llm_router()
+        if router is not None:
+            router.observe(self.provider, self.model_name, latency, success)
+        if slot is not None:
+            if success:
+                slot.release(latency=latency / output_tokens if output_tokens else latency)
+            else:
+                slot.release(overload=error is not None and self._is_overload(error))
+
+    def _acquire_slot(self) -> ConcurrencySlot | None:
+        """Wait for a free slot in the concurrency limiter of this LLM's model, if it has one."""
+        limiter = get_concurrency_limiter(self.provider, self.model_name)
+        return limiter.acquire() if limiter is not None else None
+
+    async def _aacquire_slot(self) -> ConcurrencySlot | None:
+        """Async counterpart of `_acquire_slot`."""
+        limiter = get_concurrency_limiter(self.provider, self.model_name)
+        return await limiter.aacquire() if limiter is not None else None
+
+    @staticmethod
+    def _release_slot(slot: ConcurrencySlot | None) -> None:
+        """Give back a concurrency slot without feedback; does nothing if the outcome already released it."""
+        if slot is not None:
+            slot.release()
+
+    @staticmethod
+    def _is_overload(error: Exception) -> bool:
+        """Check whether a failed request shows that the model is overloaded.
+
+        Timeouts, lost connections, rate limits, and server errors count; errors of
+        the request itself, such as a bad request or a wrong API key, do not.
+        """
+        # Imported here because src.llm.fallback imports this module
+        from src.llm.fallback import error_status_code, is_retryable
+
+        if error_status_code(error) is not None:
+            return is_retryable(error)
+        name = type(error).__name__
+        return isinstance(error, TimeoutError | ConnectionError) or "Timeout" in name or "Connect" in name
+
+    @staticmethod
+    def _track_piece(tracker: CallTracker, piece: Any, pieces: list[str]) -> None:
+        """Add the usage and the text of a stream chunk to the request's tracker."""
+        tracker.add_usage(piece)
+        text = content_text(getattr(piece, "content", piece))
+        if text:
+            tracker.mark_first_token()
+            pieces.append(text)
+
+    def stream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> Iterator[StreamChunk]:
+        """Stream the generated text of a prompt as it is produced.
+
+        Every chunk carries the time to the first token of the stream, so callers
+        can start rendering the answer at once and report the latency.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            StreamChunk objects with non-empty text
+        """
+        start = time.monotonic()
+        first_token: float | None = None
+        index = 0
+        for text in self._stream(prompt, stop, **kwargs):
+            if not text:
+                continue
+            elapsed = time.monotonic() - start
+            if first_token is None:
+                first_token = elapsed
+                logger.debug(f"{self.provider} time to first token: {first_token:.3f}s")
+            yield StreamChunk(text, index, self.provider, self.model_name, elapsed, first_token)
+            index += 1
+
+    async def astream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> AsyncIterator[StreamChunk]:
+        """Stream the generated text of a prompt asynchronously.
+
+        This is the async counterpart of `stream`, with the same chunks.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            StreamChunk objects with non-empty text
+        """
+        start = time.monotonic()
+        first_token: float | None = None
+        index = 0
+        async for text in self._astream(prompt, stop, **kwargs):
+            if not text:
+                continue
+            elapsed = time.monotonic() - start
+            if first_token is None:
+                first_token = elapsed
+                logger.debug(f"{self.provider} time to first token: {first_token:.3f}s")
+            yield StreamChunk(text, index, self.provider, self.model_name, elapsed, first_token)
+            index += 1
+
+    def get_crewai_llm(self) -> Any:
+        """Get the object that CrewAI agents use as their LLM.
+
+        CrewAI calls the provider through its own LiteLLM-based client. By default
+        it builds that client from the `model_name` and `temperature` of this
+        object; providers override this to hand CrewAI a configured client.
+
+        Returns:
+            A CrewAI LLM, or this object
+        """
+        return self
+
     def invoke(self, prompt: str, **kwargs: Any) -> str:
         """Invoke the LLM with the given prompt.
 
@@ -112,22 +612,86 @@ def invoke(self, prompt: str, **kwargs: Any) -> str:
         """
         return self._call(prompt, **kwargs)
 
-    def generate(self, prompts: list[str], **kwargs: Any) -> LLMResult:
+    def generate(self, prompts: list[str], max_concurrency: int | None = None, **kwargs: Any) -> LLMResult:
         """Generate text for multiple prompts.
 
+        The prompts are sent concurrently on the shared event loop, at most
+        `max_concurrency` at a time, and within the rate limit of the provider, where
+        they queue as one flow. The generations keep the order of the prompts. A
+        failed prompt does not fail the batch: its generation is empty and its error
+        is reported in `llm_output["errors"]`, keyed by the prompt index.
+
         Args:
             prompts: List of prompts to generate text for
+            max_concurrency: Maximum number of prompts in flight. Defaults to the
+                `max_concurrency` setting of `LLMConfig`.
             **kwargs: Additional arguments to pass to the LLM
 
         Returns:
             An LLMResult containing the generated text
         """
-        generations = []
-        for prompt in prompts:
-            text = self._call(prompt, **kwargs)
-            generations.append([{"text": text}])
+        return run_coroutine(self.agenerate(prompts, max_concurrency=max_concurrency, **kwargs))
+
+    async def acall(self, prompt: str, **kwargs: Any) -> str:
+        """Invoke the LLM asynchronously with the given prompt.
+
+        This is the async counterpart of `invoke`. Many calls can be in flight on
+        one event loop; synchronous code can use `src.llm.event_loop.run_coroutine`.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            **kwargs: Additional arguments to pass to the LLM
+
+        Returns:
+            The generated text from the LLM
+        """
+        return await self._acall(prompt, **kwargs)
 
-        return LLMResult(generations=generations)
+    async def agenerate(self, prompts: list[str], max_concurrency: int | None = None, **kwargs: Any) -> LLMResult:
+        """Generate text for multiple prompts asynchronously.
+
+        This is the async counterpart of `generate`, with the same concurrency limit,
+        ordering, and per-prompt error reporting.
+
+        Args:
+            prompts: List of prompts to generate text for
+            max_concurrency: Maximum number of prompts in flight. Defaults to the
+                `max_concurrency` setting of `LLMConfig`.
+            **kwargs: Additional arguments to pass to the LLM
+
+        Returns:
+            An LLMResult containing the generated text
+
+        Raises:
+            ValueError: If max_concurrency is smaller than 1
+        """
+        limit = max_concurrency if max_concurrency is not None else config_manager.get_config().max_concurrency
+        if limit < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {limit}")
+        semaphore = asyncio.Semaphore(limit)
+
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                return await self._acall(prompt, **kwargs)
+
+        # The prompts of one batch share one flow in the rate limiter queue, so a large
+        # batch gets the same share of the provider's limit as a single query
+        with rate_limit_flow(object()):
+            outcomes = await asyncio.gather(*(generate_one(prompt) for prompt in prompts), return_exceptions=True)
+
+        generations = []
+        errors = {}
+        for index, outcome in enumerate(outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"Prompt {index} of the batch failed: {outcome}")
+                errors[index] = f"{type(outcome).__name__}: {outcome}"
+                generations.append([Generation(text="", generation_info={"error": errors[index]})])
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                generations.append([Generation(text=outcome)])
+
+        return LLMResult(generations=generations, llm_output={"errors": errors} if errors else None)
 
     def __call__(self, prompt: str | list[BaseMessage], **kwargs: Any) -> str:
         """Call the LLM with the given prompt.
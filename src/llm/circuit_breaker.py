@@ -2,14 +2,29 @@
 
 This module provides a circuit breaker pattern for checking LLM connectivity.
 It allows for quick failure when a service is known to be unavailable,
-preventing unnecessary timeouts and retries.
+preventing unnecessary timeouts and retries. The breakers open on the outcomes of
+real provider calls: failed and slow calls are counted in a time-bucketed sliding
+window. The health checks are kept out of that window; once the reset timeout has
+passed, a passing check lets an open circuit try real calls again (half-open), and a
+failing check keeps it open for another reset timeout.
+
+The connectivity checks are HTTP requests with a timeout of a few seconds, so they
+do not run on the request path. A background `HealthProber` runs them on a schedule
+and publishes the results as an immutable snapshot. `is_claude_available`,
+`is_openai_available`, and `is_ollama_available` only read that snapshot. A snapshot
+that was not refreshed for a few probe intervals is not trusted; the circuit state of
+the breaker decides until the next probe round.
 """
 
 import logging
+import os
+import threading
 import time
-from collections.abc import Callable
-from dataclasses import dataclass
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from enum import Enum
+from types import MappingProxyType
 
 
 # Configure logging
@@ -20,6 +35,8 @@
 RESET_TIMEOUT = 5.0  # seconds
 CACHE_TIMEOUT = 5.0  # seconds
 HTTP_OK = 200  # HTTP status code for successful response
+DEFAULT_PROBE_INTERVAL = 10.0  # seconds between two health probes
+STALE_PROBE_INTERVALS = 3  # probe intervals after which a snapshot is too old to trust
 
 
 class CircuitState(Enum):
@@ -34,14 +51,129 @@ class CircuitState(Enum):
 class CircuitBreakerConfig:
     """Configuration for circuit breaker."""
 
-    failure_threshold: int = 3  # Number of failures before opening circuit
     reset_timeout: float = 60.0  # Seconds to wait before attempting to reset
     half_open_timeout: float = 5.0  # Seconds to wait in half-open state
     success_threshold: int = 1  # Number of successes needed to close circuit
+    window_seconds: float = 60.0  # Length of the sliding window of call outcomes
+    window_buckets: int = 12  # Number of time buckets in the sliding window
+    minimum_calls: int = 5  # Calls needed in the window before the rates are used
+    error_rate_threshold: float = 0.5  # Share of failed calls that opens the circuit
+    slow_call_seconds: float = 30.0  # Calls that take longer than this are slow
+    slow_call_rate_threshold: float = 0.8  # Share of slow calls that opens the circuit
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is refused because the circuit of its provider is open."""
+
+
+@dataclass(frozen=True)
+class WindowStats:
+    """Call outcomes counted in a sliding window.
+
+    Attributes:
+        calls: Calls in the window
+        failures: Calls that raised an error
+        slow_calls: Calls that took longer than the slow-call threshold
+    """
+
+    calls: int
+    failures: int
+    slow_calls: int
+
+    @property
+    def error_rate(self) -> float:
+        """Get the share of failed calls.
+
+        Returns:
+            The error rate between 0.0 and 1.0
+        """
+        return self.failures / self.calls if self.calls else 0.0
+
+    @property
+    def slow_call_rate(self) -> float:
+        """Get the share of slow calls.
+
+        Returns:
+            The slow-call rate between 0.0 and 1.0
+        """
+        return self.slow_calls / self.calls if self.calls else 0.0
+
+
+class SlidingWindow:
+    """Time-bucketed counters of the call outcomes of the last `window_seconds`.
+
+    The window is split into buckets. A bucket is reused, and its counters reset,
+    once its time slot is older than the window, so recording and reading the window
+    take constant time and memory.
+    """
+
+    def __init__(self, window_seconds: float, buckets: int) -> None:
+        """Initialize an empty window.
+
+        Args:
+            window_seconds: Length of the window
+            buckets: Number of time buckets in the window
+
+        Raises:
+            ValueError: If the window length or the number of buckets is not positive
+        """
+        if window_seconds <= 0 or buckets < 1:
+            raise ValueError(f"Invalid sliding window: {window_seconds} seconds in {buckets} buckets")
+        self.bucket_seconds = window_seconds / buckets
+        # Each bucket holds [slot, calls, failures, slow_calls]
+        self._buckets = [[-1, 0, 0, 0] for _ in range(buckets)]
+
+    def record(self, failed: bool, slow: bool, now: float | None = None) -> None:
+        """Count one call outcome.
+
+        Args:
+            failed: Whether the call raised an error
+            slow: Whether the call was slow
+            now: The monotonic time of the outcome, for tests
+        """
+        slot = int((time.monotonic() if now is None else now) // self.bucket_seconds)
+        bucket = self._buckets[slot % len(self._buckets)]
+        if bucket[0] != slot:
+            bucket[:] = [slot, 0, 0, 0]
+        bucket[1] += 1
+        bucket[2] += int(failed)
+        bucket[3] += int(slow)
+
+    def stats(self, now: float | None = None) -> WindowStats:
+        """Sum the buckets that are still inside the window.
+
+        Args:
+            now: The monotonic time of the read, for tests
+
+        Returns:
+            A WindowStats object
+        """
+        slot = int((time.monotonic() if now is None else now) // self.bucket_seconds)
+        live = [bucket for bucket in self._buckets if slot - len(self._buckets) < bucket[0] <= slot]
+        return WindowStats(
+            calls=sum(bucket[1] for bucket in live),
+            failures=sum(bucket[2] for bucket in live),
+            slow_calls=sum(bucket[3] for bucket in live),
+        )
+
+    def clear(self) -> None:
+        """Forget every outcome."""
+        for bucket in self._buckets:
+            bucket[:] = [-1, 0, 0, 0]
 
 
 class CircuitBreaker:
-    """Circuit breaker implementation for LLM connectivity checks."""
+    """Circuit breaker implementation for LLM connectivity checks.
+
+    The breaker counts the outcomes of real provider calls (`record_call`) in a
+    sliding window. It opens when, with at least `minimum_calls` outcomes in the
+    window, the error rate or the slow-call rate reaches its threshold. While it is
+    open, calls are refused with CircuitOpenError so that callers fail over at once.
+    The health checks (`record_probe`) are not counted in the window and never
+    shorten the reset timeout: a failing check restarts it, and a passing check
+    after it moves the circuit to half-open. The next real calls decide whether
+    it closes again.
+    """
 
     def __init__(
         self,
@@ -61,14 +193,21 @@ def __init__(
         self.config = config or CircuitBreakerConfig()
         self._failures = 0
         self._last_failure_time: float | None = None
+        self._opened_at: float | None = None  # Monotonic time the reset timeout counts from
         self._state = "closed"
         self.success_count = 0
         self.last_success_time = 0.0
         self._cache: dict[str, tuple[bool, float]] = {}  # Cache for check results
+        self.cache_timeout = CACHE_TIMEOUT
+        self._window = SlidingWindow(self.config.window_seconds, self.config.window_buckets)
+        self._listeners: list[Callable[[str, bool], None]] = []
+        self._lock = threading.RLock()
 
     def is_available(self) -> bool:
         """Check if the service is available.
 
+        The health check result is passed to `record_probe`, not counted as a call.
+
         Returns:
             True if the service is available, False otherwise
         """
@@ -76,72 +215,136 @@ def is_available(self) -> bool:
         current_time = time.time()
         if self.name in self._cache:
             result, timestamp = self._cache[self.name]
-            if current_time - timestamp < CACHE_TIMEOUT:  # 5 second cache
+            if current_time - timestamp < self.cache_timeout:  # 5 second cache by default
                 return result
 
-        # If circuit is open, check if reset timeout has passed
-        if self._state == "open":
-            if self._last_failure_time is not None and current_time - self._last_failure_time < self.config.reset_timeout:
-                logger.debug(f"Circuit {self.name} is OPEN, blocking request")
-                return False
-            else:
-                logger.info(f"Circuit {self.name} reset timeout passed, moving to HALF-OPEN")
-                self._state = "half_open"
-                self._last_failure_time = current_time
+        # Perform the actual check
+        try:
+            result = bool(self.check_function())
+        except Exception as e:
+            logger.warning(f"Error checking {self.name} availability: {e}")
+            result = False
+        self._cache[self.name] = (result, current_time)
+        self.record_probe(result)
+        return result
 
-        # If circuit is half-open, check if half-open timeout has passed
-        if self._state == "half_open":
-            if self._last_failure_time is not None and current_time - self._last_failure_time < self.config.half_open_timeout:
-                logger.debug(f"Circuit {self.name} is HALF-OPEN, blocking request")
+    @property
+    def state(self) -> CircuitState:
+        """Get the current circuit state without a lock.
+
+        Returns:
+            The CircuitState
+        """
+        return CircuitState(self._state)
+
+    def allow_request(self) -> bool:
+        """Check whether a real call may be sent to the service.
+
+        An open circuit lets calls through again, in the half-open state, once the
+        reset timeout has passed.
+
+        Returns:
+            False if the circuit is open, True otherwise
+        """
+        with self._lock:
+            if self._state != "open":
+                return True
+            if not self._reset_timeout_passed():
                 return False
+            logger.info(f"Circuit {self.name} reset timeout passed, moving to HALF-OPEN")
+            self._state = "half_open"
+            return True
 
-        # Perform the actual check
-        try:
-            result = self.check_function()
-            self._cache[self.name] = (result, current_time)
+    def before_call(self) -> None:
+        """Refuse a real call when the circuit is open.
 
-            if result:
-                self.record_success()
-            else:
-                self.record_failure()
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit {self.name} is open, the provider is failing or slow")
 
-            return result
-        except Exception as e:
-            logger.warning(f"Error checking {self.name} availability: {e}")
-            self.record_failure()
-            return False
+    def record_call(self, success: bool, duration: float) -> None:
+        """Count the outcome of a real provider call.
 
-    def record_failure(self) -> None:
-        """Handle failed check."""
-        self._failures += 1
-        self._last_failure_time = time.time()
-        self.success_count = 0
+        Args:
+            success: Whether the call returned a response
+            duration: Time the call took in seconds
+        """
+        slow = duration >= self.config.slow_call_seconds
+        if success and not slow:
+            self.record_success()
+        else:
+            self._record_outcome(failed=not success, slow=slow)
 
-        if self._state == "closed" and self._failures >= self.config.failure_threshold:
-            logger.warning(f"Circuit {self.name} is now OPEN")
-            self._state = "open"
-        elif self._state == "half_open":
-            logger.warning(f"Circuit {self.name} is back to OPEN")
-            self._state = "open"
+    def record_probe(self, available: bool) -> None:
+        """Use a health check result for the open to half-open transition only.
 
-    def record_success(self) -> None:
-        """Handle successful check."""
-        self.last_success_time = time.time()
-        self.success_count += 1
-        self._failures = 0
+        Probe results are not counted in the sliding window, so a passing check
+        cannot hide failing real calls and a failing one cannot open the circuit.
+        A metadata endpoint can answer while completions are slow, so a passing
+        check never moves the circuit to half-open before the reset timeout; a
+        failing check restarts the reset timeout.
+
+        Args:
+            available: Whether the health check passed
+        """
+        with self._lock:
+            if self._state != "open":
+                return
+            if not available:
+                self._opened_at = time.monotonic()
+            elif self._reset_timeout_passed():
+                logger.info(f"Circuit {self.name} health check passed after the reset timeout, moving to HALF-OPEN")
+                self._state = "half_open"
 
-        if self._state == "half_open":
-            if self.success_count >= self.config.success_threshold:
+    def record_failure(self) -> None:
+        """Count a failed real call."""
+        self._record_outcome(failed=True, slow=False)
+
+    def record_success(self) -> None:
+        """Count a successful real call and close a half-open circuit."""
+        with self._lock:
+            self.last_success_time = time.time()
+            self.success_count += 1
+            self._failures = 0
+            self._window.record(failed=False, slow=False)
+
+            closed = self._state == "half_open" and self.success_count >= self.config.success_threshold
+            if closed:
                 logger.info(f"Circuit {self.name} is now CLOSED")
                 self._state = "closed"
                 self.success_count = 0
+                self._window.clear()
+        if closed:
+            self._notify(True)
+
+    def window_stats(self) -> WindowStats:
+        """Return the call outcomes of the sliding window.
+
+        Returns:
+            A WindowStats object
+        """
+        with self._lock:
+            return self._window.stats()
+
+    def add_listener(self, listener: Callable[[str, bool], None]) -> None:
+        """Register a function that is called when the circuit opens or closes.
+
+        Args:
+            listener: Function called with the breaker name and whether the service
+                is available
+        """
+        self._listeners.append(listener)
 
     def reset(self) -> None:
         """Reset the circuit breaker to closed state."""
-        self._state = "closed"
-        self._failures = 0
-        self.success_count = 0
-        self._cache.clear()
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self.success_count = 0
+            self._cache.clear()
+            self._window.clear()
         logger.info(f"Circuit {self.name} has been manually reset")
 
     def is_open(self) -> bool:
@@ -156,6 +359,51 @@ def is_open(self) -> bool:
             return True
         return False
 
+    def _record_outcome(self, failed: bool, slow: bool) -> None:
+        """Count a failed or slow outcome and open the circuit when a threshold is reached."""
+        with self._lock:
+            self._failures += int(failed)
+            self._last_failure_time = time.time()
+            self.success_count = 0
+            self._window.record(failed=failed, slow=slow)
+
+            opened = False
+            if self._state == "half_open":
+                logger.warning(f"Circuit {self.name} is back to OPEN")
+                self._state = "open"
+                opened = True
+            elif self._state == "closed" and self._should_open(self._window.stats()):
+                self._state = "open"
+                opened = True
+            if opened:
+                self._opened_at = time.monotonic()
+        if opened:
+            self._notify(False)
+
+    def _reset_timeout_passed(self) -> bool:
+        """Check whether the open circuit has waited for the reset timeout (the lock is held)."""
+        return self._opened_at is None or time.monotonic() - self._opened_at >= self.config.reset_timeout
+
+    def _should_open(self, stats: WindowStats) -> bool:
+        """Check the window against the error-rate and slow-call-rate thresholds."""
+        if stats.calls < self.config.minimum_calls:
+            return False
+        if stats.error_rate >= self.config.error_rate_threshold:
+            logger.warning(f"Circuit {self.name} is now OPEN: {stats.error_rate:.0%} of {stats.calls} calls failed")
+            return True
+        if stats.slow_call_rate >= self.config.slow_call_rate_threshold:
+            logger.warning(f"Circuit {self.name} is now OPEN: {stats.slow_call_rate:.0%} of {stats.calls} calls were slow")
+            return True
+        return False
+
+    def _notify(self, available: bool) -> None:
+        """Tell the listeners that the circuit opened or closed."""
+        for listener in self._listeners:
+            try:
+                listener(self.name, available)
+            except Exception as e:
+                logger.warning(f"Circuit {self.name} listener failed: {e}")
+
 
 # Replace with class-based singleton pattern
 class CircuitBreakerFactory:
@@ -173,7 +421,7 @@ def get_ollama_breaker(cls) -> CircuitBreaker:
             The Ollama circuit breaker instance
         """
         if cls._ollama_breaker is None:
-            from src.llm.ollama_llm import check_ollama_availability
+            from src.llm.health_checks import check_ollama_availability
 
             cls._ollama_breaker = CircuitBreaker("ollama", check_ollama_availability)
         return cls._ollama_breaker
@@ -186,7 +434,7 @@ def get_openai_breaker(cls) -> CircuitBreaker:
             The OpenAI circuit breaker instance
         """
         if cls._openai_breaker is None:
-            from src.llm.openai_llm import check_openai_availability
+            from src.llm.health_checks import check_openai_availability
 
             cls._openai_breaker = CircuitBreaker("openai", check_openai_availability)
         return cls._openai_breaker
@@ -199,35 +447,295 @@ def get_claude_breaker(cls) -> CircuitBreaker:
             The Claude circuit breaker instance
         """
         if cls._claude_breaker is None:
-            from src.llm.claude_llm import check_claude_availability
+            from src.llm.health_checks import check_claude_availability
 
             cls._claude_breaker = CircuitBreaker("claude", check_claude_availability)
         return cls._claude_breaker
 
+    @classmethod
+    def get_breaker(cls, provider: str) -> CircuitBreaker | None:
+        """Get the circuit breaker of a provider.
+
+        Args:
+            provider: The provider name, for example "anthropic" or "ollama"
+
+        Returns:
+            The circuit breaker, or None for a provider without one
+        """
+        getter = {
+            "anthropic": cls.get_claude_breaker,
+            "claude": cls.get_claude_breaker,
+            "openai": cls.get_openai_breaker,
+            "ollama": cls.get_ollama_breaker,
+        }.get(provider.lower())
+        return getter() if getter else None
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """Reset every circuit breaker that was created."""
+        for breaker in (cls._ollama_breaker, cls._openai_breaker, cls._claude_breaker):
+            if breaker is not None:
+                breaker.reset()
+
+
+@dataclass(frozen=True)
+class HealthSnapshot:
+    """Immutable provider health published by the HealthProber.
+
+    Attributes:
+        available: Availability of each provider, keyed by circuit breaker name
+        checked_at: Time of the probe round that produced the snapshot (Unix timestamp)
+    """
+
+    available: Mapping[str, bool] = field(default_factory=lambda: MappingProxyType({}))
+    checked_at: float = 0.0
+
+    def is_stale(self, max_age: float) -> bool:
+        """Check whether the last probe round is older than `max_age` seconds.
+
+        Args:
+            max_age: Age in seconds after which the snapshot is not trusted
+
+        Returns:
+            True if the snapshot is too old to trust
+        """
+        return time.time() - self.checked_at > max_age
+
+
+class HealthProber:
+    """Background thread that refreshes provider health on a schedule.
+
+    Each round runs the `is_available` check of every circuit breaker in parallel and
+    replaces the published snapshot with a new one. A circuit that opens or closes
+    because of real call outcomes is published at once, between two rounds. Readers never take a lock: they
+    read the current snapshot reference, which is swapped atomically. A round that
+    fails is logged and the loop goes on; when no round succeeded for
+    `STALE_PROBE_INTERVALS` intervals, readers fall back to the circuit state.
+
+    Attributes:
+        interval: Seconds between two probe rounds
+
+    Example:
+        ```python
+        prober = HealthProber([CircuitBreakerFactory.get_ollama_breaker()], interval=10)
+        prober.start()
+        prober.is_available("ollama")
+        ```
+    """
+
+    def __init__(self, breakers: list[CircuitBreaker], interval: float | None = None) -> None:
+        """Initialize the prober without starting the thread.
+
+        Args:
+            breakers: The circuit breakers whose checks are run
+            interval: Seconds between two probe rounds. Defaults to the
+                LLM_HEALTH_PROBE_INTERVAL environment variable, or 10.
+        """
+        if interval is None:
+            interval = float(os.getenv("LLM_HEALTH_PROBE_INTERVAL", str(DEFAULT_PROBE_INTERVAL)))
+        self.interval = interval
+        self._breakers = {breaker.name: breaker for breaker in breakers}
+        for breaker in breakers:
+            breaker.add_listener(self._on_circuit_change)
+        self._snapshot = HealthSnapshot()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> HealthSnapshot:
+        """Get the latest published health snapshot.
+
+        Returns:
+            The current HealthSnapshot
+        """
+        return self._snapshot
+
+    def is_available(self, name: str) -> bool:
+        """Read the availability of a provider from the snapshot.
+
+        When the snapshot is stale, the probe result is unknown and the circuit state
+        of the breaker decides: a circuit that is not open counts as available.
+
+        Args:
+            name: The circuit breaker name, for example "claude"
+
+        Returns:
+            True if the last probe found the provider available
+        """
+        snapshot = self._snapshot
+        if not snapshot.is_stale(self.interval * STALE_PROBE_INTERVALS):
+            return snapshot.available.get(name, False)
+        breaker = self._breakers.get(name)
+        return breaker is not None and breaker.state != CircuitState.OPEN
+
+    def start(self) -> None:
+        """Run a first probe round, then start the background thread (only once)."""
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self.probe()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="llm-health-prober", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        with self._thread_lock:
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+    def probe(self) -> HealthSnapshot:
+        """Check every provider now and publish the results.
+
+        Returns:
+            The new HealthSnapshot
+        """
+        names = list(self._breakers)
+        with ThreadPoolExecutor(max_workers=max(1, len(names)), thread_name_prefix="llm-health-check") as pool:
+            results = list(pool.map(self._check, names))
+        return self.publish(dict(zip(names, results, strict=True)), checked_at=time.time())
+
+    def publish(self, available: dict[str, bool], checked_at: float | None = None) -> HealthSnapshot:
+        """Publish new availability values, keeping the values of other providers.
+
+        Args:
+            available: Availability of the updated providers, keyed by breaker name
+            checked_at: Time of the probe round that produced the values; the time
+                of the last round is kept when the values come from a circuit change
+
+        Returns:
+            The new HealthSnapshot
+        """
+        with self._publish_lock:
+            merged = {**self._snapshot.available, **available}
+            if checked_at is None:
+                checked_at = self._snapshot.checked_at
+            self._snapshot = HealthSnapshot(available=MappingProxyType(merged), checked_at=checked_at)
+            return self._snapshot
+
+    def _on_circuit_change(self, name: str, available: bool) -> None:
+        """Publish a circuit that opened or closed because of real calls right away."""
+        self.publish({name: available})
+
+    def _check(self, name: str) -> bool:
+        """Run the check of one breaker; errors count as unavailable."""
+        try:
+            return self._breakers[name].is_available()
+        except Exception as e:
+            logger.warning(f"Health probe of {name} failed: {e}")
+            return False
+
+    def _run(self) -> None:
+        """Probe loop: refresh the snapshot until the prober is stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"Health probe round failed, the snapshot was not refreshed: {e}")
+
+
+class HealthProberFactory:
+    """Factory for the process-wide health prober."""
+
+    _prober: HealthProber | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_prober(cls) -> HealthProber:
+        """Get the shared health prober of the Claude, OpenAI, and Ollama breakers.
+
+        The prober is started on first use: the first call waits for one probe
+        round. The API server calls this at startup.
+
+        Returns:
+            The running HealthProber instance
+        """
+        with cls._lock:
+            if cls._prober is None:
+                cls._prober = HealthProber(
+                    [
+                        CircuitBreakerFactory.get_claude_breaker(),
+                        CircuitBreakerFactory.get_openai_breaker(),
+                        CircuitBreakerFactory.get_ollama_breaker(),
+                    ]
+                )
+            prober = cls._prober
+        prober.start()
+        return prober
+
+    @classmethod
+    def current(cls) -> HealthProber | None:
+        """Get the shared health prober without a lock, or None before it was created.
+
+        Returns:
+            The HealthProber instance, or None
+        """
+        return cls._prober
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker | None:
+    """Get the circuit breaker of a provider.
+
+    Args:
+        provider: The provider name, for example "anthropic" or "ollama"
+
+    Returns:
+        The circuit breaker, or None for a provider without one
+    """
+    return CircuitBreakerFactory.get_breaker(provider)
+
+
+def get_health_prober() -> HealthProber:
+    """Get the shared, running health prober.
+
+    Returns:
+        The HealthProber instance
+    """
+    return HealthProberFactory.get_prober()
+
+
+def _read_availability(name: str) -> bool:
+    """Read the availability of a provider from the snapshot of the shared prober.
+
+    Only the first read of a process that did not start the prober (for example the
+    command line tool) starts it; later reads take no lock.
+    """
+    prober = HealthProberFactory.current() or get_health_prober()
+    return prober.is_available(name)
+
 
 def is_ollama_available() -> bool:
     """Check if Ollama is available.
 
+    Reads the latest snapshot of the background health prober.
+
     Returns:
         True if Ollama is available, False otherwise
     """
-    return CircuitBreakerFactory.get_ollama_breaker().is_available()
+    return _read_availability("ollama")
 
 
 def is_openai_available() -> bool:
     """Check if OpenAI is available.
 
+    Reads the latest snapshot of the background health prober.
+
     Returns:
         True if OpenAI is available, False otherwise
     """
-    return CircuitBreakerFactory.get_openai_breaker().is_available()
+    return _read_availability("openai")
 
 
 def is_claude_available() -> bool:
     """Check if Claude (Anthropic) is available.
 
+    Reads the latest snapshot of the background health prober.
+
     Returns:
         True if Claude is available, False otherwise
     """
-    return CircuitBreakerFactory.get_claude_breaker().is_available()
-
+    return _read_availability("claude")
@@ -1,40 +1,19 @@
 """Claude (Anthropic) LLM implementation."""
 
 import os
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
-import requests
-from langchain.callbacks.manager import CallbackManagerForLLMRun
-from langchain.schema import BaseMessage
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage
 from langchain_anthropic import ChatAnthropic
 from pydantic import SecretStr
 
-from src.llm.base import BaseLLM
-from src.llm.circuit_breaker import HTTP_OK
-
-
-def check_claude_availability() -> bool:
-    """Check if Anthropic Claude API is available.
-
-    Returns:
-        True if Claude is available, False otherwise
-    """
-    api_key = os.getenv("ANTHROPIC_API_KEY", "")
-    if not api_key:
-        return False
-
-    try:
-        response = requests.get(
-            "https://api.anthropic.com/v1/models",
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-            },
-            timeout=2,
-        )
-        return response.status_code == HTTP_OK
-    except (requests.RequestException, TimeoutError):
-        return False
+from src.llm.base import BaseLLM, content_text
+from src.llm.config import config_manager
+from src.llm.health_checks import check_claude_availability  # noqa: F401 - re-exported for existing imports
+from src.llm.metrics import report_usage
+from src.llm.prompt_cache import cached_block
 
 
 class ClaudeLLM(BaseLLM):
@@ -42,6 +21,14 @@ class ClaudeLLM(BaseLLM):
 
     This class implements the BaseLLM interface for Anthropic's Claude models.
     It wraps the LangChain ChatAnthropic class to provide a consistent interface.
+
+    With prompt caching on, a system prompt is sent as a content block with a cache
+    marker, and the CrewAI client from `get_crewai_llm` marks the stable prefixes of
+    the agent prompts (see `src.llm.prompt_cache`).
+
+    Attributes:
+        system_prompt: Stable instructions sent before every prompt, or None
+        prompt_caching: Whether stable prompt prefixes are marked for caching
     """
 
     def __init__(
@@ -49,6 +36,8 @@ def __init__(
         model_name: str = "claude-sonnet-4-20250514",
         temperature: float = 0.7,
         api_key: str | None = None,
+        system_prompt: str | None = None,
+        prompt_caching: bool | None = None,
         **kwargs: Any,
     ) -> None:
         """Initialize the Claude LLM.
@@ -57,12 +46,20 @@ def __init__(
             model_name: The name of the model to use
             temperature: The temperature to use for generation
             api_key: The Anthropic API key. If not provided, will be read from environment
+            system_prompt: Stable instructions sent as a system block before every prompt
+            prompt_caching: Whether to mark stable prompt prefixes for caching. None
+                uses the `anthropic.prompt_caching` setting of `LLMConfig`
             **kwargs: Additional arguments to pass to the ChatAnthropic constructor
         """
         super().__init__(model_name=model_name, temperature=temperature)
         self._model_name = model_name
         self._temperature = temperature
         self._api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        self._base_url = kwargs.get("base_url") or kwargs.get("anthropic_api_url")
+        self.system_prompt = system_prompt
+        if prompt_caching is None:
+            prompt_caching = config_manager.get_config().anthropic.prompt_caching
+        self.prompt_caching = prompt_caching
 
         if not self._api_key:
             raise ValueError("Anthropic API key not provided and ANTHROPIC_API_KEY environment variable not set")
@@ -92,11 +89,105 @@ def _call(
         Returns:
             The generated text from the LLM
         """
-        response = self._llm.invoke(prompt)
+        return self._execute(self._full_prompt(prompt), stop, lambda: self._invoke(prompt))
+
+    def _invoke(self, prompt: str) -> str:
+        """Send the prompt to Claude and return the generated text."""
+        response = self._llm.invoke(self._messages(prompt))
+        report_usage(response)
+        if isinstance(response, str):
+            return response
+        return str(response.content)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the LLM asynchronously with the given prompt.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            run_manager: Optional async callback manager
+            **kwargs: Additional arguments to pass to the LLM
+
+        Returns:
+            The generated text from the LLM
+        """
+        return await self._aexecute(self._full_prompt(prompt), stop, lambda: self._ainvoke(prompt))
+
+    async def _ainvoke(self, prompt: str) -> str:
+        """Send the prompt to Claude with the async client and return the generated text."""
+        response = await self._llm.ainvoke(self._messages(prompt))
+        report_usage(response)
         if isinstance(response, str):
             return response
         return str(response.content)
 
+    def _stream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> Iterator[str]:
+        """Stream the generated text of a prompt from Claude.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        for chunk in self._stream_limited(lambda: self._llm.stream(self._messages(prompt)), self._full_prompt(prompt)):
+            yield content_text(chunk.content)
+
+    async def _astream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> AsyncIterator[str]:
+        """Stream the generated text of a prompt from Claude with the async client.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        async for chunk in self._astream_limited(lambda: self._llm.astream(self._messages(prompt)), self._full_prompt(prompt)):
+            yield content_text(chunk.content)
+
+    def _messages(self, prompt: str) -> str | list[BaseMessage]:
+        """Build the input of ChatAnthropic: the prompt alone, or the system block and the prompt."""
+        if not self.system_prompt:
+            return prompt
+        system = [cached_block(self.system_prompt)] if self.prompt_caching else self.system_prompt
+        return [SystemMessage(content=system), HumanMessage(content=prompt)]
+
+    def _full_prompt(self, prompt: str) -> str:
+        """Get the text that identifies a request in the response cache and in the metrics."""
+        return f"{self.system_prompt}\n\n{prompt}" if self.system_prompt else prompt
+
+    def get_crewai_llm(self) -> Any:
+        """Get the client that CrewAI agents use for Claude.
+
+        With prompt caching on, this is a `PromptCachingLLM` that marks the stable
+        prefixes of the agent prompts for caching. CrewAI is imported here, on first
+        use.
+
+        Returns:
+            A CrewAI LLM, or this object when prompt caching is off
+        """
+        if not self.prompt_caching:
+            return super().get_crewai_llm()
+
+        from src.llm.crewai_llm import PromptCachingLLM
+
+        return PromptCachingLLM(
+            model=f"anthropic/{self.model_name}",
+            temperature=self.temperature,
+            api_key=self._api_key,
+            base_url=self._base_url,
+        )
+
     def __call__(self, prompt: str | list[BaseMessage], **kwargs: Any) -> str:
         """Call the LLM with the given prompt.
 
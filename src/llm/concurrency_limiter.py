@@ -0,0 +1,404 @@
+"""Adaptive limits on the number of parallel requests to each LLM model.
+
+A model server can only run a few generations well at the same time. Local Ollama
+saturates at a few parallel requests (fewer for `llama3:70b` than for `llama3`),
+and beyond that point every request gets slower. A fixed worker count is either
+too low for a small model or too high for a large one, so this module keeps an
+adaptive limit per (provider, model) with the AIMD rule (additive increase,
+multiplicative decrease):
+
+- While the limit is in use and the latency holds steady, every successful
+  request raises the limit by 1/limit, which is about one more request in
+  flight per round of requests.
+- When the recent latency average rises above LATENCY_TOLERANCE times the
+  baseline, the limit is multiplied by baseline / latency, which is about the
+  number of requests the model serves without delay, but by at least
+  ERROR_BACKOFF and at most LATENCY_BACKOFF. A timeout, rate limit, server
+  error, or lost connection halves it (ERROR_BACKOFF).
+- The baseline is the lowest recent latency average. It follows a lower average
+  at once and a higher one only slowly (BASELINE_DRIFT), so a latency that rises
+  step by step with the limit is still noticed, while a model whose answers got
+  longer for good gets a new baseline after a while.
+- The recent average starts again after a cut, and requests that were sent
+  before the last cut are not counted, so one burst of slow answers counts as
+  one signal.
+
+The latency signal is the time to first token of a stream, and the time per
+generated token of a request that is not streamed, so that longer answers do not
+look like a slower model.
+
+Only local models start low (INITIAL_LIMIT) and have to earn a higher limit.
+Cloud providers serve many requests in parallel, so their models start at the
+`max_in_flight` setting and the limit only drops when the latency rises or the
+provider reports an overload.
+
+Requests above the limit wait in a first-in, first-out queue. Threads wait on a
+condition variable and coroutines on a future of their event loop that a release
+resolves, so a waiting coroutine never polls. The time in the queue is reported in
+the metrics together with the rate limiter wait, apart from the provider latency.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any
+
+from src.llm.config import config_manager
+from src.llm.event_loop import wake_waiters
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Limit of a new local model before any feedback
+INITIAL_LIMIT = 2
+
+# Providers whose models run on local hardware and start at INITIAL_LIMIT; others start at max_in_flight
+LOCAL_PROVIDERS = ("ollama",)
+
+# The limit never goes below this many requests in flight
+MIN_LIMIT = 1
+
+# Weight of the newest request in the recent latency average
+LATENCY_ALPHA = 0.2
+
+# Share by which the baseline may rise per round of requests (one request per slot of the limit)
+BASELINE_DRIFT = 0.01
+
+# Successful requests needed, after the start and after every cut, before the latency is compared with the baseline
+MIN_SAMPLES = 10
+
+# The limit is cut when the recent latency average exceeds the baseline by this factor
+LATENCY_TOLERANCE = 1.5
+
+# Largest share of the limit kept after a latency rise
+LATENCY_BACKOFF = 0.8
+
+# Share of the limit kept after an overload error, and the smallest share kept after a latency rise
+ERROR_BACKOFF = 0.5
+
+
+@dataclass(frozen=True)
+class ConcurrencyStats:
+    """Snapshot of an adaptive concurrency limiter.
+
+    Attributes:
+        limit: Current limit on requests in flight
+        max_limit: Highest allowed limit
+        in_flight: Requests in flight now
+        waiting: Requests waiting for a slot now
+        latency: Recent latency average in seconds, None before the first success
+        baseline: Baseline latency in seconds, None before the first success
+        increases: Times the limit was raised
+        decreases: Times the limit was cut
+    """
+
+    limit: float
+    max_limit: int
+    in_flight: int
+    waiting: int
+    latency: float | None
+    baseline: float | None
+    increases: int
+    decreases: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the snapshot to a JSON-friendly dictionary.
+
+        Returns:
+            The counters, with the limit and the latencies rounded to 4 decimals
+        """
+        return {
+            "limit": round(self.limit, 4),
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "latency": None if self.latency is None else round(self.latency, 4),
+            "baseline": None if self.baseline is None else round(self.baseline, 4),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
+
+
+class ConcurrencySlot:
+    """Permission to have one request in flight; give it back with `release`.
+
+    Attributes:
+        waited: Seconds spent in the queue before the slot was granted
+        in_flight: Requests in flight, this one included, when the slot was granted
+        started: `time.monotonic()` when the slot was granted
+    """
+
+    def __init__(self, limiter: "AdaptiveConcurrencyLimiter", waited: float, in_flight: int) -> None:
+        self._limiter = limiter
+        self._released = False
+        self.waited = waited
+        self.in_flight = in_flight
+        self.started = time.monotonic()
+
+    def release(self, latency: float | None = None, overload: bool = False) -> None:
+        """Give the slot back and adapt the limit to the outcome of the request.
+
+        Only the first call has an effect, so the slot can also be released in a
+        `finally` block after the outcome was reported.
+
+        Args:
+            latency: Latency of a successful request in seconds, None for no feedback
+            overload: Whether the request failed because the provider was overloaded
+        """
+        if self._released:
+            return
+        self._released = True
+        self._limiter._release(self, latency, overload)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Limit on the requests in flight to one model that follows the AIMD rule.
+
+    Attributes:
+        max_limit: Highest allowed limit
+        limit: Current limit; the number of requests in flight is at most its integer part
+
+    Example:
+        ```python
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8)
+        slot = limiter.acquire()  # waits while the limit is reached
+        try:
+            answer = send_request()
+        except TimeoutError:
+            slot.release(overload=True)
+            raise
+        slot.release(latency=1.2)
+        ```
+    """
+
+    def __init__(self, max_limit: int, initial_limit: int = INITIAL_LIMIT) -> None:
+        """Initialize a limiter without latency samples.
+
+        Args:
+            max_limit: Highest allowed limit
+            initial_limit: Limit before any feedback, at most max_limit
+
+        Raises:
+            ValueError: If max_limit is smaller than MIN_LIMIT
+        """
+        if max_limit < MIN_LIMIT:
+            raise ValueError(f"max_limit must be at least {MIN_LIMIT}, got {max_limit}")
+        self.max_limit = max_limit
+        self.limit = float(max(MIN_LIMIT, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._waiters: deque[object] = deque()
+        self._condition = threading.Condition(threading.Lock())
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._latency: float | None = None
+        self._baseline: float | None = None
+        self._samples = 0
+        self._last_cut = 0.0
+        self._increases = 0
+        self._decreases = 0
+
+    def acquire(self) -> ConcurrencySlot:
+        """Wait in the current thread for a free slot.
+
+        Returns:
+            The granted ConcurrencySlot
+        """
+        start = time.monotonic()
+        ticket = self._enqueue()
+        try:
+            with self._condition:
+                while not self._try_grant(ticket):
+                    self._condition.wait()
+                in_flight = self._in_flight
+        except BaseException:
+            self._remove(ticket)
+            raise
+        return ConcurrencySlot(self, time.monotonic() - start, in_flight)
+
+    async def aacquire(self) -> ConcurrencySlot:
+        """Wait for a free slot without blocking the event loop.
+
+        Returns:
+            The granted ConcurrencySlot
+        """
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        ticket = self._enqueue()
+        try:
+            while True:
+                with self._condition:
+                    if self._try_grant(ticket):
+                        in_flight = self._in_flight
+                        break
+                    wakeup = loop.create_future()
+                    self._async_waiters.append((loop, wakeup))
+                await wakeup
+        except BaseException:
+            self._remove(ticket)
+            raise
+        return ConcurrencySlot(self, time.monotonic() - start, in_flight)
+
+    def stats(self) -> ConcurrencyStats:
+        """Get a snapshot of the limit, the queue, and the latency averages.
+
+        Returns:
+            A ConcurrencyStats object
+        """
+        with self._condition:
+            return ConcurrencyStats(
+                limit=self.limit,
+                max_limit=self.max_limit,
+                in_flight=self._in_flight,
+                waiting=len(self._waiters),
+                latency=self._latency,
+                baseline=self._baseline,
+                increases=self._increases,
+                decreases=self._decreases,
+            )
+
+    def _enqueue(self) -> object:
+        """Add a ticket to the end of the queue."""
+        ticket = object()
+        with self._condition:
+            self._waiters.append(ticket)
+        return ticket
+
+    def _try_grant(self, ticket: object) -> bool:
+        """Grant a slot if the ticket is first in the queue and the limit allows it. Call with the lock held."""
+        if self._waiters[0] is not ticket or self._in_flight >= int(self.limit):
+            return False
+        self._waiters.popleft()
+        self._in_flight += 1
+        self._notify_all()
+        return True
+
+    def _remove(self, ticket: object) -> None:
+        """Take a ticket that gave up out of the queue."""
+        with self._condition:
+            if ticket in self._waiters:
+                self._waiters.remove(ticket)
+                self._notify_all()
+
+    def _release(self, slot: ConcurrencySlot, latency: float | None, overload: bool) -> None:
+        """Free the slot and apply the AIMD rule to the outcome of its request."""
+        with self._condition:
+            self._in_flight -= 1
+            if overload:
+                self._cut(slot, ERROR_BACKOFF, "overload error")
+            elif latency is not None:
+                self._observe(slot, latency)
+            self._notify_all()
+
+    def _notify_all(self) -> None:
+        """Wake up every waiting thread and coroutine to check the queue again. Call with the lock held."""
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        wake_waiters(waiters)
+
+    def _observe(self, slot: ConcurrencySlot, latency: float) -> None:
+        """Update the latency average and the baseline, and raise or cut the limit. Call with the lock held."""
+        if slot.started < self._last_cut:
+            # The request was sent under the limit before the last cut
+            return
+        self._latency = latency if self._latency is None else self._latency + LATENCY_ALPHA * (latency - self._latency)
+        self._samples += 1
+        if self._samples < MIN_SAMPLES:
+            return
+
+        if self._baseline is None:
+            self._baseline = self._latency
+        else:
+            self._baseline = min(self._latency, self._baseline * (1.0 + BASELINE_DRIFT / self.limit))
+        if self._latency > self._baseline * LATENCY_TOLERANCE:
+            # Keep the share of the limit that the model serves at its baseline latency
+            backoff = max(ERROR_BACKOFF, min(LATENCY_BACKOFF, self._baseline / self._latency))
+            self._cut(slot, backoff, f"latency {self._latency:.2f}s over baseline {self._baseline:.2f}s")
+        elif slot.in_flight * 2 >= self.limit and self.limit < self.max_limit:
+            # Only raise a limit that is in use, so an idle model does not build up a high limit
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._increases += 1
+
+    def _cut(self, slot: ConcurrencySlot, backoff: float, reason: str) -> None:
+        """Cut the limit, unless the request was sent before the last cut. Call with the lock held."""
+        if slot.started < self._last_cut:
+            return
+        self.limit = max(float(MIN_LIMIT), self.limit * backoff)
+        self._last_cut = time.monotonic()
+        self._latency = None
+        self._samples = 0
+        self._decreases += 1
+        logger.info(f"Concurrency limit cut to {self.limit:.2f} ({reason})")
+
+
+class ConcurrencyLimiterFactory:
+    """Factory for the process-wide concurrency limiters, one per provider and model."""
+
+    _limiters: dict[tuple[str, str], AdaptiveConcurrencyLimiter] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_limiter(cls, provider: str, model: str) -> AdaptiveConcurrencyLimiter | None:
+        """Get the concurrency limiter of a model.
+
+        The highest limit is the `max_in_flight` setting of the provider in
+        `LLMConfig`; a changed setting applies to the existing limiter. Models of
+        LOCAL_PROVIDERS start at INITIAL_LIMIT, the others at the highest limit.
+
+        Args:
+            provider: The provider name, for example "ollama"
+            model: The model name, for example "llama3:70b"
+
+        Returns:
+            The shared AdaptiveConcurrencyLimiter, or None if adaptive concurrency
+            is disabled or the provider has no `max_in_flight`
+        """
+        config = config_manager.get_config()
+        provider = provider.lower()
+        max_limit = getattr(getattr(config, provider, None), "max_in_flight", 0) or 0
+        if not config.adaptive_concurrency or max_limit < MIN_LIMIT:
+            return None
+
+        with cls._lock:
+            limiter = cls._limiters.get((provider, model))
+            if limiter is None:
+                initial_limit = INITIAL_LIMIT if provider in LOCAL_PROVIDERS else max_limit
+                limiter = cls._limiters[(provider, model)] = AdaptiveConcurrencyLimiter(max_limit, initial_limit)
+            elif limiter.max_limit != max_limit:
+                with limiter._condition:
+                    limiter.max_limit = max_limit
+                    limiter.limit = min(limiter.limit, float(max_limit))
+                    limiter._notify_all()
+            return limiter
+
+    @classmethod
+    def stats(cls) -> dict[str, ConcurrencyStats]:
+        """Get a snapshot of every limiter.
+
+        Returns:
+            The ConcurrencyStats per "provider/model"
+        """
+        with cls._lock:
+            limiters = dict(cls._limiters)
+        return {f"{provider}/{model}": limiter.stats() for (provider, model), limiter in limiters.items()}
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget all limiters, so that the next requests start from the initial limit."""
+        with cls._lock:
+            cls._limiters.clear()
+
+
+def get_concurrency_limiter(provider: str, model: str) -> AdaptiveConcurrencyLimiter | None:
+    """Get the concurrency limiter of a model, or None if it has no limit.
+
+    Args:
+        provider: The provider name, for example "ollama"
+        model: The model name, for example "llama3"
+
+    Returns:
+        The shared AdaptiveConcurrencyLimiter instance, or None
+    """
+    return ConcurrencyLimiterFactory.get_limiter(provider, model)
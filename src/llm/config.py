@@ -21,6 +21,9 @@ class OpenAIConfig:
     top_p: float = 1.0
     frequency_penalty: float = 0.0
     presence_penalty: float = 0.0
+    requests_per_minute: int = 0  # 0 means no limit
+    tokens_per_minute: int = 0  # Prompt and completion tokens per minute, 0 means no limit
+    max_in_flight: int = 32  # Highest adaptive limit on parallel requests per model, 0 means no limit
 
 
 @dataclass
@@ -33,6 +36,14 @@ class OllamaConfig:
     top_p: float = 0.9
     top_k: int = 40
     num_ctx: int = 4096
+    requests_per_minute: int = 0  # 0 means no limit
+    tokens_per_minute: int = 0  # Prompt and completion tokens per minute, 0 means no limit
+    max_in_flight: int = 4  # Highest adaptive limit on parallel requests per model, 0 means no limit
+    keep_alive: str = "30m"  # How long Ollama keeps a model loaded after a request
+    pinned_models: list[str] = field(default_factory=list)  # Models kept loaded for good
+    warmup: bool = True  # Load the models at startup and keep them loaded in the background
+    warmup_interval_seconds: int = 60
+    backend: str = "langchain"  # Client of OllamaLLM: "langchain" (ChatOllama) or "native" (pooled HTTP client)
 
 
 @dataclass
@@ -44,6 +55,10 @@ class AnthropicConfig:
     temperature: float = 0.7
     max_tokens: int = 4096
     top_p: float = 1.0
+    requests_per_minute: int = 0  # 0 means no limit
+    tokens_per_minute: int = 0  # Prompt and completion tokens per minute, 0 means no limit
+    max_in_flight: int = 32  # Highest adaptive limit on parallel requests per model, 0 means no limit
+    prompt_caching: bool = True  # Mark stable prompt prefixes for Anthropic prompt caching
 
 
 @dataclass
@@ -58,7 +73,16 @@ class LLMConfig:
     sensitive_data_handling: bool = True
     cache_responses: bool = True
     cache_dir: str = ".cache/llm"
+    cache_ttl_seconds: int = 86400
+    cache_max_entries: int = 10000
     timeout_seconds: int = 30
+    max_concurrency: int = 8
+    hedge_percentile: float = 0.0  # 0 disables hedged requests
+    retry_budget_ratio: float = 0.2  # Retries allowed per request, over the whole process
+    llm_pool_size: int = 16  # Pooled LLM instances; 0 disables the pool
+    llm_pool_idle_seconds: int = 600
+    llm_routing: bool = True  # Route get_llm_for_task by the latency and error rate of real calls
+    adaptive_concurrency: bool = True  # Adapt the parallel requests per model to its latency and errors
 
 
 class ConfigManager:
@@ -92,7 +116,16 @@ def _load_config(self) -> LLMConfig:
         config.sensitive_data_handling = os.getenv("LLM_SENSITIVE_DATA_HANDLING", "true").lower() == "true"
         config.cache_responses = os.getenv("LLM_CACHE_RESPONSES", "true").lower() == "true"
         config.cache_dir = os.getenv("LLM_CACHE_DIR", ".cache/llm")
+        config.cache_ttl_seconds = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+        config.cache_max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
         config.timeout_seconds = int(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        config.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        config.hedge_percentile = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+        config.retry_budget_ratio = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+        config.llm_pool_size = int(os.getenv("LLM_POOL_SIZE", "16"))
+        config.llm_pool_idle_seconds = int(os.getenv("LLM_POOL_IDLE_SECONDS", "600"))
+        config.llm_routing = os.getenv("LLM_ROUTING", "true").lower() == "true"
+        config.adaptive_concurrency = os.getenv("LLM_ADAPTIVE_CONCURRENCY", "true").lower() == "true"
 
         # OpenAI settings
         config.openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -102,6 +135,9 @@ def _load_config(self) -> LLMConfig:
         config.openai.top_p = float(os.getenv("OPENAI_TOP_P", "1.0"))
         config.openai.frequency_penalty = float(os.getenv("OPENAI_FREQUENCY_PENALTY", "0.0"))
         config.openai.presence_penalty = float(os.getenv("OPENAI_PRESENCE_PENALTY", "0.0"))
+        config.openai.requests_per_minute = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "0"))
+        config.openai.tokens_per_minute = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "0"))
+        config.openai.max_in_flight = int(os.getenv("OPENAI_MAX_IN_FLIGHT", "32"))
 
         # Ollama settings
         config.ollama.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
@@ -110,6 +146,14 @@ def _load_config(self) -> LLMConfig:
         config.ollama.top_p = float(os.getenv("OLLAMA_TOP_P", "0.9"))
         config.ollama.top_k = int(os.getenv("OLLAMA_TOP_K", "40"))
         config.ollama.num_ctx = int(os.getenv("OLLAMA_NUM_CTX", "4096"))
+        config.ollama.requests_per_minute = int(os.getenv("OLLAMA_REQUESTS_PER_MINUTE", "0"))
+        config.ollama.tokens_per_minute = int(os.getenv("OLLAMA_TOKENS_PER_MINUTE", "0"))
+        config.ollama.max_in_flight = int(os.getenv("OLLAMA_MAX_IN_FLIGHT", "4"))
+        config.ollama.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        config.ollama.pinned_models = [name.strip() for name in os.getenv("OLLAMA_PINNED_MODELS", "").split(",") if name.strip()]
+        config.ollama.warmup = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+        config.ollama.warmup_interval_seconds = int(os.getenv("OLLAMA_WARMUP_INTERVAL_SECONDS", "60"))
+        config.ollama.backend = os.getenv("OLLAMA_BACKEND", "langchain").lower()
 
         # Anthropic settings
         config.anthropic.api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -117,6 +161,10 @@ def _load_config(self) -> LLMConfig:
         config.anthropic.temperature = float(os.getenv("ANTHROPIC_TEMPERATURE", "0.7"))
         config.anthropic.max_tokens = int(os.getenv("ANTHROPIC_MAX_TOKENS", "4096"))
         config.anthropic.top_p = float(os.getenv("ANTHROPIC_TOP_P", "1.0"))
+        config.anthropic.requests_per_minute = int(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "0"))
+        config.anthropic.tokens_per_minute = int(os.getenv("ANTHROPIC_TOKENS_PER_MINUTE", "0"))
+        config.anthropic.max_in_flight = int(os.getenv("ANTHROPIC_MAX_IN_FLIGHT", "32"))
+        config.anthropic.prompt_caching = os.getenv("ANTHROPIC_PROMPT_CACHING", "true").lower() == "true"
 
         # Load from config file if it exists
         config_file = os.getenv("LLM_CONFIG_FILE", "config/llm_config.json")
@@ -145,7 +193,16 @@ def _update_config_from_dict(self, config: LLMConfig, config_dict: dict) -> None
             "sensitive_data_handling",
             "cache_responses",
             "cache_dir",
+            "cache_ttl_seconds",
+            "cache_max_entries",
             "timeout_seconds",
+            "max_concurrency",
+            "hedge_percentile",
+            "retry_budget_ratio",
+            "llm_pool_size",
+            "llm_pool_idle_seconds",
+            "llm_routing",
+            "adaptive_concurrency",
         ]
         for attr in top_level_attrs:
             if attr in config_dict:
@@ -154,7 +211,18 @@ def _update_config_from_dict(self, config: LLMConfig, config_dict: dict) -> None
         # Update OpenAI config
         if "openai" in config_dict:
             openai_config = config_dict["openai"]
-            openai_attrs = ["api_key", "model_name", "temperature", "max_tokens", "top_p", "frequency_penalty", "presence_penalty"]
+            openai_attrs = [
+                "api_key",
+                "model_name",
+                "temperature",
+                "max_tokens",
+                "top_p",
+                "frequency_penalty",
+                "presence_penalty",
+                "requests_per_minute",
+                "tokens_per_minute",
+                "max_in_flight",
+            ]
             for attr in openai_attrs:
                 if attr in openai_config:
                     setattr(config.openai, attr, openai_config[attr])
@@ -162,7 +230,22 @@ def _update_config_from_dict(self, config: LLMConfig, config_dict: dict) -> None
         # Update Ollama config
         if "ollama" in config_dict:
             ollama_config = config_dict["ollama"]
-            ollama_attrs = ["base_url", "model_name", "temperature", "top_p", "top_k", "num_ctx"]
+            ollama_attrs = [
+                "base_url",
+                "model_name",
+                "temperature",
+                "top_p",
+                "top_k",
+                "num_ctx",
+                "requests_per_minute",
+                "tokens_per_minute",
+                "max_in_flight",
+                "keep_alive",
+                "pinned_models",
+                "warmup",
+                "warmup_interval_seconds",
+                "backend",
+            ]
             for attr in ollama_attrs:
                 if attr in ollama_config:
                     setattr(config.ollama, attr, ollama_config[attr])
@@ -170,7 +253,17 @@ def _update_config_from_dict(self, config: LLMConfig, config_dict: dict) -> None
         # Update Anthropic config
         if "anthropic" in config_dict:
             anthropic_config = config_dict["anthropic"]
-            anthropic_attrs = ["api_key", "model_name", "temperature", "max_tokens", "top_p"]
+            anthropic_attrs = [
+                "api_key",
+                "model_name",
+                "temperature",
+                "max_tokens",
+                "top_p",
+                "requests_per_minute",
+                "tokens_per_minute",
+                "max_in_flight",
+                "prompt_caching",
+            ]
             for attr in anthropic_attrs:
                 if attr in anthropic_config:
                     setattr(config.anthropic, attr, anthropic_config[attr])
@@ -211,7 +304,16 @@ def save_config(self, config_file: str | None = None) -> None:
             "sensitive_data_handling": self._config.sensitive_data_handling,
             "cache_responses": self._config.cache_responses,
             "cache_dir": self._config.cache_dir,
+            "cache_ttl_seconds": self._config.cache_ttl_seconds,
+            "cache_max_entries": self._config.cache_max_entries,
             "timeout_seconds": self._config.timeout_seconds,
+            "max_concurrency": self._config.max_concurrency,
+            "hedge_percentile": self._config.hedge_percentile,
+            "retry_budget_ratio": self._config.retry_budget_ratio,
+            "llm_pool_size": self._config.llm_pool_size,
+            "llm_pool_idle_seconds": self._config.llm_pool_idle_seconds,
+            "llm_routing": self._config.llm_routing,
+            "adaptive_concurrency": self._config.adaptive_concurrency,
             "openai": {
                 "api_key": self._config.openai.api_key,
                 "model_name": self._config.openai.model_name,
@@ -220,6 +322,9 @@ def save_config(self, config_file: str | None = None) -> None:
                 "top_p": self._config.openai.top_p,
                 "frequency_penalty": self._config.openai.frequency_penalty,
                 "presence_penalty": self._config.openai.presence_penalty,
+                "requests_per_minute": self._config.openai.requests_per_minute,
+                "tokens_per_minute": self._config.openai.tokens_per_minute,
+                "max_in_flight": self._config.openai.max_in_flight,
             },
             "ollama": {
                 "base_url": self._config.ollama.base_url,
@@ -228,6 +333,14 @@ def save_config(self, config_file: str | None = None) -> None:
                 "top_p": self._config.ollama.top_p,
                 "top_k": self._config.ollama.top_k,
                 "num_ctx": self._config.ollama.num_ctx,
+                "requests_per_minute": self._config.ollama.requests_per_minute,
+                "tokens_per_minute": self._config.ollama.tokens_per_minute,
+                "max_in_flight": self._config.ollama.max_in_flight,
+                "keep_alive": self._config.ollama.keep_alive,
+                "pinned_models": self._config.ollama.pinned_models,
+                "warmup": self._config.ollama.warmup,
+                "warmup_interval_seconds": self._config.ollama.warmup_interval_seconds,
+                "backend": self._config.ollama.backend,
             },
             "anthropic": {
                 "api_key": self._config.anthropic.api_key,
@@ -235,6 +348,10 @@ def save_config(self, config_file: str | None = None) -> None:
                 "temperature": self._config.anthropic.temperature,
                 "max_tokens": self._config.anthropic.max_tokens,
                 "top_p": self._config.anthropic.top_p,
+                "requests_per_minute": self._config.anthropic.requests_per_minute,
+                "tokens_per_minute": self._config.anthropic.tokens_per_minute,
+                "max_in_flight": self._config.anthropic.max_in_flight,
+                "prompt_caching": self._config.anthropic.prompt_caching,
             },
         }
 
@@ -0,0 +1,108 @@
+"""CrewAI client for Claude with prompt caching.
+
+CrewAI agents call the provider through their own LiteLLM-based client, not through
+`BaseLLM`. This module extends that client so that the stable parts of the agent
+prompts (the system prompt with the role, backstory, and tool descriptions, and
+the static part of the task description) are sent with Anthropic cache markers.
+CrewAI counts the prompt tokens read from the cache but not the tokens written to
+it, so the client counts those itself from the usage of each LiteLLM response.
+This module imports CrewAI, so it is only imported when a crew is built.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from crewai import LLM
+
+from src.llm.prompt_cache import with_cache_control
+
+
+class PromptCachingLLM(LLM):
+    """CrewAI LLM that marks the stable prompt prefixes of Claude requests for caching.
+
+    Attributes:
+        static_prefixes: Texts that are the same on every request, such as the
+            static part of the task descriptions
+        cache_write_tokens: Prompt tokens written to the prompt cache by the
+            requests of this client since the last reset
+
+    Example:
+        ```python
+        llm = PromptCachingLLM(model="anthropic/claude-sonnet-4-20250514", temperature=0.3)
+        llm.static_prefixes = ["Based on the user's extracted immigration context"]
+        agent = Agent(role="...", goal="...", backstory="...", llm=llm)
+        ```
+    """
+
+    def __init__(self, model: str, static_prefixes: Sequence[str] = (), **kwargs: Any) -> None:
+        """Initialize the client.
+
+        Args:
+            model: The LiteLLM model name, for example "anthropic/claude-sonnet-4-20250514"
+            static_prefixes: Texts that are the same on every request
+            **kwargs: Additional arguments for the CrewAI LLM, such as temperature or api_key
+        """
+        super().__init__(model=model, **kwargs)
+        self.static_prefixes = list(static_prefixes)
+        self.cache_write_tokens = 0
+        self._cache_write_counter = _CacheWriteCounter(self)
+
+    def call(
+        self,
+        messages: str | list[dict[str, str]],
+        tools: list[dict] | None = None,
+        callbacks: list[Any] | None = None,
+        available_functions: dict[str, Any] | None = None,
+    ) -> Any:
+        """Send a request through CrewAI and count the prompt tokens it wrote to the cache.
+
+        Args:
+            messages: Input messages, as for `crewai.LLM.call`
+            tools: Tool schemas for function calling
+            callbacks: Callbacks that get the usage of the response, such as the
+                token counter of the agent
+            available_functions: Functions the model may call
+
+        Returns:
+            The response text or the result of a tool call
+        """
+        callbacks = [*(callbacks or []), self._cache_write_counter]
+        return super().call(messages, tools, callbacks, available_functions)
+
+    def _format_messages_for_provider(self, messages: list[dict[str, str]]) -> list[dict[str, Any]]:
+        """Format the messages for the provider and add cache markers for Anthropic models.
+
+        Args:
+            messages: Chat messages with "role" and "content"
+
+        Returns:
+            The formatted messages
+        """
+        formatted = super()._format_messages_for_provider(messages)
+        if not self.is_anthropic:
+            return formatted
+        return with_cache_control(formatted, self.static_prefixes)
+
+
+class _CacheWriteCounter:
+    """Response callback that adds the cache write tokens of a response to its client."""
+
+    def __init__(self, llm: PromptCachingLLM) -> None:
+        self._llm = llm
+
+    def log_success_event(self, kwargs: dict[str, Any], response_obj: Any, start_time: Any, end_time: Any) -> None:
+        """Count the `cache_creation_input_tokens` of a response.
+
+        CrewAI calls this with `{"usage": usage}` once per response. LiteLLM also
+        calls its registered callbacks with the whole response object, which is
+        skipped so that every response is counted once.
+        """
+        if not isinstance(response_obj, dict) or not response_obj.get("usage"):
+            return
+        usage = response_obj["usage"]
+        tokens = (
+            usage.get("cache_creation_input_tokens")
+            if isinstance(usage, dict)
+            else getattr(usage, "cache_creation_input_tokens", 0)
+        )
+        self._llm.cache_write_tokens += int(tokens or 0)
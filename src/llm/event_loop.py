@@ -0,0 +1,133 @@
+"""Shared event loop for running async LLM calls from synchronous code.
+
+The async LLM interface (`BaseLLM.acall`, `BaseLLM.agenerate`) lets one event loop
+keep many provider calls in flight without one OS thread per call. Synchronous
+callers, such as crew worker threads, use the process-wide loop of this module: it
+runs in one daemon thread, and `run_coroutine` submits a coroutine to it and waits
+for the result. Async code (for example FastAPI endpoints) awaits the async methods
+directly on its own loop.
+"""
+
+import asyncio
+import logging
+import threading
+from collections.abc import Coroutine, Iterable
+from typing import Any, TypeVar
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SharedEventLoop:
+    """Event loop that runs forever in a background daemon thread.
+
+    Example:
+        ```python
+        loop = SharedEventLoop()
+        text = loop.run(llm.acall("Hello"))
+        ```
+    """
+
+    def __init__(self) -> None:
+        """Initialize the loop without starting the thread."""
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Get the running loop, starting its thread on first use.
+
+        Returns:
+            The shared event loop
+        """
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="llm-event-loop", daemon=True)
+                self._thread.start()
+                logger.debug("Started the shared LLM event loop")
+            return self._loop
+
+    def run(self, coroutine: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+        """Run a coroutine on the shared loop and wait for its result.
+
+        Args:
+            coroutine: The coroutine to run
+            timeout: Maximum time to wait in seconds, or None to wait forever
+
+        Returns:
+            The result of the coroutine
+
+        Raises:
+            RuntimeError: If called from the shared loop itself, which would deadlock
+            Exception: Any exception raised by the coroutine
+        """
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("Cannot wait for the shared event loop from its own thread")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+    def stop(self) -> None:
+        """Stop the loop and its thread. The next use starts a new loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join()
+        loop.close()
+
+
+_shared_loop = SharedEventLoop()
+
+
+def get_shared_loop() -> SharedEventLoop:
+    """Get the process-wide event loop for async LLM calls.
+
+    Returns:
+        The shared SharedEventLoop instance
+    """
+    return _shared_loop
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+    """Run a coroutine on the shared event loop from synchronous code.
+
+    Args:
+        coroutine: The coroutine to run
+        timeout: Maximum time to wait in seconds, or None to wait forever
+
+    Returns:
+        The result of the coroutine
+    """
+    return _shared_loop.run(coroutine, timeout)
+
+
+def wake_waiters(waiters: Iterable[tuple[asyncio.AbstractEventLoop, asyncio.Future]]) -> None:
+    """Resolve the wake-up futures of waiting coroutines from any thread.
+
+    Limiters that are shared by threads and coroutines keep one future per waiting
+    coroutine, together with its event loop, and resolve them when the queue moves,
+    so that waiting coroutines never poll.
+
+    Args:
+        waiters: (event loop, future) pairs of the waiting coroutines
+    """
+    for loop, future in waiters:
+        try:
+            loop.call_soon_threadsafe(_wake, future)
+        except RuntimeError:
+            pass  # The waiter's event loop is closed, nobody is waiting anymore
+
+
+def _wake(future: asyncio.Future) -> None:
+    """Resolve the wake-up future of a waiting coroutine unless it was cancelled."""
+    if not future.done():
+        future.set_result(None)
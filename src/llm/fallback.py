@@ -1,18 +1,119 @@
 """Fallback mechanisms for LLM providers."""
 
+import asyncio
 import logging
+import random
+import re
+import threading
 import time
-from collections.abc import Callable
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
 from typing import Any
 
-from src.llm.base import BaseLLM
+from src.llm.base import BaseLLM, StreamChunk
+from src.llm.circuit_breaker import CircuitOpenError
 from src.llm.config import config_manager
+from src.llm.event_loop import run_coroutine
 from src.llm.llm_factory import LLMType
+from src.llm.retry_budget import RetryBudget, get_retry_budget
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Error classification
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}  # 529: Anthropic overloaded
+FATAL_STATUS_CODES = {400, 401, 403, 404, 405, 413, 422}
+RETRY_AFTER_STATUS_CODES = {429, 503, 529}
+HTTP_SERVER_ERROR = 500
+MAX_RETRY_AFTER = 60.0  # Longest Retry-After wait in seconds before failing over instead
+
+# Errors that a retry cannot fix, by the provider that raises them
+FATAL_ERROR_NAMES = {
+    "anthropic": {"AuthenticationError", "PermissionDeniedError", "BadRequestError", "NotFoundError"},
+    "openai": {"AuthenticationError", "PermissionDeniedError", "BadRequestError", "NotFoundError", "UnprocessableEntityError"},
+    "ollama": {"OllamaEndpointNotFoundError"},
+}
+
+# Packages whose errors come from each provider
+PROVIDER_ERROR_MODULES = {
+    "anthropic": ("anthropic", "langchain_anthropic"),
+    "openai": ("openai", "langchain_openai"),
+    "ollama": ("ollama", "langchain_ollama", "langchain_community.llms.ollama"),
+}
+
+_STATUS_IN_MESSAGE = re.compile(r"status code:? (\d{3})\b", re.IGNORECASE)
+
+# Hedged requests
+DEFAULT_HEDGE_DELAY = 5.0  # Seconds before hedging while there are too few latency samples
+MIN_HEDGE_SAMPLES = 20  # Primary latencies needed before the percentile is used
+LATENCY_SAMPLES = 200  # Number of recent primary latencies kept
+
+
+@dataclass(frozen=True)
+class HedgeStats:
+    """Counters of the hedged requests of a FallbackLLM.
+
+    Attributes:
+        fired: Calls where the fallback was started because the primary was slow
+        won: Hedged calls that the fallback answered first
+        delay: The current wait before a hedged request is sent, in seconds
+    """
+
+    fired: int
+    won: int
+    delay: float
+
+    @property
+    def win_rate(self) -> float:
+        """Get the share of hedged requests that answered first.
+
+        Returns:
+            The win rate between 0.0 and 1.0
+        """
+        return self.won / self.fired if self.fired else 0.0
+
+
+class LatencyTracker:
+    """Recent latencies of successful calls, used to choose the hedging delay."""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES) -> None:
+        """Initialize an empty tracker.
+
+        Args:
+            samples: Number of recent latencies kept
+        """
+        self._latencies: deque[float] = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add the latency of a successful call.
+
+        Args:
+            seconds: The latency in seconds
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Get a percentile of the recent latencies.
+
+        Args:
+            fraction: The percentile as a fraction, for example 0.95
+
+        Returns:
+            The latency in seconds, or None while there are fewer than
+            MIN_HEDGE_SAMPLES latencies
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
 
 class FallbackStrategy:
     """Strategy for handling LLM fallbacks."""
@@ -59,7 +160,16 @@ def get_fallback_provider(provider: str) -> str:
 
 
 class RetryStrategy:
-    """Strategy for retrying LLM operations."""
+    """Strategy for retrying LLM operations.
+
+    The wait before a retry is drawn at random between 0 and the exponential
+    backoff ("full jitter"), so that workers that failed at the same time do not
+    retry at the same time. Errors that cannot succeed on a retry, such as
+    authentication failures and bad requests, are raised at once. A `Retry-After`
+    header of a rate limit or overload response is waited for. Every retry is
+    taken from the process-wide retry budget; when it is used up, the error is
+    raised instead.
+    """
 
     def __init__(
         self,
@@ -67,6 +177,9 @@ def __init__(
         initial_delay: float = 1.0,
         max_delay: float = 10.0,
         backoff_factor: float = 2.0,
+        jitter: bool = True,
+        max_retry_after: float = MAX_RETRY_AFTER,
+        budget: RetryBudget | None = None,
     ):
         """Initialize the retry strategy.
 
@@ -75,11 +188,18 @@ def __init__(
             initial_delay: Initial delay between retries in seconds
             max_delay: Maximum delay between retries in seconds
             backoff_factor: Factor to increase delay by after each retry
+            jitter: Whether to wait a random time up to the backoff delay
+            max_retry_after: Longest Retry-After wait in seconds; a longer one
+                raises the error so that the caller can fail over
+            budget: The retry budget. Defaults to the process-wide budget.
         """
         self.max_retries = max_retries
         self.initial_delay = initial_delay
         self.max_delay = max_delay
         self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+        self._budget = budget
 
     def execute_with_retry(self, operation: Callable, *args: Any, **kwargs: Any) -> Any:
         """Execute an operation with retry logic.
@@ -93,25 +213,209 @@ def execute_with_retry(self, operation: Callable, *args: Any, **kwargs: Any) ->
             The result of the operation
 
         Raises:
-            Exception: If all retries fail
+            CircuitOpenError: At once, without retries, if the provider's circuit is open
+            Exception: At once if the error is not retryable, or when the retries or
+                the retry budget are used up
         """
-        last_exception = None
-        delay = self.initial_delay
+        budget = self._budget or get_retry_budget()
+        budget.record_request()
 
         for attempt in range(self.max_retries + 1):
             try:
                 return operation(*args, **kwargs)
             except Exception as e:
-                last_exception = e
-                if attempt < self.max_retries:
-                    logger.warning(
-                        f"Operation failed (attempt {attempt + 1}/{self.max_retries}): {e}. Retrying in {delay:.2f} seconds..."
-                    )
-                    time.sleep(delay)
-                    delay = min(delay * self.backoff_factor, self.max_delay)
-                else:
-                    logger.error(f"Operation failed after {self.max_retries} retries: {e}")
-                    raise last_exception from e
+                delay = self.retry_delay(attempt, e, budget)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def aexecute_with_retry(self, operation: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Execute an async operation with retry logic.
+
+        This is the async counterpart of `execute_with_retry`. The delay between
+        attempts does not block the event loop.
+
+        Args:
+            operation: The coroutine function to execute
+            *args: Positional arguments to pass to the operation
+            **kwargs: Keyword arguments to pass to the operation
+
+        Returns:
+            The result of the operation
+
+        Raises:
+            CircuitOpenError: At once, without retries, if the provider's circuit is open
+            Exception: At once if the error is not retryable, or when the retries or
+                the retry budget are used up
+        """
+        budget = self._budget or get_retry_budget()
+        budget.record_request()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await operation(*args, **kwargs)
+            except Exception as e:
+                delay = self.retry_delay(attempt, e, budget)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def retry_delay(self, attempt: int, error: Exception, budget: RetryBudget) -> float | None:
+        """Decide whether a failed attempt is retried, and after which wait.
+
+        Args:
+            attempt: The number of the failed attempt, starting at 0
+            error: The error of the failed attempt
+            budget: The retry budget to take the retry from
+
+        Returns:
+            The wait in seconds before the next attempt, or None if the error must
+            be raised
+        """
+        if attempt >= self.max_retries:
+            logger.error(f"Operation failed after {self.max_retries} retries: {error}")
+            return None
+        if not is_retryable(error):
+            logger.error(f"Operation failed with an error that is not retried: {error}")
+            return None
+
+        backoff = min(self.initial_delay * self.backoff_factor**attempt, self.max_delay)
+        delay = random.uniform(0, backoff) if self.jitter else backoff
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                logger.error(f"Operation failed, the provider asks to wait {retry_after:.0f} seconds: {error}")
+                return None
+            delay = max(delay, retry_after)
+
+        if not budget.try_retry():
+            logger.error(f"Operation failed and the retry budget is used up: {error}")
+            return None
+
+        logger.warning(f"Operation failed (attempt {attempt + 1}/{self.max_retries}): {error}. Retrying in {delay:.2f} seconds...")
+        return delay
+
+
+def error_status_code(error: BaseException) -> int | None:
+    """Find the HTTP status code of a provider error.
+
+    The Anthropic and OpenAI SDK errors have a `status_code`, HTTP client errors
+    have a `response`, and the LangChain Ollama client only writes the code in the
+    message.
+
+    Args:
+        error: The error raised by a provider call
+
+    Returns:
+        The status code, or None if the error has none
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status
+    match = _STATUS_IN_MESSAGE.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def error_provider(error: BaseException) -> str | None:
+    """Find the provider whose client raised an error, from the module of its type.
+
+    Args:
+        error: The error raised by a provider call
+
+    Returns:
+        The provider name, or None if the error does not come from a known client
+    """
+    module = type(error).__module__
+    for provider, packages in PROVIDER_ERROR_MODULES.items():
+        if any(module == package or module.startswith(f"{package}.") for package in packages):
+            return provider
+    return None
+
+
+def is_retryable(error: BaseException, provider: str | None = None) -> bool:
+    """Check whether a failed provider call can succeed on a retry.
+
+    Errors without a status code are classified by the type names in
+    FATAL_ERROR_NAMES of the provider that raised them. When the provider is not
+    known, the names of every provider are checked.
+
+    Args:
+        error: The error raised by a provider call
+        provider: The provider of the call; found from the error type when None
+
+    Returns:
+        False for errors that a retry cannot fix (bad request, authentication,
+        permission, unknown model, open circuit), True otherwise. Unknown
+        errors are retryable.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = error_status_code(error)
+    if status is not None:
+        if status in RETRYABLE_STATUS_CODES:
+            return True
+        if status in FATAL_STATUS_CODES:
+            return False
+        return status >= HTTP_SERVER_ERROR
+    provider = provider or error_provider(error)
+    if provider is not None:
+        return type(error).__name__ not in FATAL_ERROR_NAMES.get(provider, set())
+    return not any(type(error).__name__ in names for names in FATAL_ERROR_NAMES.values())
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """Read the Retry-After header of a rate limit or overload response.
+
+    Args:
+        error: The error raised by a provider call
+
+    Returns:
+        The wait asked by the provider in seconds, or None if there is none
+    """
+    if error_status_code(error) not in RETRY_AFTER_STATUS_CODES:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds is not None:
+        try:
+            return max(0.0, float(milliseconds) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+async def _first_success(tasks: list[asyncio.Future]) -> asyncio.Future:
+    """Wait for the first task that succeeds; raise the last error if all of them fail."""
+    pending = set(tasks)
+    error: BaseException | None = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None:
+                return task
+            error = task.exception()
+    raise error
+
+
+def _shift_chunk(chunk: StreamChunk, offset: float) -> StreamChunk:
+    """Add the time spent on a failed attempt to the timings of a chunk."""
+    return replace(chunk, elapsed=chunk.elapsed + offset, time_to_first_token=chunk.time_to_first_token + offset)
 
 
 class FallbackLLM(BaseLLM):
@@ -119,6 +423,11 @@ class FallbackLLM(BaseLLM):
 
     This class wraps another LLM and provides fallback mechanisms
     when the primary LLM fails.
+
+    With hedging enabled, the fallback does not wait for the primary to use up its
+    retries: when the primary has not answered within the given percentile of its
+    recent latencies, the same prompt is also sent to the fallback. The first
+    successful answer is used and the other request is cancelled.
     """
 
     def __init__(
@@ -126,6 +435,7 @@ def __init__(
         primary_llm: BaseLLM,
         fallback_llm: BaseLLM | None = None,
         retry_strategy: RetryStrategy | None = None,
+        hedge_percentile: float | None = None,
     ):
         """Initialize the fallback LLM.
 
@@ -133,11 +443,55 @@ def __init__(
             primary_llm: The primary LLM to use
             fallback_llm: The fallback LLM to use if the primary fails
             retry_strategy: The retry strategy to use
+            hedge_percentile: Latency percentile of the primary after which a hedged
+                request is sent to the fallback, for example 0.95. 0 disables
+                hedging. Defaults to the `hedge_percentile` setting of `LLMConfig`.
+
+        Raises:
+            ValueError: If hedge_percentile is not between 0 and 1
         """
+        if hedge_percentile is None:
+            hedge_percentile = config_manager.get_config().hedge_percentile
+        if not 0 <= hedge_percentile < 1:
+            raise ValueError(f"hedge_percentile must be between 0 and 1, got {hedge_percentile}")
+
         self._primary_llm = primary_llm
         self._fallback_llm = fallback_llm
         self._retry_strategy = retry_strategy or RetryStrategy()
         self._last_successful_llm = primary_llm
+        self._hedge_percentile = hedge_percentile
+        self._latencies = LatencyTracker()
+        self._hedges_fired = 0
+        self._hedges_won = 0
+        self._hedge_lock = threading.Lock()
+
+    @property
+    def hedging(self) -> bool:
+        """Check whether hedged requests are enabled.
+
+        Returns:
+            True if there is a fallback LLM and a hedge percentile
+        """
+        return self._fallback_llm is not None and self._hedge_percentile > 0
+
+    def hedge_delay(self) -> float:
+        """Get the time to wait for the primary before a hedged request is sent.
+
+        Returns:
+            The hedge percentile of the recent primary latencies, or
+            DEFAULT_HEDGE_DELAY while there are too few of them
+        """
+        delay = self._latencies.percentile(self._hedge_percentile)
+        return DEFAULT_HEDGE_DELAY if delay is None else delay
+
+    def hedge_stats(self) -> HedgeStats:
+        """Return the hedged request counters.
+
+        Returns:
+            A HedgeStats object
+        """
+        with self._hedge_lock:
+            return HedgeStats(fired=self._hedges_fired, won=self._hedges_won, delay=self.hedge_delay())
 
     def _call(
         self,
@@ -157,6 +511,8 @@ def _call(
         Returns:
             The generated text from the LLM
         """
+        if self.hedging:
+            return run_coroutine(self._ahedged_call(prompt, stop, **kwargs))
 
         def try_primary_llm() -> str:
             return self._primary_llm._call(prompt, stop, run_manager, **kwargs)
@@ -183,6 +539,162 @@ def try_fallback_llm() -> str:
                 logger.error(f"Fallback LLM also failed: {e}")
                 raise
 
+    async def _acall(
+        self,
+        prompt: str,
+        stop: list[str] | None = None,
+        run_manager: Any | None = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the LLM asynchronously with the given prompt, with fallback if needed.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            run_manager: Optional async callback manager for the run
+            **kwargs: Additional arguments to pass to the LLM
+
+        Returns:
+            The generated text from the LLM
+        """
+        if self.hedging:
+            return await self._ahedged_call(prompt, stop, **kwargs)
+
+        async def try_primary_llm() -> str:
+            return await self._primary_llm._acall(prompt, stop, run_manager, **kwargs)
+
+        async def try_fallback_llm() -> str:
+            if self._fallback_llm:
+                return await self._fallback_llm._acall(prompt, stop, run_manager, **kwargs)
+            raise ValueError("No fallback LLM available")
+
+        try:
+            # Try the primary LLM first
+            result = await self._retry_strategy.aexecute_with_retry(try_primary_llm)
+            self._last_successful_llm = self._primary_llm
+            return result
+        except Exception as e:
+            logger.warning(f"Primary LLM failed: {e}. Trying fallback...")
+
+            # If primary fails, try the fallback
+            try:
+                result = await self._retry_strategy.aexecute_with_retry(try_fallback_llm)
+                self._last_successful_llm = self._fallback_llm
+                return result
+            except Exception as e:
+                logger.error(f"Fallback LLM also failed: {e}")
+                raise
+
+    async def _ahedged_call(self, prompt: str, stop: list[str] | None, **kwargs: Any) -> str:
+        """Race the primary against a hedged fallback request that starts when the primary is slow.
+
+        If the primary fails before the hedging delay, the fallback is used as in a
+        normal call. Each side keeps its retries.
+        """
+
+        async def attempt(llm: BaseLLM) -> str:
+            start = time.monotonic()
+            result = await self._retry_strategy.aexecute_with_retry(llm._acall, prompt, stop, None, **kwargs)
+            if llm is self._primary_llm:
+                self._latencies.record(time.monotonic() - start)
+            return result
+
+        primary = asyncio.ensure_future(attempt(self._primary_llm))
+        racers = [primary]
+        try:
+            delay = self.hedge_delay()
+            done, _ = await asyncio.wait(racers, timeout=delay)
+            hedged = not done
+            if hedged:
+                logger.info(f"Primary LLM did not answer within {delay:.2f}s, sending a hedged request to the fallback")
+                with self._hedge_lock:
+                    self._hedges_fired += 1
+            elif primary.exception() is None:
+                self._last_successful_llm = self._primary_llm
+                return primary.result()
+            else:
+                logger.warning(f"Primary LLM failed: {primary.exception()}. Trying fallback...")
+                racers = []
+
+            fallback = asyncio.ensure_future(attempt(self._fallback_llm))
+            racers.append(fallback)
+            winner = await _first_success(racers)
+        finally:
+            for task in racers:
+                task.cancel()
+
+        if winner is fallback:
+            self._last_successful_llm = self._fallback_llm
+            if hedged:
+                with self._hedge_lock:
+                    self._hedges_won += 1
+        else:
+            self._last_successful_llm = self._primary_llm
+        return winner.result()
+
+    def stream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> Iterator[StreamChunk]:
+        """Stream from the primary LLM, and from the fallback if the primary fails before its first token.
+
+        Once a token has been sent to the caller, an error is raised to the caller
+        instead: switching provider in the middle of an answer would mix two
+        different answers. The timings of the chunks are measured from the start
+        of this call, so they include a failed primary attempt.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            StreamChunk objects of the LLM that answered
+        """
+        start = time.monotonic()
+        emitted = False
+        try:
+            for chunk in self._primary_llm.stream(prompt, stop, **kwargs):
+                emitted = True
+                yield chunk
+            self._last_successful_llm = self._primary_llm
+            return
+        except Exception as e:
+            if emitted or not self._fallback_llm:
+                raise
+            logger.warning(f"Primary LLM failed before the first token: {e}. Streaming from fallback...")
+
+        offset = time.monotonic() - start
+        for chunk in self._fallback_llm.stream(prompt, stop, **kwargs):
+            yield _shift_chunk(chunk, offset)
+        self._last_successful_llm = self._fallback_llm
+
+    async def astream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> AsyncIterator[StreamChunk]:
+        """Async counterpart of `stream`, with the same fallback rule.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of strings to stop generation
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            StreamChunk objects of the LLM that answered
+        """
+        start = time.monotonic()
+        emitted = False
+        try:
+            async for chunk in self._primary_llm.astream(prompt, stop, **kwargs):
+                emitted = True
+                yield chunk
+            self._last_successful_llm = self._primary_llm
+            return
+        except Exception as e:
+            if emitted or not self._fallback_llm:
+                raise
+            logger.warning(f"Primary LLM failed before the first token: {e}. Streaming from fallback...")
+
+        offset = time.monotonic() - start
+        async for chunk in self._fallback_llm.astream(prompt, stop, **kwargs):
+            yield _shift_chunk(chunk, offset)
+        self._last_successful_llm = self._fallback_llm
+
     def _llm_type(self) -> str:
         """Return type of LLM.
 
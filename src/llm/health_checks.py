@@ -0,0 +1,66 @@
+"""Connectivity checks of the LLM providers.
+
+The checks only need `requests` and the native Ollama client, so they live apart
+from the provider classes: the circuit breakers and the health prober can run them
+without importing the LangChain provider packages. The Ollama check runs every few
+seconds, so it reuses a pooled connection instead of opening a new one.
+"""
+
+import os
+
+import requests
+
+from src.llm.circuit_breaker import HTTP_OK
+from src.llm.ollama_client import get_ollama_client
+
+
+def check_claude_availability() -> bool:
+    """Check if Anthropic Claude API is available.
+
+    Returns:
+        True if Claude is available, False otherwise
+    """
+    api_key = os.getenv("ANTHROPIC_API_KEY", "")
+    if not api_key:
+        return False
+
+    try:
+        response = requests.get(
+            "https://api.anthropic.com/v1/models",
+            headers={
+                "x-api-key": api_key,
+                "anthropic-version": "2023-06-01",
+            },
+            timeout=2,
+        )
+        return response.status_code == HTTP_OK
+    except (requests.RequestException, TimeoutError):
+        return False
+
+
+def check_openai_availability() -> bool:
+    """Check if OpenAI API is available.
+
+    Returns:
+        True if OpenAI is available, False otherwise
+    """
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    if not api_key:
+        return False
+
+    try:
+        # Simple check to see if the API key is valid
+        response = requests.get("https://api.openai.com/v1/models", headers={"Authorization": f"Bearer {api_key}"}, timeout=2)
+        return response.status_code == HTTP_OK
+    except (requests.RequestException, TimeoutError):
+        return False
+
+
+def check_ollama_availability() -> bool:
+    """Check if Ollama service is available.
+
+    Returns:
+        True if Ollama is available, False otherwise
+    """
+    base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    return get_ollama_client(base_url).is_available()
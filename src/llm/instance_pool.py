@@ -0,0 +1,240 @@
+"""Process-wide pool of LLM instances.
+
+Every provider instance wraps a LangChain chat client with its own HTTP client and
+connection pool. Building a new instance for every query therefore opened a new
+TLS connection to the provider every time. This module keeps the instances built
+by `LLMFactory`, keyed by provider, model, temperature, and constructor arguments,
+so later queries reuse a client whose connections are already open.
+
+The pool is size-bounded: when it is full, the least recently used instance is
+evicted, and instances that were not used for `LLMConfig.llm_pool_idle_seconds`
+are dropped. An evicted instance is not closed, because a caller may still use
+it; its connections are closed when it is garbage collected.
+
+Pooled instances are shared between threads and queries, so callers must not
+change them (for example their temperature). An instance whose temperature or
+model no longer matches its key is replaced on the next lookup.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from src.llm.base import BaseLLM
+from src.llm.config import config_manager
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Counters of an LLM instance pool.
+
+    Attributes:
+        hits: Lookups answered with a pooled instance
+        misses: Lookups that built a new instance
+        evictions: Instances removed because they were idle, stale, or the pool was full
+        size: Instances currently pooled
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Get the share of lookups answered with a pooled instance.
+
+        Returns:
+            The hit rate between 0.0 and 1.0
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LLMInstancePool:
+    """Thread-safe LRU pool of LLM instances with an idle timeout.
+
+    Attributes:
+        max_size: Maximum number of pooled instances
+        idle_seconds: Time without use after which an instance is dropped
+
+    Example:
+        ```python
+        pool = LLMInstancePool(max_size=8, idle_seconds=600)
+        key = pool.make_key("anthropic", "claude-sonnet-4-20250514", 0.7, {}, ClaudeLLM)
+        llm = pool.get_or_create(key, lambda: ClaudeLLM(temperature=0.7))
+        ```
+    """
+
+    def __init__(self, max_size: int, idle_seconds: float) -> None:
+        """Initialize an empty pool.
+
+        Args:
+            max_size: Maximum number of pooled instances
+            idle_seconds: Time without use after which an instance is dropped
+
+        Raises:
+            ValueError: If max_size is smaller than 1
+        """
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict[Hashable, tuple[BaseLLM, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        temperature: float,
+        kwargs: Mapping[str, Any],
+        llm_class: Callable[..., BaseLLM],
+    ) -> Hashable | None:
+        """Build the pool key of an instance.
+
+        Args:
+            provider: The LLM provider
+            model: The model name
+            temperature: The temperature setting
+            kwargs: Additional constructor arguments
+            llm_class: The class (or factory function) that builds the instance
+
+        Returns:
+            A hashable key, or None if a constructor argument cannot be hashed, in
+            which case the instance must not be pooled
+        """
+        key = (provider, model, float(temperature), tuple(sorted(kwargs.items())), llm_class)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get_or_create(self, key: Hashable, create: Callable[[], BaseLLM]) -> BaseLLM:
+        """Get the pooled instance of a key, building it on a miss.
+
+        The instance is built outside the lock. If two threads miss the same key at
+        once, both build an instance and the first one stored is used by both.
+
+        Args:
+            key: The pool key from `make_key`
+            create: Function that builds a new instance
+
+        Returns:
+            The pooled LLM instance
+
+        Raises:
+            Exception: Any error raised by `create`; nothing is stored then
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is not None and self._matches(key, entry[0]):
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+                self._evictions += 1
+            self._misses += 1
+
+        llm = create()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._matches(key, entry[0]):
+                return entry[0]
+            self._entries[key] = (llm, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        logger.debug(f"Pooled a new {type(llm).__name__} instance")
+        return llm
+
+    def clear(self) -> None:
+        """Drop all pooled instances."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> PoolStats:
+        """Return the hit, miss, and eviction counters.
+
+        Returns:
+            A PoolStats object
+        """
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            return PoolStats(hits=self._hits, misses=self._misses, evictions=self._evictions, size=len(self._entries))
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop the instances that were not used within the idle timeout."""
+        while self._entries:
+            key, (_, last_used) = next(iter(self._entries.items()))
+            if now - last_used < self.idle_seconds:
+                return
+            del self._entries[key]
+            self._evictions += 1
+
+    @staticmethod
+    def _matches(key: Hashable, llm: BaseLLM) -> bool:
+        """Check that a pooled instance was not changed since it was stored."""
+        _, model, temperature, _, _ = key
+        return getattr(llm, "model_name", model) == model and getattr(llm, "temperature", temperature) == temperature
+
+
+class LLMInstancePoolFactory:
+    """Factory for the process-wide LLM instance pool."""
+
+    _pool: LLMInstancePool | None = None
+    _settings: tuple[int, float] | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls) -> LLMInstancePool | None:
+        """Get the instance pool configured by `LLMConfig`.
+
+        The pool is rebuilt (and so emptied) when the pool settings change.
+
+        Returns:
+            The shared LLMInstancePool, or None if `llm_pool_size` is 0
+        """
+        config = config_manager.get_config()
+        settings = (int(config.llm_pool_size), float(config.llm_pool_idle_seconds))
+        if settings[0] <= 0:
+            return None
+        with cls._lock:
+            if cls._pool is None or cls._settings != settings:
+                cls._pool = LLMInstancePool(*settings)
+                cls._settings = settings
+            return cls._pool
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget the shared pool, so that the next call starts an empty one."""
+        with cls._lock:
+            cls._pool = None
+            cls._settings = None
+
+
+def get_llm_pool() -> LLMInstancePool | None:
+    """Get the LLM instance pool, or None if pooling is disabled.
+
+    Returns:
+        The shared LLMInstancePool instance, or None
+    """
+    return LLMInstancePoolFactory.get_pool()
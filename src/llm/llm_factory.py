@@ -1,15 +1,30 @@
-"""LLM factory for creating different types of language models."""
+"""LLM factory for creating different types of language models.
 
+The provider classes are imported on first use: importing this module does not
+load the LangChain provider packages, which take seconds to import.
+
+`get_llm_for_task` chooses among the LLM types that meet the accuracy of the
+requested type with the LLM router (see `src.llm.router`), which prefers the
+requested type unless another one is clearly faster or more reliable in the
+recent calls. When latency matters, it also prefers models that need no loading
+time: cloud models and the Ollama models that are resident (see
+`src.llm.ollama_warmup`).
+"""
+
+import importlib
 import logging
 import os
+import threading
+from collections.abc import Callable
 from enum import Enum
 from typing import ClassVar, TypedDict
 
 from src.llm.base import BaseLLM
 from src.llm.circuit_breaker import is_claude_available, is_ollama_available, is_openai_available
-from src.llm.claude_llm import ClaudeLLM
-from src.llm.ollama_llm import OllamaLLM
-from src.llm.openai_llm import OpenAILLM
+from src.llm.config import config_manager
+from src.llm.instance_pool import get_llm_pool
+from src.llm.ollama_warmup import get_ollama_warmer
+from src.llm.router import get_llm_router
 
 
 # Configure logging
@@ -52,13 +67,134 @@ class LLMFactory:
         LLMType.CLOUD_ACCURATE: {"provider": "anthropic", "model": "claude-sonnet-4-20250514", "temperature": 0.5},
     }
 
-    # Map of providers to their implementation classes
-    _provider_map: ClassVar[dict[str, type[BaseLLM]]] = {
-        "anthropic": ClaudeLLM,
-        "openai": OpenAILLM,
-        "ollama": OllamaLLM,
+    # LLM types that meet the accuracy of each type, the requested type first. An
+    # accurate model also meets a fast tier; a fast model never meets an accurate one.
+    _tier_routes: ClassVar[dict[LLMType, list[LLMType]]] = {
+        LLMType.LOCAL_FAST: [LLMType.LOCAL_FAST, LLMType.CLOUD_FAST, LLMType.LOCAL_ACCURATE],
+        LLMType.LOCAL_ACCURATE: [LLMType.LOCAL_ACCURATE, LLMType.CLOUD_ACCURATE],
+        LLMType.CLOUD_FAST: [LLMType.CLOUD_FAST, LLMType.LOCAL_FAST, LLMType.CLOUD_ACCURATE],
+        LLMType.CLOUD_ACCURATE: [LLMType.CLOUD_ACCURATE, LLMType.LOCAL_ACCURATE],
     }
 
+    # LLM type of the tasks that need no extra accuracy
+    _default_llm_type: ClassVar[LLMType] = LLMType.CLOUD_FAST
+
+    # Map of providers to their implementation classes, as "module:Class" paths until first use
+    _provider_map: ClassVar[dict[str, str | Callable[..., BaseLLM]]] = {
+        "anthropic": "src.llm.claude_llm:ClaudeLLM",
+        "openai": "src.llm.openai_llm:OpenAILLM",
+        "ollama": "src.llm.ollama_llm:OllamaLLM",
+    }
+    _provider_lock = threading.Lock()
+
+    @classmethod
+    def get_provider_class(cls, provider: str) -> Callable[..., BaseLLM]:
+        """Get the implementation class of a provider, importing its module on first use.
+
+        Args:
+            provider: The LLM provider, for example "anthropic"
+
+        Returns:
+            The provider class (or factory function)
+
+        Raises:
+            ValueError: If the provider is not supported
+        """
+        provider = provider.lower()
+        with cls._provider_lock:
+            if provider not in cls._provider_map:
+                raise ValueError(f"Unsupported LLM provider: {provider}")
+            llm_class = cls._provider_map[provider]
+            if isinstance(llm_class, str):
+                module_name, class_name = llm_class.split(":")
+                llm_class = getattr(importlib.import_module(module_name), class_name)
+                cls._provider_map[provider] = llm_class
+            return llm_class
+
+    @classmethod
+    def is_provider_available(cls, provider: str) -> bool:
+        """Check whether a provider is available, from the latest health snapshot.
+
+        Args:
+            provider: The LLM provider, for example "anthropic"
+
+        Returns:
+            True if the provider is available or has no availability check
+        """
+        checks = {"anthropic": is_claude_available, "openai": is_openai_available, "ollama": is_ollama_available}
+        check = checks.get(provider.lower())
+        return check is None or check()
+
+    @classmethod
+    def warmup_models(cls) -> list[str]:
+        """Get the Ollama models to load at startup: the configured model and the local models of the default tier.
+
+        The local models of the other tiers, such as the large LOCAL_ACCURATE model,
+        are loaded on first use unless they are pinned in `OllamaConfig.pinned_models`.
+
+        Returns:
+            The model names, without duplicates
+        """
+        models = [config_manager.get_config().ollama.model_name]
+        routes = [cls._llm_type_map[llm_type] for llm_type in cls._tier_routes[cls._default_llm_type]]
+        models += [config["model"] for config in routes if config["provider"] == "ollama"]
+        return list(dict.fromkeys(models))
+
+    @classmethod
+    def is_llm_type_loaded(cls, llm_type: LLMType) -> bool:
+        """Check whether the model of an LLM type can answer without loading first.
+
+        Args:
+            llm_type: The type of LLM
+
+        Returns:
+            False for an Ollama model that the warmer did not find in memory; True for
+            other providers, and when the warmer is off or Ollama did not answer it
+        """
+        config = cls._llm_type_map[llm_type]
+        if config["provider"] != "ollama":
+            return True
+        warmer = get_ollama_warmer()
+        if warmer is None or not warmer.snapshot.reachable:
+            return True
+        return warmer.is_resident(config["model"])
+
+    @classmethod
+    def route_llm_type(cls, llm_type: LLMType, latency_sensitive: bool = False) -> LLMType:
+        """Choose the LLM type to use for a request of the given type.
+
+        The router picks among the types that meet the accuracy of `llm_type`
+        (`_tier_routes`), using the availability of their providers and the latency
+        and error rate of their recent calls. Types with the same provider and model
+        are one route; the first of them is used. For a latency-sensitive request,
+        Ollama models that are not loaded are left out while another type is ready.
+
+        Args:
+            llm_type: The requested type of LLM
+            latency_sensitive: Whether to prefer models that need no loading time
+
+        Returns:
+            The chosen type, or `llm_type` if routing is disabled
+        """
+        router = get_llm_router()
+        if router is None:
+            return llm_type
+        types: list[LLMType] = []
+        routes: list[tuple[str, str]] = []
+        for candidate in cls._tier_routes.get(llm_type, [llm_type]):
+            config = cls._llm_type_map[candidate]
+            route = (config["provider"], config["model"])
+            if route not in routes:
+                types.append(candidate)
+                routes.append(route)
+        if latency_sensitive:
+            loaded = [index for index, candidate in enumerate(types) if cls.is_llm_type_loaded(candidate)]
+            if loaded:
+                types = [types[index] for index in loaded]
+                routes = [routes[index] for index in loaded]
+        decision = router.choose(llm_type.value, routes, cls.is_provider_available)
+        return types[decision.index]
+
     @classmethod
     def create_llm(cls, llm_type: LLMType, temperature: float | None = None, **kwargs) -> BaseLLM:
         """Create an LLM instance based on type.
@@ -93,6 +229,10 @@ def create_llm(cls, llm_type: LLMType, temperature: float | None = None, **kwarg
     def create_llm_by_provider(cls, provider: str, model: str, temperature: float = 0.7, **kwargs) -> BaseLLM:
         """Create an LLM instance based on provider.
 
+        Instances are taken from the process-wide instance pool when it is enabled,
+        so repeated calls with the same arguments reuse one client and its open
+        connections. Pooled instances are shared and must not be changed.
+
         Args:
             provider: The LLM provider to use
             model: The model name to use
@@ -106,32 +246,40 @@ def create_llm_by_provider(cls, provider: str, model: str, temperature: float =
             ValueError: If the provider is not supported
         """
         provider = provider.lower()
-
-        if provider not in cls._provider_map:
-            raise ValueError(f"Unsupported LLM provider: {provider}")
-
-        llm_class = cls._provider_map[provider]
+        llm_class = cls.get_provider_class(provider)
 
         try:
-            return llm_class(model_name=model, temperature=temperature, **kwargs)
+            pool = get_llm_pool()
+            key = pool.make_key(provider, model, temperature, kwargs, llm_class) if pool is not None else None
+            if key is None:
+                return llm_class(model_name=model, temperature=temperature, **kwargs)
+            return pool.get_or_create(key, lambda: llm_class(model_name=model, temperature=temperature, **kwargs))
         except Exception as e:
             logger.error(f"Error creating {provider} LLM: {e}")
             raise
 
     @classmethod
-    def get_llm_for_task(cls, task_type: str, sensitive_data: bool = False, temperature: float | None = None) -> BaseLLM:
+    def get_llm_for_task(
+        cls,
+        task_type: str,
+        sensitive_data: bool = False,
+        temperature: float | None = None,
+        latency_sensitive: bool = False,
+    ) -> BaseLLM:
         """Get appropriate LLM for a specific task type.
 
         Args:
             task_type: Type of task to perform
             sensitive_data: Whether the task involves sensitive data
             temperature: Optional temperature override
+            latency_sensitive: Whether to prefer a model that needs no loading time;
+                used when the router is enabled
 
         Returns:
             Configured LLM instance
         """
         # Default to cloud fast for most tasks
-        llm_type = LLMType.CLOUD_FAST
+        llm_type = cls._default_llm_type
 
         # Use more accurate models for specific tasks
         if sensitive_data or task_type in ["diagnosis", "treatment_planning"]:
@@ -139,6 +287,10 @@ def get_llm_for_task(cls, task_type: str, sensitive_data: bool = False, temperat
         elif task_type in ["summarization", "extraction"]:
             llm_type = LLMType.CLOUD_FAST
 
+        # Choose by availability, latency, and error rate when the router is enabled
+        if get_llm_router() is not None:
+            return cls._create_routed_llm(llm_type, temperature, latency_sensitive)
+
         # Check if the preferred LLM provider is available
         config = cls._llm_type_map[llm_type]
         provider = config["provider"]
@@ -177,6 +329,23 @@ def get_llm_for_task(cls, task_type: str, sensitive_data: bool = False, temperat
                 logger.error(f"All LLM creation attempts failed: {e}")
                 raise
 
+    @classmethod
+    def _create_routed_llm(cls, llm_type: LLMType, temperature: float | None, latency_sensitive: bool = False) -> BaseLLM:
+        """Create the LLM chosen by the router, or the next type of the tier if that fails."""
+        chosen = cls.route_llm_type(llm_type, latency_sensitive)
+        try:
+            return cls.create_llm(chosen, temperature)
+        except Exception as e:
+            logger.warning(f"Failed to create routed LLM {chosen.value}: {e}")
+            alternatives = [candidate for candidate in cls._tier_routes.get(llm_type, []) if candidate != chosen]
+            for candidate in alternatives:
+                try:
+                    logger.info(f"Falling back to {candidate.value}")
+                    return cls.create_llm(candidate, temperature)
+                except Exception as fallback_error:
+                    logger.warning(f"Failed to create {candidate.value} LLM: {fallback_error}")
+            raise
+
 
 def get_llm(provider: str | None = None, temperature: float = 0.7) -> BaseLLM:
     """Get LLM instance based on configuration.
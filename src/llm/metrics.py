@@ -0,0 +1,565 @@
+"""Per-call token, latency, and cost accounting for LLM calls.
+
+Every provider request of `BaseLLM` (plain, async, and streamed) is recorded as a
+`CallRecord`: provider, model, prompt and completion tokens, latency, time to first
+token, estimated cost, the prompt tokens read from or written to the provider's
+prompt cache, and the time spent in the rate limiter and concurrency limiter
+queues, which is not part of the latency. The token counts come from the `usage_metadata` of the
+provider response; when a provider sends none, they are estimated from the text.
+Crew runs add one record per task from the token counters of CrewAI (see
+`src.crew_templates`), because CrewAI agents call the provider through their own
+client.
+
+Records are kept in a bounded in-process registry. `call_scope` tags the records
+made inside it with an agent and a task, and `collect_calls` gathers the records
+of one unit of work, such as one query, so that they can be summed per agent and
+per task with `UsageSummary.from_records`.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Maximum number of records kept by the registry; older records are dropped
+MAX_RECORDS = 10000
+
+# Characters per token used to estimate token counts when a provider reports none
+CHARS_PER_TOKEN = 4
+
+# Price in USD per million (prompt, completion) tokens, by model name prefix.
+# The longest matching prefix is used; models without a price have no cost.
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-haiku": (0.25, 1.25),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+# Providers that run on local hardware and cost nothing per token
+FREE_PROVIDERS = {"ollama"}
+
+# Share of the prompt price paid for prompt tokens read from the provider's prompt cache
+CACHE_READ_PRICE_FACTOR = 0.1
+
+# Share of the prompt price paid for prompt tokens written to the provider's prompt cache
+CACHE_WRITE_PRICE_FACTOR = 1.25
+
+
+@dataclass(frozen=True)
+class CallRecord:
+    """One provider request, or the requests of one crew task.
+
+    Attributes:
+        provider: The LLM provider
+        model: The model name
+        prompt_tokens: Tokens sent to the model
+        completion_tokens: Tokens generated by the model
+        latency: Time of the request in seconds
+        time_to_first_token: Time to the first streamed token, None if not streamed
+        cost: Estimated cost in USD, None if the model has no known price
+        agent: Agent the request was made for, if known
+        task: Task the request was made for, if known
+        requests: Provider requests in the record
+        estimated: Whether the token counts were estimated from the text
+        cache_read_tokens: Prompt tokens read from the prompt cache, part of prompt_tokens
+        cache_write_tokens: Prompt tokens written to the prompt cache, part of prompt_tokens
+        queue_wait: Time in seconds spent in the rate limiter and concurrency
+            limiter queues before the request was sent; not part of latency
+    """
+
+    provider: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    time_to_first_token: float | None = None
+    cost: float | None = None
+    agent: str | None = None
+    task: str | None = None
+    requests: int = 1
+    estimated: bool = False
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    queue_wait: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        """Get the prompt and completion tokens together.
+
+        Returns:
+            The total number of tokens
+        """
+        return self.prompt_tokens + self.completion_tokens
+
+
+@dataclass(frozen=True)
+class UsageTotals:
+    """Sums over a group of call records.
+
+    Attributes:
+        requests: Provider requests
+        prompt_tokens: Tokens sent to the models
+        completion_tokens: Tokens generated by the models
+        latency: Time spent in the requests, in seconds
+        cost: Estimated cost in USD of the records with a known price
+        cache_read_tokens: Prompt tokens read from the prompt cache
+        cache_write_tokens: Prompt tokens written to the prompt cache
+        queue_wait: Time spent in rate limiter and concurrency limiter queues, in seconds
+    """
+
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+    cost: float = 0.0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    queue_wait: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        """Get the prompt and completion tokens together.
+
+        Returns:
+            The total number of tokens
+        """
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, record: CallRecord) -> "UsageTotals":
+        """Return new totals that include a record.
+
+        Args:
+            record: The call record to add
+
+        Returns:
+            A new UsageTotals object
+        """
+        return UsageTotals(
+            requests=self.requests + record.requests,
+            prompt_tokens=self.prompt_tokens + record.prompt_tokens,
+            completion_tokens=self.completion_tokens + record.completion_tokens,
+            latency=self.latency + record.latency,
+            cost=self.cost + (record.cost or 0.0),
+            cache_read_tokens=self.cache_read_tokens + record.cache_read_tokens,
+            cache_write_tokens=self.cache_write_tokens + record.cache_write_tokens,
+            queue_wait=self.queue_wait + record.queue_wait,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the totals to a JSON-friendly dictionary.
+
+        Returns:
+            The totals, with the cost rounded to 6 decimals
+        """
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "latency": round(self.latency, 3),
+            "cost": round(self.cost, 6),
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "queue_wait": round(self.queue_wait, 3),
+        }
+
+
+@dataclass(frozen=True)
+class UsageSummary:
+    """Token, latency, and cost totals of a group of records, per agent and per task.
+
+    Records without an agent or a task are counted in `total` only.
+
+    Attributes:
+        total: Totals over all records
+        by_agent: Totals per agent
+        by_task: Totals per task
+        by_model: Totals per "provider/model"
+    """
+
+    total: UsageTotals = field(default_factory=UsageTotals)
+    by_agent: Mapping[str, UsageTotals] = field(default_factory=lambda: MappingProxyType({}))
+    by_task: Mapping[str, UsageTotals] = field(default_factory=lambda: MappingProxyType({}))
+    by_model: Mapping[str, UsageTotals] = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_records(cls, records: Iterable[CallRecord]) -> "UsageSummary":
+        """Sum records per agent, per task, and per model.
+
+        Args:
+            records: The call records to sum
+
+        Returns:
+            A UsageSummary object
+        """
+        total = UsageTotals()
+        groups: tuple[dict[str, UsageTotals], dict[str, UsageTotals], dict[str, UsageTotals]] = ({}, {}, {})
+        for record in records:
+            total = total.add(record)
+            for group, name in zip(groups, (record.agent, record.task, f"{record.provider}/{record.model}"), strict=True):
+                if name is not None:
+                    group[name] = group.get(name, UsageTotals()).add(record)
+        by_agent, by_task, by_model = (MappingProxyType(group) for group in groups)
+        return cls(total=total, by_agent=by_agent, by_task=by_task, by_model=by_model)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the summary to a JSON-friendly dictionary.
+
+        Returns:
+            The summary with nested totals
+        """
+        return {
+            "total": self.total.to_dict(),
+            "by_agent": {name: totals.to_dict() for name, totals in self.by_agent.items()},
+            "by_task": {name: totals.to_dict() for name, totals in self.by_task.items()},
+            "by_model": {name: totals.to_dict() for name, totals in self.by_model.items()},
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text.
+
+    Args:
+        text: The text
+
+    Returns:
+        About one token per CHARS_PER_TOKEN characters, at least 1 for a non-empty text
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def estimate_cost(
+    provider: str,
+    model: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float | None:
+    """Estimate the cost of a request from MODEL_PRICES.
+
+    Prompt tokens read from or written to the prompt cache are priced with
+    CACHE_READ_PRICE_FACTOR and CACHE_WRITE_PRICE_FACTOR.
+
+    Args:
+        provider: The LLM provider
+        model: The model name
+        prompt_tokens: Tokens sent to the model, including the cached ones
+        completion_tokens: Tokens generated by the model
+        cache_read_tokens: Prompt tokens read from the prompt cache
+        cache_write_tokens: Prompt tokens written to the prompt cache
+
+    Returns:
+        The cost in USD, 0.0 for local providers, or None if the model has no known price
+    """
+    if provider in FREE_PROVIDERS:
+        return 0.0
+    name = model.rsplit("/", 1)[-1]
+    prefixes = [prefix for prefix in MODEL_PRICES if name.startswith(prefix)]
+    if not prefixes:
+        return None
+    prompt_price, completion_price = MODEL_PRICES[max(prefixes, key=len)]
+    uncached_tokens = max(0, prompt_tokens - cache_read_tokens - cache_write_tokens)
+    prompt_cost = prompt_price * (
+        uncached_tokens + cache_read_tokens * CACHE_READ_PRICE_FACTOR + cache_write_tokens * CACHE_WRITE_PRICE_FACTOR
+    )
+    return (prompt_cost + completion_tokens * completion_price) / 1_000_000
+
+
+class CallTracker:
+    """Measures one provider request and records it when it finishes.
+
+    Providers report the `usage_metadata` of their responses with `report_usage`
+    while the tracker is active; a stream reports every chunk.
+
+    Attributes:
+        provider: The LLM provider
+        model: The model name
+        prompt: The prompt of the request, used when the provider reports no usage
+        queue_wait: Time spent in the rate limiter and concurrency limiter queues before the request was sent
+    """
+
+    def __init__(self, provider: str, model: str, prompt: str, queue_wait: float = 0.0) -> None:
+        """Start measuring a request.
+
+        Args:
+            provider: The LLM provider
+            model: The model name
+            prompt: The prompt of the request
+            queue_wait: Time in seconds spent in the rate limiter and concurrency limiter queues
+        """
+        self.provider = provider
+        self.model = model
+        self.prompt = prompt
+        self.queue_wait = queue_wait
+        self._start = time.monotonic()
+        self._first_token: float | None = None
+        self._prompt_tokens = 0
+        self._completion_tokens = 0
+        self._cache_read_tokens = 0
+        self._cache_write_tokens = 0
+        self._reported = False
+
+    def add_usage(self, message: Any) -> None:
+        """Add the token usage of a provider response or stream chunk.
+
+        Args:
+            message: A LangChain message with an optional `usage_metadata` attribute
+        """
+        usage = getattr(message, "usage_metadata", None)
+        if not isinstance(usage, Mapping):
+            return
+        self._prompt_tokens += int(usage.get("input_tokens") or 0)
+        self._completion_tokens += int(usage.get("output_tokens") or 0)
+        details = usage.get("input_token_details")
+        if isinstance(details, Mapping):
+            self._cache_read_tokens += int(details.get("cache_read") or 0)
+            self._cache_write_tokens += int(details.get("cache_creation") or 0)
+        self._reported = True
+
+    @property
+    def time_to_first_token(self) -> float | None:
+        """Get the time from the start of the request to its first streamed token.
+
+        Returns:
+            The time in seconds, or None if no token was streamed yet
+        """
+        return self._first_token
+
+    def mark_first_token(self) -> None:
+        """Note the time of the first streamed token; later calls are ignored."""
+        if self._first_token is None:
+            self._first_token = time.monotonic() - self._start
+
+    def finish(self, text: str) -> CallRecord:
+        """Record the finished request in the registry.
+
+        Args:
+            text: The generated text, used when the provider reported no usage
+
+        Returns:
+            The recorded CallRecord
+        """
+        if self._reported:
+            prompt_tokens, completion_tokens = self._prompt_tokens, self._completion_tokens
+        else:
+            prompt_tokens, completion_tokens = estimate_tokens(self.prompt), estimate_tokens(text)
+        record = CallRecord(
+            provider=self.provider,
+            model=self.model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency=time.monotonic() - self._start,
+            time_to_first_token=self._first_token,
+            cost=estimate_cost(
+                self.provider,
+                self.model,
+                prompt_tokens,
+                completion_tokens,
+                self._cache_read_tokens,
+                self._cache_write_tokens,
+            ),
+            estimated=not self._reported,
+            cache_read_tokens=self._cache_read_tokens,
+            cache_write_tokens=self._cache_write_tokens,
+            queue_wait=self.queue_wait,
+        )
+        return get_metrics_registry().record(record)
+
+
+_current_tracker: ContextVar[CallTracker | None] = ContextVar("llm_call_tracker", default=None)
+_current_scope: ContextVar[tuple[str | None, str | None]] = ContextVar("llm_call_scope", default=(None, None))
+_collectors: ContextVar[tuple[list[CallRecord], ...]] = ContextVar("llm_call_collectors", default=())
+
+
+@contextmanager
+def track_call(provider: str, model: str, prompt: str, queue_wait: float = 0.0) -> Iterator[CallTracker]:
+    """Measure a provider request; `report_usage` calls inside the block go to its tracker.
+
+    The caller calls `finish` on the tracker when the request succeeded. A failed
+    request is not recorded.
+
+    Args:
+        provider: The LLM provider
+        model: The model name
+        prompt: The prompt of the request
+        queue_wait: Time in seconds spent in the rate limiter and concurrency limiter queues
+
+    Yields:
+        The CallTracker of the request
+    """
+    tracker = CallTracker(provider, model, prompt, queue_wait)
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+def report_usage(message: Any) -> None:
+    """Report the token usage of a provider response to the active request.
+
+    Providers call this with the message they got from LangChain. Outside a
+    tracked request the call does nothing.
+
+    Args:
+        message: A LangChain message with an optional `usage_metadata` attribute
+    """
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.add_usage(message)
+
+
+@contextmanager
+def call_scope(agent: str | None = None, task: str | None = None) -> Iterator[None]:
+    """Tag the records made inside the block with an agent and a task.
+
+    Args:
+        agent: The agent name
+        task: The task name
+
+    Yields:
+        None
+    """
+    token = _current_scope.set((agent, task))
+    try:
+        yield
+    finally:
+        _current_scope.reset(token)
+
+
+@contextmanager
+def collect_calls() -> Iterator[list[CallRecord]]:
+    """Gather the records made inside the block, in this thread and its tasks.
+
+    Yields:
+        A list that receives every record made inside the block
+
+    Example:
+        ```python
+        with collect_calls() as records:
+            llm.invoke("Hello")
+        print(UsageSummary.from_records(records).total.total_tokens)
+        ```
+    """
+    records: list[CallRecord] = []
+    token = _collectors.set((*_collectors.get(), records))
+    try:
+        yield records
+    finally:
+        _collectors.reset(token)
+
+
+class MetricsRegistry:
+    """Thread-safe, bounded store of call records.
+
+    Attributes:
+        max_records: Maximum number of records kept
+    """
+
+    def __init__(self, max_records: int = MAX_RECORDS) -> None:
+        """Initialize an empty registry.
+
+        Args:
+            max_records: Maximum number of records kept
+        """
+        self.max_records = max_records
+        self._records: deque[CallRecord] = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord) -> CallRecord:
+        """Store a record, tagged with the current call scope if it has no agent or task.
+
+        Args:
+            record: The call record
+
+        Returns:
+            The stored record
+        """
+        agent, task = _current_scope.get()
+        if (record.agent is None and agent is not None) or (record.task is None and task is not None):
+            record = replace(record, agent=record.agent or agent, task=record.task or task)
+        with self._lock:
+            self._records.append(record)
+        for records in _collectors.get():
+            records.append(record)
+        logger.debug(
+            f"{record.provider}/{record.model}: {record.prompt_tokens} prompt + {record.completion_tokens} "
+            f"completion tokens in {record.latency:.3f}s after {record.queue_wait:.3f}s in the queue"
+        )
+        return record
+
+    def records(self) -> list[CallRecord]:
+        """Return the stored records, oldest first.
+
+        Returns:
+            A copy of the records
+        """
+        with self._lock:
+            return list(self._records)
+
+    def summary(self) -> UsageSummary:
+        """Sum the stored records per agent, per task, and per model.
+
+        Returns:
+            A UsageSummary object
+        """
+        return UsageSummary.from_records(self.records())
+
+    def clear(self) -> None:
+        """Drop all records."""
+        with self._lock:
+            self._records.clear()
+
+
+class MetricsRegistryFactory:
+    """Factory for the process-wide metrics registry."""
+
+    _registry: MetricsRegistry | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_registry(cls) -> MetricsRegistry:
+        """Get the shared metrics registry, creating it on first use.
+
+        Returns:
+            The shared MetricsRegistry instance
+        """
+        with cls._lock:
+            if cls._registry is None:
+                cls._registry = MetricsRegistry()
+            return cls._registry
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget the shared registry, so that the next call starts an empty one."""
+        with cls._lock:
+            cls._registry = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry.
+
+    Returns:
+        The shared MetricsRegistry instance
+    """
+    return MetricsRegistryFactory.get_registry()
@@ -0,0 +1,406 @@
+"""Native HTTP client for the Ollama API.
+
+`ChatOllama` of LangChain opens a new connection for every request (`requests.post`
+without a session, and a new `aiohttp` session for every async request) and wraps
+every answer in several LangChain objects. This client talks to `POST /api/chat`
+directly over pooled keep-alive connections of `httpx`:
+
+- One synchronous client per Ollama server, shared by all threads.
+- One asynchronous client per server and event loop, because `httpx` ties the
+  connections of an async client to the loop that opened them.
+- Streams are read line by line as the bytes arrive; every line of the NDJSON
+  answer becomes one `OllamaChunk`, so the first token reaches the caller as soon
+  as Ollama sends it.
+
+The model options (`temperature`, `top_p`, `top_k`, `num_ctx`) and the keep-alive
+come from `OllamaConfig` unless the caller sets them. `OllamaLLM` uses this client
+when `OllamaConfig.backend` is "native".
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from collections.abc import AsyncIterator, Iterator, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+from src.llm.circuit_breaker import HTTP_OK
+from src.llm.config import config_manager
+from src.llm.ollama_warmup import keep_alive_for
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds to open a connection to Ollama
+CONNECT_TIMEOUT = 5.0
+
+# Seconds to wait for the next bytes of an answer; the first ones can wait for the model to load
+READ_TIMEOUT = 300.0
+
+# Seconds to wait for the availability check
+HEALTH_TIMEOUT = 2.0
+
+# Connections per server and client; Ollama serves few requests in parallel per model
+MAX_CONNECTIONS = 32
+
+# Idle connections kept open per server and client
+MAX_KEEPALIVE_CONNECTIONS = 8
+
+# Model options that OllamaLLM reads from OllamaConfig
+CONFIG_OPTIONS = ("temperature", "top_p", "top_k", "num_ctx")
+
+
+class OllamaError(RuntimeError):
+    """Error answer of the Ollama API.
+
+    Attributes:
+        status_code: The HTTP status code, or None for an error inside a stream
+    """
+
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        """Initialize the error.
+
+        Args:
+            message: The error message of Ollama
+            status_code: The HTTP status code, or None for an error inside a stream
+        """
+        super().__init__(f"Ollama error {status_code}: {message}" if status_code is not None else f"Ollama error: {message}")
+        self.status_code = status_code
+
+
+@dataclass(frozen=True)
+class OllamaChunk:
+    """One line of an Ollama chat answer, or the whole answer when it is not streamed.
+
+    The attributes match the LangChain messages that `report_usage` and the stream
+    pipeline of `BaseLLM` read.
+
+    Attributes:
+        content: The generated text of the line
+        done: Whether this is the last line of the answer
+        usage_metadata: Prompt and completion tokens, only on the last line
+    """
+
+    content: str
+    done: bool = False
+    usage_metadata: Mapping[str, int] | None = field(default=None, compare=False)
+
+
+def model_options(overrides: Mapping[str, Any] | None = None) -> dict[str, Any]:
+    """Get the model options of a request from `OllamaConfig`.
+
+    Args:
+        overrides: Options that replace the configured ones, for example {"temperature": 0.2};
+            None values are left out
+
+    Returns:
+        The options for the "options" field of an Ollama request
+    """
+    config = config_manager.get_config().ollama
+    options = {name: getattr(config, name) for name in CONFIG_OPTIONS}
+    options.update(overrides or {})
+    return {name: value for name, value in options.items() if value is not None}
+
+
+def _parse_line(line: str) -> OllamaChunk | None:
+    """Turn one NDJSON line of Ollama into a chunk; blank lines give None.
+
+    Raises:
+        OllamaError: If the line reports an error
+    """
+    if not line.strip():
+        return None
+    data = json.loads(line)
+    if "error" in data:
+        raise OllamaError(str(data["error"]))
+    usage = None
+    if data.get("done"):
+        usage = {
+            "input_tokens": int(data.get("prompt_eval_count") or 0),
+            "output_tokens": int(data.get("eval_count") or 0),
+        }
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+    content = (data.get("message") or {}).get("content") or data.get("response") or ""
+    return OllamaChunk(content, bool(data.get("done")), usage)
+
+
+def _check_status(response: httpx.Response, body: bytes) -> None:
+    """Raise the error of a response that is not HTTP 200.
+
+    Raises:
+        OllamaError: With the error message of Ollama and the status code
+    """
+    if response.status_code == HTTP_OK:
+        return
+    try:
+        message = json.loads(body).get("error") or body.decode(errors="replace")
+    except (ValueError, AttributeError):
+        message = body.decode(errors="replace")
+    raise OllamaError(message, response.status_code)
+
+
+class OllamaClient:
+    """Pooled client of one Ollama server.
+
+    Attributes:
+        base_url: The base URL of the Ollama API
+
+    Example:
+        ```python
+        client = OllamaClient("http://localhost:11434")
+        answer = client.chat("llama3", "Can I work in Canada?", options={"num_ctx": 8192})
+        for chunk in client.stream("llama3", "Can I work in Canada?"):
+            print(chunk.content, end="")
+        ```
+    """
+
+    def __init__(self, base_url: str) -> None:
+        """Initialize the client; connections are opened on the first request.
+
+        Args:
+            base_url: The base URL of the Ollama API
+        """
+        self.base_url = base_url.rstrip("/")
+        self._client: httpx.Client | None = None
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def chat(
+        self,
+        model: str,
+        prompt: str,
+        options: Mapping[str, Any] | None = None,
+        keep_alive: str | int | None = None,
+    ) -> OllamaChunk:
+        """Send a prompt and wait for the whole answer.
+
+        Args:
+            model: The model name
+            prompt: The prompt, sent as one user message
+            options: Model options such as temperature, num_ctx, top_k, top_p, or stop
+            keep_alive: How long Ollama keeps the model loaded; defaults to `keep_alive_for(model)`
+
+        Returns:
+            The answer with its token usage
+
+        Raises:
+            OllamaError: If Ollama answers with an error
+            httpx.HTTPError: If the connection fails or times out
+        """
+        response = self._sync_client().post("/api/chat", json=self._payload(model, prompt, options, keep_alive, False))
+        _check_status(response, response.content)
+        return _parse_line(response.text) or OllamaChunk("", True)
+
+    def stream(
+        self,
+        model: str,
+        prompt: str,
+        options: Mapping[str, Any] | None = None,
+        keep_alive: str | int | None = None,
+    ) -> Iterator[OllamaChunk]:
+        """Send a prompt and yield the answer line by line as Ollama writes it.
+
+        Args:
+            model: The model name
+            prompt: The prompt, sent as one user message
+            options: Model options such as temperature, num_ctx, top_k, top_p, or stop
+            keep_alive: How long Ollama keeps the model loaded; defaults to `keep_alive_for(model)`
+
+        Yields:
+            One OllamaChunk per line; the last one has `done` set and the token usage
+
+        Raises:
+            OllamaError: If Ollama answers with an error
+            httpx.HTTPError: If the connection fails or times out
+        """
+        payload = self._payload(model, prompt, options, keep_alive, True)
+        with self._sync_client().stream("POST", "/api/chat", json=payload) as response:
+            if response.status_code != HTTP_OK:
+                _check_status(response, response.read())
+            for line in response.iter_lines():
+                if chunk := _parse_line(line):
+                    yield chunk
+
+    async def achat(
+        self,
+        model: str,
+        prompt: str,
+        options: Mapping[str, Any] | None = None,
+        keep_alive: str | int | None = None,
+    ) -> OllamaChunk:
+        """Async counterpart of `chat`, on the connections of the running event loop."""
+        response = await self._async_client().post("/api/chat", json=self._payload(model, prompt, options, keep_alive, False))
+        _check_status(response, response.content)
+        return _parse_line(response.text) or OllamaChunk("", True)
+
+    async def astream(
+        self,
+        model: str,
+        prompt: str,
+        options: Mapping[str, Any] | None = None,
+        keep_alive: str | int | None = None,
+    ) -> AsyncIterator[OllamaChunk]:
+        """Async counterpart of `stream`, on the connections of the running event loop."""
+        payload = self._payload(model, prompt, options, keep_alive, True)
+        async with self._async_client().stream("POST", "/api/chat", json=payload) as response:
+            if response.status_code != HTTP_OK:
+                _check_status(response, await response.aread())
+            async for line in response.aiter_lines():
+                if chunk := _parse_line(line):
+                    yield chunk
+
+    def list_running(self, timeout: float = HEALTH_TIMEOUT) -> list[dict[str, Any]]:
+        """List the models that Ollama holds in memory (`GET /api/ps`).
+
+        Args:
+            timeout: Seconds to wait for the answer
+
+        Returns:
+            The model entries of Ollama, with "name", "expires_at", and "size_vram"
+
+        Raises:
+            OllamaError: If Ollama answers with an error
+            httpx.HTTPError: If the connection fails or times out
+        """
+        response = self._sync_client().get("/api/ps", timeout=timeout)
+        _check_status(response, response.content)
+        return response.json().get("models", [])
+
+    def load(self, model: str, keep_alive: str | int | None = None, timeout: float = READ_TIMEOUT) -> None:
+        """Load a model into memory, or renew its keep-alive, and wait until it is loaded.
+
+        Ollama loads the model for a generate request with an empty prompt and
+        answers without generating anything.
+
+        Args:
+            model: The model name
+            keep_alive: How long Ollama keeps the model loaded; defaults to `keep_alive_for(model)`
+            timeout: Seconds to wait; loading a large model from disk takes minutes
+
+        Raises:
+            OllamaError: If Ollama answers with an error
+            httpx.HTTPError: If the connection fails or times out
+        """
+        payload = {
+            "model": model,
+            "prompt": "",
+            "stream": False,
+            "keep_alive": keep_alive if keep_alive is not None else keep_alive_for(model),
+        }
+        response = self._sync_client().post("/api/generate", json=payload, timeout=timeout)
+        _check_status(response, response.content)
+
+    def is_available(self) -> bool:
+        """Check whether the server answers, on a pooled connection.
+
+        Returns:
+            True if `GET /api/tags` answered HTTP 200
+        """
+        try:
+            return self._sync_client().get("/api/tags", timeout=HEALTH_TIMEOUT).status_code == HTTP_OK
+        except (httpx.HTTPError, httpx.InvalidURL):
+            return False
+
+    def close(self) -> None:
+        """Close the pooled connections of the synchronous client.
+
+        The async clients are dropped; their connections close with their event loop.
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            self._async_clients.clear()
+        if client is not None:
+            client.close()
+
+    def _payload(
+        self,
+        model: str,
+        prompt: str,
+        options: Mapping[str, Any] | None,
+        keep_alive: str | int | None,
+        stream: bool,
+    ) -> dict[str, Any]:
+        """Build the body of a chat request."""
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+            "options": model_options(options),
+            "keep_alive": keep_alive if keep_alive is not None else keep_alive_for(model),
+        }
+
+    def _sync_client(self) -> httpx.Client:
+        """Get the synchronous client, opening it on first use."""
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(base_url=self.base_url, timeout=_timeout(), limits=_limits())
+            return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Get the async client of the running event loop, opening it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = httpx.AsyncClient(base_url=self.base_url, timeout=_timeout(), limits=_limits())
+            return client
+
+
+def _timeout() -> httpx.Timeout:
+    """Get the timeouts of the pooled clients."""
+    return httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+def _limits() -> httpx.Limits:
+    """Get the connection pool limits of the pooled clients."""
+    return httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+
+
+class OllamaClientFactory:
+    """Factory for the process-wide Ollama clients, one per server."""
+
+    _clients: dict[str, OllamaClient] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, base_url: str | None = None) -> OllamaClient:
+        """Get the shared client of an Ollama server.
+
+        Args:
+            base_url: The base URL of the Ollama API; defaults to `OllamaConfig.base_url`
+
+        Returns:
+            The shared OllamaClient
+        """
+        base_url = (base_url or config_manager.get_config().ollama.base_url).rstrip("/")
+        with cls._lock:
+            client = cls._clients.get(base_url)
+            if client is None:
+                client = cls._clients[base_url] = OllamaClient(base_url)
+            return client
+
+    @classmethod
+    def reset(cls) -> None:
+        """Close and forget all clients."""
+        with cls._lock:
+            clients = list(cls._clients.values())
+            cls._clients.clear()
+        for client in clients:
+            client.close()
+
+
+def get_ollama_client(base_url: str | None = None) -> OllamaClient:
+    """Get the process-wide client of an Ollama server.
+
+    Args:
+        base_url: The base URL of the Ollama API; defaults to `OllamaConfig.base_url`
+
+    Returns:
+        The shared OllamaClient instance
+    """
+    return OllamaClientFactory.get_client(base_url)
@@ -1,35 +1,34 @@
 """Ollama LLM implementation."""
 
 import os
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
-import requests
-from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_community.chat_models import ChatOllama
 
-from src.llm.base import BaseLLM
-from src.llm.circuit_breaker import HTTP_OK
+from src.llm.base import BaseLLM, content_text
+from src.llm.config import config_manager
+from src.llm.health_checks import check_ollama_availability  # noqa: F401 - re-exported for existing imports
+from src.llm.metrics import report_usage
+from src.llm.ollama_client import CONFIG_OPTIONS, OllamaClient, get_ollama_client
+from src.llm.ollama_warmup import keep_alive_for
 
 
-def check_ollama_availability() -> bool:
-    """Check if Ollama service is available.
-
-    Returns:
-        True if Ollama is available, False otherwise
-    """
-    base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-    try:
-        response = requests.get(f"{base_url}/api/tags", timeout=2)
-        return response.status_code == HTTP_OK
-    except (requests.RequestException, TimeoutError):
-        return False
+# Clients that OllamaLLM can send its requests with
+BACKENDS = ("langchain", "native")
 
 
 class OllamaLLM(BaseLLM):
     """Ollama LLM implementation.
 
     This class implements the BaseLLM interface for Ollama's language models.
-    It wraps the LangChain ChatOllama class to provide a consistent interface.
+    It wraps the LangChain ChatOllama class to provide a consistent interface, or
+    sends the requests with the pooled native client of `src.llm.ollama_client`
+    when the backend is "native".
+
+    Attributes:
+        backend: The client of the requests, "langchain" or "native"
     """
 
     def __init__(
@@ -37,6 +36,7 @@ def __init__(
         model_name: str = "llama3",
         temperature: float = 0.7,
         base_url: str | None = None,
+        backend: str | None = None,
         **kwargs: Any,
     ):
         """Initialize the Ollama LLM.
@@ -45,18 +45,41 @@ def __init__(
             model_name: The name of the Ollama model to use
             temperature: The temperature setting for the model
             base_url: The base URL for the Ollama API (if not provided, will be read from environment)
-            **kwargs: Additional arguments to pass to the ChatOllama constructor
+            backend: "langchain" or "native"; None uses the `ollama.backend` setting of `LLMConfig`
+            **kwargs: Additional arguments to pass to the ChatOllama constructor. Without
+                `top_p`, `top_k`, or `num_ctx`, the settings of `OllamaConfig` are used.
+                Without a `keep_alive`, the model stays loaded for the keep-alive of
+                `OllamaConfig`, or for good if it is pinned. The native backend only
+                reads these options and `keep_alive`.
+
+        Raises:
+            ValueError: If the backend is unknown
         """
         self._model_name = model_name
         self._temperature = temperature
         self._base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-
-        self._llm = ChatOllama(
-            model=model_name,
-            base_url=self._base_url,
-            temperature=temperature,
-            **kwargs,
-        )
+        self.backend = (backend or config_manager.get_config().ollama.backend).lower()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown Ollama backend: {self.backend}, expected one of {', '.join(BACKENDS)}")
+        kwargs.setdefault("keep_alive", keep_alive_for(model_name))
+        config = config_manager.get_config().ollama
+        for name in CONFIG_OPTIONS:
+            if name != "temperature":
+                kwargs.setdefault(name, getattr(config, name))
+
+        self._llm: ChatOllama | None = None
+        self._client: OllamaClient | None = None
+        if self.backend == "native":
+            self._client = get_ollama_client(self._base_url)
+            self._keep_alive = kwargs["keep_alive"]
+            self._options = {name: kwargs[name] for name in CONFIG_OPTIONS if name in kwargs}
+        else:
+            self._llm = ChatOllama(
+                model=model_name,
+                base_url=self._base_url,
+                temperature=temperature,
+                **kwargs,
+            )
 
     def _call(
         self,
@@ -76,11 +99,107 @@ def _call(
         Returns:
             The generated text from the LLM
         """
+        if self._client is not None:
+            return self._execute(prompt, stop, lambda: self._native_invoke(prompt, stop))
+        return self._execute(prompt, stop, lambda: self._invoke(prompt))
+
+    def _invoke(self, prompt: str) -> str:
+        """Send the prompt to Ollama and return the generated text."""
         response = self._llm.invoke(prompt)
+        report_usage(response)
         if isinstance(response, str):
             return response
         return str(response.content)
 
+    async def _acall(
+        self,
+        prompt: str,
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the LLM asynchronously with the given prompt.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            run_manager: Optional async callback manager
+            **kwargs: Additional arguments to pass to the LLM
+
+        Returns:
+            The generated text from the LLM
+        """
+        if self._client is not None:
+            return await self._aexecute(prompt, stop, lambda: self._native_ainvoke(prompt, stop))
+        return await self._aexecute(prompt, stop, lambda: self._ainvoke(prompt))
+
+    async def _ainvoke(self, prompt: str) -> str:
+        """Send the prompt to Ollama with the async client and return the generated text."""
+        response = await self._llm.ainvoke(prompt)
+        report_usage(response)
+        if isinstance(response, str):
+            return response
+        return str(response.content)
+
+    def _native_invoke(self, prompt: str, stop: list[str] | None) -> str:
+        """Send the prompt with the native client and return the generated text."""
+        response = self._client.chat(self._model_name, prompt, self._native_options(stop), self._keep_alive)
+        report_usage(response)
+        return response.content
+
+    async def _native_ainvoke(self, prompt: str, stop: list[str] | None) -> str:
+        """Send the prompt with the native async client and return the generated text."""
+        response = await self._client.achat(self._model_name, prompt, self._native_options(stop), self._keep_alive)
+        report_usage(response)
+        return response.content
+
+    def _native_options(self, stop: list[str] | None) -> dict[str, Any]:
+        """Get the model options of a native request."""
+        options = {**self._options, "temperature": self._temperature}
+        if stop:
+            options["stop"] = stop
+        return options
+
+    def _stream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> Iterator[str]:
+        """Stream the generated text of a prompt from Ollama.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        for chunk in self._stream_limited(lambda: self._open_stream(prompt, stop), prompt):
+            yield content_text(chunk.content)
+
+    async def _astream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> AsyncIterator[str]:
+        """Stream the generated text of a prompt from Ollama with the async client.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        async for chunk in self._astream_limited(lambda: self._open_astream(prompt, stop), prompt):
+            yield content_text(chunk.content)
+
+    def _open_stream(self, prompt: str, stop: list[str] | None) -> Iterator[Any]:
+        """Open the stream of the backend; its chunks have the text in `content`."""
+        if self._client is not None:
+            return self._client.stream(self._model_name, prompt, self._native_options(stop), self._keep_alive)
+        return self._llm.stream(prompt)
+
+    def _open_astream(self, prompt: str, stop: list[str] | None) -> AsyncIterator[Any]:
+        """Open the async stream of the backend; its chunks have the text in `content`."""
+        if self._client is not None:
+            return self._client.astream(self._model_name, prompt, self._native_options(stop), self._keep_alive)
+        return self._llm.astream(prompt)
+
     def _llm_type(self) -> str:
         """Return type of LLM.
 
@@ -106,7 +225,8 @@ def temperature(self, value: float) -> None:
             value: The temperature value to set
         """
         self._temperature = value
-        self._llm.temperature = value
+        if self._llm is not None:
+            self._llm.temperature = value
 
     @property
     def model_name(self) -> str:
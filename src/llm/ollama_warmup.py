@@ -0,0 +1,410 @@
+"""Warm-up and keep-alive of the local Ollama models.
+
+Ollama loads a model into memory on its first request and unloads it after the
+request's keep-alive time, so the first call after idle time waits seconds for
+the model to load. This also hits the `LOCAL_ACCURATE` fallback, whose large model
+is rarely used. The warmer loads the configured model (`OllamaConfig.model_name`)
+and the local models of the default routing tier of `LLMFactory` at startup, in a
+background thread, and then keeps them loaded. Other pulled models, such as the
+large model of the accurate tier, are loaded on first use unless they are pinned:
+
+- Every round it reads the resident models from `GET /api/ps` and publishes them
+  as an immutable snapshot, which `LLMFactory` reads to prefer a loaded model
+  when latency matters.
+- A resident model whose keep-alive ends before the next rounds gets a new
+  keep-alive. This only resets Ollama's timer; it does not load anything.
+- A pinned model (`OllamaConfig.pinned_models`) is loaded with an endless
+  keep-alive and loaded again if Ollama has evicted it. Other models are only
+  loaded at startup, so two models that do not fit in memory together are not
+  loaded in turn forever.
+
+A model is loaded by a generate request with an empty prompt, which Ollama
+answers once the model is in memory. The requests go through the pooled
+`OllamaClient` of the server.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from src.llm.config import config_manager
+
+
+if TYPE_CHECKING:
+    from src.llm.ollama_client import OllamaClient
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Keep-alive that tells Ollama to keep a model loaded until it is stopped
+PINNED_KEEP_ALIVE = -1
+
+# Seconds to wait for Ollama to load a model; large models take minutes from disk
+LOAD_TIMEOUT = 300.0
+
+# Seconds to wait for the list of resident models
+PS_TIMEOUT = 2.0
+
+# A model gets a new keep-alive when its keep-alive ends within this many rounds
+RENEW_ROUNDS = 2
+
+
+def model_key(name: str) -> str:
+    """Get the name under which Ollama lists a model.
+
+    Args:
+        name: A model name, for example "llama3" or "llama3:70b"
+
+    Returns:
+        The name with a tag, for example "llama3:latest"
+    """
+    return name if ":" in name else f"{name}:latest"
+
+
+def keep_alive_for(model: str) -> str | int:
+    """Get the keep-alive that requests for a model send, from `OllamaConfig`.
+
+    Args:
+        model: The model name, with or without a tag
+
+    Returns:
+        PINNED_KEEP_ALIVE for pinned models, the keep-alive setting otherwise
+    """
+    config = config_manager.get_config().ollama
+    pinned = {model_key(name) for name in config.pinned_models}
+    return PINNED_KEEP_ALIVE if model_key(model) in pinned else keep_alive_value(config.keep_alive)
+
+
+def keep_alive_value(keep_alive: str | int) -> str | int:
+    """Convert a keep-alive setting to the value Ollama expects.
+
+    Args:
+        keep_alive: A duration such as "30m", or a number of seconds such as "600" or -1
+
+    Returns:
+        The duration string, or the seconds as a number (Ollama reads a number
+        without a unit as seconds, and a negative one as "keep loaded")
+    """
+    if isinstance(keep_alive, str) and keep_alive.strip().lstrip("-").isdigit():
+        return int(keep_alive)
+    return keep_alive
+
+
+@dataclass(frozen=True)
+class ResidentModel:
+    """A model that Ollama holds in memory.
+
+    Attributes:
+        name: The model name with its tag, for example "llama3:latest"
+        expires_at: When Ollama unloads the model, None if unknown
+        size_vram: Bytes of GPU memory the model uses
+    """
+
+    name: str
+    expires_at: datetime | None = None
+    size_vram: int = 0
+
+
+@dataclass(frozen=True)
+class ResidencySnapshot:
+    """The resident models at one point in time.
+
+    Attributes:
+        models: Resident models keyed by name with tag
+        checked_at: `time.time()` of the check, 0.0 before the first check
+        reachable: Whether Ollama answered the check
+    """
+
+    models: Mapping[str, ResidentModel] = field(default_factory=lambda: MappingProxyType({}))
+    checked_at: float = 0.0
+    reachable: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the snapshot to a JSON-friendly dictionary.
+
+        Returns:
+            The resident models with their unload time, and the time of the check
+        """
+        return {
+            "reachable": self.reachable,
+            "checked_at": self.checked_at,
+            "models": {
+                name: {
+                    "expires_at": model.expires_at.isoformat() if model.expires_at else None,
+                    "size_vram": model.size_vram,
+                }
+                for name, model in self.models.items()
+            },
+        }
+
+
+class OllamaWarmer:
+    """Background thread that loads Ollama models and keeps them loaded.
+
+    Readers never take a lock: they read the current snapshot reference, which is
+    swapped atomically.
+
+    Attributes:
+        base_url: The base URL of the Ollama API
+        models: Models loaded at startup
+        pinned: Models kept loaded for good
+        keep_alive: Keep-alive of the models that are not pinned, for example "30m"
+        interval: Seconds between two rounds
+
+    Example:
+        ```python
+        warmer = OllamaWarmer("http://localhost:11434", ["llama3", "llama3:70b"], pinned=["llama3"])
+        warmer.start()  # loads the models in the background
+        warmer.is_resident("llama3:70b")
+        ```
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        models: Iterable[str],
+        pinned: Iterable[str] = (),
+        keep_alive: str | int = "30m",
+        interval: float = 60.0,
+    ) -> None:
+        """Initialize the warmer without starting the thread.
+
+        Args:
+            base_url: The base URL of the Ollama API
+            models: Models loaded at startup
+            pinned: Models kept loaded for good; they are loaded at startup too
+            keep_alive: Keep-alive of the models that are not pinned
+            interval: Seconds between two rounds
+        """
+        self.base_url = base_url.rstrip("/")
+        self.pinned = list(dict.fromkeys(model_key(name) for name in pinned))
+        self.models = list(dict.fromkeys([*self.pinned, *(model_key(name) for name in models)]))
+        self.keep_alive = keep_alive_value(keep_alive)
+        self.interval = interval
+        self._snapshot = ResidencySnapshot()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> ResidencySnapshot:
+        """Get the latest published residency snapshot.
+
+        Returns:
+            The current ResidencySnapshot
+        """
+        return self._snapshot
+
+    def is_resident(self, model: str) -> bool:
+        """Read from the snapshot whether a model is loaded.
+
+        Args:
+            model: The model name, with or without a tag
+
+        Returns:
+            True if the last check found the model in memory
+        """
+        return model_key(model) in self._snapshot.models
+
+    def keep_alive_for(self, model: str) -> str | int:
+        """Get the keep-alive to send with requests for a model.
+
+        Args:
+            model: The model name, with or without a tag
+
+        Returns:
+            PINNED_KEEP_ALIVE for pinned models, the keep-alive setting otherwise
+        """
+        return PINNED_KEEP_ALIVE if model_key(model) in self.pinned else self.keep_alive
+
+    def start(self) -> None:
+        """Start the background thread (only once); its first round loads all models."""
+        with self._thread_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ollama-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread; a model that is loading finishes in Ollama."""
+        self._stop.set()
+        with self._thread_lock:
+            if self._thread is not None:
+                self._thread.join(timeout=PS_TIMEOUT)
+                self._thread = None
+
+    def refresh(self) -> ResidencySnapshot:
+        """Read the resident models from Ollama and publish them.
+
+        Returns:
+            The new ResidencySnapshot; it is empty and not reachable if Ollama did not answer
+        """
+        # Imported here because src.llm.ollama_client imports this module
+        from src.llm.ollama_client import OllamaError
+
+        try:
+            listed = self._client().list_running(timeout=PS_TIMEOUT)
+        except (OllamaError, httpx.HTTPError, httpx.InvalidURL, ValueError) as e:
+            logger.debug(f"Could not list the resident Ollama models: {e}")
+            listed = None
+
+        models = {}
+        for entry in listed or []:
+            name = entry.get("name") or entry.get("model")
+            if name:
+                models[model_key(name)] = ResidentModel(
+                    model_key(name), _parse_time(entry.get("expires_at")), int(entry.get("size_vram") or 0)
+                )
+        self._snapshot = ResidencySnapshot(MappingProxyType(models), time.time(), listed is not None)
+        return self._snapshot
+
+    def warm(self, model: str) -> bool:
+        """Load a model, or renew its keep-alive if it is loaded, and wait until Ollama answers.
+
+        Args:
+            model: The model name, with or without a tag
+
+        Returns:
+            True if Ollama loaded the model
+        """
+        # Imported here because src.llm.ollama_client imports this module
+        from src.llm.ollama_client import OllamaError
+
+        start = time.monotonic()
+        try:
+            self._client().load(model, keep_alive=self.keep_alive_for(model), timeout=LOAD_TIMEOUT)
+        except (OllamaError, httpx.HTTPError, httpx.InvalidURL) as e:
+            logger.warning(f"Could not warm up Ollama model {model}: {e}")
+            return False
+        logger.info(f"Ollama model {model} is loaded ({time.monotonic() - start:.1f}s)")
+        return True
+
+    def warm_all(self) -> list[str]:
+        """Load every model that is not resident yet.
+
+        Returns:
+            The models that were loaded
+        """
+        if not self.refresh().reachable:
+            return []
+        loaded = [model for model in self.models if not self.is_resident(model) and self.warm(model)]
+        self.refresh()
+        return loaded
+
+    def keep_warm(self) -> list[str]:
+        """Run one background round: renew ending keep-alives and reload evicted pinned models.
+
+        Returns:
+            The models that got a warm-up request
+        """
+        snapshot = self.refresh()
+        if not snapshot.reachable:
+            return []
+        renew_before = time.time() + RENEW_ROUNDS * self.interval
+        warmed = []
+        for model in self.models:
+            resident = snapshot.models.get(model)
+            if resident is None:
+                needed = model in self.pinned
+            else:
+                needed = resident.expires_at is not None and resident.expires_at.timestamp() < renew_before
+            if needed and self.warm(model):
+                warmed.append(model)
+        if warmed:
+            self.refresh()
+        return warmed
+
+    def _client(self) -> "OllamaClient":
+        """Get the pooled client of the Ollama server."""
+        # Imported here because src.llm.ollama_client imports this module
+        from src.llm.ollama_client import get_ollama_client
+
+        return get_ollama_client(self.base_url)
+
+    def _run(self) -> None:
+        """Warm-up loop: load the models, then keep them loaded until the warmer is stopped."""
+        self.warm_all()
+        while not self._stop.wait(self.interval):
+            self.keep_warm()
+
+
+def _parse_time(value: Any) -> datetime | None:
+    """Parse an ISO 8601 time from Ollama, or return None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=UTC)
+
+
+class OllamaWarmerFactory:
+    """Factory for the process-wide Ollama warmer."""
+
+    _warmer: OllamaWarmer | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_warmer(cls) -> OllamaWarmer | None:
+        """Get the shared warmer of the configured Ollama model and the local models of the default tier, creating it on first use.
+
+        The warmer is not started here; `start_ollama_warmup` starts it.
+
+        Returns:
+            The shared OllamaWarmer, or None if `OllamaConfig.warmup` is off
+        """
+        config = config_manager.get_config().ollama
+        if not config.warmup:
+            return None
+        with cls._lock:
+            if cls._warmer is None:
+                # Imported here because src.llm.llm_factory imports this module
+                from src.llm.llm_factory import LLMFactory
+
+                cls._warmer = OllamaWarmer(
+                    config.base_url,
+                    LLMFactory.warmup_models(),
+                    pinned=config.pinned_models,
+                    keep_alive=config.keep_alive,
+                    interval=config.warmup_interval_seconds,
+                )
+            return cls._warmer
+
+    @classmethod
+    def reset(cls) -> None:
+        """Stop and forget the shared warmer."""
+        with cls._lock:
+            warmer, cls._warmer = cls._warmer, None
+        if warmer is not None:
+            warmer.stop()
+
+
+def get_ollama_warmer() -> OllamaWarmer | None:
+    """Get the process-wide Ollama warmer, or None if warm-up is disabled.
+
+    Returns:
+        The shared OllamaWarmer instance, or None
+    """
+    return OllamaWarmerFactory.get_warmer()
+
+
+def start_ollama_warmup() -> OllamaWarmer | None:
+    """Start loading the Ollama models in the background, if warm-up is enabled.
+
+    Returns:
+        The running OllamaWarmer, or None if warm-up is disabled
+    """
+    warmer = get_ollama_warmer()
+    if warmer is not None:
+        warmer.start()
+    return warmer
@@ -1,34 +1,17 @@
 """OpenAI LLM implementation."""
 
 import os
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
-import requests
-from langchain.callbacks.manager import CallbackManagerForLLMRun
+from langchain.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain.schema import BaseMessage
 from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 
-from src.llm.base import BaseLLM
-from src.llm.circuit_breaker import HTTP_OK
-
-
-def check_openai_availability() -> bool:
-    """Check if OpenAI API is available.
-
-    Returns:
-        True if OpenAI is available, False otherwise
-    """
-    api_key = os.getenv("OPENAI_API_KEY", "")
-    if not api_key:
-        return False
-
-    try:
-        # Simple check to see if the API key is valid
-        response = requests.get("https://api.openai.com/v1/models", headers={"Authorization": f"Bearer {api_key}"}, timeout=2)
-        return response.status_code == HTTP_OK
-    except (requests.RequestException, TimeoutError):
-        return False
+from src.llm.base import BaseLLM, content_text
+from src.llm.health_checks import check_openai_availability  # noqa: F401 - re-exported for existing imports
+from src.llm.metrics import report_usage
 
 
 class OpenAILLM(BaseLLM):
@@ -86,11 +69,72 @@ def _call(
         Returns:
             The generated text from the LLM
         """
+        return self._execute(prompt, stop, lambda: self._invoke(prompt))
+
+    def _invoke(self, prompt: str) -> str:
+        """Send the prompt to OpenAI and return the generated text."""
         response = self._llm.invoke(prompt)
+        report_usage(response)
         if isinstance(response, str):
             return response
         return str(response.content)
 
+    async def _acall(
+        self,
+        prompt: str,
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> str:
+        """Call the LLM asynchronously with the given prompt.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            run_manager: Optional async callback manager
+            **kwargs: Additional arguments to pass to the LLM
+
+        Returns:
+            The generated text from the LLM
+        """
+        return await self._aexecute(prompt, stop, lambda: self._ainvoke(prompt))
+
+    async def _ainvoke(self, prompt: str) -> str:
+        """Send the prompt to OpenAI with the async client and return the generated text."""
+        response = await self._llm.ainvoke(prompt)
+        report_usage(response)
+        if isinstance(response, str):
+            return response
+        return str(response.content)
+
+    def _stream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> Iterator[str]:
+        """Stream the generated text of a prompt from OpenAI.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        for chunk in self._stream_limited(lambda: self._llm.stream(prompt), prompt):
+            yield content_text(chunk.content)
+
+    async def _astream(self, prompt: str, stop: list[str] | None = None, **kwargs: Any) -> AsyncIterator[str]:
+        """Stream the generated text of a prompt from OpenAI with the async client.
+
+        Args:
+            prompt: The prompt to send to the LLM
+            stop: Optional list of stop sequences
+            **kwargs: Additional arguments to pass to the LLM
+
+        Yields:
+            The pieces of generated text
+        """
+        async for chunk in self._astream_limited(lambda: self._llm.astream(prompt), prompt):
+            yield content_text(chunk.content)
+
     def __call__(self, prompt: str | list[BaseMessage], **kwargs: Any) -> str:
         """Call the LLM with the given prompt.
 
@@ -0,0 +1,397 @@
+"""Per-provider request and token rate limits for LLM calls.
+
+Batch jobs can send many requests at once, and providers answer requests above the
+account limit with errors (HTTP 429). This module keeps a limiter per provider and
+API key with two token buckets: one for requests per minute and one for prompt and
+completion tokens per minute. A request takes one request and its estimated prompt
+tokens before it is sent; once it has finished, the limiter is settled with the
+tokens the provider actually counted.
+
+Callers that must wait are queued instead of failing. The queue is fair between
+flows: the next free slot goes to the flows in turn, and to the requests of one
+flow in order of arrival, so a batch of many prompts (one flow, see
+`BaseLLM.agenerate`) cannot starve a single query that arrives after it. A flow
+is the value set with `rate_limit_flow`, or else the current asyncio task or
+thread. The same queue is used by threads (`acquire`) and coroutines (`aacquire`),
+and both return the time spent in the queue, which the metrics report apart from
+the provider latency. Waiting threads sleep on a condition variable and waiting
+coroutines on a future of their event loop that is resolved when the queue moves,
+so a coroutine behind other requests never polls; only the head of the queue
+sleeps for the time until the buckets allow it.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Hashable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from src.llm.config import config_manager
+from src.llm.event_loop import wake_waiters
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of seconds in a rate-limit window
+SECONDS_PER_MINUTE = 60.0
+
+
+@dataclass(frozen=True)
+class RateLimitStats:
+    """Counters of a rate limiter queue.
+
+    Attributes:
+        granted: Requests that were let through
+        waiting: Requests in the queue now
+        total_wait: Seconds spent in the queue by all granted requests
+        max_wait: Longest time in seconds that a granted request spent in the queue
+    """
+
+    granted: int
+    waiting: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def average_wait(self) -> float:
+        """Get the average time in the queue.
+
+        Returns:
+            The average wait in seconds, 0.0 before the first request
+        """
+        return self.total_wait / self.granted if self.granted else 0.0
+
+
+class _Bucket:
+    """Token bucket that refills at a rate per minute and holds one second's worth (at least 1)."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / SECONDS_PER_MINUTE
+        self.capacity = max(1.0, self.rate)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Add the tokens earned since the last refill."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Return the seconds until `amount` may be taken; larger amounts only need a full bucket."""
+        needed = min(amount, self.capacity)
+        return max(0.0, (needed - self.level) / self.rate)
+
+
+@dataclass
+class _Waiter:
+    """A request in the queue of a rate limiter."""
+
+    flow: Hashable
+    tokens: float
+
+
+_current_flow: ContextVar[Hashable | None] = ContextVar("rate_limit_flow", default=None)
+
+
+@contextmanager
+def rate_limit_flow(flow: Hashable) -> Iterator[None]:
+    """Queue the requests made inside the block as one flow.
+
+    The rate limiter queue is fair between flows, so all requests of the block
+    together get the same share of the limit as any other single caller.
+
+    Args:
+        flow: Name of the flow, for example "batch-42"
+
+    Yields:
+        None
+    """
+    token = _current_flow.set(flow)
+    try:
+        yield
+    finally:
+        _current_flow.reset(token)
+
+
+def _default_flow() -> Hashable:
+    """Return the flow of the caller: the one set with `rate_limit_flow`, the asyncio task, or the thread."""
+    flow = _current_flow.get()
+    if flow is not None:
+        return flow
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return ("task", id(task)) if task is not None else ("thread", threading.get_ident())
+
+
+class RateLimiter:
+    """Fair queue in front of a request bucket and a token bucket.
+
+    The buckets hold at most one second's worth of requests and tokens (and at
+    least one), so short bursts are allowed but the average rate never exceeds
+    the limits. A request with more tokens than a bucket holds waits for a full
+    bucket and leaves it in debt, so the following requests wait longer.
+
+    Attributes:
+        requests_per_minute: Maximum average number of requests per minute, 0 for no limit
+        tokens_per_minute: Maximum average number of tokens per minute, 0 for no limit
+
+    Example:
+        ```python
+        limiter = RateLimiter(requests_per_minute=50, tokens_per_minute=40000)
+        waited = limiter.acquire(tokens=1200)  # waits until the request may be sent
+        limiter.settle(300)  # the request used 300 more tokens than reserved
+        ```
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0) -> None:
+        """Initialize full buckets and an empty queue.
+
+        Args:
+            requests_per_minute: Maximum average number of requests per minute, 0 for no limit
+            tokens_per_minute: Maximum average number of tokens per minute, 0 for no limit
+
+        Raises:
+            ValueError: If a limit is negative or neither limit is positive
+        """
+        if requests_per_minute < 0 or tokens_per_minute < 0 or (requests_per_minute <= 0 and tokens_per_minute <= 0):
+            raise ValueError(
+                f"requests_per_minute or tokens_per_minute must be positive, got {requests_per_minute} and {tokens_per_minute}"
+            )
+
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = _Bucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+        self._flows: OrderedDict[Hashable, deque[_Waiter]] = OrderedDict()
+        self._condition = threading.Condition(threading.Lock())
+        self._async_waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._granted = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self, tokens: float = 0, flow: Hashable | None = None) -> float:
+        """Wait in the current thread until the request may be sent.
+
+        Args:
+            tokens: Tokens the request is expected to use, such as its prompt tokens
+            flow: Flow of the request; defaults to the current flow
+
+        Returns:
+            The time in seconds that was spent in the queue
+        """
+        start = time.monotonic()
+        waiter = self._enqueue(tokens, flow)
+        try:
+            with self._condition:
+                while (delay := self._try_grant(waiter)) != 0.0:
+                    self._condition.wait(timeout=delay)
+        except BaseException:
+            self._remove(waiter)
+            raise
+        return self._record_wait(time.monotonic() - start)
+
+    async def aacquire(self, tokens: float = 0, flow: Hashable | None = None) -> float:
+        """Wait without blocking the event loop until the request may be sent.
+
+        Args:
+            tokens: Tokens the request is expected to use, such as its prompt tokens
+            flow: Flow of the request; defaults to the current flow
+
+        Returns:
+            The time in seconds that was spent in the queue
+        """
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        waiter = self._enqueue(tokens, flow)
+        try:
+            while True:
+                with self._condition:
+                    delay = self._try_grant(waiter)
+                    if delay == 0.0:
+                        break
+                    wakeup = loop.create_future()
+                    self._async_waiters.append((loop, wakeup))
+                if delay is None:
+                    # Behind other requests: wait until the queue moves
+                    await wakeup
+                else:
+                    # At the head: wait for the buckets, or for a settle that frees tokens
+                    try:
+                        await asyncio.wait_for(wakeup, delay)
+                    except TimeoutError:
+                        pass
+        except BaseException:
+            self._remove(waiter)
+            raise
+        return self._record_wait(time.monotonic() - start)
+
+    def settle(self, tokens: float) -> None:
+        """Correct the token bucket once the real token usage of a request is known.
+
+        Args:
+            tokens: Tokens used beyond the reserved amount; negative to give tokens back
+        """
+        if self._tokens is None or tokens == 0:
+            return
+        with self._condition:
+            self._tokens.refill(time.monotonic())
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level - tokens)
+            self._notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Let no request through for some time, for example after the provider answered HTTP 429.
+
+        Args:
+            seconds: Length of the pause
+        """
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"Rate limiter paused for {seconds:.1f}s")
+
+    def stats(self) -> RateLimitStats:
+        """Get the counters of the queue.
+
+        Returns:
+            A RateLimitStats object
+        """
+        with self._condition:
+            waiting = sum(len(waiters) for waiters in self._flows.values())
+            return RateLimitStats(self._granted, waiting, self._total_wait, self._max_wait)
+
+    def _enqueue(self, tokens: float, flow: Hashable | None) -> _Waiter:
+        """Add a request to the queue of its flow."""
+        waiter = _Waiter(flow if flow is not None else _default_flow(), max(0.0, tokens))
+        with self._condition:
+            self._flows.setdefault(waiter.flow, deque()).append(waiter)
+        return waiter
+
+    def _try_grant(self, waiter: _Waiter) -> float | None:
+        """Let the waiter through if it is next and the buckets allow it. Call with the lock held.
+
+        Returns:
+            0.0 if the waiter was let through, the seconds until the buckets allow it
+            if it is next, or None if other requests are ahead of it
+        """
+        head_flow, head_waiters = next(iter(self._flows.items()))
+        if head_waiters[0] is not waiter:
+            return None
+
+        now = time.monotonic()
+        delay = max(0.0, self._paused_until - now)
+        for bucket, amount in ((self._requests, 1.0), (self._tokens, waiter.tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                delay = max(delay, bucket.delay(amount))
+        if delay > 0:
+            return delay
+
+        if self._requests is not None:
+            self._requests.level -= 1.0
+        if self._tokens is not None:
+            self._tokens.level -= waiter.tokens
+        head_waiters.popleft()
+        if head_waiters:
+            self._flows.move_to_end(head_flow)
+        else:
+            del self._flows[head_flow]
+        self._notify_all()
+        return 0.0
+
+    def _remove(self, waiter: _Waiter) -> None:
+        """Take a waiter that gave up out of the queue."""
+        with self._condition:
+            waiters = self._flows.get(waiter.flow)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._flows[waiter.flow]
+                self._notify_all()
+
+    def _notify_all(self) -> None:
+        """Wake up every waiting thread and coroutine to check the queue again. Call with the lock held."""
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        wake_waiters(waiters)
+
+    def _record_wait(self, waited: float) -> float:
+        """Add the wait of a granted request to the counters and return it."""
+        with self._condition:
+            self._granted += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return waited
+
+
+def account_key(api_key: str | None) -> str | None:
+    """Get a short fingerprint of an API key, so that limiters can be kept per key without storing it.
+
+    Args:
+        api_key: The API key, or None
+
+    Returns:
+        The first 12 hex digits of the SHA-256 of the key, or None without a key
+    """
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12] if api_key else None
+
+
+class RateLimiterFactory:
+    """Factory for the process-wide rate limiters, one per provider and API key."""
+
+    _limiters: dict[tuple[str, str | None], RateLimiter] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_limiter(cls, provider: str, account: str | None = None) -> RateLimiter | None:
+        """Get the rate limiter of a provider account.
+
+        The limits are the `requests_per_minute` and `tokens_per_minute` settings of
+        the provider in `LLMConfig`; every API key has its own limiter with these
+        limits. The limiter is rebuilt when the settings change.
+
+        Args:
+            provider: The provider name, for example "anthropic"
+            account: Fingerprint of the API key (see `account_key`), or None
+
+        Returns:
+            The shared RateLimiter, or None if the provider has no limit
+        """
+        provider = provider.lower()
+        provider_config = getattr(config_manager.get_config(), provider, None)
+        requests_limit = getattr(provider_config, "requests_per_minute", 0) or 0
+        tokens_limit = getattr(provider_config, "tokens_per_minute", 0) or 0
+        if requests_limit <= 0 and tokens_limit <= 0:
+            return None
+
+        with cls._lock:
+            limiter = cls._limiters.get((provider, account))
+            if limiter is None or (limiter.requests_per_minute, limiter.tokens_per_minute) != (requests_limit, tokens_limit):
+                limiter = cls._limiters[(provider, account)] = RateLimiter(requests_limit, tokens_limit)
+            return limiter
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget all limiters, so that the next calls start with full buckets."""
+        with cls._lock:
+            cls._limiters.clear()
+
+
+def get_rate_limiter(provider: str, account: str | None = None) -> RateLimiter | None:
+    """Get the rate limiter of a provider account, or None if the provider has no limit.
+
+    Args:
+        provider: The provider name, for example "anthropic"
+        account: Fingerprint of the API key (see `account_key`), or None
+
+    Returns:
+        The shared RateLimiter instance, or None
+    """
+    return RateLimiterFactory.get_limiter(provider, account)
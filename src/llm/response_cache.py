@@ -0,0 +1,250 @@
+"""On-disk response cache for LLM calls.
+
+Every identical prompt used to cost a full provider round trip. This module stores
+completions on disk under `LLMConfig.cache_dir`, keyed by provider, model,
+temperature, stop sequences, and a hash of the prompt. Entries expire after a TTL,
+and the cache is size-bounded: when it is full, the least recently used entries
+are evicted. The cache is enabled or disabled with `LLMConfig.cache_responses`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from src.llm.config import config_manager
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Name of the SQLite file inside the cache directory
+CACHE_FILE_NAME = "responses.sqlite3"
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Counters of a response cache.
+
+    Attributes:
+        hits: Lookups answered from the cache
+        misses: Lookups that needed a provider call
+        evictions: Entries removed because they expired or the cache was full
+        entries: Entries currently stored
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Get the share of lookups answered from the cache.
+
+        Returns:
+            The hit rate between 0.0 and 1.0
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """SQLite-backed LLM response cache with TTL and LRU eviction.
+
+    Attributes:
+        path: Path of the SQLite database file
+        ttl_seconds: Time after which an entry is no longer used
+        max_entries: Maximum number of stored entries
+
+    Example:
+        ```python
+        cache = ResponseCache(".cache/llm", ttl_seconds=3600, max_entries=1000)
+        key = cache.make_key("anthropic", "claude-sonnet-4-20250514", 0.7, None, "Hello")
+        if cache.get(key) is None:
+            cache.set(key, "Hi there!")
+        ```
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: float, max_entries: int) -> None:
+        """Initialize the cache and create the database if needed.
+
+        Args:
+            cache_dir: Directory for the cache database
+            ttl_seconds: Time after which an entry is no longer used
+            max_entries: Maximum number of stored entries
+
+        Raises:
+            ValueError: If max_entries is smaller than 1
+            sqlite3.Error: If the database cannot be created
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1, got {max_entries}")
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILE_NAME)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, stop: list[str] | None, prompt: str) -> str:
+        """Build the cache key for a call.
+
+        Args:
+            provider: The provider name
+            model: The model name
+            temperature: The temperature of the call
+            stop: The stop sequences of the call
+            prompt: The prompt text
+
+        Returns:
+            A hex digest that identifies the call
+        """
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        fields = [provider, model, temperature, stop or [], prompt_hash]
+        return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Look up a cached response.
+
+        Args:
+            key: The key built by `make_key`
+
+        Returns:
+            The cached response, or None on a miss or an expired entry
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] >= self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count(evictions=1)
+                row = None
+            if row is None:
+                self._count(misses=1)
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+
+        self._count(hits=1)
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store a response and evict the least recently used entries if needed.
+
+        Args:
+            key: The key built by `make_key`
+            value: The response text
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                self._count(evictions=overflow)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+        with self._lock:
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> CacheStats:
+        """Return the hit, miss, and eviction counters.
+
+        Returns:
+            A CacheStats object
+        """
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions, entries=entries)
+
+    def _count(self, hits: int = 0, misses: int = 0, evictions: int = 0) -> None:
+        """Update the counters."""
+        with self._lock:
+            self._hits += hits
+            self._misses += misses
+            self._evictions += evictions
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection that commits on success and always closes."""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+class ResponseCacheFactory:
+    """Factory for the process-wide response cache."""
+
+    _cache: ResponseCache | None = None
+    _settings: tuple[str, float, int] | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls) -> ResponseCache | None:
+        """Get the response cache configured by `LLMConfig`.
+
+        The cache is rebuilt when the cache settings change.
+
+        Returns:
+            The shared ResponseCache, or None if `cache_responses` is disabled
+        """
+        config = config_manager.get_config()
+        if not config.cache_responses:
+            return None
+
+        settings = (config.cache_dir, float(config.cache_ttl_seconds), int(config.cache_max_entries))
+        with cls._lock:
+            if cls._cache is None or cls._settings != settings:
+                try:
+                    cls._cache = ResponseCache(*settings)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"LLM response cache disabled, cannot open {config.cache_dir}: {e}")
+                    return None
+                cls._settings = settings
+            return cls._cache
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Get the response cache, or None if caching is disabled.
+
+    Returns:
+        The shared ResponseCache instance, or None
+    """
+    return ResponseCacheFactory.get_cache()
@@ -0,0 +1,160 @@
+"""Process-wide retry budget for LLM calls.
+
+During a provider outage every call fails, and without a limit every worker
+retries every call several times. The retries then multiply the load on a
+provider that is already struggling. The retry budget caps the retries of the
+whole process to a share of the recent requests, plus a small reserve so that a
+process with little traffic can still retry.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from src.llm.config import config_manager
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Length of the window in which requests and retries are counted
+BUDGET_WINDOW_SECONDS = 10.0
+
+# Retries always allowed in a window, whatever the number of requests
+MIN_RETRIES_PER_WINDOW = 10
+
+
+@dataclass(frozen=True)
+class RetryBudgetStats:
+    """Counters of a retry budget in the current window.
+
+    Attributes:
+        requests: First attempts in the window
+        retries: Retries allowed in the window
+        denied: Retries refused since the budget was created
+    """
+
+    requests: int
+    retries: int
+    denied: int
+
+
+class RetryBudget:
+    """Cap on the ratio of retries to requests over a sliding time window.
+
+    Attributes:
+        ratio: Share of the requests that may be retried, for example 0.2
+        min_retries: Retries always allowed in a window
+        window_seconds: Length of the window
+
+    Example:
+        ```python
+        budget = RetryBudget(ratio=0.2)
+        budget.record_request()
+        if budget.try_retry():
+            ...  # send the retry
+        ```
+    """
+
+    def __init__(
+        self,
+        ratio: float,
+        min_retries: int = MIN_RETRIES_PER_WINDOW,
+        window_seconds: float = BUDGET_WINDOW_SECONDS,
+    ) -> None:
+        """Initialize an empty budget.
+
+        Args:
+            ratio: Share of the requests that may be retried
+            min_retries: Retries always allowed in a window
+            window_seconds: Length of the window
+
+        Raises:
+            ValueError: If ratio or min_retries is negative
+        """
+        if ratio < 0 or min_retries < 0:
+            raise ValueError(f"Invalid retry budget: ratio {ratio}, min_retries {min_retries}")
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window_seconds = window_seconds
+        self._requests: deque[float] = deque()
+        self._retries: deque[float] = deque()
+        self._denied = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Count the first attempt of a call."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._requests.append(now)
+
+    def try_retry(self) -> bool:
+        """Take one retry from the budget.
+
+        Returns:
+            True if the retry may be sent, False if the budget is used up
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                self._denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def stats(self) -> RetryBudgetStats:
+        """Return the counters of the current window.
+
+        Returns:
+            A RetryBudgetStats object
+        """
+        with self._lock:
+            self._prune(time.monotonic())
+            return RetryBudgetStats(requests=len(self._requests), retries=len(self._retries), denied=self._denied)
+
+    def _prune(self, now: float) -> None:
+        """Drop the requests and retries that left the window."""
+        for times in (self._requests, self._retries):
+            while times and now - times[0] >= self.window_seconds:
+                times.popleft()
+
+
+class RetryBudgetFactory:
+    """Factory for the process-wide retry budget."""
+
+    _budget: RetryBudget | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_budget(cls) -> RetryBudget:
+        """Get the retry budget configured by `LLMConfig`.
+
+        The budget is rebuilt when the `retry_budget_ratio` setting changes.
+
+        Returns:
+            The shared RetryBudget instance
+        """
+        ratio = config_manager.get_config().retry_budget_ratio
+        with cls._lock:
+            if cls._budget is None or cls._budget.ratio != ratio:
+                cls._budget = RetryBudget(ratio)
+            return cls._budget
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget the shared budget, so that the next call starts an empty one."""
+        with cls._lock:
+            cls._budget = None
+
+
+def get_retry_budget() -> RetryBudget:
+    """Get the process-wide retry budget.
+
+    Returns:
+        The shared RetryBudget instance
+    """
+    return RetryBudgetFactory.get_budget()
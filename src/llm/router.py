@@ -0,0 +1,361 @@
+"""Latency- and error-aware routing between LLM providers.
+
+The circuit breakers only tell whether a provider is up. A provider that is up
+but answers three times slower than usual would still get all the traffic. The
+router keeps an exponentially weighted moving average (EWMA) of the latency and
+the error rate of every (provider, model) route, fed by the real calls of
+`BaseLLM`, and `LLMFactory.get_llm_for_task` asks it which of the routes that
+meet the requested accuracy tier to use.
+
+The preferred route of a tier is used unless another available route is clearly
+faster (SWITCH_RATIO). A route with too few calls, or whose statistics are older
+than STALE_SECONDS, counts as unknown; an unknown preferred route is used again,
+so a provider that recovered gets traffic back.
+
+While the preferred route takes all the traffic, the other routes collect no calls
+and cannot be compared with it. So every route also keeps a slow baseline average
+of its latency: when the recent latency of the preferred route reaches DRIFT_RATIO
+times its baseline, the request goes to an unknown route of the tier instead, which
+then collects the calls that the comparison needs. Every decision is counted, and
+`stats()` reports the decisions together with the EWMAs of every route.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any
+
+from src.llm.config import config_manager
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Weight of the newest call in the latency and error-rate averages
+EWMA_ALPHA = 0.2
+
+# Weight of the newest call in the long-term baseline of the latency
+BASELINE_ALPHA = 0.02
+
+# The preferred route has drifted when its recent latency reaches this multiple of its baseline
+DRIFT_RATIO = 1.5
+
+# Calls a route needs before its averages are used
+MIN_SAMPLES = 3
+
+# Averages older than this many seconds are ignored, so the route is tried again
+STALE_SECONDS = 60.0
+
+# Another route is used only when its score is below this share of the preferred route's score
+SWITCH_RATIO = 0.8
+
+# Lowest success rate used in the score, so that a failing route has a large but finite score
+MIN_SUCCESS_RATE = 0.05
+
+# Reasons of a routing decision
+REASON_PREFERRED = "preferred"  # The preferred route of the tier
+REASON_FASTER = "faster"  # Another route had a clearly better score
+REASON_FALLBACK = "fallback"  # The preferred route was unavailable
+REASON_DRIFTED = "drifted"  # The preferred route became much slower than its baseline; an unknown route is tried
+REASON_UNAVAILABLE = "unavailable"  # No route was available; the preferred route is tried anyway
+
+
+@dataclass(frozen=True)
+class RouteStats:
+    """Moving averages of the calls of one (provider, model) route.
+
+    Attributes:
+        provider: The LLM provider
+        model: The model name
+        latency: EWMA of the latency of successful calls in seconds, None before the first success
+        error_rate: EWMA of the share of failed calls
+        samples: Calls observed
+        updated: `time.monotonic()` of the last observed call
+        baseline: Slow EWMA of the latency of successful calls in seconds, None before the first success
+    """
+
+    provider: str
+    model: str
+    latency: float | None
+    error_rate: float
+    samples: int
+    updated: float
+    baseline: float | None = None
+
+    @property
+    def drift(self) -> float:
+        """Get the recent latency as a multiple of the baseline latency.
+
+        Returns:
+            The ratio of the two averages, or 1.0 without a successful call
+        """
+        if self.latency is None or not self.baseline:
+            return 1.0
+        return self.latency / self.baseline
+
+    @property
+    def score(self) -> float:
+        """Get the expected time to a successful answer; lower is better.
+
+        Returns:
+            The latency divided by the success rate, or infinity without a successful call
+        """
+        if self.latency is None:
+            return float("inf")
+        return self.latency / max(1.0 - self.error_rate, MIN_SUCCESS_RATE)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the statistics to a JSON-friendly dictionary.
+
+        Returns:
+            The averages, rounded to 4 decimals
+        """
+        return {
+            "latency": None if self.latency is None else round(self.latency, 4),
+            "baseline": None if self.baseline is None else round(self.baseline, 4),
+            "error_rate": round(self.error_rate, 4),
+            "samples": self.samples,
+        }
+
+
+@dataclass(frozen=True)
+class RoutingDecision:
+    """The route chosen for one request.
+
+    Attributes:
+        tier: The requested tier, for example "cloud_fast"
+        provider: The chosen provider
+        model: The chosen model
+        reason: Why the route was chosen, one of the REASON_* constants
+        index: Position of the chosen route in the candidate list
+    """
+
+    tier: str
+    provider: str
+    model: str
+    reason: str
+    index: int
+
+
+@dataclass(frozen=True)
+class RouterStats:
+    """Snapshot of the router's averages and decision counters.
+
+    Attributes:
+        routes: Averages per "provider/model"
+        decisions: Decisions per "tier -> provider/model (reason)"
+    """
+
+    routes: Mapping[str, RouteStats] = field(default_factory=lambda: MappingProxyType({}))
+    decisions: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert the snapshot to a JSON-friendly dictionary.
+
+        Returns:
+            The routes and the decision counters
+        """
+        return {
+            "routes": {name: stats.to_dict() for name, stats in self.routes.items()},
+            "decisions": dict(self.decisions),
+        }
+
+
+class LLMRouter:
+    """Chooses between routes from the EWMAs of their latency and error rate.
+
+    Attributes:
+        alpha: Weight of the newest call in the averages
+        min_samples: Calls a route needs before its averages are used
+        stale_seconds: Age after which the averages of a route are ignored
+        switch_ratio: Share of the preferred score that another route must beat
+        baseline_alpha: Weight of the newest call in the baseline latency
+        drift_ratio: Multiple of the baseline latency at which the preferred route has drifted
+    """
+
+    def __init__(
+        self,
+        alpha: float = EWMA_ALPHA,
+        min_samples: int = MIN_SAMPLES,
+        stale_seconds: float = STALE_SECONDS,
+        switch_ratio: float = SWITCH_RATIO,
+        baseline_alpha: float = BASELINE_ALPHA,
+        drift_ratio: float = DRIFT_RATIO,
+    ) -> None:
+        """Initialize a router without statistics.
+
+        Args:
+            alpha: Weight of the newest call in the averages, between 0 and 1
+            min_samples: Calls a route needs before its averages are used
+            stale_seconds: Age after which the averages of a route are ignored
+            switch_ratio: Share of the preferred score that another route must beat
+            baseline_alpha: Weight of the newest call in the baseline latency, between 0 and 1
+            drift_ratio: Multiple of the baseline latency at which the preferred route has drifted
+
+        Raises:
+            ValueError: If alpha or baseline_alpha is not in (0, 1]
+        """
+        if not 0 < alpha <= 1 or not 0 < baseline_alpha <= 1:
+            raise ValueError("alpha and baseline_alpha must be greater than 0 and at most 1")
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.stale_seconds = stale_seconds
+        self.switch_ratio = switch_ratio
+        self.baseline_alpha = baseline_alpha
+        self.drift_ratio = drift_ratio
+        self._routes: dict[tuple[str, str], RouteStats] = {}
+        self._decisions: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, provider: str, model: str, latency: float, success: bool) -> None:
+        """Add the outcome of a call to the averages of its route.
+
+        Failed calls raise the error rate but do not change the latency, so a
+        provider that fails fast does not look fast.
+
+        Args:
+            provider: The LLM provider
+            model: The model name
+            latency: Duration of the call in seconds
+            success: Whether the call succeeded
+        """
+        now = time.monotonic()
+        with self._lock:
+            current = self._routes.get((provider, model))
+            if current is None:
+                latency_ewma = baseline = latency if success else None
+                error_rate = 0.0 if success else 1.0
+                samples = 1
+            else:
+                latency_ewma, baseline = current.latency, current.baseline
+                if success:
+                    latency_ewma = latency if latency_ewma is None else latency_ewma + self.alpha * (latency - latency_ewma)
+                    baseline = latency if baseline is None else baseline + self.baseline_alpha * (latency - baseline)
+                error_rate = current.error_rate + self.alpha * ((0.0 if success else 1.0) - current.error_rate)
+                samples = current.samples + 1
+            self._routes[(provider, model)] = RouteStats(provider, model, latency_ewma, error_rate, samples, now, baseline)
+
+    def route_stats(self, provider: str, model: str) -> RouteStats | None:
+        """Get the averages of a route.
+
+        Args:
+            provider: The LLM provider
+            model: The model name
+
+        Returns:
+            The RouteStats of the route, or None if it has no calls
+        """
+        with self._lock:
+            return self._routes.get((provider, model))
+
+    def choose(self, tier: str, candidates: Sequence[tuple[str, str]], is_available: Callable[[str], bool]) -> RoutingDecision:
+        """Choose the route for a request and count the decision.
+
+        Args:
+            tier: The requested tier, used to label the decision
+            candidates: (provider, model) routes that meet the tier, preferred route first
+            is_available: Function that tells whether a provider is available
+
+        Returns:
+            The RoutingDecision
+
+        Raises:
+            ValueError: If there are no candidates
+        """
+        if not candidates:
+            raise ValueError("No candidate routes")
+        usable = [index for index, (provider, _) in enumerate(candidates) if is_available(provider)]
+        if not usable:
+            return self._decide(tier, candidates, 0, REASON_UNAVAILABLE)
+
+        preferred = usable[0]
+        reason = REASON_PREFERRED if preferred == 0 else REASON_FALLBACK
+        preferred_stats = self._usable_stats(*candidates[preferred])
+        if preferred_stats is None:
+            return self._decide(tier, candidates, preferred, reason)
+
+        scored = [(stats.score, index) for index in usable[1:] if (stats := self._usable_stats(*candidates[index])) is not None]
+        if scored:
+            best_score, best = min(scored)
+            if best_score < preferred_stats.score * self.switch_ratio:
+                return self._decide(tier, candidates, best, REASON_FASTER)
+
+        # The known routes are no faster; try an unknown one when the preferred route slowed down
+        known = {index for _, index in scored}
+        unknown = [index for index in usable[1:] if index not in known]
+        if unknown and preferred_stats.drift >= self.drift_ratio:
+            return self._decide(tier, candidates, unknown[0], REASON_DRIFTED)
+        return self._decide(tier, candidates, preferred, reason)
+
+    def stats(self) -> RouterStats:
+        """Get a snapshot of the averages and the decision counters.
+
+        Returns:
+            A RouterStats object
+        """
+        with self._lock:
+            routes = {f"{provider}/{model}": stats for (provider, model), stats in self._routes.items()}
+            return RouterStats(routes=MappingProxyType(routes), decisions=MappingProxyType(dict(self._decisions)))
+
+    def clear(self) -> None:
+        """Drop all averages and decision counters."""
+        with self._lock:
+            self._routes.clear()
+            self._decisions.clear()
+
+    def _usable_stats(self, provider: str, model: str) -> RouteStats | None:
+        """Return the averages of a route, or None if they are missing, too few, or stale."""
+        stats = self.route_stats(provider, model)
+        if stats is None or stats.samples < self.min_samples or time.monotonic() - stats.updated > self.stale_seconds:
+            return None
+        return stats
+
+    def _decide(self, tier: str, candidates: Sequence[tuple[str, str]], index: int, reason: str) -> RoutingDecision:
+        """Build a decision and count it."""
+        provider, model = candidates[index]
+        decision = RoutingDecision(tier=tier, provider=provider, model=model, reason=reason, index=index)
+        with self._lock:
+            self._decisions[f"{tier} -> {provider}/{model} ({reason})"] += 1
+        if reason != REASON_PREFERRED:
+            logger.info(f"Routing {tier} request to {provider}/{model} ({reason})")
+        return decision
+
+
+class LLMRouterFactory:
+    """Factory for the process-wide LLM router."""
+
+    _router: LLMRouter | None = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_router(cls) -> LLMRouter:
+        """Get the shared router, creating it on first use.
+
+        Returns:
+            The shared LLMRouter instance
+        """
+        with cls._lock:
+            if cls._router is None:
+                cls._router = LLMRouter()
+            return cls._router
+
+    @classmethod
+    def reset(cls) -> None:
+        """Forget the shared router, so that the next call starts without statistics."""
+        with cls._lock:
+            cls._router = None
+
+
+def get_llm_router() -> LLMRouter | None:
+    """Get the process-wide LLM router, or None if routing is disabled.
+
+    Returns:
+        The shared LLMRouter instance, or None if `LLMConfig.llm_routing` is off
+    """
+    if not config_manager.get_config().llm_routing:
+        return None
+    return LLMRouterFactory.get_router()
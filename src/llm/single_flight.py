@@ -0,0 +1,246 @@
+"""Single-flight coalescing of identical in-flight calls.
+
+When many identical requests arrive at the same time (for example after a policy
+change is in the news), each one used to start its own crew run and its own provider
+calls. A single-flight group lets the first caller with a given key run the work,
+while concurrent callers with the same key wait for it and get the same result (or
+the same exception). Only calls that overlap in time are coalesced; a call that
+starts after the previous one finished runs again.
+
+A leader that is cancelled (for example a hedged request that lost the race) does not
+pass its cancellation on: one of its followers takes over and runs the work itself,
+and the other followers wait for that call.
+
+Synchronous callers (`do`) and coroutines (`ado`) share the same groups: a
+coroutine can wait for a call that runs in a worker thread and the other way round.
+"""
+
+import asyncio
+import logging
+import threading
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class SingleFlightStats:
+    """Counters of a single-flight group.
+
+    Attributes:
+        executions: Calls that ran the work
+        collapsed: Calls that waited for a running call instead of running the work
+        in_flight: Keys that are running right now
+    """
+
+    executions: int
+    collapsed: int
+    in_flight: int
+
+
+class _Call:
+    """A running call that threads and coroutines can wait for."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """Check whether the call ended because its leader was cancelled."""
+        return isinstance(self.error, asyncio.CancelledError)
+
+    def outcome(self) -> Any:
+        """Return the result, or raise the error, of the finished call."""
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def add_waiter(self) -> asyncio.Future:
+        """Return a future of the running event loop that resolves when the call finishes."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if not self.done.is_set():
+                self._waiters.append((loop, future))
+                return future
+        future.set_result(None)
+        return future
+
+    def finish(self) -> None:
+        """Wake up every waiting thread and coroutine."""
+        with self._lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass  # The waiter's event loop is closed, nobody is waiting anymore
+
+
+def _resolve(future: asyncio.Future) -> None:
+    """Resolve a waiter future unless its coroutine was cancelled."""
+    if not future.done():
+        future.set_result(None)
+
+
+class SingleFlight:
+    """Group of calls where only one call per key runs at a time.
+
+    Attributes:
+        name: Name of the group, used in log messages
+
+    Example:
+        ```python
+        group = SingleFlight("query")
+        result = group.do("work permit", lambda: run_crew("work permit"))
+        ```
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize an empty group.
+
+        Args:
+            name: Name of the group, used in log messages
+        """
+        self.name = name
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._executions = 0
+        self._collapsed = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run `fn`, or wait for the running call with the same key.
+
+        Args:
+            key: The normalized key of the call
+            fn: Function that does the work
+
+        Returns:
+            The result of the call that ran the work
+
+        Raises:
+            Exception: The exception raised by the call that ran the work
+        """
+        call, leader = self._join(key)
+        while not leader:
+            call.done.wait()
+            if not call.cancelled:
+                return call.outcome()
+            call, leader = self._join(key, take_over=True)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._leave(key, call)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await `fn()`, or wait without blocking for the running call with the same key.
+
+        Args:
+            key: The normalized key of the call
+            fn: Coroutine function that does the work
+
+        Returns:
+            The result of the call that ran the work
+
+        Raises:
+            Exception: The exception raised by the call that ran the work
+        """
+        call, leader = self._join(key)
+        while not leader:
+            await call.add_waiter()
+            if not call.cancelled:
+                return call.outcome()
+            call, leader = self._join(key, take_over=True)
+
+        try:
+            call.result = await fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._leave(key, call)
+
+    def _join(self, key: str, take_over: bool = False) -> tuple[_Call, bool]:
+        """Return the running call of a key, or start one; the flag tells whether the caller leads.
+
+        `take_over` is set by a follower whose leader was cancelled; it was already
+        counted as collapsed.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                if not take_over:
+                    self._collapsed += 1
+                logger.debug(f"Coalesced a call into the running {self.name} call")
+                return call, False
+            if take_over:
+                logger.debug(f"Taking over the cancelled {self.name} call")
+            call = self._calls[key] = _Call()
+            self._executions += 1
+            return call, True
+
+    def _leave(self, key: str, call: _Call) -> None:
+        """Remove a finished call and wake up its followers."""
+        with self._lock:
+            del self._calls[key]
+        call.finish()
+
+    def stats(self) -> SingleFlightStats:
+        """Return the execution and collapse counters.
+
+        Returns:
+            A SingleFlightStats object
+        """
+        with self._lock:
+            return SingleFlightStats(executions=self._executions, collapsed=self._collapsed, in_flight=len(self._calls))
+
+
+class SingleFlightFactory:
+    """Factory for the process-wide single-flight groups."""
+
+    _groups: dict[str, SingleFlight] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_group(cls, name: str) -> SingleFlight:
+        """Get the single-flight group with the given name, creating it on first use.
+
+        Args:
+            name: Name of the group, for example "llm" or "query"
+
+        Returns:
+            The shared SingleFlight instance
+        """
+        with cls._lock:
+            if name not in cls._groups:
+                cls._groups[name] = SingleFlight(name)
+            return cls._groups[name]
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Get a shared single-flight group.
+
+    Args:
+        name: Name of the group, for example "llm" or "query"
+
+    Returns:
+        The shared SingleFlight instance
+    """
+    return SingleFlightFactory.get_group(name)
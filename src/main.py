@@ -5,52 +5,108 @@
 agents: Intake, Research, and Response.
 """
 
-import os
+import json
+import logging
+from collections.abc import Callable
+from contextlib import nullcontext
+from typing import TYPE_CHECKING
 
-from crewai import Crew, LLM, Process
-from dotenv import load_dotenv
+from src.answer_cache import get_answer_cache, parse_intake_summary
+from src.fast_intake import get_fast_intake
+from src.llm.metrics import UsageSummary, collect_calls
+from src.llm.single_flight import get_single_flight
+from src.streaming import StreamEvent, stream_crew_events
 
-from src.agents import create_immigration_crew
-from src.tasks import (
-    IntakeTask,
-    ResearchImmigrationTask,
-    ResponseTask,
-)
 
+if TYPE_CHECKING:
+    from src.crew_templates import CrewTemplatePool
 
-from src.llm.llm_factory import get_llm
+# Configure logging
+logger = logging.getLogger(__name__)
 
 
-def process_immigration_query(query: str, user_context: dict | None = None) -> str:
+def get_crew_template_pool() -> "CrewTemplatePool":
+    """Get the process-wide crew template pool.
+
+    The crew modules import CrewAI, which takes seconds, so they are imported on
+    the first query and not when this module is imported.
+
+    Returns:
+        The shared CrewTemplatePool instance
+    """
+    from src.crew_templates import get_crew_template_pool as get_pool
+
+    return get_pool()
+
+
+class QueryResult(str):
+    """The final response of a query, with the LLM usage of its run.
+
+    It is a `str`, so callers that only need the response text use it as before.
+
+    Attributes:
+        usage: Tokens, latency, and estimated cost of the run, in total, per agent,
+            and per task
+    """
+
+    usage: UsageSummary
+
+    def __new__(cls, text: str, usage: UsageSummary | None = None) -> "QueryResult":
+        """Create the result.
+
+        Args:
+            text: The final response text
+            usage: The LLM usage of the run
+
+        Returns:
+            The QueryResult object
+        """
+        result = super().__new__(cls, text)
+        result.usage = usage or UsageSummary()
+        return result
+
+
+def _query_key(inputs: dict[str, str]) -> str:
+    """Build the coalescing key of a query: case and whitespace are ignored."""
+    return json.dumps({name: " ".join(value.lower().split()) for name, value in sorted(inputs.items())})
+
+
+def process_immigration_query(
+    query: str,
+    user_context: dict | None = None,
+    on_event: Callable[[StreamEvent], None] | None = None,
+) -> str:
     """Processes an immigration query using the immigration agent crew.
 
-    This function orchestrates the entire workflow. It initializes the language model,
-    creates the 3 specialized agents, defines the sequence of tasks, and runs the
-    crew to produce a single concise response.
+    This function orchestrates the entire workflow. It borrows a warm crew template
+    (LLM, the 3 specialized agents, and the sequence of tasks) from the shared pool,
+    and runs the crew to produce a single concise response. The templates are built
+    once per process instead of once per query.
+
+    The intake facts are extracted by a rule-based fast path when the query and the
+    user context make them clear, without the IntakeAgent LLM call. When the answer
+    cache is enabled, the intake stage runs before the other stages. If another user
+    already asked about the same case (same nationality, location, destination,
+    visa type, status, and desired outcome), the cached answer is personalized and
+    returned without running the Research and Response stages.
+
+    Concurrent calls with the same query and user context (ignoring case and
+    whitespace) share one crew run and all get its result. Streamed calls always
+    run their own crew, because their events belong to one caller.
 
     Args:
         query: A string containing the user's immigration question or scenario.
         user_context: Optional dict with user details (name, country, location).
+        on_event: Optional callback for progress events. When given, it receives an
+            event when each task starts and finishes, and the tokens of the final
+            response as they are generated.
 
     Returns:
-        A string containing the final immigration response for the user.
+        A QueryResult: the final immigration response for the user as a string. Its
+        `usage` attribute holds the tokens, latency, and estimated cost of the LLM
+        calls of the run, per agent and per task. Coalesced calls share the result
+        (and the usage) of the one run.
     """
-    load_dotenv()
-
-    # Use the centralized LLM factory
-    llm = get_llm(temperature=0.3)
-
-    # Create 3 consolidated agents
-    agents_list = create_immigration_crew(llm)
-    intake_agent, research_agent, response_agent = agents_list
-
-    # Create tasks
-    tasks = [
-        IntakeTask(intake_agent),
-        ResearchImmigrationTask(research_agent),
-        ResponseTask(response_agent),
-    ]
-
     # Build inputs with user context
     ctx = user_context or {}
     inputs = {
@@ -60,12 +116,57 @@ def process_immigration_query(query: str, user_context: dict | None = None) -> s
         "user_location": ctx.get("location", "Not provided"),
     }
 
-    # Create and run the crew
-    crew = Crew(agents=agents_list, tasks=tasks, process=Process.sequential, verbose=True)
-    result = crew.kickoff(inputs=inputs)
+    if on_event is not None:
+        return _run_crew(inputs, ctx, on_event)
+    return get_single_flight("query").do(_query_key(inputs), lambda: _run_crew(inputs, ctx, None))
+
 
-    # Return the final response (last task's output)
-    return result.raw
+def _run_crew(inputs: dict[str, str], ctx: dict, on_event: Callable[[StreamEvent], None] | None) -> QueryResult:
+    """Run the crew for one query and sum the LLM usage of the run."""
+    with collect_calls() as records:
+        answer = _run_stages(inputs, ctx, on_event)
+    usage = UsageSummary.from_records(records)
+    logger.info(
+        f"Query used {usage.total.total_tokens} tokens in {usage.total.requests} LLM requests "
+        f"(estimated cost ${usage.total.cost:.4f})"
+    )
+    return QueryResult(answer, usage)
+
+
+def _run_stages(inputs: dict[str, str], ctx: dict, on_event: Callable[[StreamEvent], None] | None) -> str:
+    """Run the crew stages, using the intake fast path and the answer cache when enabled."""
+    fast_intake = get_fast_intake()
+    summary = fast_intake.extract(inputs["query"], ctx) if fast_intake else None
+    answer_cache = get_answer_cache()
+
+    # Run a warm crew from the template pool
+    events = stream_crew_events(on_event) if on_event else nullcontext()
+    with get_crew_template_pool().checkout() as template, events:
+        if summary is not None:
+            # The facts were clear enough to skip the IntakeAgent
+            template.set_intake_summary(summary)
+            if on_event:
+                on_event(StreamEvent("task_completed", {"task": "IntakeTask", "agent": None, "output": summary}))
+        elif answer_cache is None:
+            # Return the final response (last task's output)
+            return template.kickoff(inputs, stream=on_event is not None).raw
+        else:
+            summary = template.kickoff_intake(inputs).raw
+
+        # Look up the answer for the extracted case before the expensive stages
+        profile = parse_intake_summary(summary)
+        name = ctx.get("name") or profile.name
+        cached = answer_cache.lookup(profile, name) if answer_cache else None
+        if cached is not None:
+            if on_event:
+                on_event(StreamEvent("token", {"text": cached}))
+            return cached
+
+        answer = template.kickoff_advice(inputs, stream=on_event is not None).raw
+
+    if answer_cache:
+        answer_cache.save(profile, answer, name)
+    return answer
 
 
 def main():
@@ -89,6 +190,8 @@ def main():
     print("=" * 60)
     print(result)
     print("=" * 60)
+    print("LLM USAGE")
+    print(json.dumps(result.usage.to_dict(), indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,180 @@
+"""Progress and token streaming for immigration crew runs.
+
+CrewAI reports progress through its global event bus: an event is emitted when a
+task starts, when it finishes, and for every token of a streaming LLM call. The
+handlers run synchronously in the thread that runs the crew. This module registers
+one set of process-wide handlers and forwards the events to the sink of the crew
+run that is active in the current thread (a `ContextVar`), so concurrent runs in
+different worker threads never see each other's events.
+
+Only the tokens of the final `ResponseTask` are forwarded, and only the part after
+the agent's "Final Answer:" marker, so the client receives the user-facing answer
+and not the agent's intermediate reasoning.
+"""
+
+import json
+import logging
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Name of the task whose tokens are streamed to the client
+STREAMED_TASK = "ResponseTask"
+
+# Marker that the CrewAI agent writes before its user-facing answer
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """A progress event of a streamed crew run.
+
+    Attributes:
+        event: Event name: "task_started", "task_completed", "task_failed", "token",
+            "final", or "error"
+        data: JSON-serializable event payload
+    """
+
+    event: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+    def to_sse(self) -> str:
+        """Format the event as a Server-Sent Events message.
+
+        Returns:
+            The event encoded as `event: ...` and `data: ...` lines
+        """
+        return f"event: {self.event}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class _StreamSink:
+    """Per-run state that turns CrewAI bus events into StreamEvents."""
+
+    def __init__(self, on_event: Callable[[StreamEvent], None]) -> None:
+        self._on_event = on_event
+        self._current_task: str | None = None
+        self._buffer = ""
+        self._answer_started = False
+
+    def task_started(self, task: Any) -> None:
+        self._current_task = type(task).__name__
+        self._buffer = ""
+        self._answer_started = False
+        self._on_event(StreamEvent("task_started", {"task": self._current_task, "agent": _agent_role(task)}))
+
+    def task_completed(self, task: Any, output: Any) -> None:
+        raw = getattr(output, "raw", str(output))
+        self._on_event(StreamEvent("task_completed", {"task": type(task).__name__, "agent": _agent_role(task), "output": raw}))
+        self._current_task = None
+
+    def task_failed(self, task: Any, error: str) -> None:
+        self._on_event(StreamEvent("task_failed", {"task": type(task).__name__, "error": error}))
+
+    def token(self, chunk: str) -> None:
+        if self._current_task != STREAMED_TASK or not chunk:
+            return
+
+        if self._answer_started:
+            self._on_event(StreamEvent("token", {"text": chunk}))
+            return
+
+        # Hold tokens back until the agent starts its final answer
+        self._buffer += chunk
+        marker_index = self._buffer.find(FINAL_ANSWER_MARKER)
+        if marker_index >= 0:
+            self._answer_started = True
+            text = self._buffer[marker_index + len(FINAL_ANSWER_MARKER) :].lstrip()
+            self._buffer = ""
+            if text:
+                self._on_event(StreamEvent("token", {"text": text}))
+
+
+def _agent_role(task: Any) -> str | None:
+    """Return the role of the agent assigned to a task, if any."""
+    agent = getattr(task, "agent", None)
+    return getattr(agent, "role", None)
+
+
+_current_sink: ContextVar[_StreamSink | None] = ContextVar("crew_stream_sink", default=None)
+_handlers_registered = False
+_handlers_lock = threading.Lock()
+
+
+def _register_bus_handlers() -> None:
+    """Register the process-wide CrewAI event bus handlers once.
+
+    CrewAI is imported here and not at module level, because importing it takes
+    seconds and the API server imports this module at startup.
+    """
+    global _handlers_registered
+
+    from crewai.utilities.events import (
+        LLMStreamChunkEvent,
+        TaskCompletedEvent,
+        TaskFailedEvent,
+        TaskStartedEvent,
+    )
+    from crewai.utilities.events.crewai_event_bus import crewai_event_bus
+
+    with _handlers_lock:
+        if _handlers_registered:
+            return
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_task_started(source: Any, event: TaskStartedEvent) -> None:
+            sink = _current_sink.get()
+            if sink is not None:
+                sink.task_started(event.task or source)
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_task_completed(source: Any, event: TaskCompletedEvent) -> None:
+            sink = _current_sink.get()
+            if sink is not None:
+                sink.task_completed(event.task or source, event.output)
+
+        @crewai_event_bus.on(TaskFailedEvent)
+        def on_task_failed(source: Any, event: TaskFailedEvent) -> None:
+            sink = _current_sink.get()
+            if sink is not None:
+                sink.task_failed(event.task or source, event.error)
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def on_stream_chunk(source: Any, event: LLMStreamChunkEvent) -> None:
+            sink = _current_sink.get()
+            if sink is not None:
+                sink.token(event.chunk)
+
+        _handlers_registered = True
+        logger.debug("Registered crew streaming handlers on the CrewAI event bus")
+
+
+@contextmanager
+def stream_crew_events(on_event: Callable[[StreamEvent], None]) -> Iterator[None]:
+    """Forward the events of crew runs in the current thread to a callback.
+
+    Args:
+        on_event: Callback that receives every StreamEvent. It is called from the
+            thread that runs the crew, so it must be thread-safe.
+
+    Yields:
+        None. Crew runs started inside the block report their events to `on_event`.
+
+    Example:
+        ```python
+        with stream_crew_events(print):
+            template.kickoff(inputs, stream=True)
+        ```
+    """
+    _register_bus_handlers()
+    token = _current_sink.set(_StreamSink(on_event))
+    try:
+        yield
+    finally:
+        _current_sink.reset(token)
@@ -6,7 +6,17 @@
 import pytest
 import requests
 
-from src.llm.circuit_breaker import is_ollama_available, is_openai_available
+from src.api.job_store import JobRunnerFactory
+from src.llm.circuit_breaker import CircuitBreakerFactory, is_ollama_available, is_openai_available
+from src.llm.concurrency_limiter import ConcurrencyLimiterFactory
+from src.llm.config import config_manager
+from src.llm.instance_pool import LLMInstancePoolFactory
+from src.llm.metrics import MetricsRegistryFactory
+from src.llm.ollama_client import OllamaClientFactory
+from src.llm.ollama_warmup import OllamaWarmerFactory
+from src.llm.rate_limiter import RateLimiterFactory
+from src.llm.retry_budget import RetryBudgetFactory
+from src.llm.router import LLMRouterFactory
 
 
 # Constants
@@ -22,6 +32,104 @@ def is_service_available(url: str, timeout: int = 5) -> bool:
         return False
 
 
+@pytest.fixture(autouse=True)
+def disable_response_cache(monkeypatch):
+    """Keep the on-disk LLM response cache out of tests unless a test enables it."""
+    monkeypatch.setattr(config_manager.get_config(), "cache_responses", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_answer_cache(monkeypatch):
+    """Keep the on-disk final-answer cache out of tests unless a test enables it."""
+    monkeypatch.setenv("ANSWER_CACHE_ENABLED", "false")
+
+
+@pytest.fixture(autouse=True)
+def disable_fast_intake(monkeypatch):
+    """Run the IntakeAgent in tests unless a test enables the rule-based fast path."""
+    monkeypatch.setenv("INTAKE_FAST_PATH", "false")
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breakers():
+    """Start every test with closed circuits, so failures of one test do not refuse calls in another."""
+    CircuitBreakerFactory.reset_all()
+    yield
+    CircuitBreakerFactory.reset_all()
+
+
+@pytest.fixture(autouse=True)
+def reset_retry_budget():
+    """Start every test with an empty retry budget, so retries of one test do not use up another's."""
+    RetryBudgetFactory.reset()
+    yield
+    RetryBudgetFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_pool():
+    """Start every test with an empty LLM instance pool, so instances built with one test's mocks are not reused."""
+    LLMInstancePoolFactory.reset()
+    yield
+    LLMInstancePoolFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_metrics():
+    """Start every test with an empty LLM metrics registry."""
+    MetricsRegistryFactory.reset()
+    yield
+    MetricsRegistryFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiters():
+    """Start every test with full rate limiter buckets and empty queues."""
+    RateLimiterFactory.reset()
+    yield
+    RateLimiterFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_concurrency_limiters():
+    """Start every test with concurrency limiters at their initial limit."""
+    ConcurrencyLimiterFactory.reset()
+    yield
+    ConcurrencyLimiterFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_ollama_clients():
+    """Start every test without pooled Ollama connections."""
+    OllamaClientFactory.reset()
+    yield
+    OllamaClientFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_ollama_warmer():
+    """Start every test without a running Ollama warmer or residency snapshot."""
+    OllamaWarmerFactory.reset()
+    yield
+    OllamaWarmerFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_router():
+    """Start every test with an LLM router without statistics, so one test's calls do not steer another's routing."""
+    LLMRouterFactory.reset()
+    yield
+    LLMRouterFactory.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_job_runner():
+    """Start every test without a job runner, so a test's job workers and database do not leak into another."""
+    JobRunnerFactory.reset()
+    yield
+    JobRunnerFactory.reset()
+
+
 @pytest.fixture
 def mock_env_vars():
     """Mock environment variables for testing."""
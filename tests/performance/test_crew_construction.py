@@ -0,0 +1,56 @@
+"""Benchmark for per-request crew construction cost.
+
+This module compares the cost of building the agents, tasks, and crew for every
+query (the old behaviour) with checking out and resetting a warm template from
+the CrewTemplatePool (the new behaviour). Run with `pytest -s` to see the timings.
+"""
+
+import time
+
+import pytest
+from crewai import Crew, Process
+
+from src.agents import create_immigration_crew
+from src.crew_templates import CrewTemplatePool
+from src.tasks import IntakeTask, ResearchImmigrationTask, ResponseTask
+
+
+# Benchmark constants
+TEST_MODEL = "gpt-4o-mini"
+BENCHMARK_ROUNDS = 20
+
+
+def build_crew_per_request() -> Crew:
+    """Build a crew the way process_immigration_query did before the template pool."""
+    agents = create_immigration_crew(TEST_MODEL)
+    intake_agent, research_agent, response_agent = agents
+    tasks = [IntakeTask(intake_agent), ResearchImmigrationTask(research_agent), ResponseTask(response_agent)]
+    return Crew(agents=agents, tasks=tasks, process=Process.sequential, verbose=True)
+
+
+@pytest.mark.performance
+class TestCrewConstructionPerformance:
+    """Performance test cases for crew construction."""
+
+    def test_template_checkout_is_cheaper_than_rebuild(self):
+        """Measure per-request setup cost before and after the template pool.
+
+        Verifies that:
+        1. Checking out a warm template is faster than building a new crew
+        2. Both timings are printed for tracking over time
+        """
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_ROUNDS):
+            build_crew_per_request()
+        rebuild_time = (time.perf_counter() - start) / BENCHMARK_ROUNDS
+
+        pool = CrewTemplatePool(size=1, llm_factory=lambda: TEST_MODEL)
+        pool.warm()
+        start = time.perf_counter()
+        for _ in range(BENCHMARK_ROUNDS):
+            with pool.checkout():
+                pass
+        checkout_time = (time.perf_counter() - start) / BENCHMARK_ROUNDS
+
+        print(f"\nPer-request crew setup: rebuild {rebuild_time * 1000:.2f} ms, template checkout {checkout_time * 1000:.3f} ms")
+        assert checkout_time < rebuild_time
@@ -0,0 +1,198 @@
+"""Unit tests for the final-answer cache.
+
+This module tests the parsing and normalization of intake summaries, the
+personalization of cached answers, and the cache hit path of
+process_immigration_query.
+"""
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.answer_cache import (
+    NAME_PLACEHOLDER,
+    AnswerCache,
+    IntakeProfile,
+    depersonalize,
+    get_answer_cache,
+    parse_intake_summary,
+    personalize,
+)
+from src.llm.response_cache import ResponseCache
+from src.main import process_immigration_query
+
+
+# Two intake summaries of the same case, written differently
+SUMMARY_EMMANUEL = """name: Emmanuel Amarikwa
+nationality: Nigerian
+current_location: Kigali, Rwanda
+destination_country: Canada
+current_visa_type: Not provided
+immigration_status: Not provided
+desired_outcome: Study permit
+additional_details: Transfer to Trent University"""
+
+SUMMARY_AMINA = """1. Name - Amina
+2. Nationality / country of origin: nigerian
+3. Current location: Rwanda
+4. Destination country: CANADA.
+5. Current visa type: none
+6. Immigration status: N/A
+7. Desired outcome: study permit"""
+
+ANSWER = "Hi Emmanuel, to study in Canada you need a study permit. Good luck, Emmanuel Amarikwa!"
+
+
+@pytest.fixture
+def answer_cache(tmp_path):
+    """Create an answer cache in a temporary directory."""
+    return AnswerCache(ResponseCache(str(tmp_path), ttl_seconds=3600, max_entries=10))
+
+
+class TestIntakeParsing:
+    """Tests for parsing and normalizing intake summaries."""
+
+    def test_parse_structured_summary(self):
+        """Verify the labelled fields are extracted and normalized."""
+        profile = parse_intake_summary(SUMMARY_EMMANUEL)
+
+        assert profile == IntakeProfile(
+            name="Emmanuel Amarikwa",
+            nationality="nigeria",
+            current_location="rwanda",
+            destination_country="canada",
+            desired_outcome="study permit",
+        )
+
+    def test_same_case_written_differently_has_same_key(self):
+        """Verify differently phrased summaries of one case share the cache key."""
+        first = parse_intake_summary(SUMMARY_EMMANUEL)
+        second = parse_intake_summary(SUMMARY_AMINA)
+
+        assert first.name != second.name
+        assert first.cache_key() == second.cache_key()
+
+    def test_different_outcome_has_different_key(self):
+        """Verify a different desired outcome changes the cache key."""
+        study = parse_intake_summary(SUMMARY_EMMANUEL)
+        work = parse_intake_summary(SUMMARY_EMMANUEL.replace("Study permit", "Work permit"))
+
+        assert study.cache_key() != work.cache_key()
+
+    def test_vague_profile_is_not_cacheable(self):
+        """Verify a profile without destination or outcome is not cached."""
+        assert not parse_intake_summary("name: Amina\ndestination_country: Not provided").cacheable
+
+
+class TestPersonalization:
+    """Tests for replacing the user's name in cached answers."""
+
+    def test_depersonalize_replaces_full_and_first_name(self):
+        """Verify every form of the name becomes one placeholder."""
+        text = depersonalize(ANSWER, "Emmanuel Amarikwa")
+
+        assert "Emmanuel" not in text
+        assert "Amarikwa" not in text
+        assert text.count(NAME_PLACEHOLDER) == 2
+
+    def test_personalize_uses_current_name(self):
+        """Verify the placeholder is filled with the current user's name."""
+        assert personalize(f"Hi {NAME_PLACEHOLDER}!", "Amina") == "Hi Amina!"
+        assert personalize(f"Hi {NAME_PLACEHOLDER}!", None) == "Hi there!"
+
+    def test_names_that_are_common_words(self):
+        """Verify parts of a name that are also common words are left alone outside of addressing the user."""
+        answer = "Hi Will, a grant of a study permit will require proof of funds. Will you need a visa? Good luck, Will!"
+
+        text = personalize(depersonalize(answer, "Will Grant"), "Ada Obi")
+
+        assert text == (
+            "Hi Ada Obi, a grant of a study permit will require proof of funds. Will you need a visa? Good luck, Ada Obi!"
+        )
+
+
+class TestAnswerCache:
+    """Tests for the AnswerCache class."""
+
+    def test_answer_is_shared_between_users(self, answer_cache):
+        """Verify an answer stored for one user is returned to another user."""
+        answer_cache.save(parse_intake_summary(SUMMARY_EMMANUEL), ANSWER, "Emmanuel Amarikwa")
+
+        answer = answer_cache.lookup(parse_intake_summary(SUMMARY_AMINA), "Amina")
+
+        assert answer == "Hi Amina, to study in Canada you need a study permit. Good luck, Amina!"
+        assert answer_cache.stats().hits == 1
+
+    def test_answer_quoting_details_is_never_stored(self, answer_cache):
+        """Verify an answer that repeats the user's additional details is not shared."""
+        summary = SUMMARY_EMMANUEL.replace("Transfer to Trent University", "My sister lives in Toronto and will sponsor me")
+        answer = "Since your sister lives in Toronto and will sponsor you, apply for a study permit."
+
+        answer_cache.save(parse_intake_summary(summary), answer, "Emmanuel Amarikwa")
+
+        assert answer_cache.stats().entries == 0
+
+    def test_vague_profile_is_never_stored(self, answer_cache):
+        """Verify nothing is stored for a profile that is not cacheable."""
+        answer_cache.save(IntakeProfile(nationality="nigerian"), ANSWER)
+
+        assert answer_cache.stats().entries == 0
+
+    def test_disabled_by_environment(self, monkeypatch):
+        """Verify ANSWER_CACHE_ENABLED=false turns the cache off."""
+        monkeypatch.setenv("ANSWER_CACHE_ENABLED", "false")
+
+        assert get_answer_cache() is None
+
+
+class TestProcessQueryWithAnswerCache:
+    """Tests for the answer cache in process_immigration_query."""
+
+    @pytest.fixture
+    def template(self):
+        """Create a crew template whose stages return fixed outputs."""
+        template = MagicMock()
+        template.kickoff_intake.return_value = MagicMock(raw=SUMMARY_AMINA)
+        template.kickoff_advice.return_value = MagicMock(raw="Hi Amina, apply online.")
+        return template
+
+    @pytest.fixture
+    def pool(self, template):
+        """Create a template pool that always checks out the same template."""
+        pool = MagicMock()
+
+        @contextmanager
+        def checkout():
+            yield template
+
+        pool.checkout = checkout
+        with patch("src.main.get_crew_template_pool", return_value=pool):
+            yield pool
+
+    def test_hit_skips_research_and_response(self, pool, template, answer_cache):
+        """Verify a cache hit returns the cached answer without the advice crew."""
+        answer_cache.save(parse_intake_summary(SUMMARY_EMMANUEL), ANSWER, "Emmanuel Amarikwa")
+
+        with patch("src.main.get_answer_cache", return_value=answer_cache):
+            result = process_immigration_query("Study permit for Canada?", {"name": "Amina"})
+
+        assert result.startswith("Hi Amina, to study in Canada")
+        template.kickoff_intake.assert_called_once()
+        template.kickoff_advice.assert_not_called()
+
+    def test_miss_runs_advice_and_stores_answer(self, pool, template, answer_cache):
+        """Verify a cache miss runs the advice crew and stores its answer."""
+        with patch("src.main.get_answer_cache", return_value=answer_cache):
+            first = process_immigration_query("Study permit for Canada?", {"name": "Amina"})
+            second = process_immigration_query("Study permit for Canada?", {"name": "Amina"})
+
+        assert first == second == "Hi Amina, apply online."
+        template.kickoff_advice.assert_called_once()
+
+    def test_disabled_cache_runs_full_crew(self, pool, template):
+        """Verify the full crew runs when the answer cache is disabled."""
+        template.kickoff.return_value = MagicMock(raw="full answer")
+
+        assert process_immigration_query("Study permit for Canada?") == "full answer"
+        template.kickoff_intake.assert_not_called()
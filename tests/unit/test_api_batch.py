@@ -0,0 +1,136 @@
+"""Unit tests for the batch advice endpoint.
+
+This module tests that batch items run concurrently within the parallelism
+limit, that results keep the input order, and that failures are per item.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from src.api import api_server
+from src.api.api_server import MAX_BATCH_ITEMS, MAX_BATCH_PARALLELISM, app
+from src.api.crew_executor import CrewExecutor, CrewExecutorFullError
+
+
+client = TestClient(app)
+
+
+def fake_process(query: str) -> dict:
+    """Answer a query after a delay that makes later items finish first."""
+    if query == "fail":
+        raise RuntimeError("crew failed")
+    time.sleep(0.05 / (1 + int(query)))
+    return {"answer": query}
+
+
+class TestBatchEndpoint:
+    """Tests for the /immigration-advice/batch endpoint."""
+
+    def test_results_keep_input_order(self):
+        """Verify results come back in the same order as the items."""
+        items = [{"text": str(i)} for i in range(4)]
+
+        with patch("src.api.api_server.process_immigration_query", side_effect=fake_process):
+            response = client.post("/immigration-advice/batch", json={"items": items, "max_parallelism": 4})
+
+        data = response.json()
+        assert response.status_code == 200
+        assert [result["index"] for result in data["results"]] == [0, 1, 2, 3]
+        assert [result["result"]["answer"] for result in data["results"]] == ["0", "1", "2", "3"]
+        assert data["succeeded"] == 4
+
+    def test_failure_is_reported_per_item(self):
+        """Verify one failing item does not fail the whole batch."""
+        items = [{"text": "0"}, {"text": "fail"}, {"text": "2"}]
+
+        with patch("src.api.api_server.process_immigration_query", side_effect=fake_process):
+            response = client.post("/immigration-advice/batch", json={"items": items})
+
+        data = response.json()
+        assert [result["status"] for result in data["results"]] == ["ok", "error", "ok"]
+        assert data["results"][1]["error"] == "crew failed"
+        assert data["failed"] == 1
+
+    def test_parallelism_is_bounded(self):
+        """Verify no more than max_parallelism items run at the same time."""
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def tracking_process(query: str) -> str:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return query
+
+        items = [{"text": str(i)} for i in range(8)]
+        with patch("src.api.api_server.process_immigration_query", side_effect=tracking_process):
+            client.post("/immigration-advice/batch", json={"items": items, "max_parallelism": 2})
+
+        assert peak <= 2
+
+    def test_invalid_parallelism(self):
+        """Verify a parallelism below 1 is rejected."""
+        response = client.post("/immigration-advice/batch", json={"items": [], "max_parallelism": 0})
+
+        assert response.status_code == 422
+
+    def test_batch_size_is_bounded(self):
+        """Verify too many items or a too high parallelism are rejected."""
+        too_many = client.post("/immigration-advice/batch", json={"items": [{"text": "0"}] * (MAX_BATCH_ITEMS + 1)})
+        too_parallel = client.post(
+            "/immigration-advice/batch", json={"items": [{"text": "0"}], "max_parallelism": MAX_BATCH_PARALLELISM + 1}
+        )
+
+        assert too_many.status_code == 422
+        assert too_parallel.status_code == 422
+
+    def test_parallelism_is_clamped_to_executor(self):
+        """Verify a batch never runs more items than the executor can hold."""
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def tracking_process(query: str) -> str:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+            return query
+
+        executor = CrewExecutor(max_workers=1, max_queue=1)
+        items = [{"text": str(i)} for i in range(6)]
+        with (
+            patch.object(api_server, "crew_executor", executor),
+            patch("src.api.api_server.process_immigration_query", side_effect=tracking_process),
+        ):
+            response = client.post("/immigration-advice/batch", json={"items": items, "max_parallelism": 8})
+
+        executor.shutdown()
+        assert response.json()["succeeded"] == 6
+        assert executor.stats().rejected == 0
+        assert peak <= 1
+
+    def test_full_executor_is_waited_for(self):
+        """Verify an item retries while the executor is full instead of failing."""
+        done = Future()
+        done.set_result({"answer": "0"})
+        attempts = [CrewExecutorFullError("full"), CrewExecutorFullError("full"), done]
+
+        with patch.object(api_server.crew_executor, "submit", side_effect=attempts):
+            response = client.post("/immigration-advice/batch", json={"items": [{"text": "0"}]})
+
+        data = response.json()
+        assert data["succeeded"] == 1
+        assert data["results"][0]["result"] == {"answer": "0"}
@@ -0,0 +1,266 @@
+"""Unit tests for the circuit breaker.
+
+This module tests the sliding window of call outcomes, opening on the error rate
+and the slow-call rate, and the breaker in the LLM call pipeline.
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.llm.base import BaseLLM
+from src.llm.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitOpenError,
+    CircuitState,
+    HealthProber,
+    SlidingWindow,
+)
+from src.llm.event_loop import run_coroutine
+from src.llm.fallback import RetryStrategy
+
+
+# A window of 10 seconds in 5 buckets of 2 seconds
+TEST_WINDOW_SECONDS = 10.0
+TEST_WINDOW_BUCKETS = 5
+
+# Calls that take this long or longer are slow in the tests
+TEST_SLOW_CALL_SECONDS = 1.0
+
+
+def make_breaker(**overrides):
+    """Build a breaker that opens after 4 calls with a 50% error rate."""
+    config = CircuitBreakerConfig(minimum_calls=4, slow_call_seconds=TEST_SLOW_CALL_SECONDS, **overrides)
+    return CircuitBreaker("claude", lambda: True, config)
+
+
+class BrokenLLM(BaseLLM):
+    """LLM whose provider requests fail until `healthy` is set."""
+
+    def __init__(self):
+        super().__init__(model_name="broken-model")
+        self.healthy = False
+        self.requests = 0
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return self._execute(prompt, stop, self._send)
+
+    def _send(self):
+        self.requests += 1
+        if not self.healthy:
+            raise ConnectionError("provider overloaded")
+        return "ok"
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        async def send():
+            return self._send()
+
+        return await self._aexecute(prompt, stop, send)
+
+    def _llm_type(self):
+        return "broken"
+
+    @property
+    def provider(self):
+        return "anthropic"
+
+
+class TestSlidingWindow:
+    """Tests for the SlidingWindow class."""
+
+    def test_counts_outcomes(self):
+        """Verify that calls, failures, and slow calls are counted."""
+        window = SlidingWindow(TEST_WINDOW_SECONDS, TEST_WINDOW_BUCKETS)
+        window.record(failed=False, slow=False, now=100.0)
+        window.record(failed=True, slow=False, now=101.0)
+        window.record(failed=False, slow=True, now=103.0)
+
+        stats = window.stats(now=103.0)
+
+        assert (stats.calls, stats.failures, stats.slow_calls) == (3, 1, 1)
+        assert stats.error_rate == pytest.approx(1 / 3)
+        assert stats.slow_call_rate == pytest.approx(1 / 3)
+
+    def test_old_outcomes_leave_the_window(self):
+        """Verify that outcomes older than the window are not counted."""
+        window = SlidingWindow(TEST_WINDOW_SECONDS, TEST_WINDOW_BUCKETS)
+        window.record(failed=True, slow=False, now=100.0)
+        window.record(failed=False, slow=False, now=108.0)
+
+        assert window.stats(now=108.0).calls == 2
+        assert window.stats(now=111.0).calls == 1
+        assert window.stats(now=200.0).calls == 0
+
+    def test_reused_bucket_is_reset(self):
+        """Verify that a bucket starts from zero when its time slot comes around again."""
+        window = SlidingWindow(TEST_WINDOW_SECONDS, TEST_WINDOW_BUCKETS)
+        window.record(failed=True, slow=False, now=100.0)
+        window.record(failed=False, slow=False, now=110.0)
+
+        stats = window.stats(now=110.0)
+
+        assert (stats.calls, stats.failures) == (1, 0)
+
+    def test_invalid_window(self):
+        """Verify that a window without buckets is rejected."""
+        with pytest.raises(ValueError):
+            SlidingWindow(TEST_WINDOW_SECONDS, 0)
+
+
+class TestCircuitBreakerOutcomes:
+    """Tests for opening the circuit on real call outcomes."""
+
+    def test_opens_on_error_rate(self):
+        """Verify that the circuit opens once half of the calls in the window failed."""
+        breaker = make_breaker()
+        breaker.record_call(success=True, duration=0.1)
+        breaker.record_call(success=False, duration=0.1)
+        breaker.record_call(success=True, duration=0.1)
+        assert breaker.allow_request() is True
+
+        breaker.record_call(success=False, duration=0.1)
+
+        assert breaker.allow_request() is False
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_needs_minimum_calls(self):
+        """Verify that a few failures alone do not open the circuit."""
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record_call(success=False, duration=0.1)
+
+        assert breaker.allow_request() is True
+
+    def test_opens_on_slow_call_rate(self):
+        """Verify that the circuit opens when most calls are slow, even if they succeed."""
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.record_call(success=True, duration=TEST_SLOW_CALL_SECONDS)
+
+        assert breaker.window_stats().slow_calls == 4
+        assert breaker.allow_request() is False
+
+    def test_half_open_success_closes(self):
+        """Verify that a successful call after the reset timeout closes the circuit."""
+        breaker = make_breaker(reset_timeout=0)
+        for _ in range(4):
+            breaker.record_call(success=False, duration=0.1)
+
+        assert breaker.allow_request() is True  # Half-open after the reset timeout
+        breaker.record_call(success=True, duration=0.1)
+
+        assert breaker.window_stats().calls == 0
+        assert breaker.allow_request() is True
+
+    def test_open_and_close_are_published(self):
+        """Verify that the health snapshot follows the circuit between probe rounds."""
+        breaker = make_breaker(reset_timeout=0)
+        prober = HealthProber([breaker])
+        prober.probe()
+        assert prober.is_available("claude") is True
+
+        for _ in range(4):
+            breaker.record_call(success=False, duration=0.1)
+        assert prober.is_available("claude") is False
+
+        breaker.allow_request()
+        breaker.record_call(success=True, duration=0.1)
+        assert prober.is_available("claude") is True
+
+
+class TestCircuitBreakerProbes:
+    """Tests for the health check results in the circuit breaker."""
+
+    def test_probes_stay_out_of_the_window(self):
+        """Verify that health checks neither count as calls nor open or close the circuit."""
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.record_probe(False)
+        breaker.record_call(success=False, duration=0.1)
+        breaker.record_call(success=False, duration=0.1)
+        for _ in range(10):
+            breaker.record_probe(True)
+
+        assert breaker.window_stats().calls == 2
+        assert breaker.allow_request() is True
+
+    def test_passing_probe_waits_for_reset_timeout(self):
+        """Verify that a passing health check does not move an open circuit to half-open before the reset timeout."""
+        breaker = make_breaker(reset_timeout=3600)
+        for _ in range(4):
+            breaker.record_call(success=False, duration=0.1)
+
+        breaker.record_probe(True)
+
+        assert breaker.state is CircuitState.OPEN
+        assert breaker.allow_request() is False
+
+    def test_passing_probe_half_opens_after_reset_timeout(self):
+        """Verify that a passing health check after the reset timeout moves the circuit to half-open."""
+        breaker = make_breaker(reset_timeout=60)
+        for _ in range(4):
+            breaker.record_call(success=False, duration=0.1)
+
+        with patch("src.llm.circuit_breaker.time.monotonic", return_value=time.monotonic() + 61):
+            breaker.record_probe(True)
+
+        assert breaker.state is CircuitState.HALF_OPEN
+        breaker.record_call(success=False, duration=0.1)
+        assert breaker.allow_request() is False
+
+    def test_failing_probe_delays_half_open(self):
+        """Verify that a failing health check restarts the reset timeout."""
+        breaker = make_breaker(reset_timeout=60)
+        for _ in range(4):
+            breaker.record_call(success=False, duration=0.1)
+        start = time.monotonic()
+
+        with patch("src.llm.circuit_breaker.time.monotonic", return_value=start + 50):
+            breaker.record_probe(False)
+        with patch("src.llm.circuit_breaker.time.monotonic", return_value=start + 70):
+            assert breaker.allow_request() is False
+        with patch("src.llm.circuit_breaker.time.monotonic", return_value=start + 111):
+            assert breaker.allow_request() is True
+
+        assert breaker.state is CircuitState.HALF_OPEN
+
+
+class TestCircuitBreakerPipeline:
+    """Tests for the circuit breaker in the LLM call pipeline."""
+
+    def test_failed_calls_open_the_circuit(self):
+        """Verify that failed provider requests open the circuit and later calls are refused."""
+        llm = BrokenLLM()
+        breaker = make_breaker()
+
+        with patch("src.llm.base.get_circuit_breaker", return_value=breaker):
+            for index in range(4):
+                with pytest.raises(ConnectionError):
+                    llm.invoke(f"prompt {index}")
+            with pytest.raises(CircuitOpenError):
+                llm.invoke("one more")
+
+        assert llm.requests == 4
+
+    def test_async_calls_are_recorded(self):
+        """Verify that async provider requests feed the same window."""
+        llm = BrokenLLM()
+        llm.healthy = True
+        breaker = make_breaker()
+
+        with patch("src.llm.base.get_circuit_breaker", return_value=breaker):
+            assert run_coroutine(llm.acall("hello")) == "ok"
+
+        assert breaker.window_stats().calls == 1
+
+    def test_retry_stops_on_open_circuit(self):
+        """Verify that the retry strategy does not retry a refused call."""
+        operation = MagicMock(side_effect=CircuitOpenError("open"))
+
+        with pytest.raises(CircuitOpenError):
+            RetryStrategy(max_retries=3, initial_delay=0).execute_with_retry(operation)
+
+        assert operation.call_count == 1
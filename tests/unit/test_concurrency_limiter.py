@@ -0,0 +1,295 @@
+"""Unit tests for the adaptive (AIMD) concurrency limiter.
+
+This module tests the additive increase and multiplicative decrease of the limit,
+the queue of requests above the limit, the limiters per model from the
+configuration, and the concurrency limit in the LLM call pipeline.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.llm.base import BaseLLM
+from src.llm.concurrency_limiter import (
+    ERROR_BACKOFF,
+    INITIAL_LIMIT,
+    MIN_SAMPLES,
+    AdaptiveConcurrencyLimiter,
+    get_concurrency_limiter,
+)
+from src.llm.config import config_manager
+from src.llm.event_loop import run_coroutine
+from src.llm.metrics import get_metrics_registry
+
+
+# Requests a simulated model serves in parallel without getting slower
+MODEL_CAPACITY = 3
+
+# Rounds of requests in the convergence test
+ROUNDS = 300
+
+# Maximum time a test waits for a thread or a coroutine
+TIMEOUT = 10
+
+
+def run_round(limiter, latency_of):
+    """Send as many requests as the limit allows and release them with the latency of the model."""
+    slots = [limiter.acquire() for _ in range(int(limiter.limit))]
+    latency = latency_of(len(slots))
+    for slot in slots:
+        slot.release(latency=latency)
+    return len(slots), latency
+
+
+def saturating_model(in_flight):
+    """Latency of a model that serves MODEL_CAPACITY requests at once and queues the rest."""
+    return max(1.0, in_flight / MODEL_CAPACITY)
+
+
+class OverloadError(Exception):
+    """Provider error for HTTP 503."""
+
+    status_code = 503
+
+
+class BadRequestError(Exception):
+    """Provider error for HTTP 400."""
+
+    status_code = 400
+
+
+class LocalLLM(BaseLLM):
+    """Provider that reports itself as Ollama and answers after a short delay."""
+
+    def __init__(self, model_name="llama3", delay=0.0):
+        super().__init__(model_name=model_name)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return self._execute(prompt, stop, lambda: self._send(prompt))
+
+    def _send(self, prompt):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if prompt == "overloaded":
+                raise OverloadError("service unavailable")
+            if prompt == "bad":
+                raise BadRequestError("invalid request")
+            return prompt
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _stream(self, prompt, stop=None, **kwargs):
+        return self._stream_limited(lambda: iter(prompt.split()), prompt)
+
+    def _llm_type(self):
+        return "local"
+
+    @property
+    def provider(self):
+        return "ollama"
+
+
+class TestAIMD:
+    """Tests for the additive increase and multiplicative decrease of the limit."""
+
+    def test_limit_grows_while_latency_holds(self):
+        """Verify a used limit grows by about one per round while the latency stays the same."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=6)
+        for _ in range(20):
+            run_round(limiter, lambda in_flight: 1.0)
+
+        assert limiter.limit == 6
+        assert limiter.stats().decreases == 0
+
+    def test_idle_limit_does_not_grow(self):
+        """Verify single requests do not raise a limit that they do not use."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8, initial_limit=4)
+        for _ in range(50):
+            limiter.acquire().release(latency=1.0)
+
+        assert limiter.limit == 4
+
+    def test_limit_settles_at_model_capacity(self):
+        """Verify the limit follows a saturating model: most of its capacity is used and requests do not pile up."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=16)
+        served = latencies = 0.0
+        for _ in range(ROUNDS):
+            in_flight, latency = run_round(limiter, saturating_model)
+            served += in_flight / latency
+            latencies += latency
+
+        assert served / ROUNDS > 0.9 * MODEL_CAPACITY
+        assert latencies / ROUNDS < 1.5
+        assert limiter.limit < 2 * MODEL_CAPACITY
+
+    def test_one_burst_of_slow_answers_cuts_once(self):
+        """Verify slow requests sent before a cut do not cut the limit again."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8, initial_limit=8)
+        for _ in range(MIN_SAMPLES):
+            limiter.acquire().release(latency=1.0)
+        slots = [limiter.acquire() for _ in range(8)]
+        for slot in slots:
+            slot.release(latency=4.0)
+
+        assert limiter.stats().decreases == 1
+        assert 8 * ERROR_BACKOFF <= limiter.limit < 8
+
+    def test_overload_error_halves_limit(self):
+        """Verify an overload error halves the limit, which never drops below one."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=8, initial_limit=8)
+        limiter.acquire().release(overload=True)
+        assert limiter.limit == 4
+        for _ in range(5):
+            limiter.acquire().release(overload=True)
+
+        assert limiter.limit == 1
+
+    def test_invalid_max_limit(self):
+        """Verify a limiter needs room for at least one request."""
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(max_limit=0)
+
+
+class TestQueue:
+    """Tests for the requests that wait above the limit."""
+
+    def test_acquire_waits_for_release(self):
+        """Verify a request above the limit waits until a slot is released, and its wait is reported."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=1)
+        slot = limiter.acquire()
+        granted = []
+        waiter = threading.Thread(target=lambda: granted.append(limiter.acquire()))
+        waiter.start()
+        time.sleep(0.1)
+        assert not granted and limiter.stats().waiting == 1
+
+        slot.release()
+        waiter.join(TIMEOUT)
+
+        assert granted[0].waited >= 0.05
+        assert limiter.stats().in_flight == 1
+
+    def test_async_acquire_and_cancel(self):
+        """Verify a coroutine waits without blocking and a cancelled waiter leaves the queue."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=1)
+        slot = limiter.acquire()
+
+        async def cancel_waiter():
+            task = asyncio.ensure_future(limiter.aacquire())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        run_coroutine(cancel_waiter(), TIMEOUT)
+        slot.release()
+
+        assert limiter.stats().waiting == 0
+        assert run_coroutine(limiter.aacquire(), TIMEOUT).in_flight == 1
+
+    def test_async_waiter_is_woken_by_release(self):
+        """Verify a waiting coroutine gets the slot as soon as another thread releases it."""
+        limiter = AdaptiveConcurrencyLimiter(max_limit=1)
+        slot = limiter.acquire()
+        releaser = threading.Timer(0.05, slot.release)
+
+        async def wait_for_slot():
+            releaser.start()
+            return await limiter.aacquire()
+
+        granted = run_coroutine(wait_for_slot(), TIMEOUT)
+
+        assert granted.waited >= 0.04
+        assert limiter.stats().in_flight == 1
+
+
+class TestProviderConcurrency:
+    """Tests for the concurrency limits in the call pipeline."""
+
+    def test_limiter_per_model(self):
+        """Verify every model gets its own limiter, bounded by the provider's max_in_flight setting."""
+        small = get_concurrency_limiter("ollama", "llama3")
+        large = get_concurrency_limiter("ollama", "llama3:70b")
+
+        assert small is not large
+        assert small.max_limit == config_manager.get_config().ollama.max_in_flight
+        assert small.limit == INITIAL_LIMIT
+
+    def test_cloud_models_start_at_max_in_flight(self):
+        """Verify cloud models start at the provider's max_in_flight instead of the low local start."""
+        limiter = get_concurrency_limiter("anthropic", "claude-sonnet-4-20250514")
+
+        assert limiter.limit == config_manager.get_config().anthropic.max_in_flight
+
+    def test_latency_per_generated_token(self):
+        """Verify a request that is not streamed reports its latency per generated token to the limiter."""
+        answer = " ".join(["permit"] * 200)
+        LocalLLM(delay=0.05).invoke(answer)
+
+        record = get_metrics_registry().records()[-1]
+        latency = get_concurrency_limiter("ollama", "llama3").stats().latency
+        assert latency == pytest.approx(record.latency / record.completion_tokens, rel=0.5)
+        assert latency < 0.05
+
+    def test_disabled(self, monkeypatch):
+        """Verify there is no limiter when adaptive concurrency is off or the provider has no maximum."""
+        assert get_concurrency_limiter("echo", "echo-model") is None
+        monkeypatch.setattr(config_manager.get_config(), "adaptive_concurrency", False)
+        assert get_concurrency_limiter("ollama", "llama3") is None
+
+    def test_batch_stays_within_limit(self):
+        """Verify a batch sends no more requests at once than the model's limit and reports the wait."""
+        llm = LocalLLM(delay=0.05)
+
+        result = llm.generate([f"prompt {index}" for index in range(6)], max_concurrency=6)
+
+        assert [generation[0].text for generation in result.generations] == [f"prompt {index}" for index in range(6)]
+        assert llm.max_in_flight == INITIAL_LIMIT
+        assert max(record.queue_wait for record in get_metrics_registry().records()) >= 0.05
+
+    def test_errors_release_slots(self):
+        """Verify failed requests free their slot, and only overload errors cut the limit."""
+        llm = LocalLLM()
+        limiter = get_concurrency_limiter("ollama", "llama3")
+
+        with pytest.raises(BadRequestError):
+            llm.invoke("bad")
+        assert limiter.limit == INITIAL_LIMIT
+        with pytest.raises(OverloadError):
+            llm.invoke("overloaded")
+
+        assert limiter.limit == INITIAL_LIMIT * ERROR_BACKOFF
+        assert limiter.stats().in_flight == 0
+
+    def test_closed_stream_releases_slot(self):
+        """Verify a stream that the caller closes early gives its slot back."""
+        stream = LocalLLM().stream("one two three")
+        next(stream)
+        assert get_concurrency_limiter("ollama", "llama3").stats().in_flight == 1
+
+        stream.close()
+
+        assert get_concurrency_limiter("ollama", "llama3").stats().in_flight == 0
+
+    def test_stats_endpoint(self):
+        """Verify the concurrency stats endpoint reports the limit of every called model."""
+        from src.api.api_server import app
+
+        LocalLLM().invoke("hello")
+
+        body = TestClient(app).get("/concurrency-stats/").json()
+
+        assert body["enabled"] is True
+        assert body["models"]["ollama/llama3"]["limit"] == INITIAL_LIMIT
+        assert body["models"]["ollama/llama3"]["in_flight"] == 0
@@ -0,0 +1,129 @@
+"""Unit tests for the bounded crew executor.
+
+This module tests that crew runs are executed outside the event loop,
+that the waiting queue is bounded, and that the load counters are correct.
+"""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.crew_executor import CrewExecutor, CrewExecutorFullError
+
+
+def run_coroutine(coroutine):
+    """Run a coroutine on a private event loop.
+
+    `asyncio.run` unsets the main thread event loop when it finishes, which breaks
+    later tests that use `asyncio.get_event_loop()`.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestCrewExecutor:
+    """Tests for the CrewExecutor class."""
+
+    def test_run_returns_result(self):
+        """Verify a blocking function runs in the pool and its result is returned."""
+        executor = CrewExecutor(max_workers=1, max_queue=1)
+
+        result = run_coroutine(executor.run(lambda text: text.upper(), "hello"))
+
+        assert result == "HELLO"
+        assert executor.stats().completed == 1
+        executor.shutdown()
+
+    def test_event_loop_stays_responsive(self):
+        """Verify the event loop keeps running while a crew run is blocked."""
+        executor = CrewExecutor(max_workers=1, max_queue=0)
+        release = threading.Event()
+
+        async def scenario():
+            crew_run = asyncio.ensure_future(executor.run(release.wait, 5))
+            # The loop must be free to run other coroutines during the crew run
+            await asyncio.sleep(0.01)
+            assert not crew_run.done()
+            release.set()
+            return await crew_run
+
+        assert run_coroutine(scenario()) is True
+        executor.shutdown()
+
+    def test_queue_is_bounded(self):
+        """Verify submissions beyond workers plus queue depth are rejected."""
+        executor = CrewExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        executor.submit(release.wait, 5)
+        executor.submit(release.wait, 5)
+        with pytest.raises(CrewExecutorFullError):
+            executor.submit(release.wait, 5)
+
+        stats = executor.stats()
+        assert stats.queued + stats.running == 2
+        assert stats.rejected == 1
+
+        release.set()
+        executor.shutdown()
+        assert executor.stats().completed == 2
+
+    def test_shutdown_without_wait_clears_queue(self):
+        """Verify runs cancelled by a shutdown without waiting leave the queue count."""
+        executor = CrewExecutor(max_workers=1, max_queue=2)
+        release = threading.Event()
+        executor.submit(release.wait, 5)
+        waiting = [executor.submit(release.wait, 5) for _ in range(2)]
+
+        executor.shutdown(wait=False)
+        release.set()
+
+        assert all(future.cancelled() for future in waiting)
+        assert executor.stats().queued == 0
+
+    def test_invalid_size(self):
+        """Verify an executor without workers cannot be created."""
+        with pytest.raises(ValueError, match="max_workers"):
+            CrewExecutor(max_workers=0)
+
+
+class TestExecutorEndpoints:
+    """Tests for the API endpoints that use the crew executor."""
+
+    @patch("src.api.api_server.process_immigration_query", return_value={"response": "advice"})
+    def test_advice_endpoint_uses_executor(self, mock_process):
+        """Verify the advice endpoint runs the crew through the executor."""
+        from src.api.api_server import app
+
+        client = TestClient(app)
+        response = client.post("/immigration-advice/", json={"text": "work permit"})
+
+        assert response.status_code == 200
+        assert response.json() == {"response": "advice"}
+        mock_process.assert_called_once_with("work permit")
+
+    def test_advice_endpoint_returns_503_when_full(self):
+        """Verify a full executor queue is reported as 503."""
+        from src.api import api_server
+
+        client = TestClient(api_server.app)
+        with patch.object(api_server.crew_executor, "submit", side_effect=CrewExecutorFullError("full")):
+            response = client.post("/immigration-advice/", json={"text": "work permit"})
+
+        assert response.status_code == 503
+
+    def test_executor_stats_endpoint(self):
+        """Verify the stats endpoint reports queued and running crew runs."""
+        from src.api.api_server import app
+
+        client = TestClient(app)
+        response = client.get("/executor-stats/")
+
+        assert response.status_code == 200
+        assert {"queued", "running", "max_workers", "max_queue"} <= set(response.json())
@@ -0,0 +1,126 @@
+"""Unit tests for the warm crew template pool.
+
+This module tests that crew templates are built once, reused between runs,
+and reset so that no state leaks from one query into the next.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.crew_templates import CrewTemplate, CrewTemplatePool
+from src.llm.config import config_manager
+from src.llm.llm_factory import LLMFactory
+
+
+# Model name used to build agents without calling any provider
+TEST_MODEL = "gpt-4o-mini"
+
+
+@pytest.fixture
+def pool():
+    """Create a small template pool that does not need API keys."""
+    return CrewTemplatePool(size=2, llm_factory=lambda: TEST_MODEL)
+
+
+class TestCrewTemplate:
+    """Tests for the CrewTemplate class."""
+
+    def test_template_builds_three_step_crew(self):
+        """Verify the template holds three agents, three tasks, and one crew."""
+        template = CrewTemplate(TEST_MODEL)
+
+        assert len(template.agents) == 3
+        assert len(template.tasks) == 3
+        assert template.crew.tasks == template.tasks
+
+    def test_reset_clears_previous_output(self):
+        """Verify reset removes task outputs from the previous run."""
+        template = CrewTemplate(TEST_MODEL)
+        template.tasks[0].output = MagicMock()
+        template.tasks[0].tools_errors = 2
+
+        template.reset()
+
+        assert all(task.output is None for task in template.tasks)
+        assert template.tasks[0].tools_errors == 0
+
+    def test_intake_summary_feeds_advice_tasks(self):
+        """Verify a summary set without the IntakeAgent is the context of the advice tasks."""
+        template = CrewTemplate(TEST_MODEL)
+
+        template.set_intake_summary("destination_country: Canada")
+
+        assert template.tasks[0].output.raw == "destination_country: Canada"
+        assert template.tasks[0] in template.tasks[1].context
+        assert template.advice_crew.tasks == template.tasks[1:]
+
+
+class TestCrewTemplatePool:
+    """Tests for the CrewTemplatePool class."""
+
+    def test_warm_builds_all_templates(self, pool):
+        """Verify warm builds exactly `size` templates."""
+        pool.warm()
+        pool.warm()
+
+        assert pool.created == 2
+
+    def test_checkout_reuses_templates(self, pool):
+        """Verify sequential checkouts reuse the same template."""
+        with pool.checkout() as first:
+            pass
+        with pool.checkout() as second:
+            pass
+
+        assert first is second
+        assert pool.created == 1
+
+    def test_checkout_resets_template(self, pool):
+        """Verify a checked-out template is reset before use."""
+        with pool.checkout() as template:
+            template.tasks[2].output = MagicMock()
+
+        with patch.object(CrewTemplate, "reset", autospec=True) as mock_reset:
+            with pool.checkout() as template:
+                mock_reset.assert_called_once_with(template)
+
+    def test_concurrent_checkouts_get_different_templates(self, pool):
+        """Verify a template is never shared by two runs at the same time."""
+        with pool.checkout() as first, pool.checkout() as second, pool.checkout() as third:
+            assert len({id(first), id(second), id(third)}) == 3
+
+        # The overflow template is dropped because the pool is full
+        assert pool.created == 2
+
+    def test_checkout_follows_provider_change(self):
+        """Verify a template built before the LLM changed is rebuilt with the current LLM."""
+        current = {"llm": TEST_MODEL}
+        pool = CrewTemplatePool(size=1, llm_factory=lambda: current["llm"])
+        pool.warm()
+
+        current["llm"] = "gpt-4o"
+        with pool.checkout() as template:
+            assert template.llm == "gpt-4o"
+        with pool.checkout() as again:
+            assert again is template
+
+        assert pool.created == 1
+
+    def test_equal_llm_keeps_template_without_instance_pool(self, monkeypatch):
+        """Verify a new LLM instance with the same provider, model, and temperature does not rebuild the template."""
+        monkeypatch.setattr(config_manager.get_config(), "llm_pool_size", 0)
+        pool = CrewTemplatePool(size=1, llm_factory=lambda: LLMFactory.create_llm_by_provider("ollama", "llama3", 0.3))
+
+        with pool.checkout() as first:
+            pass
+        with pool.checkout() as second:
+            assert second.llm_key == ("ollama", "llama3", 0.3)
+
+        assert second is first
+        assert pool.created == 1
+
+    def test_invalid_size(self):
+        """Verify a pool without templates cannot be created."""
+        with pytest.raises(ValueError, match="size"):
+            CrewTemplatePool(size=0)
@@ -0,0 +1,127 @@
+"""Unit tests for the rule-based intake fast path.
+
+This module tests the extraction of intake facts from queries and user context,
+the fallback for ambiguous queries, the fast-path counters, and the use of the
+fast path in process_immigration_query.
+"""
+
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.answer_cache import parse_intake_summary
+from src.fast_intake import FastIntakeExtractor, canonical_country, get_fast_intake
+from src.main import process_immigration_query
+
+
+# Example query from the CLI entry point
+EMMANUEL_QUERY = (
+    "Hi my name is Emmanuel Amarikwa from Nigeria living in Rwanda. "
+    "I want to transfer my study from African Leadership University to "
+    "Trent University Canada. What is the requirement?"
+)
+
+
+@pytest.fixture
+def extractor():
+    """Create an extractor with empty counters."""
+    return FastIntakeExtractor()
+
+
+class TestFastIntakeExtractor:
+    """Tests for the FastIntakeExtractor class."""
+
+    def test_extracts_facts_from_query(self, extractor):
+        """Verify name, nationality, location, destination, and outcome are extracted."""
+        profile = parse_intake_summary(extractor.extract(EMMANUEL_QUERY))
+
+        assert profile.name == "Emmanuel Amarikwa"
+        assert profile.nationality == "nigeria"
+        assert profile.current_location == "rwanda"
+        assert profile.destination_country == "canada"
+        assert profile.desired_outcome == "study permit"
+
+    def test_demonyms_and_plain_in(self, extractor):
+        """Verify a demonym before a permit names the destination."""
+        profile = parse_intake_summary(extractor.extract("Nigerian in Rwanda wants a Canadian study permit"))
+
+        assert (profile.nationality, profile.current_location, profile.destination_country) == ("nigeria", "rwanda", "canada")
+
+    def test_user_context_fills_missing_facts(self, extractor):
+        """Verify the user context provides the nationality and location."""
+        summary = extractor.extract(
+            "My H1B expired, can I get a work permit in the USA?", {"country": "India", "location": "Pune, India"}
+        )
+        profile = parse_intake_summary(summary)
+
+        assert profile.nationality == "india"
+        assert profile.destination_country == "united states"
+        assert profile.current_visa_type == "h1b"
+        assert profile.immigration_status == "expired"
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "I want to move to Canada or Australia to work in tech",  # two destinations
+            "I am from Kenya and want to go to Germany",  # no desired outcome
+            "How do I get a study permit for Canada?",  # no nationality
+        ],
+    )
+    def test_ambiguous_queries_fall_back(self, extractor, query):
+        """Verify the extractor does not guess when a fact is missing or unclear."""
+        assert extractor.extract(query) is None
+
+    def test_counts_fast_path_rate(self, extractor):
+        """Verify fast and fallback queries are counted."""
+        extractor.extract(EMMANUEL_QUERY)
+        extractor.extract("How do I get a study permit for Canada?")
+
+        stats = extractor.stats()
+        assert (stats.fast, stats.fallback) == (1, 1)
+        assert stats.fast_path_rate == 0.5
+
+    def test_canonical_country(self):
+        """Verify names, aliases, and demonyms map to one country."""
+        assert canonical_country("USA") == canonical_country("American") == "united states"
+        assert canonical_country("Nigerian") == "nigeria"
+        assert canonical_country("Atlantis") is None
+
+    def test_disabled_by_environment(self):
+        """Verify INTAKE_FAST_PATH=false turns the fast path off."""
+        assert get_fast_intake() is None
+
+
+class TestProcessQueryWithFastIntake:
+    """Tests for the intake fast path in process_immigration_query."""
+
+    @pytest.fixture
+    def template(self, monkeypatch):
+        """Check out a mocked crew template with the fast path enabled."""
+        monkeypatch.setenv("INTAKE_FAST_PATH", "true")
+        template = MagicMock()
+        template.kickoff.return_value = MagicMock(raw="full answer")
+        template.kickoff_advice.return_value = MagicMock(raw="advice")
+
+        @contextmanager
+        def checkout():
+            yield template
+
+        pool = MagicMock(checkout=checkout)
+        with patch("src.main.get_crew_template_pool", return_value=pool):
+            yield template
+
+    def test_clear_query_skips_intake_agent(self, template):
+        """Verify a clear query runs only the advice crew on the local summary."""
+        assert process_immigration_query(EMMANUEL_QUERY) == "advice"
+
+        summary = template.set_intake_summary.call_args.args[0]
+        assert "destination_country: Canada" in summary
+        template.kickoff_intake.assert_not_called()
+        template.kickoff.assert_not_called()
+
+    def test_ambiguous_query_runs_full_crew(self, template):
+        """Verify an ambiguous query falls back to the IntakeAgent."""
+        assert process_immigration_query("How do I get a study permit for Canada?") == "full answer"
+
+        template.set_intake_summary.assert_not_called()
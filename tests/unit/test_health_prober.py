@@ -0,0 +1,157 @@
+"""Unit tests for the background health prober.
+
+This module tests the probe rounds, the published snapshot, and the background
+refresh of provider availability.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+from src.llm.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    HealthProber,
+    HealthProberFactory,
+    is_claude_available,
+)
+
+
+# Short interval so the background thread refreshes quickly
+TEST_PROBE_INTERVAL = 0.05
+
+
+def make_breaker(name, check_function):
+    """Build a breaker that checks again on every probe."""
+    config = CircuitBreakerConfig(minimum_calls=1, reset_timeout=0, half_open_timeout=0)
+    breaker = CircuitBreaker(name, check_function, config)
+    breaker.cache_timeout = 0
+    return breaker
+
+
+class TestHealthProber:
+    """Tests for the HealthProber class."""
+
+    def test_unknown_provider_is_unavailable(self):
+        """Verify that a provider without a probe result reads as unavailable."""
+        prober = HealthProber([], interval=TEST_PROBE_INTERVAL)
+
+        assert prober.is_available("claude") is False
+
+    def test_probe_publishes_snapshot(self):
+        """Verify that one probe round publishes the result of every check."""
+        prober = HealthProber(
+            [make_breaker("claude", lambda: True), make_breaker("ollama", lambda: False)],
+            interval=TEST_PROBE_INTERVAL,
+        )
+
+        snapshot = prober.probe()
+
+        assert dict(snapshot.available) == {"claude": True, "ollama": False}
+        assert prober.snapshot is snapshot
+        assert prober.is_available("claude") is True
+        assert prober.is_available("ollama") is False
+
+    def test_failing_check_reads_as_unavailable(self):
+        """Verify that a check that raises marks the provider unavailable."""
+
+        def broken_check():
+            raise ConnectionError("refused")
+
+        prober = HealthProber([make_breaker("openai", broken_check)], interval=TEST_PROBE_INTERVAL)
+        prober.probe()
+
+        assert prober.is_available("openai") is False
+
+    def test_reads_do_not_run_checks(self):
+        """Verify that availability reads only use the snapshot."""
+        calls = []
+        prober = HealthProber([make_breaker("claude", lambda: calls.append(1) or True)], interval=TEST_PROBE_INTERVAL)
+        prober.probe()
+
+        for _ in range(100):
+            assert prober.is_available("claude") is True
+
+        assert len(calls) == 1
+
+    def test_background_thread_refreshes_snapshot(self):
+        """Verify that the started prober picks up a provider that comes back."""
+        up = threading.Event()
+        prober = HealthProber([make_breaker("ollama", up.is_set)], interval=TEST_PROBE_INTERVAL)
+        prober.start()
+        try:
+            assert prober.is_available("ollama") is False
+            up.set()
+            deadline = time.monotonic() + 5
+            while not prober.is_available("ollama") and time.monotonic() < deadline:
+                time.sleep(TEST_PROBE_INTERVAL)
+            assert prober.is_available("ollama") is True
+        finally:
+            prober.stop()
+
+    def test_failed_round_keeps_thread_running(self):
+        """Verify that a probe round that raises is logged and later rounds still refresh the snapshot."""
+        up = threading.Event()
+        prober = HealthProber([make_breaker("ollama", up.is_set)], interval=TEST_PROBE_INTERVAL)
+        probe = prober.probe
+        rounds = []
+
+        def flaky_probe():
+            rounds.append(1)
+            if len(rounds) == 2:
+                raise RuntimeError("cannot schedule new futures after interpreter shutdown")
+            return probe()
+
+        with patch.object(prober, "probe", side_effect=flaky_probe):
+            prober.start()
+            try:
+                up.set()
+                deadline = time.monotonic() + 5
+                while not prober.is_available("ollama") and time.monotonic() < deadline:
+                    time.sleep(TEST_PROBE_INTERVAL)
+                assert prober.is_available("ollama") is True
+                assert len(rounds) > 2
+            finally:
+                prober.stop()
+
+    def test_stale_snapshot_falls_back_to_circuit_state(self):
+        """Verify that a snapshot older than a few intervals is not trusted and the circuit state decides."""
+        breaker = make_breaker("claude", lambda: False)
+        prober = HealthProber([breaker], interval=TEST_PROBE_INTERVAL)
+        prober.probe()
+        assert prober.is_available("claude") is False
+
+        prober.publish({}, checked_at=time.time() - 60)
+        assert prober.is_available("claude") is True
+
+        breaker.record_call(success=False, duration=0.1)
+        assert prober.is_available("claude") is False
+
+    def test_circuit_change_keeps_probe_time(self):
+        """Verify that a circuit change between rounds does not make an old snapshot look fresh."""
+        prober = HealthProber([make_breaker("claude", lambda: True)], interval=TEST_PROBE_INTERVAL)
+        checked_at = prober.probe().checked_at
+
+        prober.publish({"claude": False})
+
+        assert prober.snapshot.checked_at == checked_at
+
+    def test_reads_do_not_start_the_prober(self):
+        """Verify that availability reads of a created prober only read its snapshot."""
+        prober = HealthProber([make_breaker("claude", lambda: True)], interval=TEST_PROBE_INTERVAL)
+        prober.probe()
+
+        with patch.object(HealthProberFactory, "_prober", prober), patch.object(prober, "start") as start:
+            assert is_claude_available() is True
+
+        start.assert_not_called()
+
+    def test_publish_keeps_other_providers(self):
+        """Verify that publishing one provider keeps the values of the others."""
+        prober = HealthProber([make_breaker("claude", lambda: True)], interval=TEST_PROBE_INTERVAL)
+        prober.probe()
+
+        prober.publish({"openai": False})
+
+        assert prober.is_available("claude") is True
+        assert prober.is_available("openai") is False
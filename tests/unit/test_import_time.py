@@ -0,0 +1,57 @@
+"""Unit tests for lazy imports.
+
+This module checks that importing the LLM factory and the API server does not
+load CrewAI or the LangChain provider packages, and that the lazy provider
+classes still resolve on first use.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.llm.llm_factory import LLMFactory
+
+
+# Project root, where the child processes run
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Packages that must not be loaded by the imports under test
+HEAVY_PACKAGES = ["crewai", "langchain_anthropic", "langchain_openai", "langchain_community"]
+
+
+def loaded_after_import(module):
+    """Import a module in a fresh process and return the heavy packages it loaded."""
+    code = f"import json, sys; import {module}; print(json.dumps([n for n in {HEAVY_PACKAGES!r} if n in sys.modules]))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestLazyImports:
+    """Tests for the lazy import of providers and CrewAI."""
+
+    @pytest.mark.parametrize("module", ["src.llm", "src.llm.llm_factory", "src.api.api_server"])
+    def test_heavy_packages_not_loaded(self, module):
+        """Verify the import does not load CrewAI or a LangChain provider package."""
+        assert loaded_after_import(module) == []
+
+    def test_provider_class_resolved_on_first_use(self):
+        """Verify a provider path in the factory map is replaced by its class."""
+        from src.llm.ollama_llm import OllamaLLM
+
+        assert LLMFactory.get_provider_class("ollama") is OllamaLLM
+        assert LLMFactory._provider_map["ollama"] is OllamaLLM
+
+    def test_package_exports_provider_classes(self):
+        """Verify the provider classes can still be imported from the package."""
+        from src.llm import ClaudeLLM
+        from src.llm.claude_llm import ClaudeLLM as DirectClaudeLLM
+
+        assert ClaudeLLM is DirectClaudeLLM
+
+    def test_unknown_provider(self):
+        """Verify an unknown provider is rejected."""
+        with pytest.raises(ValueError, match="Unsupported LLM provider"):
+            LLMFactory.get_provider_class("unknown")
@@ -0,0 +1,192 @@
+"""Unit tests for the durable job store and the job endpoints.
+
+This module tests that jobs are stored in SQLite, survive a restart, are run
+by the background workers, and can be polled and long-polled over the API.
+"""
+
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import api_server
+from src.api.job_store import JobRunner, JobRunnerFactory, JobStatus, JobStore
+
+
+# Test constants
+WAIT_TIMEOUT = 5.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a job store in a temporary directory."""
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def wait_until_finished(store: JobStore, job_id: str):
+    """Wait until a job has reached a final state."""
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestJobStore:
+    """Tests for the JobStore class."""
+
+    def test_create_and_get(self, store):
+        """Verify a new job is stored as queued."""
+        job = store.create("work permit")
+
+        loaded = store.get(job.id)
+        assert loaded.status == JobStatus.QUEUED
+        assert loaded.query == "work permit"
+        assert store.get("missing") is None
+
+    def test_claim_in_submission_order(self, store):
+        """Verify workers claim the oldest queued job first."""
+        first = store.create("first")
+        store.create("second")
+
+        claimed = store.claim_next()
+
+        assert claimed.id == first.id
+        assert store.get(first.id).status == JobStatus.RUNNING
+
+    def test_results_survive_restart(self, store):
+        """Verify a new store on the same file sees the stored results."""
+        job = store.create("study permit")
+        store.claim_next()
+        store.mark_succeeded(job.id, {"answer": "apply online"})
+
+        reopened = JobStore(store.path)
+
+        assert reopened.get(job.id).result == {"answer": "apply online"}
+        assert reopened.count_by_status()["succeeded"] == 1
+
+    def test_only_expired_leases_are_requeued(self, store):
+        """Verify a running job goes back to the queue only once its lease has run out."""
+        owned = store.create("study permit")
+        abandoned = store.create("work permit")
+        store.claim_next("live-process", lease_seconds=60.0)
+        store.claim_next("stopped-process", lease_seconds=-1.0)
+
+        assert store.requeue_expired() == 1
+        assert store.get(owned.id).status == JobStatus.RUNNING
+        assert store.get(abandoned.id).status == JobStatus.QUEUED
+
+    def test_renewed_lease_is_kept(self, store):
+        """Verify only the owner of a job can renew its lease."""
+        job = store.create("study permit")
+        store.claim_next("live-process", lease_seconds=-1.0)
+
+        assert store.renew_leases("other-process", [job.id]) == 0
+        assert store.renew_leases("live-process", [job.id]) == 1
+        assert store.requeue_expired() == 0
+
+    def test_stale_owner_cannot_finish_job(self, store):
+        """Verify a worker whose lease ran out cannot overwrite the outcome of the worker that took the job over."""
+        job = store.create("study permit")
+        store.claim_next("stopped-process", lease_seconds=-1.0)
+        store.requeue_expired()
+        store.claim_next("live-process", lease_seconds=60.0)
+
+        assert store.mark_succeeded(job.id, "stale answer", owner="stopped-process") is False
+        assert store.get(job.id).status == JobStatus.RUNNING
+        assert store.mark_succeeded(job.id, "answer", owner="live-process") is True
+        assert store.mark_failed(job.id, "late error", owner="live-process") is False
+        assert store.get(job.id).result == "answer"
+
+
+class TestJobRunner:
+    """Tests for the JobRunner class."""
+
+    def test_runner_stores_results_and_errors(self, store):
+        """Verify the workers store the result or the error of each job."""
+
+        def handler(query: str) -> str:
+            if query == "fail":
+                raise RuntimeError("crew failed")
+            return query.upper()
+
+        runner = JobRunner(store, handler, workers=2)
+        runner.start()
+        ok_job = store.create("ok")
+        failed_job = store.create("fail")
+        runner.notify()
+
+        assert wait_until_finished(store, ok_job.id).result == "OK"
+        failed = wait_until_finished(store, failed_job.id)
+        assert failed.status == JobStatus.FAILED
+        assert failed.error == "crew failed"
+        runner.stop(timeout=1.0)
+
+    def test_unstorable_result_fails_the_job(self, store):
+        """Verify a result that cannot be stored fails its job and the worker keeps running."""
+        runner = JobRunner(store, lambda query: object() if query == "bad" else query, workers=1)
+        runner.start()
+        bad_job = store.create("bad")
+        ok_job = store.create("ok")
+        runner.notify()
+
+        assert wait_until_finished(store, bad_job.id).status == JobStatus.FAILED
+        assert wait_until_finished(store, ok_job.id).result == "ok"
+        runner.stop(timeout=1.0)
+
+    def test_worker_survives_storage_errors(self, store):
+        """Verify a worker whose job outcome cannot be stored at all moves on to the next job."""
+        runner = JobRunner(store, lambda query: query, workers=1)
+        failing_job = store.create("first")
+        next_job = store.create("second")
+        original = store.mark_succeeded
+
+        def mark_succeeded(job_id, result, owner=""):
+            if job_id == failing_job.id:
+                raise sqlite3.OperationalError("disk I/O error")
+            return original(job_id, result, owner)
+
+        with (
+            patch.object(store, "mark_succeeded", side_effect=mark_succeeded),
+            patch.object(store, "mark_failed", side_effect=sqlite3.OperationalError("disk I/O error")),
+        ):
+            runner.start()
+            runner.notify()
+            assert wait_until_finished(store, next_job.id).result == "second"
+
+        runner.stop(timeout=1.0)
+        assert store.get(failing_job.id).status == JobStatus.RUNNING
+
+
+class TestJobEndpoints:
+    """Tests for the /jobs/ endpoints."""
+
+    @pytest.fixture
+    def client(self, store):
+        """Create a test client whose job store lives in a temporary directory."""
+        runner = JobRunner(store, api_server._run_job_query, workers=1)
+        with patch.object(JobRunnerFactory, "_runner", runner):
+            yield TestClient(api_server.app)
+        runner.stop(timeout=1.0)
+
+    def test_submit_and_long_poll(self, client):
+        """Verify a submitted job returns an ID right away and can be long-polled."""
+        with patch("src.api.api_server.process_immigration_query", return_value="apply online"):
+            response = client.post("/jobs/", json={"text": "study permit"})
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+
+            result = client.get(f"/jobs/{job_id}", params={"wait": WAIT_TIMEOUT}).json()
+
+        assert result["status"] == "succeeded"
+        assert result["result"] == "apply online"
+
+    def test_unknown_job(self, client):
+        """Verify an unknown job ID is reported as 404."""
+        response = client.get("/jobs/does-not-exist")
+
+        assert response.status_code == 404
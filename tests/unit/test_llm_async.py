@@ -0,0 +1,217 @@
+"""Unit tests for the async LLM interface.
+
+This module tests the async calls of the providers, the async fallback and retry
+logic, async request coalescing, and the shared event loop for synchronous callers.
+The coroutines run on the shared LLM event loop, as synchronous callers do.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.llm.base import BaseLLM
+from src.llm.claude_llm import ClaudeLLM
+from src.llm.event_loop import get_shared_loop, run_coroutine
+from src.llm.fallback import FallbackLLM, RetryStrategy
+from src.llm.ollama_llm import OllamaLLM
+from src.llm.openai_llm import OpenAILLM
+from src.llm.single_flight import SingleFlight
+
+
+# Delay of one simulated provider call in seconds
+CALL_DELAY = 0.2
+
+# Number of calls kept in flight at the same time
+IN_FLIGHT_CALLS = 200
+
+# Maximum time a test waits for a coroutine
+TIMEOUT = 10
+
+
+class AsyncMockLLM(BaseLLM):
+    """Provider whose async calls sleep without blocking the event loop."""
+
+    def __init__(self, fail_times=0):
+        super().__init__(model_name="async-model", temperature=0.7)
+        self.fail_times = fail_times
+        self.calls = 0
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return f"sync {prompt}"
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.fail_times:
+            raise RuntimeError("temporary error")
+        await asyncio.sleep(CALL_DELAY)
+        return f"async {prompt}"
+
+    def _llm_type(self):
+        return "async-mock"
+
+    @property
+    def provider(self):
+        return "async-mock"
+
+
+class TestProviderAsyncCalls:
+    """Tests for the native async calls of the providers."""
+
+    @pytest.mark.parametrize(
+        ("llm_class", "chat_class", "kwargs"),
+        [
+            (ClaudeLLM, "src.llm.claude_llm.ChatAnthropic", {"api_key": "test-key"}),
+            (OpenAILLM, "src.llm.openai_llm.ChatOpenAI", {"api_key": "test-key"}),
+            (OllamaLLM, "src.llm.ollama_llm.ChatOllama", {}),
+        ],
+    )
+    def test_acall_uses_async_client(self, llm_class, chat_class, kwargs):
+        """Verify acall awaits the provider's ainvoke instead of the blocking invoke."""
+        with patch(chat_class) as mock_chat:
+            mock_chat.return_value.ainvoke = AsyncMock(return_value=MagicMock(content="Async response"))
+            llm = llm_class(**kwargs)
+
+            result = run_coroutine(llm.acall("Test prompt"), TIMEOUT)
+
+        assert result == "Async response"
+        mock_chat.return_value.ainvoke.assert_awaited_once_with("Test prompt")
+        mock_chat.return_value.invoke.assert_not_called()
+
+    def test_default_acall_runs_sync_call(self):
+        """Verify a provider without native async support still works through acall."""
+
+        class SyncOnlyLLM(AsyncMockLLM):
+            _acall = BaseLLM._acall
+
+        assert run_coroutine(SyncOnlyLLM().acall("hi"), TIMEOUT) == "sync hi"
+
+    def test_agenerate_keeps_calls_in_flight(self):
+        """Verify many prompts run concurrently on one event loop, in order."""
+        llm = AsyncMockLLM()
+        prompts = [f"prompt {index}" for index in range(IN_FLIGHT_CALLS)]
+
+        start = time.perf_counter()
+        result = run_coroutine(llm.agenerate(prompts, max_concurrency=IN_FLIGHT_CALLS), TIMEOUT)
+        elapsed = time.perf_counter() - start
+
+        assert [generation[0].text for generation in result.generations] == [f"async {prompt}" for prompt in prompts]
+        assert elapsed < CALL_DELAY * 5
+
+
+class TestConcurrentGenerate:
+    """Tests for the concurrent, bounded generate method."""
+
+    def test_generate_runs_prompts_concurrently(self):
+        """Verify generate is faster than one call after the other and keeps the order."""
+        llm = AsyncMockLLM()
+        prompts = [f"prompt {index}" for index in range(10)]
+
+        start = time.perf_counter()
+        result = llm.generate(prompts, max_concurrency=10)
+        elapsed = time.perf_counter() - start
+
+        assert [generation[0].text for generation in result.generations] == [f"async {prompt}" for prompt in prompts]
+        assert elapsed < CALL_DELAY * 3
+        assert result.llm_output is None
+
+    def test_generate_respects_concurrency_limit(self):
+        """Verify at most max_concurrency prompts are in flight."""
+        in_flight, peak = 0, 0
+
+        class CountingLLM(AsyncMockLLM):
+            async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return prompt
+
+        CountingLLM().generate([str(index) for index in range(20)], max_concurrency=3)
+
+        assert peak == 3
+
+    def test_generate_reports_errors_per_prompt(self):
+        """Verify one failed prompt does not fail the batch."""
+
+        class PartlyFailingLLM(AsyncMockLLM):
+            async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+                if prompt == "bad":
+                    raise RuntimeError("rejected")
+                return prompt.upper()
+
+        result = PartlyFailingLLM().generate(["a", "bad", "c"])
+
+        assert [generation[0].text for generation in result.generations] == ["A", "", "C"]
+        assert result.llm_output == {"errors": {1: "RuntimeError: rejected"}}
+        assert result.generations[1][0].generation_info == {"error": "RuntimeError: rejected"}
+
+    def test_invalid_concurrency(self):
+        """Verify a concurrency limit below one is rejected."""
+        with pytest.raises(ValueError, match="max_concurrency"):
+            AsyncMockLLM().generate(["a"], max_concurrency=0)
+
+
+class TestAsyncFallback:
+    """Tests for the async retry and fallback logic."""
+
+    def test_retry_uses_non_blocking_sleep(self):
+        """Verify retries wait with asyncio.sleep and then succeed."""
+        strategy = RetryStrategy(max_retries=2, initial_delay=0.01)
+        operation = AsyncMock(side_effect=[RuntimeError("temporary"), "ok"])
+
+        with patch("src.llm.fallback.time.sleep") as mock_sleep:
+            assert run_coroutine(strategy.aexecute_with_retry(operation), TIMEOUT) == "ok"
+
+        mock_sleep.assert_not_called()
+        assert operation.await_count == 2
+
+    def test_retry_raises_after_last_attempt(self):
+        """Verify the last error is raised when all attempts fail."""
+        strategy = RetryStrategy(max_retries=1, initial_delay=0.01)
+        operation = AsyncMock(side_effect=RuntimeError("down"))
+
+        with pytest.raises(RuntimeError, match="down"):
+            run_coroutine(strategy.aexecute_with_retry(operation), TIMEOUT)
+
+    def test_fallback_llm_switches_provider(self):
+        """Verify the async fallback uses the fallback LLM when the primary fails."""
+        primary = AsyncMockLLM(fail_times=10)
+        fallback = AsyncMockLLM()
+        llm = FallbackLLM(primary, fallback, RetryStrategy(max_retries=1, initial_delay=0.01))
+
+        assert run_coroutine(llm.acall("hello"), TIMEOUT) == "async hello"
+        assert llm.last_successful_llm is fallback
+
+
+class TestAsyncCoalescing:
+    """Tests for async single-flight coalescing and the shared event loop."""
+
+    def test_concurrent_coroutines_share_one_call(self):
+        """Verify coroutines with the same key wait for one execution."""
+        group = SingleFlight("test")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(CALL_DELAY)
+            return "shared"
+
+        async def scenario():
+            return await asyncio.gather(*(group.ado("key", work) for _ in range(5)))
+
+        assert run_coroutine(scenario(), TIMEOUT) == ["shared"] * 5
+        assert len(calls) == 1
+        assert group.stats().collapsed == 4
+
+    def test_shared_loop_cannot_wait_for_itself(self):
+        """Verify waiting on the shared loop from its own thread fails instead of deadlocking."""
+
+        async def nested():
+            return run_coroutine(asyncio.sleep(0))
+
+        with pytest.raises(RuntimeError, match="own thread"):
+            run_coroutine(nested(), TIMEOUT)
+        assert get_shared_loop().loop.is_running()
@@ -0,0 +1,174 @@
+"""Unit tests for hedged requests in FallbackLLM.
+
+This module tests when a hedged request is sent to the fallback, which answer is
+used, the cancellation of the slower request, and the hedge counters.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.llm.base import BaseLLM
+from src.llm.event_loop import run_coroutine
+from src.llm.fallback import MIN_HEDGE_SAMPLES, FallbackLLM, LatencyTracker, RetryStrategy
+
+
+# Wait before hedging in the tests, in seconds
+TEST_HEDGE_DELAY = 0.1
+
+# Latencies of the simulated providers, in seconds
+FAST = 0.01
+SLOW = 0.5
+VERY_SLOW = 5.0
+
+# Maximum time a test waits for a coroutine
+TIMEOUT = 10
+
+
+class DelayedLLM(BaseLLM):
+    """Provider that answers after a fixed delay and remembers cancelled calls."""
+
+    def __init__(self, name, delay, fail=False):
+        super().__init__(model_name=f"{name}-model")
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.cancelled = 0
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        raise AssertionError("hedged calls use the async client")
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ConnectionError(f"{self.name} failed")
+        return f"{self.name}: {prompt}"
+
+    def _llm_type(self):
+        return "delayed"
+
+    @property
+    def provider(self):
+        return self.name
+
+
+def hedged(primary, fallback):
+    """Build a FallbackLLM that hedges at the 95th percentile without retries."""
+    return FallbackLLM(primary, fallback, RetryStrategy(max_retries=0), hedge_percentile=0.95)
+
+
+@pytest.fixture(autouse=True)
+def short_hedge_delay():
+    """Hedge after TEST_HEDGE_DELAY while there are no latency samples."""
+    with patch("src.llm.fallback.DEFAULT_HEDGE_DELAY", TEST_HEDGE_DELAY):
+        yield
+
+
+class TestHedgedRequests:
+    """Tests for the hedging mode of FallbackLLM."""
+
+    def test_fast_primary_is_not_hedged(self):
+        """Verify no hedged request is sent when the primary answers in time."""
+        llm = hedged(DelayedLLM("primary", FAST), DelayedLLM("fallback", FAST))
+
+        assert run_coroutine(llm.acall("hi"), TIMEOUT) == "primary: hi"
+        assert llm.hedge_stats().fired == 0
+
+    def test_fallback_wins_and_primary_is_cancelled(self):
+        """Verify a slow primary is hedged, the faster fallback answer is used, and the primary is cancelled."""
+        primary = DelayedLLM("primary", VERY_SLOW)
+        llm = hedged(primary, DelayedLLM("fallback", FAST))
+
+        assert run_coroutine(llm.acall("hi"), TIMEOUT) == "fallback: hi"
+
+        stats = llm.hedge_stats()
+        assert (stats.fired, stats.won, stats.win_rate) == (1, 1, 1.0)
+        assert primary.cancelled == 1
+        assert llm.last_successful_llm is llm._fallback_llm
+
+    def test_primary_can_still_win_after_hedge(self):
+        """Verify the primary answer is used when it arrives before the hedged request."""
+        fallback = DelayedLLM("fallback", VERY_SLOW)
+        llm = hedged(DelayedLLM("primary", SLOW), fallback)
+
+        assert run_coroutine(llm.acall("hi"), TIMEOUT) == "primary: hi"
+
+        stats = llm.hedge_stats()
+        assert (stats.fired, stats.won) == (1, 0)
+        assert fallback.cancelled == 1
+
+    def test_failed_hedge_waits_for_primary(self):
+        """Verify a failed hedged request does not fail a call that the primary answers."""
+        llm = hedged(DelayedLLM("primary", SLOW), DelayedLLM("fallback", FAST, fail=True))
+
+        assert run_coroutine(llm.acall("hi"), TIMEOUT) == "primary: hi"
+
+    def test_early_primary_error_uses_fallback(self):
+        """Verify a primary error before the hedging delay falls back without counting a hedge."""
+        llm = hedged(DelayedLLM("primary", FAST, fail=True), DelayedLLM("fallback", FAST))
+
+        assert run_coroutine(llm.acall("hi"), TIMEOUT) == "fallback: hi"
+        assert llm.hedge_stats().fired == 0
+
+    def test_both_fail(self):
+        """Verify the error is raised when both requests fail."""
+        llm = hedged(DelayedLLM("primary", SLOW, fail=True), DelayedLLM("fallback", FAST, fail=True))
+
+        with pytest.raises(ConnectionError):
+            run_coroutine(llm.acall("hi"), TIMEOUT)
+
+    def test_sync_call_is_hedged(self):
+        """Verify the synchronous call path uses hedging too."""
+        llm = hedged(DelayedLLM("primary", VERY_SLOW), DelayedLLM("fallback", FAST))
+
+        assert llm.invoke("hi") == "fallback: hi"
+        assert llm.hedge_stats().won == 1
+
+    def test_hedging_disabled_by_default(self):
+        """Verify hedging is off unless a percentile is configured."""
+        llm = FallbackLLM(DelayedLLM("primary", FAST), DelayedLLM("fallback", FAST), hedge_percentile=0)
+
+        assert llm.hedging is False
+
+    def test_invalid_percentile(self):
+        """Verify a percentile of 1 or more is rejected."""
+        with pytest.raises(ValueError, match="hedge_percentile"):
+            FallbackLLM(DelayedLLM("primary", FAST), hedge_percentile=1.5)
+
+
+class TestLatencyTracker:
+    """Tests for the hedging delay taken from recent latencies."""
+
+    def test_needs_enough_samples(self):
+        """Verify no percentile is given before MIN_HEDGE_SAMPLES latencies are known."""
+        tracker = LatencyTracker()
+        for _ in range(MIN_HEDGE_SAMPLES - 1):
+            tracker.record(1.0)
+
+        assert tracker.percentile(0.95) is None
+
+    def test_percentile_of_recent_latencies(self):
+        """Verify the percentile follows the recent latencies."""
+        tracker = LatencyTracker(samples=100)
+        for index in range(100):
+            tracker.record(index / 100)
+
+        assert tracker.percentile(0.95) == pytest.approx(0.95)
+        assert tracker.percentile(0.5) == pytest.approx(0.5)
+
+    def test_delay_uses_primary_latencies(self):
+        """Verify the hedging delay moves to the primary's percentile once enough calls succeeded."""
+        llm = hedged(DelayedLLM("primary", FAST), DelayedLLM("fallback", FAST))
+
+        async def calls():
+            for index in range(MIN_HEDGE_SAMPLES):
+                await llm.acall(f"prompt {index}")
+
+        run_coroutine(calls(), TIMEOUT)
+
+        assert FAST <= llm.hedge_delay() < TEST_HEDGE_DELAY
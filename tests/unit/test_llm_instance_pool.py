@@ -0,0 +1,168 @@
+"""Unit tests for the LLM instance pool.
+
+This module tests that LLMFactory reuses provider instances with the same
+arguments, the LRU and idle eviction of the pool, and the pool counters.
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.llm.base import BaseLLM
+from src.llm.config import config_manager
+from src.llm.instance_pool import LLMInstancePool, get_llm_pool
+from src.llm.llm_factory import LLMFactory
+
+
+class CountingLLM(BaseLLM):
+    """Provider that counts how many instances were built."""
+
+    built = 0
+
+    def __init__(self, model_name="counting-model", temperature=0.7, **kwargs):
+        super().__init__(model_name=model_name, temperature=temperature)
+        self.kwargs = kwargs
+        CountingLLM.built += 1
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return prompt
+
+    def _llm_type(self):
+        return "counting"
+
+    @property
+    def provider(self):
+        return "counting"
+
+
+@pytest.fixture(autouse=True)
+def counting_provider():
+    """Register CountingLLM as the "counting" provider."""
+    CountingLLM.built = 0
+    with patch.dict(LLMFactory._provider_map, {"counting": CountingLLM}):
+        yield
+
+
+def make_key(pool, model="m", temperature=0.7, **kwargs):
+    """Build the pool key of a CountingLLM instance."""
+    return pool.make_key("counting", model, temperature, kwargs, CountingLLM)
+
+
+class TestFactoryPooling:
+    """Tests for the pool in LLMFactory."""
+
+    def test_same_arguments_reuse_instance(self):
+        """Verify a second call with the same arguments returns the pooled instance."""
+        first = LLMFactory.create_llm_by_provider("counting", "m", 0.5, max_tokens=100)
+        second = LLMFactory.create_llm_by_provider("COUNTING", "m", 0.5, max_tokens=100)
+
+        assert first is second
+        assert CountingLLM.built == 1
+        stats = get_llm_pool().stats()
+        assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+    @pytest.mark.parametrize(
+        ("model", "temperature", "kwargs"),
+        [("other", 0.5, {"max_tokens": 100}), ("m", 0.2, {"max_tokens": 100}), ("m", 0.5, {"max_tokens": 50})],
+    )
+    def test_different_arguments_build_new_instance(self, model, temperature, kwargs):
+        """Verify the model, the temperature, and the constructor arguments are part of the key."""
+        first = LLMFactory.create_llm_by_provider("counting", "m", 0.5, max_tokens=100)
+        second = LLMFactory.create_llm_by_provider("counting", model, temperature, **kwargs)
+
+        assert first is not second
+
+    def test_unhashable_arguments_are_not_pooled(self):
+        """Verify instances with unhashable constructor arguments are built every time."""
+        first = LLMFactory.create_llm_by_provider("counting", "m", 0.5, headers={"x": "1"})
+        second = LLMFactory.create_llm_by_provider("counting", "m", 0.5, headers={"x": "1"})
+
+        assert first is not second
+        assert get_llm_pool().stats().size == 0
+
+    def test_pool_disabled(self, monkeypatch):
+        """Verify a pool size of 0 turns pooling off."""
+        monkeypatch.setattr(config_manager.get_config(), "llm_pool_size", 0)
+
+        first = LLMFactory.create_llm_by_provider("counting", "m", 0.5)
+        second = LLMFactory.create_llm_by_provider("counting", "m", 0.5)
+
+        assert first is not second
+        assert get_llm_pool() is None
+
+    def test_failed_creation_is_not_pooled(self):
+        """Verify a constructor error is raised and nothing is stored."""
+        with (
+            patch.dict(LLMFactory._provider_map, {"counting": lambda **kwargs: 1 / 0}),
+            pytest.raises(ZeroDivisionError),
+        ):
+            LLMFactory.create_llm_by_provider("counting", "m", 0.5)
+
+        assert get_llm_pool().stats().size == 0
+
+
+class TestLLMInstancePool:
+    """Tests for the eviction and counters of LLMInstancePool."""
+
+    def test_least_recently_used_is_evicted(self):
+        """Verify the least recently used instance is evicted when the pool is full."""
+        pool = LLMInstancePool(max_size=2, idle_seconds=600)
+        first = pool.get_or_create(make_key(pool, "a"), lambda: CountingLLM("a"))
+        pool.get_or_create(make_key(pool, "b"), lambda: CountingLLM("b"))
+        pool.get_or_create(make_key(pool, "a"), lambda: CountingLLM("a"))
+        pool.get_or_create(make_key(pool, "c"), lambda: CountingLLM("c"))
+
+        assert pool.get_or_create(make_key(pool, "a"), lambda: CountingLLM("a")) is first
+        stats = pool.stats()
+        assert (stats.evictions, stats.size) == (1, 2)
+        pool.get_or_create(make_key(pool, "b"), lambda: CountingLLM("b"))
+        assert CountingLLM.built == 4
+
+    def test_idle_instances_are_dropped(self):
+        """Verify an instance unused for the idle timeout is built again."""
+        pool = LLMInstancePool(max_size=4, idle_seconds=10)
+        key = make_key(pool)
+
+        with patch("src.llm.instance_pool.time.monotonic", side_effect=[100.0, 100.0, 105.0, 116.0, 116.0, 117.0]):
+            first = pool.get_or_create(key, lambda: CountingLLM("m"))
+            assert pool.get_or_create(key, lambda: CountingLLM("m")) is first
+            assert pool.get_or_create(key, lambda: CountingLLM("m")) is not first
+            assert pool.stats().evictions == 1
+
+    def test_changed_instance_is_replaced(self):
+        """Verify an instance whose temperature was changed is not handed out again."""
+        pool = LLMInstancePool(max_size=4, idle_seconds=600)
+        key = make_key(pool, temperature=0.7)
+        first = pool.get_or_create(key, lambda: CountingLLM("m", 0.7))
+        first.temperature = 0.1
+
+        second = pool.get_or_create(key, lambda: CountingLLM("m", 0.7))
+
+        assert second is not first
+        assert second.temperature == 0.7
+
+    def test_concurrent_misses_share_one_instance(self):
+        """Verify threads that miss the same key at once all get the same instance."""
+        pool = LLMInstancePool(max_size=4, idle_seconds=600)
+        key = make_key(pool)
+        barrier = threading.Barrier(4)
+        results = []
+
+        def create():
+            barrier.wait(timeout=5)
+            return CountingLLM("m")
+
+        threads = [threading.Thread(target=lambda: results.append(pool.get_or_create(key, create))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        assert len({id(llm) for llm in results}) == 1
+        assert pool.stats().size == 1
+
+    def test_invalid_size(self):
+        """Verify a pool without room is rejected."""
+        with pytest.raises(ValueError):
+            LLMInstancePool(max_size=0, idle_seconds=600)
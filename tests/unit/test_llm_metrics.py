@@ -0,0 +1,191 @@
+"""Unit tests for per-call LLM token, latency, and cost accounting.
+
+This module tests the records of provider calls, streams, and crew tasks, the
+cost estimate, the sums per agent and per task, and the usage summary on the
+result of process_immigration_query.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.crew_templates import CrewTemplate
+from src.llm.claude_llm import ClaudeLLM
+from src.llm.event_loop import run_coroutine
+from src.llm.metrics import (
+    CallRecord,
+    MetricsRegistry,
+    UsageSummary,
+    call_scope,
+    collect_calls,
+    estimate_cost,
+    get_metrics_registry,
+)
+from src.llm.ollama_llm import OllamaLLM
+from src.main import process_immigration_query
+
+
+# Maximum time a test waits for a coroutine
+TIMEOUT = 10
+
+# Model name used to build agents without calling any provider
+TEST_MODEL = "gpt-4o-mini"
+
+
+def message(content, input_tokens=None, output_tokens=None):
+    """Build a LangChain-like response with optional usage metadata."""
+    usage = None if input_tokens is None else {"input_tokens": input_tokens, "output_tokens": output_tokens}
+    return MagicMock(content=content, usage_metadata=usage)
+
+
+def make_claude():
+    """Build a ClaudeLLM on a patched ChatAnthropic."""
+    return ClaudeLLM(model_name="claude-sonnet-4-20250514", api_key="test-key")
+
+
+class TestProviderCallRecords:
+    """Tests for the records of provider requests."""
+
+    def test_usage_metadata_is_recorded(self):
+        """Verify the token usage reported by the provider is recorded with its cost."""
+        with patch("src.llm.claude_llm.ChatAnthropic") as mock_chat:
+            mock_chat.return_value.invoke.return_value = message("Hello", 1000, 200)
+            make_claude().invoke("Hi")
+
+        [record] = get_metrics_registry().records()
+        assert (record.provider, record.model) == ("anthropic", "claude-sonnet-4-20250514")
+        assert (record.prompt_tokens, record.completion_tokens, record.estimated) == (1000, 200, False)
+        assert record.cost == pytest.approx((1000 * 3.0 + 200 * 15.0) / 1_000_000)
+        assert record.latency >= 0
+        assert record.time_to_first_token is None
+
+    def test_tokens_estimated_without_usage(self):
+        """Verify the tokens are estimated from the text when the provider reports none."""
+        with patch("src.llm.ollama_llm.ChatOllama") as mock_chat:
+            mock_chat.return_value.invoke.return_value = message("x" * 40)
+            OllamaLLM().invoke("y" * 80)
+
+        [record] = get_metrics_registry().records()
+        assert (record.prompt_tokens, record.completion_tokens, record.estimated) == (20, 10, True)
+        assert record.cost == 0.0
+
+    def test_async_call_is_recorded(self):
+        """Verify async requests are recorded in the same way."""
+
+        async def ainvoke(prompt):
+            return message("Hello", 30, 7)
+
+        with patch("src.llm.claude_llm.ChatAnthropic") as mock_chat:
+            mock_chat.return_value.ainvoke = ainvoke
+            run_coroutine(make_claude().acall("Hi"), TIMEOUT)
+
+        [record] = get_metrics_registry().records()
+        assert (record.prompt_tokens, record.completion_tokens) == (30, 7)
+
+    def test_stream_records_usage_and_time_to_first_token(self):
+        """Verify a finished stream is recorded with the usage of its chunks and its time to first token."""
+        chunks = [message("", 25, 0), message("Hel"), message("lo", 0, 2)]
+        with patch("src.llm.claude_llm.ChatAnthropic") as mock_chat:
+            mock_chat.return_value.stream.return_value = iter(chunks)
+            list(make_claude().stream("Hi"))
+
+        [record] = get_metrics_registry().records()
+        assert (record.prompt_tokens, record.completion_tokens) == (25, 2)
+        assert record.time_to_first_token is not None
+        assert record.time_to_first_token <= record.latency
+
+    def test_failed_call_is_not_recorded(self):
+        """Verify a failed request adds no record."""
+        with patch("src.llm.claude_llm.ChatAnthropic") as mock_chat:
+            mock_chat.return_value.invoke.side_effect = ConnectionError("down")
+            with pytest.raises(ConnectionError):
+                make_claude().invoke("Hi")
+
+        assert get_metrics_registry().records() == []
+
+    def test_scope_and_collector_follow_async_calls(self):
+        """Verify the call scope and the collector reach calls run on the shared event loop."""
+
+        async def ainvoke(prompt):
+            return message("Hello", 5, 5)
+
+        with patch("src.llm.claude_llm.ChatAnthropic") as mock_chat:
+            mock_chat.return_value.ainvoke = ainvoke
+            llm = make_claude()
+            with collect_calls() as records, call_scope(agent="Researcher", task="ResearchImmigrationTask"):
+                run_coroutine(llm.acall("Hi"), TIMEOUT)
+
+        assert [(record.agent, record.task) for record in records] == [("Researcher", "ResearchImmigrationTask")]
+
+
+class TestCostAndSummary:
+    """Tests for the cost estimate and the usage summary."""
+
+    def test_longest_price_prefix_is_used(self):
+        """Verify gpt-4o-mini is not priced as gpt-4o."""
+        assert estimate_cost("openai", "gpt-4o-mini", 1_000_000, 0) == pytest.approx(0.15)
+        assert estimate_cost("openai", "gpt-4o", 1_000_000, 0) == pytest.approx(2.5)
+
+    def test_unknown_and_local_models(self):
+        """Verify a model without a price has no cost and local models cost nothing."""
+        assert estimate_cost("openai", "my-finetune", 100, 100) is None
+        assert estimate_cost("ollama", "llama3", 100, 100) == 0.0
+
+    def test_summary_per_agent_and_task(self):
+        """Verify records are summed in total, per agent, per task, and per model."""
+        records = [
+            CallRecord("anthropic", "m", 100, 10, 1.0, cost=0.5, agent="Intake", task="IntakeTask"),
+            CallRecord("anthropic", "m", 300, 30, 2.0, cost=None, agent="Response", task="ResponseTask", requests=2),
+            CallRecord("anthropic", "m", 50, 5, 0.5, cost=0.25, agent="Intake", task="IntakeTask"),
+        ]
+
+        summary = UsageSummary.from_records(records)
+
+        assert (summary.total.requests, summary.total.total_tokens, summary.total.cost) == (4, 495, 0.75)
+        assert summary.by_agent["Intake"].prompt_tokens == 150
+        assert summary.by_task["ResponseTask"].latency == 2.0
+        assert summary.by_model["anthropic/m"].requests == 4
+        assert summary.to_dict()["by_task"]["IntakeTask"]["total_tokens"] == 165
+
+    def test_registry_is_bounded(self):
+        """Verify the registry keeps only the newest records."""
+        registry = MetricsRegistry(max_records=2)
+        for tokens in (1, 2, 3):
+            registry.record(CallRecord("p", "m", tokens, 0, 0.1))
+
+        assert [record.prompt_tokens for record in registry.records()] == [2, 3]
+
+
+class TestCrewUsage:
+    """Tests for the usage of crew runs."""
+
+    def test_template_records_each_task(self):
+        """Verify a crew run records the token counters of each task's agent."""
+        template = CrewTemplate(TEST_MODEL)
+        for index, agent in enumerate(template.agents, start=1):
+            agent._token_process.sum_prompt_tokens(index * 100)
+            agent._token_process.sum_completion_tokens(index * 10)
+            agent._token_process.sum_successful_requests(index)
+
+        template._record_usage(template.tasks)
+
+        summary = get_metrics_registry().summary()
+        assert set(summary.by_task) == {"IntakeTask", "ResearchImmigrationTask", "ResponseTask"}
+        assert summary.by_task["ResponseTask"].prompt_tokens == 300
+        assert summary.by_agent[template.agents[0].role].completion_tokens == 10
+        assert summary.total.requests == 6
+        assert summary.total.cost == pytest.approx((600 * 0.15 + 60 * 0.6) / 1_000_000)
+
+    def test_query_result_carries_usage(self):
+        """Verify process_immigration_query returns the answer with the usage of its run."""
+
+        def run_stages(inputs, ctx, on_event):
+            get_metrics_registry().record(CallRecord("anthropic", "m", 120, 40, 1.5, agent="Intake", task="IntakeTask"))
+            return "advice"
+
+        with patch("src.main._run_stages", side_effect=run_stages):
+            result = process_immigration_query("Work permit?")
+
+        assert result == "advice"
+        assert result.usage.total.total_tokens == 160
+        assert result.usage.by_task["IntakeTask"].latency == 1.5
@@ -0,0 +1,264 @@
+"""Unit tests for latency- and error-aware LLM routing.
+
+This module tests the latency and error-rate averages of the router, its choice
+between the routes of a tier, the routing in LLMFactory.get_llm_for_task, the
+outcomes fed by the call pipeline, and the routing stats endpoint.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.llm.base import BaseLLM
+from src.llm.config import config_manager
+from src.llm.llm_factory import LLMFactory, LLMType
+from src.llm.router import (
+    DRIFT_RATIO,
+    REASON_DRIFTED,
+    REASON_FALLBACK,
+    REASON_FASTER,
+    REASON_PREFERRED,
+    REASON_UNAVAILABLE,
+    LLMRouter,
+    get_llm_router,
+)
+
+
+# Routes of a tier in the router tests, preferred route first
+CLAUDE = ("anthropic", "claude-sonnet-4-20250514")
+LLAMA = ("ollama", "llama3")
+LLAMA_70B = ("ollama", "llama3:70b")
+
+
+def always_available(provider):
+    """Report every provider as available."""
+    return True
+
+
+def observe(router, route, latency, calls=3, success=True):
+    """Feed a route with the same call outcome several times."""
+    for _ in range(calls):
+        router.observe(*route, latency, success)
+
+
+class EchoLLM(BaseLLM):
+    """LLM that answers every prompt through the call pipeline."""
+
+    def __init__(self, fail=False):
+        super().__init__(model_name="echo-model")
+        self.fail = fail
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return self._execute(prompt, stop, lambda: self._send(prompt))
+
+    def _send(self, prompt):
+        if self.fail:
+            raise ConnectionError("provider down")
+        return prompt
+
+    def _llm_type(self):
+        return "echo"
+
+    @property
+    def provider(self):
+        return "echo"
+
+
+class TestRouteAverages:
+    """Tests for the moving averages of a route."""
+
+    def test_latency_and_error_rate_are_averaged(self):
+        """Verify the newest call moves the averages by alpha."""
+        router = LLMRouter(alpha=0.2)
+        router.observe(*CLAUDE, 1.0, True)
+        router.observe(*CLAUDE, 2.0, True)
+        router.observe(*CLAUDE, 5.0, False)
+
+        stats = router.route_stats(*CLAUDE)
+        assert stats.latency == pytest.approx(1.2)
+        assert stats.error_rate == pytest.approx(0.2)
+        assert stats.samples == 3
+        assert stats.score == pytest.approx(1.2 / 0.8)
+
+    def test_failing_route_does_not_look_fast(self):
+        """Verify fast failures do not lower the latency and a route without a success has an infinite score."""
+        router = LLMRouter()
+        observe(router, LLAMA, 0.01, success=False)
+
+        assert router.route_stats(*LLAMA).latency is None
+        assert router.route_stats(*LLAMA).score == float("inf")
+
+    def test_invalid_alpha(self):
+        """Verify a weight outside (0, 1] is rejected."""
+        with pytest.raises(ValueError):
+            LLMRouter(alpha=0)
+
+
+class TestRouteChoice:
+    """Tests for the choice between the routes of a tier."""
+
+    def test_unknown_preferred_route_is_used(self):
+        """Verify the preferred route is used while it has too few calls."""
+        router = LLMRouter()
+        observe(router, LLAMA, 0.1)
+        router.observe(*CLAUDE, 9.0, True)
+
+        decision = router.choose("cloud_fast", [CLAUDE, LLAMA], always_available)
+
+        assert (decision.provider, decision.reason, decision.index) == ("anthropic", REASON_PREFERRED, 0)
+
+    def test_clearly_faster_route_is_used(self):
+        """Verify a route whose score is well below the preferred route's takes the request."""
+        router = LLMRouter()
+        observe(router, CLAUDE, 6.0)
+        observe(router, LLAMA, 2.0)
+
+        decision = router.choose("cloud_fast", [CLAUDE, LLAMA], always_available)
+
+        assert (decision.model, decision.reason) == ("llama3", REASON_FASTER)
+
+    def test_small_difference_keeps_preferred_route(self):
+        """Verify the preferred route is kept when another route is only a little faster."""
+        router = LLMRouter()
+        observe(router, CLAUDE, 2.0)
+        observe(router, LLAMA, 1.8)
+
+        assert router.choose("cloud_fast", [CLAUDE, LLAMA], always_available).reason == REASON_PREFERRED
+
+    def test_error_rate_moves_traffic(self):
+        """Verify a route that often fails loses its traffic to a slower but reliable one."""
+        router = LLMRouter()
+        observe(router, CLAUDE, 1.0)
+        observe(router, CLAUDE, 1.0, calls=6, success=False)
+        observe(router, LLAMA, 2.0)
+
+        assert router.choose("cloud_fast", [CLAUDE, LLAMA], always_available).provider == "ollama"
+
+    def test_stale_preferred_route_is_tried_again(self):
+        """Verify a slow preferred route gets a request again once its averages are stale."""
+        router = LLMRouter(stale_seconds=60)
+        with patch("src.llm.router.time.monotonic", return_value=100.0):
+            observe(router, CLAUDE, 6.0)
+            observe(router, LLAMA, 2.0)
+            assert router.choose("cloud_fast", [CLAUDE, LLAMA], always_available).reason == REASON_FASTER
+        with patch("src.llm.router.time.monotonic", return_value=200.0):
+            assert router.choose("cloud_fast", [CLAUDE, LLAMA], always_available).reason == REASON_PREFERRED
+
+    def test_slower_preferred_route_tries_unknown_route(self):
+        """Verify a preferred route that becomes 3x slower sends requests to a route without calls, which then wins."""
+        router = LLMRouter()
+        observe(router, CLAUDE, 1.0, calls=10)
+        assert router.choose("cloud_fast", [CLAUDE, LLAMA], always_available).reason == REASON_PREFERRED
+
+        observe(router, CLAUDE, 3.0)
+        drifted = router.choose("cloud_fast", [CLAUDE, LLAMA], always_available)
+
+        assert (drifted.provider, drifted.reason) == ("ollama", REASON_DRIFTED)
+        observe(router, LLAMA, 1.0)
+        assert router.choose("cloud_fast", [CLAUDE, LLAMA], always_available).reason == REASON_FASTER
+
+    def test_steady_preferred_route_is_kept(self):
+        """Verify a preferred route at its usual latency keeps the requests while the other routes have no calls."""
+        router = LLMRouter()
+        observe(router, CLAUDE, 1.0, calls=10)
+        observe(router, CLAUDE, 1.2)
+
+        assert router.route_stats(*CLAUDE).drift < DRIFT_RATIO
+        assert router.choose("cloud_fast", [CLAUDE, LLAMA], always_available).reason == REASON_PREFERRED
+
+    def test_unavailable_routes(self):
+        """Verify an unavailable preferred route falls back, and with no route available the preferred one is tried."""
+        router = LLMRouter()
+
+        fallback = router.choose("cloud_fast", [CLAUDE, LLAMA], lambda provider: provider == "ollama")
+        none_up = router.choose("cloud_fast", [CLAUDE, LLAMA], lambda provider: False)
+
+        assert (fallback.provider, fallback.reason) == ("ollama", REASON_FALLBACK)
+        assert (none_up.provider, none_up.reason) == ("anthropic", REASON_UNAVAILABLE)
+
+    def test_decisions_are_counted(self):
+        """Verify every decision is counted by tier, route, and reason."""
+        router = LLMRouter()
+        for _ in range(2):
+            router.choose("cloud_fast", [CLAUDE, LLAMA], always_available)
+        router.choose("local_accurate", [LLAMA_70B], lambda provider: False)
+
+        assert router.stats().to_dict()["decisions"] == {
+            "cloud_fast -> anthropic/claude-sonnet-4-20250514 (preferred)": 2,
+            "local_accurate -> ollama/llama3:70b (unavailable)": 1,
+        }
+
+
+class TestFactoryRouting:
+    """Tests for the routing in LLMFactory.get_llm_for_task."""
+
+    @pytest.fixture(autouse=True)
+    def providers_up(self):
+        """Report every provider as available and replace create_llm with a mock."""
+        with (
+            patch.object(LLMFactory, "is_provider_available", return_value=True),
+            patch.object(LLMFactory, "create_llm", return_value=MagicMock(spec=BaseLLM)) as create_llm,
+        ):
+            yield create_llm
+
+    def test_slow_cloud_provider_routes_to_local_model(self, providers_up):
+        """Verify a fast request goes to the local model while Claude is slow."""
+        observe(get_llm_router(), CLAUDE, 6.0)
+        observe(get_llm_router(), LLAMA, 1.0)
+
+        LLMFactory.get_llm_for_task("summarization")
+
+        providers_up.assert_called_once_with(LLMType.LOCAL_FAST, None)
+
+    def test_accurate_tier_never_routes_to_fast_model(self, providers_up):
+        """Verify a sensitive request only goes to a model of the accurate tier."""
+        observe(get_llm_router(), CLAUDE, 6.0)
+        observe(get_llm_router(), LLAMA, 0.1)
+
+        LLMFactory.get_llm_for_task("diagnosis", sensitive_data=True)
+
+        providers_up.assert_called_once_with(LLMType.CLOUD_ACCURATE, None)
+
+    def test_failed_creation_tries_next_type(self, providers_up):
+        """Verify the next type of the tier is created when the chosen one cannot be built."""
+        fallback_llm = MagicMock(spec=BaseLLM)
+        providers_up.side_effect = [ValueError("no key"), fallback_llm]
+
+        assert LLMFactory.get_llm_for_task("summarization", temperature=0.2) is fallback_llm
+        assert providers_up.call_args.args == (LLMType.LOCAL_FAST, 0.2)
+
+    def test_routing_disabled(self, providers_up, monkeypatch):
+        """Verify the router is off when LLMConfig.llm_routing is false."""
+        monkeypatch.setattr(config_manager.get_config(), "llm_routing", False)
+
+        assert get_llm_router() is None
+        assert LLMFactory.route_llm_type(LLMType.CLOUD_FAST) is LLMType.CLOUD_FAST
+
+
+class TestPipelineOutcomes:
+    """Tests for the call outcomes that the pipeline reports to the router."""
+
+    def test_calls_feed_the_router(self):
+        """Verify successful and failed provider requests are observed on their route."""
+        EchoLLM().invoke("hello")
+        with pytest.raises(ConnectionError):
+            EchoLLM(fail=True).invoke("world")
+
+        stats = get_llm_router().route_stats("echo", "echo-model")
+        assert stats.samples == 2
+        assert stats.latency is not None
+        assert 0 < stats.error_rate < 1
+
+    def test_stats_endpoint(self):
+        """Verify the routing stats endpoint reports the routes and the decisions."""
+        from src.api.api_server import app
+
+        EchoLLM().invoke("hello")
+        get_llm_router().choose("cloud_fast", [CLAUDE], always_available)
+
+        body = TestClient(app).get("/routing-stats/").json()
+
+        assert body["enabled"] is True
+        assert body["routes"]["echo/echo-model"]["samples"] == 1
+        assert body["decisions"] == {"cloud_fast -> anthropic/claude-sonnet-4-20250514 (preferred)": 1}
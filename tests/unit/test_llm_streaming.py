@@ -0,0 +1,176 @@
+"""Unit tests for token streaming from the LLM providers.
+
+This module tests the stream chunks of the providers, the time to first token,
+the default streaming of providers without a streaming client, and the fallback
+rule of FallbackLLM for streams.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.llm.base import BaseLLM, content_text
+from src.llm.claude_llm import ClaudeLLM
+from src.llm.event_loop import run_coroutine
+from src.llm.fallback import FallbackLLM
+from src.llm.ollama_llm import OllamaLLM
+from src.llm.openai_llm import OpenAILLM
+
+
+# Maximum time a test waits for a coroutine
+TIMEOUT = 10
+
+PROVIDERS = [
+    (ClaudeLLM, "src.llm.claude_llm.ChatAnthropic", {"api_key": "test-key"}),
+    (OpenAILLM, "src.llm.openai_llm.ChatOpenAI", {"api_key": "test-key"}),
+    (OllamaLLM, "src.llm.ollama_llm.ChatOllama", {}),
+]
+
+
+class StreamingMockLLM(BaseLLM):
+    """Provider that streams fixed pieces and can fail after some of them."""
+
+    def __init__(self, name, pieces, fail_after=None):
+        super().__init__(model_name=f"{name}-model")
+        self.name = name
+        self.pieces = pieces
+        self.fail_after = fail_after
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return "".join(self.pieces)
+
+    def _stream(self, prompt, stop=None, **kwargs):
+        for index, piece in enumerate(self.pieces):
+            if index == self.fail_after:
+                raise ConnectionError(f"{self.name} stream broke")
+            yield piece
+        if self.fail_after is not None and self.fail_after >= len(self.pieces):
+            raise ConnectionError(f"{self.name} stream broke")
+
+    async def _astream(self, prompt, stop=None, **kwargs):
+        for piece in self._stream(prompt, stop, **kwargs):
+            yield piece
+
+    def _llm_type(self):
+        return "streaming-mock"
+
+    @property
+    def provider(self):
+        return self.name
+
+
+class PlainLLM(BaseLLM):
+    """Provider without a streaming client."""
+
+    def __init__(self):
+        super().__init__(model_name="plain-model")
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return "whole answer"
+
+    def _llm_type(self):
+        return "plain"
+
+    @property
+    def provider(self):
+        return "plain"
+
+
+async def collect(stream):
+    """Collect the chunks of an async stream."""
+    return [chunk async for chunk in stream]
+
+
+class TestProviderStreaming:
+    """Tests for the streaming clients of the providers."""
+
+    @pytest.mark.parametrize(("llm_class", "chat_class", "kwargs"), PROVIDERS)
+    def test_stream_yields_chunks(self, llm_class, chat_class, kwargs):
+        """Verify stream yields numbered chunks with the provider, model, and time to first token."""
+        with patch(chat_class) as mock_chat:
+            mock_chat.return_value.stream.return_value = iter(
+                [MagicMock(content="Hel"), MagicMock(content=""), MagicMock(content="lo")]
+            )
+            llm = llm_class(**kwargs)
+
+            chunks = list(llm.stream("Test prompt"))
+
+        mock_chat.return_value.stream.assert_called_once_with("Test prompt")
+        assert [chunk.text for chunk in chunks] == ["Hel", "lo"]
+        assert [chunk.index for chunk in chunks] == [0, 1]
+        assert {chunk.provider for chunk in chunks} == {llm.provider}
+        assert {chunk.model for chunk in chunks} == {llm.model_name}
+        assert chunks[0].time_to_first_token == chunks[1].time_to_first_token == chunks[0].elapsed
+        assert chunks[1].elapsed >= chunks[0].elapsed
+
+    @pytest.mark.parametrize(("llm_class", "chat_class", "kwargs"), PROVIDERS)
+    def test_astream_uses_async_client(self, llm_class, chat_class, kwargs):
+        """Verify astream reads the provider's async stream."""
+
+        async def pieces(prompt):
+            for text in ("Async ", "stream"):
+                yield MagicMock(content=text)
+
+        with patch(chat_class) as mock_chat:
+            mock_chat.return_value.astream = pieces
+            llm = llm_class(**kwargs)
+
+            chunks = run_coroutine(collect(llm.astream("Test prompt")), TIMEOUT)
+
+        assert "".join(chunk.text for chunk in chunks) == "Async stream"
+        mock_chat.return_value.stream.assert_not_called()
+
+    def test_content_blocks_are_joined(self):
+        """Verify the text of content blocks is used and other blocks are skipped."""
+        content = [{"type": "text", "text": "Hello"}, {"type": "tool_use", "id": "x"}, " there"]
+
+        assert content_text(content) == "Hello there"
+
+    def test_default_stream_yields_whole_result(self):
+        """Verify a provider without a streaming client streams its result as one chunk."""
+        llm = PlainLLM()
+
+        chunks = list(llm.stream("hello"))
+        async_chunks = run_coroutine(collect(llm.astream("hello")), TIMEOUT)
+
+        assert [chunk.text for chunk in chunks] == [chunk.text for chunk in async_chunks] == ["whole answer"]
+
+
+class TestFallbackStreaming:
+    """Tests for the fallback rule of FallbackLLM streams."""
+
+    def test_switches_before_first_token(self):
+        """Verify the fallback streams when the primary fails before its first token."""
+        primary = StreamingMockLLM("primary", ["never"], fail_after=0)
+        fallback = StreamingMockLLM("fallback", ["Hi", " there"])
+        llm = FallbackLLM(primary, fallback)
+
+        chunks = list(llm.stream("hello"))
+
+        assert "".join(chunk.text for chunk in chunks) == "Hi there"
+        assert {chunk.provider for chunk in chunks} == {"fallback"}
+        assert llm.last_successful_llm is fallback
+
+    def test_does_not_switch_after_first_token(self):
+        """Verify an error after the first token reaches the caller instead of the fallback."""
+        primary = StreamingMockLLM("primary", ["Hi", " there"], fail_after=1)
+        fallback = StreamingMockLLM("fallback", ["other answer"])
+        llm = FallbackLLM(primary, fallback)
+        received = []
+
+        with pytest.raises(ConnectionError):
+            for chunk in llm.stream("hello"):
+                received.append(chunk.text)
+
+        assert received == ["Hi"]
+
+    def test_async_switches_before_first_token(self):
+        """Verify the async stream follows the same fallback rule."""
+        primary = StreamingMockLLM("primary", [], fail_after=0)
+        fallback = StreamingMockLLM("fallback", ["async answer"])
+        llm = FallbackLLM(primary, fallback)
+
+        chunks = run_coroutine(collect(llm.astream("hello")), TIMEOUT)
+
+        assert [chunk.text for chunk in chunks] == ["async answer"]
+        assert chunks[0].time_to_first_token == chunks[0].elapsed
@@ -0,0 +1,232 @@
+"""Unit tests for the native Ollama client.
+
+This module tests the pooled connections, the requests and options that the
+client sends, the NDJSON stream parsing, the error answers, and the native
+backend of OllamaLLM, against a local stand-in for the Ollama API.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.llm.config import config_manager
+from src.llm.event_loop import run_coroutine
+from src.llm.health_checks import check_ollama_availability
+from src.llm.metrics import get_metrics_registry
+from src.llm.ollama_client import OllamaClient, OllamaError, get_ollama_client
+from src.llm.ollama_llm import OllamaLLM
+
+
+# Words of the answer of the stand-in server, one per stream line
+ANSWER_WORDS = ["You ", "can ", "apply."]
+
+# Token counts on the last line of an answer
+PROMPT_EVAL_COUNT = 12
+EVAL_COUNT = 3
+
+# Maximum time a test waits for the stand-in server or a coroutine
+TIMEOUT = 10
+
+
+class OllamaStandIn(BaseHTTPRequestHandler):
+    """Answers GET /api/tags and POST /api/chat like Ollama over keep-alive connections.
+
+    A stream is written in chunks that split the NDJSON lines, and it waits for
+    `release` before its last line. The request bodies and the client ports of the
+    requests are kept.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    requests: list[dict] = []
+    ports: list[int] = []
+    release = threading.Event()
+
+    def do_GET(self):
+        OllamaStandIn.ports.append(self.client_address[1])
+        self._reply(200, {"models": []})
+
+    def do_POST(self):
+        OllamaStandIn.ports.append(self.client_address[1])
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        OllamaStandIn.requests.append(body)
+        if body["model"] == "missing":
+            self._reply(404, {"error": f"model '{body['model']}' not found"})
+        elif not body["stream"]:
+            self._reply(200, self._line("".join(ANSWER_WORDS), done=True))
+        else:
+            self._stream(body["messages"][0]["content"] == "fail")
+
+    def _stream(self, fail):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        lines = "".join(json.dumps(self._line(word)) + "\n" for word in ANSWER_WORDS)
+        # Split the lines in the middle, so that no chunk ends at a line end
+        for start in range(0, len(lines), 7):
+            self._chunk(lines[start : start + 7])
+        OllamaStandIn.release.wait(TIMEOUT)
+        last = {"error": "model runner stopped"} if fail else self._line("", done=True)
+        self._chunk(json.dumps(last) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    @staticmethod
+    def _line(content, done=False):
+        line = {"model": "llama3", "message": {"role": "assistant", "content": content}, "done": done}
+        if done:
+            line.update(prompt_eval_count=PROMPT_EVAL_COUNT, eval_count=EVAL_COUNT)
+        return line
+
+    def _reply(self, status, reply):
+        data = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_url():
+    """Run the stand-in server in a thread and return its base URL."""
+    OllamaStandIn.requests = []
+    OllamaStandIn.ports = []
+    OllamaStandIn.release = threading.Event()
+    OllamaStandIn.release.set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestOllamaClient:
+    """Tests for the requests of the native client."""
+
+    def test_connections_are_reused(self, ollama_url):
+        """Verify requests and availability checks share one keep-alive connection."""
+        client = get_ollama_client(ollama_url)
+
+        for _ in range(3):
+            client.chat("llama3", "Can I work in Canada?")
+        assert client.is_available()
+
+        assert len(OllamaStandIn.ports) == 4
+        assert len(set(OllamaStandIn.ports)) == 1
+        assert get_ollama_client(ollama_url + "/") is client
+
+    def test_request_carries_config_options(self, ollama_url, monkeypatch):
+        """Verify a request sends the options of OllamaConfig, the caller's options, and the keep-alive."""
+        monkeypatch.setattr(config_manager.get_config().ollama, "num_ctx", 8192)
+        monkeypatch.setattr(config_manager.get_config().ollama, "keep_alive", "10m")
+
+        answer = OllamaClient(ollama_url).chat("llama3", "Can I work in Canada?", options={"top_k": 10, "stop": ["\n"]})
+
+        body = OllamaStandIn.requests[0]
+        assert body["messages"] == [{"role": "user", "content": "Can I work in Canada?"}]
+        assert body["options"]["num_ctx"] == 8192
+        assert body["options"]["top_k"] == 10
+        assert body["options"]["top_p"] == config_manager.get_config().ollama.top_p
+        assert body["options"]["stop"] == ["\n"]
+        assert body["keep_alive"] == "10m"
+        assert answer.content == "".join(ANSWER_WORDS)
+        assert answer.usage_metadata["input_tokens"] == PROMPT_EVAL_COUNT
+
+    def test_stream_yields_lines_as_they_arrive(self, ollama_url):
+        """Verify lines split across chunks are parsed, and arrive before the answer is complete."""
+        OllamaStandIn.release.clear()
+        stream = OllamaClient(ollama_url).stream("llama3", "Can I work in Canada?")
+
+        first = next(stream)
+        OllamaStandIn.release.set()
+        rest = list(stream)
+
+        assert [first.content, *(chunk.content for chunk in rest)] == [*ANSWER_WORDS, ""]
+        assert rest[-1].done
+        assert rest[-1].usage_metadata["output_tokens"] == EVAL_COUNT
+
+    def test_async_chat_and_stream(self, ollama_url):
+        """Verify the async client answers and streams like the synchronous one."""
+        client = OllamaClient(ollama_url)
+
+        async def chat_and_stream():
+            answer = await client.achat("llama3", "Can I work in Canada?")
+            return answer, [chunk.content async for chunk in client.astream("llama3", "Can I work in Canada?")]
+
+        answer, pieces = run_coroutine(chat_and_stream(), TIMEOUT)
+
+        assert answer.content == "".join(ANSWER_WORDS)
+        assert pieces == [*ANSWER_WORDS, ""]
+
+    def test_errors(self, ollama_url):
+        """Verify error answers raise OllamaError, with the status code when Ollama sent one."""
+        client = OllamaClient(ollama_url)
+
+        with pytest.raises(OllamaError) as not_found:
+            client.chat("missing", "Can I work in Canada?")
+        with pytest.raises(OllamaError) as stopped:
+            list(client.stream("llama3", "fail"))
+
+        assert not_found.value.status_code == 404
+        assert "not found" in str(not_found.value)
+        assert stopped.value.status_code is None
+
+    def test_availability_check(self, ollama_url, monkeypatch):
+        """Verify the Ollama availability check uses the pooled client and fails without a server."""
+        monkeypatch.setenv("OLLAMA_BASE_URL", ollama_url)
+        assert check_ollama_availability()
+
+        monkeypatch.setenv("OLLAMA_BASE_URL", "http://127.0.0.1:9")
+        assert not check_ollama_availability()
+
+
+class TestNativeBackend:
+    """Tests for OllamaLLM with the native backend."""
+
+    def test_invoke_and_stream(self, ollama_url):
+        """Verify OllamaLLM answers and streams through the native client and records the reported usage."""
+        llm = OllamaLLM(model_name="llama3", temperature=0.2, base_url=ollama_url, backend="native")
+
+        assert llm.invoke("Can I work in Canada?") == "".join(ANSWER_WORDS)
+        assert [chunk.text for chunk in llm.stream("Can I study in Canada?")] == ANSWER_WORDS
+
+        records = get_metrics_registry().records()
+        assert [record.prompt_tokens for record in records] == [PROMPT_EVAL_COUNT, PROMPT_EVAL_COUNT]
+        assert not any(record.estimated for record in records)
+        assert OllamaStandIn.requests[0]["options"]["temperature"] == 0.2
+
+    def test_async_invoke(self, ollama_url):
+        """Verify the async call goes through the native async client."""
+        llm = OllamaLLM(model_name="llama3", base_url=ollama_url, backend="native")
+
+        assert run_coroutine(llm.acall("Can I work in Canada?"), TIMEOUT) == "".join(ANSWER_WORDS)
+
+    def test_backend_from_config(self, monkeypatch):
+        """Verify the backend comes from OllamaConfig and an unknown backend is refused."""
+        monkeypatch.setattr(config_manager.get_config().ollama, "backend", "native")
+        assert OllamaLLM(model_name="llama3").backend == "native"
+
+        with pytest.raises(ValueError):
+            OllamaLLM(model_name="llama3", backend="grpc")
+
+    def test_langchain_backend_gets_config_options(self, monkeypatch):
+        """Verify ChatOllama gets num_ctx, top_k, and top_p from OllamaConfig unless they are passed."""
+        monkeypatch.setattr(config_manager.get_config().ollama, "num_ctx", 8192)
+
+        llm = OllamaLLM(model_name="llama3", backend="langchain", top_k=10)
+
+        assert llm._llm.num_ctx == 8192
+        assert llm._llm.top_k == 10
+        assert llm._llm.top_p == config_manager.get_config().ollama.top_p
@@ -0,0 +1,242 @@
+"""Unit tests for the warm-up and keep-alive of the Ollama models.
+
+This module tests the models that the warmer loads at startup, the keep-alive
+renewal of its background rounds, the choice of loaded models in LLMFactory, the
+keep-alive of OllamaLLM requests, and the resident models endpoint, against a
+local stand-in for the Ollama API.
+"""
+
+import json
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.llm.base import BaseLLM
+from src.llm.config import config_manager
+from src.llm.llm_factory import LLMFactory, LLMType
+from src.llm.ollama_llm import OllamaLLM
+from src.llm.ollama_warmup import PINNED_KEEP_ALIVE, OllamaWarmer, get_ollama_warmer, model_key
+
+
+# Keep-alive of the models that are not pinned in these tests
+KEEP_ALIVE = "30m"
+
+# Seconds between two background rounds in these tests
+INTERVAL = 60.0
+
+# Maximum time a test waits for the background thread
+TIMEOUT = 10
+
+
+class OllamaStandIn(BaseHTTPRequestHandler):
+    """Answers GET /api/ps and POST /api/generate like Ollama and keeps the generate request bodies.
+
+    `loaded` maps the resident models to their unload time.
+    """
+
+    loaded: dict[str, datetime] = {}
+    requests: list[dict] = []
+
+    def do_GET(self):
+        models = [
+            {"name": name, "model": name, "expires_at": expires_at.isoformat(), "size_vram": 1024}
+            for name, expires_at in OllamaStandIn.loaded.items()
+        ]
+        self._reply({"models": models})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        OllamaStandIn.requests.append(body)
+        keep_alive = body.get("keep_alive")
+        lifetime = timedelta(days=365) if keep_alive == PINNED_KEEP_ALIVE else timedelta(minutes=30)
+        OllamaStandIn.loaded[model_key(body["model"])] = datetime.now(UTC) + lifetime
+        self._reply({"model": body["model"], "response": "", "done": True})
+
+    def _reply(self, reply):
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def ollama_url():
+    """Run the stand-in server in a thread and return its base URL."""
+    OllamaStandIn.loaded = {}
+    OllamaStandIn.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def ollama_config(ollama_url, monkeypatch):
+    """Point the Ollama settings at the stand-in server."""
+    config = config_manager.get_config().ollama
+    monkeypatch.setattr(config, "base_url", ollama_url)
+    monkeypatch.setattr(config, "pinned_models", [])
+    monkeypatch.setattr(config, "keep_alive", KEEP_ALIVE)
+    monkeypatch.setattr(config, "warmup", True)
+    return config
+
+
+def warmed_models():
+    """Get the models of the generate requests, in order."""
+    return [body["model"] for body in OllamaStandIn.requests]
+
+
+class TestWarmup:
+    """Tests for the models loaded at startup."""
+
+    def test_configured_and_fallback_models_are_loaded(self, ollama_config, monkeypatch):
+        """Verify the configured model, the local model of the default tier, and pinned models are loaded once."""
+        monkeypatch.setattr(ollama_config, "model_name", "mistral")
+        monkeypatch.setattr(ollama_config, "pinned_models", ["llama3:70b"])
+        warmer = get_ollama_warmer()
+
+        loaded = warmer.warm_all()
+
+        assert loaded == ["llama3:70b", "mistral:latest", "llama3:latest"]
+        assert {body["model"]: body["keep_alive"] for body in OllamaStandIn.requests} == {
+            "llama3:70b": PINNED_KEEP_ALIVE,
+            "mistral:latest": KEEP_ALIVE,
+            "llama3:latest": KEEP_ALIVE,
+        }
+        assert all(body["prompt"] == "" for body in OllamaStandIn.requests)
+        assert warmer.is_resident("llama3") and warmer.is_resident("mistral")
+
+    def test_large_model_is_not_loaded_unless_pinned(self, ollama_config):
+        """Verify the large model of the accurate tier is left to first use when it is not pinned."""
+        warmer = get_ollama_warmer()
+
+        loaded = warmer.warm_all()
+
+        assert loaded == ["llama3:latest"]
+        assert "llama3:70b" not in warmed_models()
+
+    def test_resident_models_are_not_loaded_again(self, ollama_url):
+        """Verify the warm-up skips models that are in memory, whatever tag they are listed with."""
+        OllamaStandIn.loaded["llama3:latest"] = datetime.now(UTC) + timedelta(minutes=30)
+        warmer = OllamaWarmer(ollama_url, ["llama3", "llama3:70b"], keep_alive=KEEP_ALIVE, interval=INTERVAL)
+
+        assert warmer.warm_all() == ["llama3:70b"]
+
+    def test_unreachable_ollama(self):
+        """Verify the warm-up does nothing and reports Ollama as unreachable when it does not answer."""
+        warmer = OllamaWarmer("http://127.0.0.1:9", ["llama3"], interval=INTERVAL)
+
+        assert warmer.warm_all() == []
+        assert warmer.snapshot.reachable is False
+        assert warmer.snapshot.checked_at > 0
+
+    def test_background_thread_loads_models(self, ollama_config):
+        """Verify the started warmer loads the models in the background and stops on request."""
+        warmer = get_ollama_warmer()
+        warmer.start()
+        deadline = time.monotonic() + TIMEOUT
+        while not all(warmer.is_resident(model) for model in warmer.models) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        warmer.stop()
+
+        assert all(warmer.is_resident(model) for model in warmer.models)
+
+    def test_disabled(self, monkeypatch):
+        """Verify there is no warmer when OllamaConfig.warmup is off."""
+        monkeypatch.setattr(config_manager.get_config().ollama, "warmup", False)
+
+        assert get_ollama_warmer() is None
+
+
+class TestKeepWarm:
+    """Tests for the background rounds."""
+
+    def test_ending_keep_alive_is_renewed(self, ollama_url):
+        """Verify a round renews only the models whose keep-alive ends before the next rounds."""
+        now = datetime.now(UTC)
+        OllamaStandIn.loaded = {"llama3:latest": now + timedelta(seconds=30), "llama3:70b": now + timedelta(hours=1)}
+        warmer = OllamaWarmer(ollama_url, ["llama3", "llama3:70b"], keep_alive=KEEP_ALIVE, interval=INTERVAL)
+
+        assert warmer.keep_warm() == ["llama3:latest"]
+        assert warmer.snapshot.models["llama3:latest"].expires_at > now + timedelta(minutes=10)
+
+    def test_only_pinned_models_are_reloaded(self, ollama_url):
+        """Verify a round loads an evicted pinned model again but leaves other evicted models out."""
+        warmer = OllamaWarmer(ollama_url, ["llama3", "llama3:70b"], pinned=["llama3"], interval=INTERVAL)
+
+        assert warmer.keep_warm() == ["llama3:latest"]
+        assert OllamaStandIn.requests[0]["keep_alive"] == PINNED_KEEP_ALIVE
+        assert not warmer.is_resident("llama3:70b")
+
+
+class TestLoadedModelRouting:
+    """Tests for the choice of loaded models in LLMFactory."""
+
+    @pytest.fixture(autouse=True)
+    def providers_up(self):
+        """Report every provider as available and replace create_llm with a mock."""
+        with (
+            patch.object(LLMFactory, "is_provider_available", return_value=True),
+            patch.object(LLMFactory, "create_llm", return_value=MagicMock(spec=BaseLLM)) as create_llm,
+        ):
+            yield create_llm
+
+    def test_latency_sensitive_request_avoids_cold_model(self, ollama_config, providers_up):
+        """Verify a latency-sensitive request skips a local model that is not loaded, and others do not."""
+        OllamaStandIn.loaded["llama3:70b"] = datetime.now(UTC) + timedelta(minutes=30)
+        get_ollama_warmer().refresh()
+
+        assert LLMFactory.is_llm_type_loaded(LLMType.LOCAL_ACCURATE)
+        assert not LLMFactory.is_llm_type_loaded(LLMType.LOCAL_FAST)
+        assert LLMFactory.route_llm_type(LLMType.LOCAL_FAST) is LLMType.LOCAL_FAST
+        assert LLMFactory.route_llm_type(LLMType.LOCAL_FAST, latency_sensitive=True) is not LLMType.LOCAL_FAST
+
+        LLMFactory.get_llm_for_task("summarization", latency_sensitive=True)
+
+        assert providers_up.call_args.args[0] is not LLMType.LOCAL_FAST
+
+    def test_unknown_residency_keeps_preferred_model(self, providers_up):
+        """Verify the requested local model is kept before the warmer has reached Ollama."""
+        assert LLMFactory.route_llm_type(LLMType.LOCAL_FAST, latency_sensitive=True) is LLMType.LOCAL_FAST
+
+
+class TestOllamaKeepAlive:
+    """Tests for the keep-alive of Ollama requests and the resident models endpoint."""
+
+    def test_requests_keep_the_model_loaded(self, monkeypatch):
+        """Verify OllamaLLM sends the configured keep-alive, an endless one for pinned models."""
+        monkeypatch.setattr(config_manager.get_config().ollama, "keep_alive", "600")
+        monkeypatch.setattr(config_manager.get_config().ollama, "pinned_models", ["llama3:70b"])
+
+        assert OllamaLLM(model_name="llama3")._llm.keep_alive == 600
+        assert OllamaLLM(model_name="llama3:70b")._llm.keep_alive == PINNED_KEEP_ALIVE
+        assert OllamaLLM(model_name="llama3", keep_alive="5m")._llm.keep_alive == "5m"
+
+    def test_models_endpoint(self, ollama_config, monkeypatch):
+        """Verify the endpoint reports the warmed and pinned models and the resident ones."""
+        from src.api.api_server import app
+
+        monkeypatch.setattr(ollama_config, "pinned_models", ["llama3"])
+        get_ollama_warmer().warm("llama3:latest")
+        get_ollama_warmer().refresh()
+
+        body = TestClient(app).get("/ollama-models/").json()
+
+        assert body["enabled"] is True
+        assert body["pinned"] == ["llama3:latest"]
+        assert "llama3:70b" not in body["warmed"]
+        assert body["reachable"] is True
+        assert list(body["models"]) == ["llama3:latest"]
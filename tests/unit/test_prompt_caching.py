@@ -0,0 +1,217 @@
+"""Unit tests for Anthropic prompt caching.
+
+This module tests the cache markers on stable prompt prefixes, the cache tokens
+and cost in the LLM metrics, and the requests that ClaudeLLM and the CrewAI
+client send to a local stand-in for the Anthropic Messages API.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from crewai.utilities.token_counter_callback import TokenCalcHandler
+
+from src.crew_templates import CrewTemplate
+from src.llm.claude_llm import ClaudeLLM
+from src.llm.config import config_manager
+from src.llm.crewai_llm import PromptCachingLLM
+from src.llm.metrics import estimate_cost, get_metrics_registry
+from src.llm.prompt_cache import CACHE_CONTROL, MAX_CACHE_BREAKPOINTS, static_prefix, with_cache_control
+
+
+# Model used in the requests to the stand-in server
+TEST_MODEL = "claude-sonnet-4-20250514"
+
+# Usage reported by the stand-in server: 1000 prompt tokens read from the cache
+CACHE_READ_USAGE = {"input_tokens": 10, "output_tokens": 5, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 1000}
+
+# Usage of a first request with a new prefix: 900 prompt tokens written to the cache
+CACHE_WRITE_USAGE = {"input_tokens": 100, "output_tokens": 5, "cache_creation_input_tokens": 900, "cache_read_input_tokens": 0}
+
+
+class AnthropicStandIn(BaseHTTPRequestHandler):
+    """Answers POST /v1/messages like the Anthropic API with `usage` and keeps the request bodies."""
+
+    requests: list[dict] = []
+    usage: dict = CACHE_READ_USAGE
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        AnthropicStandIn.requests.append(body)
+        reply = {
+            "id": "msg_test",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [{"type": "text", "text": "Hello"}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": AnthropicStandIn.usage,
+        }
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def anthropic_url():
+    """Run the stand-in server in a thread and return its base URL."""
+    AnthropicStandIn.requests = []
+    AnthropicStandIn.usage = CACHE_READ_USAGE
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AnthropicStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestCacheMarkers:
+    """Tests for the cache markers on chat messages."""
+
+    def test_system_and_static_user_prefix_are_marked(self):
+        """Verify the system prompt and the static prefix of the user message end cached blocks."""
+        messages = [
+            {"role": "system", "content": "You are an intake agent."},
+            {"role": "user", "content": "Analyze the query: Can I work in Canada?"},
+        ]
+
+        marked = with_cache_control(messages, ["Analyze the query: "])
+
+        assert marked[0]["content"] == [{"type": "text", "text": "You are an intake agent.", "cache_control": CACHE_CONTROL}]
+        assert marked[1]["content"] == [
+            {"type": "text", "text": "Analyze the query: ", "cache_control": CACHE_CONTROL},
+            {"type": "text", "text": "Can I work in Canada?"},
+        ]
+        assert messages[0]["content"] == "You are an intake agent."
+
+    def test_only_first_matching_user_message_is_marked(self):
+        """Verify later turns stay plain text, so the cache marker count stays within the limit."""
+        messages = [{"role": "system", "content": f"system {index}"} for index in range(MAX_CACHE_BREAKPOINTS + 1)]
+        messages += [{"role": "user", "content": "Prefix a"}, {"role": "user", "content": "Prefix b"}]
+
+        marked = with_cache_control(messages, ["Prefix"])
+
+        assert sum(isinstance(message["content"], list) for message in marked) == MAX_CACHE_BREAKPOINTS
+        assert with_cache_control(messages[-2:], ["Prefix"])[1]["content"] == "Prefix b"
+
+    def test_static_prefix_stops_at_first_placeholder(self):
+        """Verify the static prefix of a task description ends before its first input."""
+        assert static_prefix("Research the rules.\nQuery: {query}\nCountry: {country}") == "Research the rules.\nQuery: "
+        assert static_prefix("No inputs here.") == "No inputs here."
+
+    def test_crewai_client_marks_anthropic_messages_only(self):
+        """Verify the CrewAI client adds cache markers for Claude models and not for others."""
+        messages = [{"role": "system", "content": "Role"}, {"role": "user", "content": "Task: question"}]
+        claude = PromptCachingLLM(model=f"anthropic/{TEST_MODEL}", static_prefixes=["Task: "])
+        openai = PromptCachingLLM(model="gpt-4o-mini", static_prefixes=["Task: "])
+
+        # CrewAI puts a placeholder user turn before the system message for Anthropic
+        formatted = {message["role"]: message["content"] for message in claude._format_messages_for_provider(messages)}
+        assert formatted["system"][0]["cache_control"] == CACHE_CONTROL
+        assert formatted["user"][0] == {"type": "text", "text": "Task: ", "cache_control": CACHE_CONTROL}
+        assert openai._format_messages_for_provider(messages) == messages
+
+
+class TestCacheAccounting:
+    """Tests for the cache tokens in the metrics."""
+
+    def test_cached_tokens_are_cheaper(self):
+        """Verify cache reads cost a tenth and cache writes a quarter more than normal input."""
+        assert estimate_cost("anthropic", TEST_MODEL, 1_000_000, 0, cache_read_tokens=1_000_000) == pytest.approx(0.3)
+        assert estimate_cost("anthropic", TEST_MODEL, 1_000_000, 0, cache_write_tokens=1_000_000) == pytest.approx(3.75)
+        assert estimate_cost("anthropic", TEST_MODEL, 1_000_000, 0) == pytest.approx(3.0)
+
+    def test_crew_records_cached_prompt_tokens(self):
+        """Verify a crew run records the cached prompt tokens counted by CrewAI."""
+        template = CrewTemplate(ClaudeLLM(model_name=TEST_MODEL, api_key="test-key", prompt_caching=True))
+        agent = template.agents[0]
+        agent._token_process.sum_prompt_tokens(1000)
+        agent._token_process.sum_cached_prompt_tokens(800)
+
+        template._record_usage(template.tasks[:1])
+
+        [record] = get_metrics_registry().records()
+        assert record.cache_read_tokens == 800
+        assert record.cost == pytest.approx((200 * 3.0 + 800 * 0.3) / 1_000_000)
+
+    def test_crew_records_cache_writes(self, anthropic_url):
+        """Verify a crew run records the prompt tokens that the agent's client wrote to the cache."""
+        AnthropicStandIn.usage = CACHE_WRITE_USAGE
+        template = CrewTemplate(ClaudeLLM(model_name=TEST_MODEL, api_key="test-key", base_url=anthropic_url))
+        agent = template.agents[0]
+
+        agent.llm.call("Can I work in Canada?", callbacks=[TokenCalcHandler(agent._token_process)])
+        template._record_usage(template.tasks[:1])
+
+        [record] = get_metrics_registry().records()
+        assert (record.prompt_tokens, record.cache_write_tokens) == (1000, 900)
+        assert record.cost == pytest.approx(estimate_cost("anthropic", TEST_MODEL, 1000, 5, cache_write_tokens=900))
+        template.reset()
+        assert agent.llm.cache_write_tokens == 0
+
+
+class TestCachingConfig:
+    """Tests for the prompt caching setting in the configuration file."""
+
+    def test_setting_is_saved(self, tmp_path, monkeypatch):
+        """Verify save_config writes the prompt caching setting of Anthropic."""
+        monkeypatch.setattr(config_manager.get_config().anthropic, "prompt_caching", False)
+        config_file = tmp_path / "llm_config.json"
+
+        config_manager.save_config(str(config_file))
+
+        assert json.loads(config_file.read_text())["anthropic"]["prompt_caching"] is False
+
+
+class TestClaudeRequests:
+    """Tests for the requests sent to the stand-in Anthropic API."""
+
+    def test_system_prompt_is_sent_as_cached_block(self, anthropic_url):
+        """Verify the system prompt is sent with a cache marker and the cache read is recorded."""
+        llm = ClaudeLLM(model_name=TEST_MODEL, api_key="test-key", system_prompt="You are an advisor.", base_url=anthropic_url)
+
+        assert llm.invoke("Can I study in Germany?") == "Hello"
+
+        [request] = AnthropicStandIn.requests
+        assert request["system"] == [{"type": "text", "text": "You are an advisor.", "cache_control": CACHE_CONTROL}]
+        assert request["messages"] == [{"role": "user", "content": "Can I study in Germany?"}]
+        [record] = get_metrics_registry().records()
+        assert (record.prompt_tokens, record.cache_read_tokens, record.cache_write_tokens) == (1010, 1000, 0)
+        assert record.cost == pytest.approx((10 * 3.0 + 1000 * 0.3 + 5 * 15.0) / 1_000_000)
+
+    def test_caching_off_sends_plain_system_prompt(self, anthropic_url):
+        """Verify no cache marker is sent when prompt caching is off."""
+        llm = ClaudeLLM(
+            model_name=TEST_MODEL,
+            api_key="test-key",
+            system_prompt="You are an advisor.",
+            prompt_caching=False,
+            base_url=anthropic_url,
+        )
+
+        llm.invoke("Hi")
+
+        assert AnthropicStandIn.requests[0]["system"] == "You are an advisor."
+        assert llm.get_crewai_llm() is llm
+
+    def test_agent_client_caches_task_prefix(self, anthropic_url):
+        """Verify the agents' CrewAI client sends the static task prefix as a cached block."""
+        template = CrewTemplate(ClaudeLLM(model_name=TEST_MODEL, api_key="test-key", base_url=anthropic_url))
+        agent_llm = template.agents[1].llm
+        prefix = static_prefix(template.tasks[1].description)
+
+        agent_llm.call([{"role": "system", "content": "Researcher"}, {"role": "user", "content": f"{prefix}Visa query"}])
+
+        [request] = AnthropicStandIn.requests
+        assert request["system"][0]["cache_control"] == CACHE_CONTROL
+        cached = [block for block in request["messages"][-1]["content"] if "cache_control" in block]
+        assert [block["text"] for block in cached] == [prefix]
+        assert template.agents[0].llm is not agent_llm
@@ -0,0 +1,260 @@
+"""Unit tests for the per-provider rate limiter.
+
+This module tests the request and token buckets, the fair queue, the provider
+and account limits from the configuration, and the rate limit in the LLM call
+pipeline.
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.llm.base import BaseLLM
+from src.llm.config import config_manager
+from src.llm.event_loop import run_coroutine
+from src.llm.metrics import get_metrics_registry
+from src.llm.rate_limiter import RateLimiter, get_rate_limiter
+
+
+# One request per second
+TEST_REQUESTS_PER_MINUTE = 60
+
+# Ten requests per second, all ten can be sent at once
+FAST_REQUESTS_PER_MINUTE = 600
+FAST_BURST = 10
+
+# A thousand tokens per second, all thousand can be sent at once
+TEST_TOKENS_PER_MINUTE = 60000
+TOKEN_BURST = 1000
+
+# Twenty requests per second: the queue lets one request through every 50 ms once the burst is used
+QUEUE_REQUESTS_PER_MINUTE = 1200
+QUEUE_BURST = 20
+
+# Maximum time a test waits for a coroutine
+TIMEOUT = 10
+
+
+def drain(limiter, requests):
+    """Use up the burst of a limiter."""
+    for _ in range(requests):
+        limiter.acquire()
+
+
+class ThrottledError(Exception):
+    """Provider error for HTTP 429 with a Retry-After of 0.2 seconds."""
+
+    status_code = 429
+    response = MagicMock(headers={"retry-after": "0.2"})
+
+
+class LimitedLLM(BaseLLM):
+    """Provider that reports itself as Anthropic and answers immediately."""
+
+    def __init__(self):
+        super().__init__(model_name="limited-model")
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return self._execute(prompt, stop, lambda: self._send(prompt))
+
+    def _send(self, prompt):
+        if prompt == "throttled":
+            raise ThrottledError("rate limit exceeded")
+        if prompt.startswith("broken"):
+            raise ConnectionError("connection reset")
+        return prompt
+
+    def _llm_type(self):
+        return "limited"
+
+    @property
+    def provider(self):
+        return "anthropic"
+
+
+@pytest.fixture
+def anthropic_limit(monkeypatch):
+    """Limit Anthropic requests to one per second."""
+    monkeypatch.setattr(config_manager.get_config().anthropic, "requests_per_minute", TEST_REQUESTS_PER_MINUTE)
+
+
+class TestRateLimiter:
+    """Tests for the RateLimiter class."""
+
+    def test_burst_then_wait(self):
+        """Verify a burst of one second's requests passes and the next request waits for the rate."""
+        limiter = RateLimiter(FAST_REQUESTS_PER_MINUTE)
+
+        assert [limiter.acquire() < 0.01 for _ in range(FAST_BURST)] == [True] * FAST_BURST
+        assert limiter.acquire() == pytest.approx(0.1, abs=0.05)
+
+    def test_async_acquire_waits_for_slot(self):
+        """Verify aacquire waits for a free slot without blocking other coroutines."""
+        limiter = RateLimiter(FAST_REQUESTS_PER_MINUTE)
+        drain(limiter, FAST_BURST)
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            delay, _ = await asyncio.gather(limiter.aacquire(), ticker())
+            return delay
+
+        assert run_coroutine(scenario(), timeout=5) == pytest.approx(0.1, abs=0.05)
+        assert len(ticks) == 3
+
+    def test_invalid_rate(self):
+        """Verify a limiter without a positive rate cannot be created."""
+        with pytest.raises(ValueError, match="requests_per_minute"):
+            RateLimiter(0)
+
+    def test_tokens_per_minute(self):
+        """Verify requests wait for the tokens they reserve."""
+        limiter = RateLimiter(tokens_per_minute=TEST_TOKENS_PER_MINUTE)
+
+        assert limiter.acquire(tokens=TOKEN_BURST) < 0.01
+        assert limiter.acquire(tokens=100) == pytest.approx(0.1, abs=0.05)
+
+    def test_settle_charges_real_usage(self):
+        """Verify tokens used beyond the reservation make the next request wait."""
+        limiter = RateLimiter(tokens_per_minute=TEST_TOKENS_PER_MINUTE)
+        limiter.acquire(tokens=0)
+
+        limiter.settle(TOKEN_BURST)
+
+        assert limiter.acquire(tokens=100) == pytest.approx(0.1, abs=0.05)
+
+    def test_pause(self):
+        """Verify a paused limiter lets no request through until the pause is over."""
+        limiter = RateLimiter(FAST_REQUESTS_PER_MINUTE)
+
+        limiter.pause(0.2)
+
+        assert limiter.acquire() == pytest.approx(0.2, abs=0.05)
+
+
+class TestFairQueue:
+    """Tests for the fair queue of the rate limiter."""
+
+    def test_flows_take_turns(self):
+        """Verify a single query is not queued behind every request of an earlier batch."""
+        limiter = RateLimiter(QUEUE_REQUESTS_PER_MINUTE)
+        drain(limiter, QUEUE_BURST)
+        granted = []
+
+        async def request(flow, name):
+            await limiter.aacquire(flow=flow)
+            granted.append(name)
+
+        async def scenario():
+            batch = [asyncio.create_task(request("batch", f"batch-{index}")) for index in range(4)]
+            await asyncio.sleep(0)
+            query = asyncio.create_task(request("query", "query"))
+            await asyncio.gather(*batch, query)
+
+        run_coroutine(scenario(), TIMEOUT)
+
+        assert granted == ["batch-0", "query", "batch-1", "batch-2", "batch-3"]
+        stats = limiter.stats()
+        assert (stats.granted, stats.waiting) == (QUEUE_BURST + 5, 0)
+        assert stats.max_wait >= stats.average_wait > 0
+
+    def test_waiting_coroutines_do_not_poll(self):
+        """Verify coroutines behind the head of the queue sleep until the queue moves instead of polling."""
+        limiter = RateLimiter(QUEUE_REQUESTS_PER_MINUTE)
+        drain(limiter, QUEUE_BURST)
+        limiter.pause(0.3)
+
+        async def scenario():
+            await asyncio.gather(*(limiter.aacquire(flow="batch") for _ in range(5)))
+
+        with patch.object(limiter, "_try_grant", wraps=limiter._try_grant) as try_grant:
+            run_coroutine(scenario(), TIMEOUT)
+
+        # Polling every 10 ms would check about 30 times per waiting coroutine
+        assert try_grant.call_count < 20
+        assert limiter.stats().waiting == 0
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Verify a cancelled request does not hold up the requests behind it."""
+        limiter = RateLimiter(QUEUE_REQUESTS_PER_MINUTE)
+        limiter.pause(TIMEOUT)
+
+        async def scenario():
+            waiter = asyncio.create_task(limiter.aacquire())
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        run_coroutine(scenario(), TIMEOUT)
+
+        assert limiter.stats().waiting == 0
+
+
+class TestProviderRateLimits:
+    """Tests for the provider limits in the call pipeline."""
+
+    def test_no_limit_by_default(self):
+        """Verify providers have no limit unless one is configured."""
+        assert get_rate_limiter("anthropic") is None
+        assert get_rate_limiter("unknown") is None
+
+    def test_limit_from_config(self, anthropic_limit):
+        """Verify the limiter follows the provider's requests_per_minute setting."""
+        limiter = get_rate_limiter("anthropic")
+
+        assert limiter.requests_per_minute == TEST_REQUESTS_PER_MINUTE
+        assert get_rate_limiter("anthropic") is limiter
+
+    def test_limiter_per_api_key(self, monkeypatch):
+        """Verify every API key gets its own limiter, and a token limit alone turns limiting on."""
+        monkeypatch.setattr(config_manager.get_config().openai, "tokens_per_minute", TEST_TOKENS_PER_MINUTE)
+
+        first = get_rate_limiter("openai", "key-a")
+
+        assert first.tokens_per_minute == TEST_TOKENS_PER_MINUTE
+        assert get_rate_limiter("openai", "key-a") is first
+        assert get_rate_limiter("openai", "key-b") is not first
+
+    def test_provider_requests_wait_for_limit(self, anthropic_limit):
+        """Verify every request that reaches the provider takes a rate-limit slot."""
+        with patch("src.llm.rate_limiter.RateLimiter.acquire", return_value=0.0) as mock_acquire:
+            LimitedLLM().invoke("one")
+            LimitedLLM().invoke("two")
+
+        assert mock_acquire.call_count == 2
+
+    def test_queue_wait_is_reported_apart_from_latency(self, monkeypatch):
+        """Verify the time in the queue is recorded as queue wait and not as provider latency."""
+        monkeypatch.setattr(config_manager.get_config().anthropic, "requests_per_minute", FAST_REQUESTS_PER_MINUTE)
+        drain(get_rate_limiter("anthropic"), FAST_BURST)
+
+        LimitedLLM().invoke("hello")
+
+        [record] = get_metrics_registry().records()
+        assert record.queue_wait == pytest.approx(0.1, abs=0.05)
+        assert record.latency < 0.05
+
+    def test_failed_call_gives_reserved_tokens_back(self, monkeypatch):
+        """Verify a request that fails does not keep the tokens it reserved."""
+        monkeypatch.setattr(config_manager.get_config().anthropic, "tokens_per_minute", TEST_TOKENS_PER_MINUTE)
+        limiter = get_rate_limiter("anthropic")
+
+        with pytest.raises(ConnectionError):
+            LimitedLLM().invoke("broken " * 400)
+
+        assert limiter._tokens.level == pytest.approx(TOKEN_BURST, abs=50)
+
+    def test_rate_limit_error_pauses_queue(self, monkeypatch):
+        """Verify an HTTP 429 with Retry-After pauses the queue for the following requests."""
+        monkeypatch.setattr(config_manager.get_config().anthropic, "requests_per_minute", FAST_REQUESTS_PER_MINUTE)
+
+        with pytest.raises(ThrottledError):
+            LimitedLLM().invoke("throttled")
+
+        assert get_rate_limiter("anthropic").acquire() == pytest.approx(0.2, abs=0.05)
@@ -0,0 +1,130 @@
+"""Unit tests for the on-disk LLM response cache.
+
+This module tests the cache keys, TTL expiry, LRU eviction, the hit and miss
+counters, and the integration with the BaseLLM call pipeline.
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.llm.base import BaseLLM
+from src.llm.config import config_manager
+from src.llm.response_cache import ResponseCache, get_response_cache
+
+
+# Test constants
+TEST_TTL_SECONDS = 3600
+TEST_MAX_ENTRIES = 3
+
+
+class PipelineLLM(BaseLLM):
+    """Minimal provider that sends every call through the shared pipeline."""
+
+    def __init__(self):
+        super().__init__(model_name="pipeline-model", temperature=0.7)
+        self.backend = MagicMock(side_effect=lambda prompt: f"answer to {prompt}")
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return self._execute(prompt, stop, lambda: self.backend(prompt))
+
+    def _llm_type(self):
+        return "pipeline"
+
+    @property
+    def provider(self):
+        return "pipeline"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a small cache in a temporary directory."""
+    return ResponseCache(str(tmp_path), ttl_seconds=TEST_TTL_SECONDS, max_entries=TEST_MAX_ENTRIES)
+
+
+@pytest.fixture
+def enabled_cache(tmp_path, monkeypatch):
+    """Enable the configured response cache in a temporary directory."""
+    config = config_manager.get_config()
+    monkeypatch.setattr(config, "cache_responses", True)
+    monkeypatch.setattr(config, "cache_dir", str(tmp_path))
+    return get_response_cache()
+
+
+class TestResponseCache:
+    """Tests for the ResponseCache class."""
+
+    def test_key_depends_on_all_fields(self):
+        """Verify each key field changes the key."""
+        base = ResponseCache.make_key("anthropic", "claude", 0.7, None, "Hello")
+
+        assert base == ResponseCache.make_key("anthropic", "claude", 0.7, [], "Hello")
+        assert base != ResponseCache.make_key("openai", "claude", 0.7, None, "Hello")
+        assert base != ResponseCache.make_key("anthropic", "other", 0.7, None, "Hello")
+        assert base != ResponseCache.make_key("anthropic", "claude", 0.5, None, "Hello")
+        assert base != ResponseCache.make_key("anthropic", "claude", 0.7, ["\n"], "Hello")
+        assert base != ResponseCache.make_key("anthropic", "claude", 0.7, None, "Hello!")
+
+    def test_hit_and_miss_counters(self, cache):
+        """Verify hits and misses are counted."""
+        assert cache.get("key") is None
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+        assert stats.hit_rate == 0.5
+
+    def test_expired_entries_are_not_used(self, tmp_path):
+        """Verify an entry older than the TTL is a miss and is removed."""
+        cache = ResponseCache(str(tmp_path), ttl_seconds=0.01, max_entries=TEST_MAX_ENTRIES)
+        cache.set("key", "value")
+        time.sleep(0.02)
+
+        assert cache.get("key") is None
+        assert cache.stats().evictions == 1
+
+    def test_least_recently_used_entry_is_evicted(self, cache):
+        """Verify the cache keeps at most max_entries, dropping the oldest access."""
+        for key in ["a", "b", "c"]:
+            cache.set(key, key)
+            time.sleep(0.001)
+        cache.get("a")  # "b" is now the least recently used entry
+        cache.set("d", "d")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "a"
+        assert cache.stats().entries == TEST_MAX_ENTRIES
+
+    def test_entries_survive_a_new_instance(self, cache, tmp_path):
+        """Verify entries are stored on disk."""
+        cache.set("key", "value")
+
+        reopened = ResponseCache(str(tmp_path), ttl_seconds=TEST_TTL_SECONDS, max_entries=TEST_MAX_ENTRIES)
+
+        assert reopened.get("key") == "value"
+
+
+class TestCachedCallPipeline:
+    """Tests for the response cache inside the BaseLLM call pipeline."""
+
+    def test_identical_prompt_is_served_from_cache(self, enabled_cache):
+        """Verify the second identical call does not reach the provider."""
+        llm = PipelineLLM()
+
+        assert llm.invoke("Hello") == "answer to Hello"
+        assert llm.invoke("Hello") == "answer to Hello"
+
+        llm.backend.assert_called_once_with("Hello")
+        assert enabled_cache.stats().hits == 1
+
+    def test_cache_disabled_by_config(self):
+        """Verify every call reaches the provider when cache_responses is False."""
+        llm = PipelineLLM()
+
+        llm.invoke("Hello")
+        llm.invoke("Hello")
+
+        assert get_response_cache() is None
+        assert llm.backend.call_count == 2
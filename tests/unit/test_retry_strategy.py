@@ -0,0 +1,218 @@
+"""Unit tests for the retry strategy and the retry budget.
+
+This module tests the full-jitter backoff, the classification of retryable and
+fatal provider errors, the Retry-After header, and the process-wide retry budget.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.llm.circuit_breaker import CircuitOpenError
+from src.llm.event_loop import run_coroutine
+from src.llm.fallback import RetryStrategy, error_status_code, is_retryable, retry_after_seconds
+from src.llm.retry_budget import RetryBudget, get_retry_budget
+
+
+# Maximum time a test waits for a coroutine
+TIMEOUT = 10
+
+
+class ProviderError(Exception):
+    """Error shaped like the Anthropic and OpenAI SDK status errors."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"provider returned {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(status_code=status_code, headers=headers or {})
+
+
+class AuthenticationError(Exception):
+    """Error named like the SDK authentication errors, without a status code."""
+
+
+def no_wait_strategy(**kwargs):
+    """Build a strategy whose waits are recorded instead of slept."""
+    return RetryStrategy(max_retries=3, initial_delay=1.0, max_delay=8.0, budget=RetryBudget(ratio=1.0), **kwargs)
+
+
+class TestErrorClassification:
+    """Tests for retryable and fatal errors."""
+
+    @pytest.mark.parametrize("status", [408, 429, 500, 502, 503, 504, 529])
+    def test_retryable_status_codes(self, status):
+        """Verify rate limit, overload, and server errors are retried."""
+        assert is_retryable(ProviderError(status)) is True
+
+    @pytest.mark.parametrize("status", [400, 401, 403, 404, 422])
+    def test_fatal_status_codes(self, status):
+        """Verify bad requests, authentication, and unknown models are not retried."""
+        assert is_retryable(ProviderError(status)) is False
+
+    def test_status_code_in_message(self):
+        """Verify the status code of a LangChain Ollama error is read from its message."""
+        error = ValueError("Ollama call failed with status code 404. Maybe your model is not found.")
+
+        assert error_status_code(error) == 404
+        assert is_retryable(error) is False
+
+    def test_fatal_error_names(self):
+        """Verify SDK errors are classified by their type when the status code is missing."""
+        assert is_retryable(AuthenticationError("invalid x-api-key")) is False
+
+    def test_fatal_error_names_of_the_raising_provider(self):
+        """Verify an error name is looked up in the fatal names of the provider that raised it."""
+        openai_error = type("OllamaEndpointNotFoundError", (Exception,), {"__module__": "openai"})
+        ollama_error = type("OllamaEndpointNotFoundError", (Exception,), {"__module__": "langchain_ollama.llms"})
+        ollama_bad_request = type("BadRequestError", (Exception,), {"__module__": "ollama._types"})
+
+        assert is_retryable(openai_error("model not found")) is True
+        assert is_retryable(ollama_error("model not found")) is False
+        assert is_retryable(ollama_bad_request("bad request")) is True
+        assert is_retryable(ollama_bad_request("bad request"), provider="openai") is False
+
+    def test_unknown_errors_are_retryable(self):
+        """Verify errors without a known status or type are retried."""
+        assert is_retryable(ConnectionError("connection reset")) is True
+        assert is_retryable(TimeoutError()) is True
+
+    def test_open_circuit_is_fatal(self):
+        """Verify a call refused by an open circuit is not retried."""
+        assert is_retryable(CircuitOpenError("open")) is False
+
+
+class TestRetryAfter:
+    """Tests for the Retry-After header."""
+
+    def test_seconds(self):
+        """Verify a Retry-After value in seconds is read on a 429."""
+        assert retry_after_seconds(ProviderError(429, {"retry-after": "3"})) == 3.0
+
+    def test_milliseconds(self):
+        """Verify the retry-after-ms header is preferred."""
+        assert retry_after_seconds(ProviderError(529, {"retry-after-ms": "1500", "retry-after": "2"})) == 1.5
+
+    def test_http_date_in_the_past(self):
+        """Verify an HTTP date is turned into a wait that is never negative."""
+        assert retry_after_seconds(ProviderError(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+
+    def test_ignored_on_other_status(self):
+        """Verify Retry-After is only used on rate limit and overload responses."""
+        assert retry_after_seconds(ProviderError(500, {"retry-after": "3"})) is None
+
+    def test_strategy_waits_for_retry_after(self):
+        """Verify the retry waits at least the time asked by the provider."""
+        operation = MagicMock(side_effect=[ProviderError(429, {"retry-after": "5"}), "ok"])
+
+        with patch("src.llm.fallback.time.sleep") as mock_sleep:
+            assert no_wait_strategy().execute_with_retry(operation) == "ok"
+
+        assert mock_sleep.call_args.args[0] >= 5.0
+
+    def test_long_retry_after_fails_over(self):
+        """Verify a Retry-After longer than the limit raises instead of waiting."""
+        operation = MagicMock(side_effect=ProviderError(429, {"retry-after": "600"}))
+
+        with patch("src.llm.fallback.time.sleep") as mock_sleep, pytest.raises(ProviderError):
+            no_wait_strategy().execute_with_retry(operation)
+
+        mock_sleep.assert_not_called()
+        assert operation.call_count == 1
+
+
+class TestRetryStrategy:
+    """Tests for the backoff of the retry strategy."""
+
+    def test_fatal_error_is_not_retried(self):
+        """Verify an authentication failure is raised after one attempt."""
+        operation = MagicMock(side_effect=ProviderError(401))
+
+        with patch("src.llm.fallback.time.sleep") as mock_sleep, pytest.raises(ProviderError):
+            no_wait_strategy().execute_with_retry(operation)
+
+        assert operation.call_count == 1
+        mock_sleep.assert_not_called()
+
+    def test_full_jitter_stays_under_backoff(self):
+        """Verify each wait is drawn between 0 and the capped exponential backoff."""
+        operation = MagicMock(side_effect=ConnectionError("reset"))
+
+        with patch("src.llm.fallback.time.sleep") as mock_sleep, pytest.raises(ConnectionError):
+            no_wait_strategy().execute_with_retry(operation)
+
+        waits = [call.args[0] for call in mock_sleep.call_args_list]
+        assert len(waits) == 3
+        assert all(0 <= wait <= limit for wait, limit in zip(waits, [1.0, 2.0, 4.0], strict=True))
+
+    def test_jitter_spreads_retries(self):
+        """Verify workers that fail together do not all wait the same time."""
+        strategy = no_wait_strategy()
+        budget = RetryBudget(ratio=1.0, min_retries=100)
+
+        waits = {strategy.retry_delay(2, ConnectionError("reset"), budget) for _ in range(20)}
+
+        assert len(waits) > 1
+
+    def test_without_jitter(self):
+        """Verify the backoff is deterministic when jitter is turned off."""
+        strategy = no_wait_strategy(jitter=False)
+
+        assert strategy.retry_delay(2, ConnectionError("reset"), RetryBudget(ratio=1.0)) == 4.0
+
+    def test_async_fatal_error_is_not_retried(self):
+        """Verify the async retry uses the same classification."""
+        operation = AsyncMock(side_effect=ProviderError(400))
+
+        with pytest.raises(ProviderError):
+            run_coroutine(no_wait_strategy().aexecute_with_retry(operation), TIMEOUT)
+
+        assert operation.await_count == 1
+
+
+class TestRetryBudget:
+    """Tests for the process-wide retry budget."""
+
+    def test_min_retries_without_requests(self):
+        """Verify the reserve allows a few retries whatever the traffic."""
+        budget = RetryBudget(ratio=0.0, min_retries=2)
+
+        assert [budget.try_retry() for _ in range(3)] == [True, True, False]
+        assert budget.stats().denied == 1
+
+    def test_ratio_of_requests(self):
+        """Verify the budget grows with the number of requests."""
+        budget = RetryBudget(ratio=0.5, min_retries=0)
+        for _ in range(4):
+            budget.record_request()
+
+        assert [budget.try_retry() for _ in range(3)] == [True, True, False]
+
+    def test_window_expires(self):
+        """Verify retries leave the budget once they are older than the window."""
+        budget = RetryBudget(ratio=0.0, min_retries=1, window_seconds=10)
+
+        with patch("src.llm.retry_budget.time.monotonic", side_effect=[100.0, 105.0, 111.0]):
+            assert budget.try_retry() is True
+            assert budget.try_retry() is False
+            assert budget.try_retry() is True
+
+    def test_used_up_budget_stops_retries(self):
+        """Verify an operation is not retried once the budget is used up."""
+        operation = MagicMock(side_effect=ConnectionError("outage"))
+        strategy = RetryStrategy(max_retries=3, initial_delay=0, budget=RetryBudget(ratio=0.0, min_retries=1))
+
+        with pytest.raises(ConnectionError):
+            strategy.execute_with_retry(operation)
+
+        assert operation.call_count == 2
+
+    def test_shared_budget_counts_requests(self):
+        """Verify the default strategy uses the process-wide budget."""
+        RetryStrategy(initial_delay=0).execute_with_retry(lambda: "ok")
+
+        assert get_retry_budget().stats().requests == 1
+
+    def test_invalid_budget(self):
+        """Verify a negative ratio is rejected."""
+        with pytest.raises(ValueError):
+            RetryBudget(ratio=-1)
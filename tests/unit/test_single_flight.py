@@ -0,0 +1,184 @@
+"""Unit tests for single-flight coalescing.
+
+This module tests that concurrent identical calls share one execution, that
+errors reach every waiting caller, and that the LLM call pipeline and
+process_immigration_query coalesce their calls.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.llm.base import BaseLLM
+from src.llm.event_loop import run_coroutine
+from src.llm.single_flight import SingleFlight, get_single_flight
+from src.main import process_immigration_query
+
+
+# Number of concurrent callers used in the tests
+CALLERS = 5
+
+# Maximum time a test waits for a coroutine
+TIMEOUT = 5
+
+
+def run_concurrently(fn, release: threading.Event, started: threading.Event):
+    """Start CALLERS calls of fn, release the leader once all callers are waiting."""
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        futures = [pool.submit(fn) for _ in range(CALLERS)]
+        started.wait(5)
+        # Give the followers time to join the running call
+        time.sleep(0.1)
+        release.set()
+        return [future.result(timeout=5) for future in futures]
+
+
+class TestSingleFlight:
+    """Tests for the SingleFlight class."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Verify callers with the same key get the result of one execution."""
+        group = SingleFlight("test")
+        started, release = threading.Event(), threading.Event()
+        work = MagicMock(side_effect=lambda: started.set() or release.wait(5) and "result")
+
+        results = run_concurrently(lambda: group.do("key", work), release, started)
+
+        assert results == ["result"] * CALLERS
+        work.assert_called_once()
+        stats = group.stats()
+        assert (stats.executions, stats.collapsed, stats.in_flight) == (1, CALLERS - 1, 0)
+
+    def test_error_reaches_every_caller(self):
+        """Verify followers get the exception of the running call."""
+        group = SingleFlight("test")
+        started, release = threading.Event(), threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("provider down")
+
+        def call():
+            with pytest.raises(RuntimeError, match="provider down"):
+                group.do("key", fail)
+            return True
+
+        assert all(run_concurrently(call, release, started))
+        assert group.stats().executions == 1
+
+    def test_cancelled_leader_is_taken_over(self):
+        """Verify followers of a cancelled leader run the work themselves instead of being cancelled."""
+        group = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(1 if calls == 1 else 0)
+            return "result"
+
+        async def scenario():
+            leader = asyncio.ensure_future(group.ado("key", work))
+            await asyncio.sleep(0.01)
+            followers = [asyncio.ensure_future(group.ado("key", work)) for _ in range(CALLERS - 1)]
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            results = await asyncio.gather(*followers)
+            return leader.cancelled(), results
+
+        cancelled, results = run_coroutine(scenario(), TIMEOUT)
+
+        assert cancelled
+        assert results == ["result"] * (CALLERS - 1)
+        assert calls == 2
+        assert group.stats().collapsed == CALLERS - 1
+
+    def test_sequential_calls_run_again(self):
+        """Verify a call after the previous one finished is not coalesced."""
+        group = SingleFlight("test")
+        work = MagicMock(return_value="result")
+
+        group.do("key", work)
+        group.do("key", work)
+
+        assert work.call_count == 2
+        assert group.stats().collapsed == 0
+
+    def test_different_keys_run_separately(self):
+        """Verify calls with different keys are never coalesced."""
+        group = SingleFlight("test")
+
+        assert group.do("a", lambda: 1) == 1
+        assert group.do("b", lambda: 2) == 2
+        assert group.stats().executions == 2
+
+    def test_groups_are_shared_by_name(self):
+        """Verify the factory returns one group per name."""
+        assert get_single_flight("llm") is get_single_flight("llm")
+        assert get_single_flight("llm") is not get_single_flight("query")
+
+
+class SlowLLM(BaseLLM):
+    """Provider whose requests block until the test releases them."""
+
+    def __init__(self, started, release):
+        super().__init__(model_name="slow-model", temperature=0.7)
+        self.started, self.release = started, release
+        self.requests = 0
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return self._execute(prompt, stop, self._send)
+
+    def _send(self):
+        self.requests += 1
+        self.started.set()
+        self.release.wait(5)
+        return "answer"
+
+    def _llm_type(self):
+        return "slow"
+
+    @property
+    def provider(self):
+        return "slow"
+
+
+class TestCoalescedCalls:
+    """Tests for coalescing in the LLM pipeline and in process_immigration_query."""
+
+    def test_identical_llm_calls_send_one_request(self):
+        """Verify concurrent identical prompts reach the provider once."""
+        started, release = threading.Event(), threading.Event()
+        llm = SlowLLM(started, release)
+        collapsed_before = get_single_flight("llm").stats().collapsed
+
+        results = run_concurrently(lambda: llm.invoke("Same prompt"), release, started)
+
+        assert results == ["answer"] * CALLERS
+        assert llm.requests == 1
+        assert get_single_flight("llm").stats().collapsed - collapsed_before == CALLERS - 1
+
+    @patch("src.main._run_crew")
+    def test_identical_queries_run_one_crew(self, mock_run_crew):
+        """Verify concurrent queries that differ in case and spacing share one crew run."""
+        started, release = threading.Event(), threading.Event()
+        mock_run_crew.side_effect = lambda *args: started.set() or release.wait(5) and "advice"
+        queries = iter(["Work permit in Canada?", "work  permit in canada?"] * CALLERS)
+
+        results = run_concurrently(lambda: process_immigration_query(next(queries)), release, started)
+
+        assert results == ["advice"] * CALLERS
+        mock_run_crew.assert_called_once()
+
+    @patch("src.main._run_crew", return_value="advice")
+    def test_streamed_queries_are_not_coalesced(self, mock_run_crew):
+        """Verify a streamed query always runs its own crew."""
+        process_immigration_query("Work permit?", on_event=lambda event: None)
+        process_immigration_query("Work permit?", on_event=lambda event: None)
+
+        assert mock_run_crew.call_count == 2
@@ -0,0 +1,104 @@
+"""Unit tests for crew progress and token streaming.
+
+This module tests that CrewAI bus events are forwarded to the sink of the
+current crew run, that only the final answer tokens are streamed, and that
+the SSE endpoint sends the events in order.
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.events import LLMStreamChunkEvent, TaskCompletedEvent, TaskStartedEvent
+from crewai.utilities.events.crewai_event_bus import crewai_event_bus
+from fastapi.testclient import TestClient
+
+from src.crew_templates import CrewTemplate
+from src.streaming import StreamEvent, stream_crew_events
+
+
+@pytest.fixture(scope="module")
+def template():
+    """Create a crew template whose tasks can emit events."""
+    return CrewTemplate("gpt-4o-mini")
+
+
+def emit_task(task, chunks: list[str]) -> None:
+    """Emit the start, the streamed tokens, and the completion of a task."""
+    crewai_event_bus.emit(task, TaskStartedEvent(context="", task=task))
+    for chunk in chunks:
+        crewai_event_bus.emit(task, LLMStreamChunkEvent(chunk=chunk))
+    output = TaskOutput(description=task.description, raw="".join(chunks), agent=task.agent.role)
+    crewai_event_bus.emit(task, TaskCompletedEvent(output=output, task=task))
+
+
+class TestStreamCrewEvents:
+    """Tests for the stream_crew_events context manager."""
+
+    def test_forwards_task_events(self, template):
+        """Verify task start and completion events reach the callback."""
+        events: list[StreamEvent] = []
+        with stream_crew_events(events.append):
+            emit_task(template.tasks[0], ["Nationality: Nigerian"])
+
+        assert [event.event for event in events] == ["task_started", "task_completed"]
+        assert events[0].data["task"] == "IntakeTask"
+        assert events[1].data["output"] == "Nationality: Nigerian"
+
+    def test_streams_only_final_answer_tokens(self, template):
+        """Verify only ResponseTask tokens after the final answer marker are streamed."""
+        events: list[StreamEvent] = []
+        with stream_crew_events(events.append):
+            emit_task(template.tasks[1], ["Final Answer: research"])
+            emit_task(template.tasks[2], ["Thought: I know.\nFinal ", "Answer: You ", "can apply."])
+
+        tokens = [event.data["text"] for event in events if event.event == "token"]
+        assert tokens == ["You ", "can apply."]
+
+    def test_other_threads_are_isolated(self, template):
+        """Verify events of a crew run in another thread are not forwarded."""
+        events: list[StreamEvent] = []
+        with stream_crew_events(events.append):
+            worker = threading.Thread(target=emit_task, args=(template.tasks[0], ["other run"]))
+            worker.start()
+            worker.join()
+
+        assert events == []
+
+    def test_sse_format(self):
+        """Verify events are encoded as Server-Sent Events."""
+        assert StreamEvent("token", {"text": "Hi"}).to_sse() == 'event: token\ndata: {"text": "Hi"}\n\n'
+
+
+class TestStreamEndpoint:
+    """Tests for the /immigration-advice/stream endpoint."""
+
+    def test_stream_endpoint_sends_events_in_order(self):
+        """Verify the endpoint streams progress events followed by the final answer."""
+        from src.api.api_server import app
+
+        def fake_process(query, user_context=None, on_event=None):
+            on_event(StreamEvent("task_started", {"task": "ResponseTask"}))
+            on_event(StreamEvent("token", {"text": "Apply online."}))
+            return "Apply online."
+
+        client = TestClient(app)
+        with patch("src.api.api_server.process_immigration_query", side_effect=fake_process):
+            response = client.post("/immigration-advice/stream", json={"text": "study permit"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.text
+        assert body.index("event: task_started") < body.index("event: token") < body.index("event: final")
+
+    def test_stream_endpoint_reports_errors(self):
+        """Verify a failing crew run ends the stream with an error event."""
+        from src.api.api_server import app
+
+        client = TestClient(app)
+        with patch("src.api.api_server.process_immigration_query", side_effect=RuntimeError("crew failed")):
+            response = client.post("/immigration-advice/stream", json={"text": "study permit"})
+
+        assert "event: error" in response.text
+        assert "crew failed" in response.text